@@ -3,15 +3,26 @@ from sqlalchemy import inspect, text
 
 from app.config.database import engine, Base, get_db
 from app.routes import (auth, maintainer, ong, staff, user, attendee,
-                        volunteer, project, base, campaign)
+                        volunteer, project, base, campaign, payment, webhook, metrics,
+                        subscription)
 from app.dependencies import auth_dev
 from app.models.user import UserType, User
 from app.models.roles import Role
 from app.models.staff import Staff
 from app.models.card import Card
+from app.models.payout import Payout, PayoutBatch
+from app.models.reconciliation import ReconciliationRun, ReconciliationDiscrepancy
 from app.services.auth_service import get_password_hash
+from app.pagarme.client import PagarMeClient
+from app.pagarme.async_client import AsyncPagarMeClient
+from app.pagarme.metrics import pagarme_summary_middleware
+from app.services.payment_outbox_service import PaymentOutboxService
+from app.services.webhook_queue_service import WebhookQueueService
 app = FastAPI(title="Leet Desenvolvimento de Programas de Computador LTDA")
 
+# Resumo por requisição das chamadas feitas à Pagar.me (header Server-Timing)
+app.middleware("http")(pagarme_summary_middleware)
+
 # Função para criar as tabelas
 def create_tables():
     inspector = inspect(engine)
@@ -26,6 +37,17 @@ def create_tables():
 @app.on_event("startup")
 async def startup_event():
     create_tables()
+    PaymentOutboxService.start()
+    WebhookQueueService.start()
+
+
+# Encerra os workers de pagamentos e de webhooks e libera o pool de conexões com a Pagar.me
+@app.on_event("shutdown")
+async def shutdown_event():
+    PaymentOutboxService.stop()
+    WebhookQueueService.stop()
+    PagarMeClient.close()
+    await AsyncPagarMeClient.close()
 
 
 #
@@ -127,6 +149,10 @@ app.include_router(attendee.router)
 app.include_router(volunteer.router)
 app.include_router(base.router)
 app.include_router(campaign.router)
+app.include_router(payment.router)
+app.include_router(webhook.router)
+app.include_router(subscription.router)
+app.include_router(metrics.router)
 
 
 @app.get("/")
@@ -0,0 +1,105 @@
+"""Comandos administrativos, executados com `python -m app.manage <comando>`."""
+import argparse
+import csv
+import json
+import logging
+from datetime import date
+
+import app.main  # noqa: F401  Registra todos os modelos antes de usar a sessão
+from app.config.database import SessionLocal
+from app.services.subscription_sync_service import SubscriptionSyncService
+from app.services.reconciliation_service import ReconciliationService
+from app.services.donation_totals_service import DonationTotalsService
+from app.services.payout_service import PayoutService
+from app.services.webhook_queue_service import WebhookQueueService
+
+logger = logging.getLogger(__name__)
+
+
+def sync_subscriptions(args: argparse.Namespace) -> None:
+    """Atualiza o espelho local de assinaturas, ciclos e faturas."""
+    db = SessionLocal()
+    try:
+        print(json.dumps(SubscriptionSyncService.sync(db, full=args.full)))
+    finally:
+        db.close()
+
+
+def reconcile(args: argparse.Namespace) -> None:
+    """Concilia os pedidos da Pagar.me com as transações locais."""
+    db = SessionLocal()
+    try:
+        run = ReconciliationService.run(db, full=args.full)
+        print(json.dumps({"run_id": run.id, "orders": run.orders_seen, "matched": run.matched,
+                          "corrected": run.corrected, "discrepancies": run.discrepancies}))
+        if args.report:
+            with open(args.report, "w", newline="") as report:
+                writer = csv.writer(report)
+                writer.writerow(["transaction_id", "order_id", "kind", "local_value", "remote_value", "corrected"])
+                for item in ReconciliationService.iter_report(db, run.id):
+                    writer.writerow([item.transaction_id, item.order_id, item.kind,
+                                     item.local_value, item.remote_value, item.corrected])
+    finally:
+        db.close()
+
+
+def rebuild_totals(args: argparse.Namespace) -> None:
+    """Recalcula do zero os totais arrecadados por ONG, campanha, projeto e base."""
+    db = SessionLocal()
+    try:
+        print(json.dumps({"rows": DonationTotalsService.rebuild(db)}))
+    finally:
+        db.close()
+
+
+def payouts(args: argparse.Namespace) -> None:
+    """Repassa às ONGs o valor líquido das doações pagas do ciclo."""
+    db = SessionLocal()
+    try:
+        period_end = date.fromisoformat(args.period_end) if args.period_end else None
+        batch = PayoutService.run(db, period_end=period_end)
+        print(json.dumps({"batch_id": batch.id, "status": batch.status, "payouts": batch.payout_count,
+                          "submitted_cents": batch.total_cents}))
+    finally:
+        db.close()
+
+
+def requeue_webhooks(args: argparse.Namespace) -> None:
+    """Devolve à fila as notificações da Pagar.me que esgotaram as tentativas."""
+    db = SessionLocal()
+    try:
+        print(json.dumps({"requeued": WebhookQueueService.requeue_dead(db, args.ids)}))
+    finally:
+        db.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.manage")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("sync-subscriptions", help=sync_subscriptions.__doc__)
+    command.add_argument("--full", action="store_true", help="ignora a marca d'água e sincroniza tudo")
+    command.set_defaults(handler=sync_subscriptions)
+
+    command = commands.add_parser("reconcile", help=reconcile.__doc__)
+    command.add_argument("--full", action="store_true", help="relê todos os pedidos, não só a janela recente")
+    command.add_argument("--report", help="grava as divergências encontradas neste arquivo CSV")
+    command.set_defaults(handler=reconcile)
+
+    command = commands.add_parser("rebuild-totals", help=rebuild_totals.__doc__)
+    command.set_defaults(handler=rebuild_totals)
+
+    command = commands.add_parser("payouts", help=payouts.__doc__)
+    command.add_argument("--period-end", help="data de corte (YYYY-MM-DD), padrão hoje; reexecutar retoma o ciclo")
+    command.set_defaults(handler=payouts)
+
+    command = commands.add_parser("requeue-webhooks", help=requeue_webhooks.__doc__)
+    command.add_argument("ids", nargs="*", type=int, help="ids em webhook_logs; sem ids, todas as mortas")
+    command.set_defaults(handler=requeue_webhooks)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores da revisão
+revision = "c9d0e1f2a3b4"
+down_revision = "b8c9d0e1f2a3"
+
+# Linhas atualizadas por lote no backfill
+BACKFILL_CHUNK_SIZE = 10000
+
+def upgrade():
+    # Colunas em centavos começam nulas para não reescrever a tabela de uma vez
+    op.add_column("transactions", sa.Column("amount_cents", sa.BigInteger, nullable=True))
+    op.add_column("transactions", sa.Column("commission_cents", sa.BigInteger, nullable=True))
+
+    # Backfill em lotes por faixa de id, cada lote na própria transação
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        max_id = bind.execute(sa.text("SELECT COALESCE(MAX(id), 0) FROM transactions")).scalar()
+        for start in range(0, max_id + 1, BACKFILL_CHUNK_SIZE):
+            bind.execute(
+                sa.text(
+                    "UPDATE transactions "
+                    "SET amount_cents = ROUND(amount::numeric * 100), "
+                    "commission_cents = ROUND(commission_amount::numeric * 100) "
+                    "WHERE id >= :start AND id < :end AND amount_cents IS NULL"
+                ),
+                {"start": start, "end": start + BACKFILL_CHUNK_SIZE}
+            )
+
+        # Agregados por ONG e status (totais de doações), sem bloquear escritas na tabela
+        op.create_index("ix_transactions_ong_status", "transactions", ["ong_id", "status"],
+                        postgresql_concurrently=True)
+
+    # O NOT NULL fica para enforce_cents_not_null, depois que o código novo já grava os centavos
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_transactions_ong_status", table_name="transactions", postgresql_concurrently=True)
+    op.drop_column("transactions", "commission_cents")
+    op.drop_column("transactions", "amount_cents")
@@ -0,0 +1,16 @@
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores da revisão
+revision = "d6e7f8a9b0c1"
+down_revision = "c5d6e7f8a9b0"
+
+def upgrade():
+    # Reentregas da Pagar.me repetem o ID do evento; o índice único as descarta na gravação.
+    # As notificações antigas ficam sem event_id, pois podem conter duplicatas.
+    op.add_column("webhook_logs", sa.Column("event_id", sa.String, nullable=True))
+    op.create_index("ix_webhook_logs_event_id", "webhook_logs", ["event_id"], unique=True)
+
+def downgrade():
+    op.drop_index("ix_webhook_logs_event_id", table_name="webhook_logs")
+    op.drop_column("webhook_logs", "event_id")
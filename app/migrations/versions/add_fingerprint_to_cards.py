@@ -0,0 +1,17 @@
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores da revisão
+revision = "d0e1f2a3b4c5"
+down_revision = "c9d0e1f2a3b4"
+
+def upgrade():
+    # Impressão do cartão para reaproveitar cartões já salvos
+    op.add_column("cards", sa.Column("fingerprint", sa.String(64), nullable=True))
+
+    # Listagem da carteira e busca por impressão filtram pelo mantenedor
+    op.create_index("ix_cards_maintainer_id", "cards", ["maintainer_id"])
+
+def downgrade():
+    op.drop_index("ix_cards_maintainer_id", table_name="cards")
+    op.drop_column("cards", "fingerprint")
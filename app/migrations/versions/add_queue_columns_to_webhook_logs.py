@@ -0,0 +1,32 @@
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores da revisão
+revision = "c5d6e7f8a9b0"
+down_revision = "b4c5d6e7f8a9"
+
+def upgrade():
+    # webhook_logs passa a ser a fila das notificações; as já gravadas foram processadas na requisição
+    op.add_column("webhook_logs", sa.Column("raw_body", sa.Text, nullable=True))
+    op.add_column("webhook_logs", sa.Column("status", sa.String, nullable=False, server_default="done"))
+    op.add_column("webhook_logs", sa.Column("attempts", sa.Integer, nullable=False, server_default="0"))
+    op.add_column("webhook_logs", sa.Column("available_at", sa.DateTime, nullable=False, server_default=sa.func.now()))
+    op.add_column("webhook_logs", sa.Column("locked_at", sa.DateTime, nullable=True))
+    op.add_column("webhook_logs", sa.Column("locked_by", sa.String, nullable=True))
+    op.add_column("webhook_logs", sa.Column("last_error", sa.String, nullable=True))
+    op.add_column("webhook_logs", sa.Column("processed_at", sa.DateTime, nullable=True))
+    op.alter_column("webhook_logs", "status", server_default="pending")
+    op.alter_column("webhook_logs", "event", nullable=True)
+    op.alter_column("webhook_logs", "payload", nullable=True)
+    op.create_index("ix_webhook_logs_status_available_at", "webhook_logs", ["status", "available_at"])
+    op.create_index("ix_webhook_logs_locked_by", "webhook_logs", ["locked_by"])
+
+def downgrade():
+    op.drop_index("ix_webhook_logs_locked_by", table_name="webhook_logs")
+    op.drop_index("ix_webhook_logs_status_available_at", table_name="webhook_logs")
+    op.execute("DELETE FROM webhook_logs WHERE payload IS NULL")
+    op.alter_column("webhook_logs", "payload", nullable=False)
+    op.alter_column("webhook_logs", "event", nullable=False)
+    for column in ("processed_at", "last_error", "locked_by", "locked_at", "available_at", "attempts",
+                   "status", "raw_body"):
+        op.drop_column("webhook_logs", column)
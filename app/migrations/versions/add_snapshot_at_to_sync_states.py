@@ -0,0 +1,13 @@
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores da revisão
+revision = "f8a9b0c1d2e3"
+down_revision = "e7f8a9b0c1d2"
+
+def upgrade():
+    # Limite superior da janela listada pela execução em andamento, para o cursor de página ser estável
+    op.add_column("sync_states", sa.Column("snapshot_at", sa.DateTime, nullable=True))
+
+def downgrade():
+    op.drop_column("sync_states", "snapshot_at")
@@ -0,0 +1,23 @@
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# Identificadores da revisão
+revision = "e5f6a7b8c9d0"
+down_revision = "c3d4e5f6a7b8"
+
+def upgrade():
+    # Cache persistente de consultas de BIN na Pagar.me
+    op.create_table(
+        "card_bins",
+        sa.Column("bin", sa.String(6), primary_key=True),
+        sa.Column("found", sa.Boolean, nullable=False, server_default=sa.true()),
+        sa.Column("data", postgresql.JSON, nullable=True),
+        sa.Column("fetched_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column("expires_at", sa.DateTime, nullable=False)
+    )
+    op.create_index("ix_card_bins_expires_at", "card_bins", ["expires_at"])
+
+def downgrade():
+    op.drop_index("ix_card_bins_expires_at", table_name="card_bins")
+    op.drop_table("card_bins")
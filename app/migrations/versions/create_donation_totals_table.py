@@ -0,0 +1,39 @@
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores da revisão
+revision = "a3b4c5d6e7f8"
+down_revision = "f2a3b4c5d6e7"
+
+def upgrade():
+    # Totais arrecadados por ONG, campanha, projeto e base
+    op.create_table(
+        "donation_totals",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("scope", sa.String, nullable=False),
+        sa.Column("scope_id", sa.Integer, nullable=False),
+        sa.Column("raised_cents", sa.BigInteger, nullable=False, server_default="0"),
+        sa.Column("donation_count", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("donor_count", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("last_donation_at", sa.DateTime, nullable=True),
+        sa.Column("updated_at", sa.DateTime, nullable=True),
+        sa.UniqueConstraint("scope", "scope_id", name="uq_donation_totals_scope")
+    )
+
+    # Verificação de doador recorrente ao atualizar os totais
+    op.create_index("ix_transactions_maintainer_status", "transactions", ["maintainer_id", "status"])
+
+    # Os totais começam com o histórico já pago
+    for scope, column in (("ong", "ong_id"), ("campaign", "campaign_id"),
+                          ("project", "project_id"), ("base", "base_id")):
+        op.execute(
+            "INSERT INTO donation_totals "
+            "(scope, scope_id, raised_cents, donation_count, donor_count, last_donation_at, updated_at) "
+            f"SELECT '{scope}', {column}, SUM(amount_cents), COUNT(id), COUNT(DISTINCT maintainer_id), "
+            "MAX(created_at), NOW() "
+            f"FROM transactions WHERE status = 'PAID' AND {column} IS NOT NULL GROUP BY {column}"
+        )
+
+def downgrade():
+    op.drop_index("ix_transactions_maintainer_status", table_name="transactions")
+    op.drop_table("donation_totals")
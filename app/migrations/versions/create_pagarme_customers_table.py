@@ -0,0 +1,30 @@
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores da revisão
+revision = "f6a7b8c9d0e1"
+down_revision = "e5f6a7b8c9d0"
+
+def upgrade():
+    # Índice documento -> cliente na Pagar.me
+    op.create_table(
+        "pagarme_customers",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("document", sa.String, nullable=False, unique=True),
+        sa.Column("customer_id", sa.String, nullable=False),
+        sa.Column("created_at", sa.DateTime, nullable=False, server_default=sa.func.now())
+    )
+
+    # Popular o índice com os clientes já associados aos mantenedores
+    op.execute(
+        """
+        INSERT INTO pagarme_customers (document, customer_id)
+        SELECT DISTINCT ON (u.document) u.document, m.client_id
+        FROM maintainers m JOIN users u ON u.id = m.user_id
+        WHERE m.client_id IS NOT NULL AND u.document IS NOT NULL
+        ORDER BY u.document, m.id
+        """
+    )
+
+def downgrade():
+    op.drop_table("pagarme_customers")
@@ -0,0 +1,28 @@
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores da revisão
+revision = "b8c9d0e1f2a3"
+down_revision = "a7b8c9d0e1f2"
+
+def upgrade():
+    # Chaves Idempotency-Key de POST /payments/
+    op.create_table(
+        "payment_idempotency_keys",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("key", sa.String, nullable=False),
+        sa.Column("fingerprint", sa.String(64), nullable=False),
+        sa.Column("status", sa.String, nullable=False, server_default="in_progress"),
+        sa.Column("transaction_id", sa.Integer, sa.ForeignKey("transactions.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column("expires_at", sa.DateTime, nullable=False, index=True),
+        sa.UniqueConstraint("user_id", "key", name="uq_payment_idempotency_keys_user_key")
+    )
+
+    # Chave repassada à Pagar.me na criação do pedido
+    op.add_column("payment_outbox", sa.Column("idempotency_key", sa.String, nullable=True))
+
+def downgrade():
+    op.drop_column("payment_outbox", "idempotency_key")
+    op.drop_table("payment_idempotency_keys")
@@ -0,0 +1,26 @@
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores da revisão
+revision = "a7b8c9d0e1f2"
+down_revision = "f6a7b8c9d0e1"
+
+def upgrade():
+    # Fila de chamadas à Pagar.me feitas fora da requisição de pagamento
+    op.create_table(
+        "payment_outbox",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("transaction_id", sa.Integer, sa.ForeignKey("transactions.id"), nullable=False, unique=True),
+        sa.Column("status", sa.String, nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("available_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column("locked_at", sa.DateTime, nullable=True),
+        sa.Column("last_error", sa.String, nullable=True),
+        sa.Column("created_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column("processed_at", sa.DateTime, nullable=True)
+    )
+    op.create_index("ix_payment_outbox_status_available_at", "payment_outbox", ["status", "available_at"])
+
+def downgrade():
+    op.drop_index("ix_payment_outbox_status_available_at", table_name="payment_outbox")
+    op.drop_table("payment_outbox")
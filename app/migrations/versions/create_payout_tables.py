@@ -0,0 +1,46 @@
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores da revisão
+revision = "b4c5d6e7f8a9"
+down_revision = "a3b4c5d6e7f8"
+
+def upgrade():
+    op.create_table(
+        "payout_batches",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("period_end", sa.Date, nullable=False, unique=True),
+        sa.Column("status", sa.String, nullable=False, server_default="pending"),
+        sa.Column("payout_count", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("total_cents", sa.BigInteger, nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column("finished_at", sa.DateTime, nullable=True)
+    )
+
+    op.create_table(
+        "payouts",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("batch_id", sa.Integer, sa.ForeignKey("payout_batches.id"), nullable=False),
+        sa.Column("ong_id", sa.Integer, sa.ForeignKey("ongs.id"), nullable=False),
+        sa.Column("recipient_id", sa.String, nullable=False),
+        sa.Column("amount_cents", sa.BigInteger, nullable=False, server_default="0"),
+        sa.Column("transaction_count", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("status", sa.String, nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("idempotency_key", sa.String, nullable=False, unique=True),
+        sa.Column("gateway_id", sa.String, nullable=True),
+        sa.Column("error", sa.String, nullable=True),
+        sa.Column("created_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column("submitted_at", sa.DateTime, nullable=True),
+        sa.UniqueConstraint("batch_id", "ong_id", name="uq_payouts_batch_ong")
+    )
+
+    # Doações pagas ainda não repassadas são buscadas por ONG a cada ciclo
+    op.add_column("transactions", sa.Column("payout_id", sa.Integer, sa.ForeignKey("payouts.id"), nullable=True))
+    op.create_index("ix_transactions_payout_id", "transactions", ["payout_id"])
+
+def downgrade():
+    op.drop_index("ix_transactions_payout_id", table_name="transactions")
+    op.drop_column("transactions", "payout_id")
+    op.drop_table("payouts")
+    op.drop_table("payout_batches")
@@ -0,0 +1,44 @@
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores da revisão
+revision = "f2a3b4c5d6e7"
+down_revision = "e1f2a3b4c5d6"
+
+def upgrade():
+    # Busca das transações pelos ids da Pagar.me durante a conciliação e nos webhooks
+    op.create_index("ix_transactions_order_id", "transactions", ["order_id"])
+    op.create_index("ix_transactions_charge_id", "transactions", ["charge_id"])
+
+    op.create_table(
+        "reconciliation_runs",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("status", sa.String, nullable=False, server_default="running"),
+        sa.Column("since", sa.DateTime, nullable=True),
+        sa.Column("orders_seen", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("matched", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("corrected", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("discrepancies", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("error", sa.String, nullable=True),
+        sa.Column("started_at", sa.DateTime, nullable=False, server_default=sa.func.now()),
+        sa.Column("finished_at", sa.DateTime, nullable=True)
+    )
+
+    op.create_table(
+        "reconciliation_discrepancies",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("run_id", sa.Integer, sa.ForeignKey("reconciliation_runs.id"), nullable=False, index=True),
+        sa.Column("transaction_id", sa.Integer, sa.ForeignKey("transactions.id"), nullable=True),
+        sa.Column("order_id", sa.String, nullable=True),
+        sa.Column("kind", sa.String, nullable=False),
+        sa.Column("local_value", sa.String, nullable=True),
+        sa.Column("remote_value", sa.String, nullable=True),
+        sa.Column("corrected", sa.Boolean, nullable=False, server_default=sa.false()),
+        sa.Column("created_at", sa.DateTime, nullable=False, server_default=sa.func.now())
+    )
+
+def downgrade():
+    op.drop_table("reconciliation_discrepancies")
+    op.drop_table("reconciliation_runs")
+    op.drop_index("ix_transactions_charge_id", table_name="transactions")
+    op.drop_index("ix_transactions_order_id", table_name="transactions")
@@ -0,0 +1,79 @@
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores da revisão
+revision = "e1f2a3b4c5d6"
+down_revision = "d0e1f2a3b4c5"
+
+def upgrade():
+    # Espelho local das assinaturas da Pagar.me
+    op.create_table(
+        "subscriptions",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("subscription_id", sa.String, nullable=False, unique=True),
+        sa.Column("customer_id", sa.String, nullable=True, index=True),
+        sa.Column("maintainer_id", sa.Integer, sa.ForeignKey("maintainers.id"), nullable=True),
+        sa.Column("ong_id", sa.Integer, sa.ForeignKey("ongs.id"), nullable=True),
+        sa.Column("status", sa.String, nullable=False),
+        sa.Column("payment_method", sa.String, nullable=True),
+        sa.Column("interval", sa.String, nullable=True),
+        sa.Column("interval_count", sa.Integer, nullable=False, server_default="1"),
+        sa.Column("amount_cents", sa.BigInteger, nullable=False, server_default="0"),
+        sa.Column("monthly_amount_cents", sa.BigInteger, nullable=False, server_default="0"),
+        sa.Column("next_billing_at", sa.DateTime, nullable=True),
+        sa.Column("canceled_at", sa.DateTime, nullable=True),
+        sa.Column("gateway_created_at", sa.DateTime, nullable=True),
+        sa.Column("gateway_updated_at", sa.DateTime, nullable=True),
+        sa.Column("synced_at", sa.DateTime, nullable=True)
+    )
+    op.create_index("ix_subscriptions_maintainer_id", "subscriptions", ["maintainer_id"])
+    op.create_index("ix_subscriptions_ong_status", "subscriptions", ["ong_id", "status"])
+
+    op.create_table(
+        "subscription_cycles",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("cycle_id", sa.String, nullable=False, unique=True),
+        sa.Column("subscription_id", sa.String, nullable=False, index=True),
+        sa.Column("cycle", sa.Integer, nullable=True),
+        sa.Column("status", sa.String, nullable=True),
+        sa.Column("start_at", sa.DateTime, nullable=True),
+        sa.Column("end_at", sa.DateTime, nullable=True),
+        sa.Column("billing_at", sa.DateTime, nullable=True),
+        sa.Column("gateway_created_at", sa.DateTime, nullable=True)
+    )
+
+    op.create_table(
+        "subscription_invoices",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("invoice_id", sa.String, nullable=False, unique=True),
+        sa.Column("subscription_id", sa.String, nullable=False),
+        sa.Column("cycle_id", sa.String, nullable=True),
+        sa.Column("charge_id", sa.String, nullable=True),
+        sa.Column("status", sa.String, nullable=False),
+        sa.Column("amount_cents", sa.BigInteger, nullable=False, server_default="0"),
+        sa.Column("due_at", sa.DateTime, nullable=True),
+        sa.Column("gateway_created_at", sa.DateTime, nullable=True),
+        sa.Column("gateway_updated_at", sa.DateTime, nullable=True)
+    )
+    op.create_index("ix_subscription_invoices_subscription_created", "subscription_invoices",
+                    ["subscription_id", "gateway_created_at"])
+
+    # Marca d'água e cursor das sincronizações incrementais
+    op.create_table(
+        "sync_states",
+        sa.Column("resource", sa.String, primary_key=True),
+        sa.Column("watermark", sa.DateTime, nullable=True),
+        sa.Column("cursor", sa.String, nullable=True),
+        sa.Column("last_run_at", sa.DateTime, nullable=True),
+        sa.Column("last_error", sa.String, nullable=True),
+        sa.Column("updated_at", sa.DateTime, nullable=True)
+    )
+
+def downgrade():
+    op.drop_table("sync_states")
+    op.drop_index("ix_subscription_invoices_subscription_created", table_name="subscription_invoices")
+    op.drop_table("subscription_invoices")
+    op.drop_table("subscription_cycles")
+    op.drop_index("ix_subscriptions_ong_status", table_name="subscriptions")
+    op.drop_index("ix_subscriptions_maintainer_id", table_name="subscriptions")
+    op.drop_table("subscriptions")
@@ -0,0 +1,42 @@
+from alembic import op
+import sqlalchemy as sa
+
+# Identificadores da revisão
+revision = "e7f8a9b0c1d2"
+down_revision = "d6e7f8a9b0c1"
+
+# Linhas atualizadas por lote no backfill
+BACKFILL_CHUNK_SIZE = 10000
+
+COLUMNS = ("amount_cents", "commission_cents")
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        # Linhas gravadas pela versão antiga entre o backfill de c9d0e1f2a3b4 e o deploy
+        max_id = bind.execute(sa.text("SELECT COALESCE(MAX(id), 0) FROM transactions")).scalar()
+        for start in range(0, max_id + 1, BACKFILL_CHUNK_SIZE):
+            bind.execute(
+                sa.text(
+                    "UPDATE transactions "
+                    "SET amount_cents = ROUND(amount::numeric * 100), "
+                    "commission_cents = ROUND(commission_amount::numeric * 100) "
+                    "WHERE id >= :start AND id < :end "
+                    "AND (amount_cents IS NULL OR commission_cents IS NULL)"
+                ),
+                {"start": start, "end": start + BACKFILL_CHUNK_SIZE}
+            )
+
+        for column in COLUMNS:
+            constraint = f"ck_transactions_{column}_not_null"
+            # NOT VALID só vale para escritas novas; o VALIDATE varre a tabela sem bloquear escritas
+            bind.execute(sa.text(
+                f"ALTER TABLE transactions ADD CONSTRAINT {constraint} CHECK ({column} IS NOT NULL) NOT VALID"))
+            bind.execute(sa.text(f"ALTER TABLE transactions VALIDATE CONSTRAINT {constraint}"))
+            # Com a restrição válida, o Postgres (12+) aplica o NOT NULL sem varrer a tabela de novo
+            bind.execute(sa.text(f"ALTER TABLE transactions ALTER COLUMN {column} SET NOT NULL"))
+            bind.execute(sa.text(f"ALTER TABLE transactions DROP CONSTRAINT {constraint}"))
+
+def downgrade():
+    for column in COLUMNS:
+        op.alter_column("transactions", column, nullable=True)
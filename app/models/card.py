@@ -8,10 +8,11 @@ class Card(Base):
     __tablename__ = "cards"
 
     id = Column(Integer, primary_key=True, index=True)
-    maintainer_id = Column(Integer, ForeignKey("maintainers.id"), nullable=False)
+    maintainer_id = Column(Integer, ForeignKey("maintainers.id"), nullable=False, index=True)
     card_id = Column(String, nullable=False, unique=True)  # ID do cartão na Pagar.me
     last_four_digits = Column(String(4), nullable=False)
     brand = Column(String, nullable=False)
+    fingerprint = Column(String(64), nullable=True)  # BIN, últimos 4, validade e hash do titular
     status = Column(String, nullable=False, default="active")  # active, inactive, expired
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
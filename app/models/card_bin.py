@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime, JSON, Boolean
+from app.config.database import Base
+from datetime import datetime
+
+
+class CardBin(Base):
+    __tablename__ = "card_bins"
+
+    bin = Column(String(6), primary_key=True)
+    found = Column(Boolean, nullable=False, default=True)  # False para BINs desconhecidos (cache negativo)
+    data = Column(JSON, nullable=True)  # Resposta da Pagar.me (bandeira, emissor, tipo do cartão)
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
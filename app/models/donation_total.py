@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, UniqueConstraint
+from app.config.database import Base
+from datetime import datetime
+
+
+class DonationTotal(Base):
+    """Total arrecadado por ONG, campanha, projeto ou base, mantido a cada pagamento confirmado."""
+    __tablename__ = "donation_totals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String, nullable=False)  # ong, campaign, project, base
+    scope_id = Column(Integer, nullable=False)
+    raised_cents = Column(BigInteger, nullable=False, default=0)
+    donation_count = Column(Integer, nullable=False, default=0)
+    donor_count = Column(Integer, nullable=False, default=0)  # Mantenedores distintos
+    last_donation_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("scope", "scope_id", name="uq_donation_totals_scope"),
+    )
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint
+from app.config.database import Base
+from datetime import datetime
+
+
+class PaymentIdempotencyKey(Base):
+    """Chave Idempotency-Key enviada em POST /payments/ e a transação que ela originou."""
+    __tablename__ = "payment_idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String, nullable=False)
+    fingerprint = Column(String(64), nullable=False)  # sha256 do corpo da requisição
+    status = Column(String, nullable=False, default="in_progress")  # in_progress, completed
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_payment_idempotency_keys_user_key"),
+    )
@@ -17,4 +17,5 @@ class Maintainer(Base):
     address = relationship("Address")
     user = relationship("User")
     ongs = relationship("OngMaintainer", back_populates="maintainer")
-    cards = relationship("Card", back_populates="maintainer")
\ No newline at end of file
+    cards = relationship("Card", back_populates="maintainer")
+    transactions = relationship("Transaction", back_populates="maintainer")
\ No newline at end of file
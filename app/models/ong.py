@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Float
 from sqlalchemy.orm import relationship
 
 from app.config.database import Base
@@ -11,6 +11,7 @@ class ONG(Base):
     address_id = Column(Integer, ForeignKey("address.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"))
     description = Column(String, nullable=True)
+    commission_rate = Column(Float, nullable=False, default=0.04)
 
     # Relationship definition
     address = relationship("Address")
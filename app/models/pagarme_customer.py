@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.config.database import Base
+from datetime import datetime
+
+
+class PagarMeCustomer(Base):
+    """Índice local documento -> cliente na Pagar.me, evitando clientes duplicados."""
+    __tablename__ = "pagarme_customers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document = Column(String, nullable=False, unique=True)
+    customer_id = Column(String, nullable=False)  # ID do cliente na Pagar.me
+    created_at = Column(DateTime, default=datetime.utcnow)
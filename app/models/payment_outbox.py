@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
+from app.config.database import Base
+from datetime import datetime
+
+
+class PaymentOutbox(Base):
+    """Trabalho pendente com a Pagar.me para uma transação já gravada como PENDING."""
+    __tablename__ = "payment_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=False, unique=True)
+    status = Column(String, nullable=False, default="pending")  # pending, processing, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    idempotency_key = Column(String, nullable=True)  # Chave repassada à Pagar.me na criação do pedido
+    created_at = Column(DateTime, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+
+    transaction = relationship("Transaction")
+
+    __table_args__ = (
+        Index("ix_payment_outbox_status_available_at", "status", "available_at"),
+    )
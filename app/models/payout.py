@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Date, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.config.database import Base
+from datetime import datetime
+
+
+class PayoutBatch(Base):
+    """Ciclo de repasses: um repasse por ONG com as doações pagas até period_end."""
+    __tablename__ = "payout_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    period_end = Column(Date, nullable=False, unique=True)  # Doações criadas antes desta data
+    status = Column(String, nullable=False, default="pending")  # pending, done, partial
+    payout_count = Column(Integer, nullable=False, default=0)
+    total_cents = Column(BigInteger, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    payouts = relationship("Payout", back_populates="batch")
+
+
+class Payout(Base):
+    """Repasse do valor líquido de uma ONG em um ciclo, feito por saque ou transferência na Pagar.me."""
+    __tablename__ = "payouts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    batch_id = Column(Integer, ForeignKey("payout_batches.id"), nullable=False)
+    ong_id = Column(Integer, ForeignKey("ongs.id"), nullable=False)
+    recipient_id = Column(String, nullable=False)
+    amount_cents = Column(BigInteger, nullable=False, default=0)  # Soma de amount - comissão
+    transaction_count = Column(Integer, nullable=False, default=0)
+    status = Column(String, nullable=False, default="pending")  # pending, insufficient_funds, submitted, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    idempotency_key = Column(String, nullable=False, unique=True)
+    gateway_id = Column(String, nullable=True)  # ID do saque/transferência na Pagar.me
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    submitted_at = Column(DateTime, nullable=True)
+
+    batch = relationship("PayoutBatch", back_populates="payouts")
+
+    __table_args__ = (
+        UniqueConstraint("batch_id", "ong_id", name="uq_payouts_batch_ong"),
+    )
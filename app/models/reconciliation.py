@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean
+from app.config.database import Base
+from datetime import datetime
+
+
+class ReconciliationRun(Base):
+    """Execução da conciliação entre os pedidos da Pagar.me e as transações locais."""
+    __tablename__ = "reconciliation_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, nullable=False, default="running")  # running, done, failed
+    since = Column(DateTime, nullable=True)  # Início da janela de pedidos lidos (None = tudo)
+    orders_seen = Column(Integer, nullable=False, default=0)
+    matched = Column(Integer, nullable=False, default=0)
+    corrected = Column(Integer, nullable=False, default=0)
+    discrepancies = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class ReconciliationDiscrepancy(Base):
+    """Divergência encontrada em uma conciliação e se ela foi corrigida."""
+    __tablename__ = "reconciliation_discrepancies"
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("reconciliation_runs.id"), nullable=False, index=True)
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=True)
+    order_id = Column(String, nullable=True)
+    kind = Column(String, nullable=False)  # status, missing_order_id, amount, unknown_order, fetch_failed
+    local_value = Column(String, nullable=True)
+    remote_value = Column(String, nullable=True)
+    corrected = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
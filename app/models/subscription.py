@@ -0,0 +1,65 @@
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Index
+from app.config.database import Base
+from datetime import datetime
+
+
+class Subscription(Base):
+    """Espelho local de uma assinatura (doação recorrente) da Pagar.me."""
+    __tablename__ = "subscriptions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    subscription_id = Column(String, nullable=False, unique=True)  # ID da assinatura na Pagar.me
+    customer_id = Column(String, nullable=True, index=True)
+    maintainer_id = Column(Integer, ForeignKey("maintainers.id"), nullable=True)
+    ong_id = Column(Integer, ForeignKey("ongs.id"), nullable=True)
+    status = Column(String, nullable=False)  # active, canceled, future, failed
+    payment_method = Column(String, nullable=True)
+    interval = Column(String, nullable=True)  # day, week, month, year
+    interval_count = Column(Integer, nullable=False, default=1)
+    amount_cents = Column(BigInteger, nullable=False, default=0)  # Valor por cobrança
+    monthly_amount_cents = Column(BigInteger, nullable=False, default=0)  # Valor normalizado para um mês
+    next_billing_at = Column(DateTime, nullable=True)
+    canceled_at = Column(DateTime, nullable=True)
+    gateway_created_at = Column(DateTime, nullable=True)
+    gateway_updated_at = Column(DateTime, nullable=True)
+    synced_at = Column(DateTime, nullable=True)  # Última sincronização dos ciclos e faturas
+
+    __table_args__ = (
+        Index("ix_subscriptions_maintainer_id", "maintainer_id"),
+        Index("ix_subscriptions_ong_status", "ong_id", "status"),
+    )
+
+
+class SubscriptionCycle(Base):
+    """Ciclo de cobrança de uma assinatura espelhada."""
+    __tablename__ = "subscription_cycles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cycle_id = Column(String, nullable=False, unique=True)  # ID do ciclo na Pagar.me
+    subscription_id = Column(String, nullable=False, index=True)
+    cycle = Column(Integer, nullable=True)
+    status = Column(String, nullable=True)
+    start_at = Column(DateTime, nullable=True)
+    end_at = Column(DateTime, nullable=True)
+    billing_at = Column(DateTime, nullable=True)
+    gateway_created_at = Column(DateTime, nullable=True)
+
+
+class SubscriptionInvoice(Base):
+    """Fatura de uma assinatura espelhada."""
+    __tablename__ = "subscription_invoices"
+
+    id = Column(Integer, primary_key=True, index=True)
+    invoice_id = Column(String, nullable=False, unique=True)  # ID da fatura na Pagar.me
+    subscription_id = Column(String, nullable=False)
+    cycle_id = Column(String, nullable=True)
+    charge_id = Column(String, nullable=True)
+    status = Column(String, nullable=False)  # pending, paid, canceled, scheduled, failed
+    amount_cents = Column(BigInteger, nullable=False, default=0)
+    due_at = Column(DateTime, nullable=True)
+    gateway_created_at = Column(DateTime, nullable=True)
+    gateway_updated_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_subscription_invoices_subscription_created", "subscription_id", "gateway_created_at"),
+    )
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, DateTime
+from app.config.database import Base
+from datetime import datetime
+
+
+class SyncState(Base):
+    """Marca d'água e cursor de cada sincronização incremental com a Pagar.me."""
+    __tablename__ = "sync_states"
+
+    resource = Column(String, primary_key=True)
+    watermark = Column(DateTime, nullable=True)  # Maior created_at já sincronizado
+    cursor = Column(String, nullable=True)  # Página a retomar se a última execução foi interrompida
+    snapshot_at = Column(DateTime, nullable=True)  # Início da execução em andamento; fixa a janela listada
+    last_run_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, Float, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from app.config.database import Base
 import enum
@@ -21,6 +21,10 @@ class TransactionStatus(enum.Enum):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_ong_status", "ong_id", "status"),
+        Index("ix_transactions_maintainer_status", "maintainer_id", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     maintainer_id = Column(Integer, ForeignKey("maintainers.id"), nullable=False)
@@ -31,16 +35,20 @@ class Transaction(Base):
     attendee_id = Column(Integer, ForeignKey("attendees.id"), nullable=True)
     amount = Column(Float, nullable=False)
     commission_amount = Column(Float, nullable=False)
+    # Valores exatos em centavos; amount/commission_amount ficam por compatibilidade
+    amount_cents = Column(BigInteger, nullable=False)
+    commission_cents = Column(BigInteger, nullable=False)
     payment_method = Column(Enum(PaymentMethod), nullable=False)
     status = Column(Enum(TransactionStatus), nullable=False, default=TransactionStatus.PENDING)
-    order_id = Column(String, nullable=True)
-    charge_id = Column(String, nullable=True)
+    order_id = Column(String, nullable=True, index=True)
+    charge_id = Column(String, nullable=True, index=True)
     card_id = Column(String, nullable=True)
     boleto_url = Column(String, nullable=True)
     boleto_barcode = Column(String, nullable=True)
     pix_qr_code = Column(String, nullable=True)
     pix_code = Column(String, nullable=True)
     error_message = Column(String, nullable=True)
+    payout_id = Column(Integer, ForeignKey("payouts.id"), nullable=True, index=True)  # Repasse que incluiu a doação
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -1,12 +1,28 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
 from app.config.database import Base
 from datetime import datetime
 
 
 class WebhookLog(Base):
+    """Notificação recebida da Pagar.me e fila do seu processamento em segundo plano."""
     __tablename__ = "webhook_logs"
 
     id = Column(Integer, primary_key=True, index=True)
-    event = Column(String, nullable=False)
-    payload = Column(JSON, nullable=False)
-    received_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    event = Column(String, nullable=True)
+    event_id = Column(String, nullable=True)  # ID do evento na Pagar.me; reentregas têm o mesmo
+    payload = Column(JSON, nullable=True)
+    raw_body = Column(Text, nullable=True)  # Corpo exatamente como recebido
+    status = Column(String, nullable=False, default="pending")  # pending, processing, done, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = Column(DateTime, nullable=True)
+    locked_by = Column(String, nullable=True)  # Lote do worker que reservou a notificação
+    last_error = Column(String, nullable=True)
+    received_at = Column(DateTime, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_webhook_logs_status_available_at", "status", "available_at"),
+        Index("ix_webhook_logs_locked_by", "locked_by"),
+        Index("ix_webhook_logs_event_id", "event_id", unique=True),
+    )
@@ -1,106 +1,193 @@
 import requests
-import os
-from dotenv import load_dotenv
+import httpx
 from typing import Dict, Any, List
 import logging
-import base64
 
-load_dotenv()
+from app.pagarme.client import PagarMeClient
+from app.pagarme.responses import decode_json, decode_error, LogBody
+from app.pagarme.async_client import AsyncPagarMeClient
 
 logger = logging.getLogger(__name__)
 
 class PagarMeAddressAPI:
-    BASE_URL = "https://api.pagar.me/core/v5"
-    API_KEY = os.getenv("PAGARME_API_KEY")
-
-    @staticmethod
-    def _get_headers() -> Dict[str, str]:
-        """Retorna headers comuns para chamadas à API."""
-        return {
-            "Authorization": f"Basic {base64.b64encode(f'{PagarMeAddressAPI.API_KEY}:'.encode()).decode()}",
-            "Content-Type": "application/json"
-        }
+    BASE_URL = PagarMeClient.BASE_URL
 
     @staticmethod
     def create_address(customer_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Cria um endereço para um cliente na Pagar.me."""
         url = f"{PagarMeAddressAPI.BASE_URL}/customers/{customer_id}/addresses"
-        headers = PagarMeAddressAPI._get_headers()
         try:
-            response = requests.post(url, json=data, headers=headers)
+            response = PagarMeClient.request("POST", url, operation="address.create", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me address created for customer {customer_id}: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me address created for customer %s: %s", customer_id, LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to create Pagar.me address: {e.response.json()}")
-            raise Exception(f"Failed to create Pagar.me address: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me address: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me address: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error creating Pagar.me address: {str(e)}")
+            logger.error("Unexpected error creating Pagar.me address: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def list_addresses(customer_id: str) -> List[Dict[str, Any]]:
         """Lista todos os endereços de um cliente."""
         url = f"{PagarMeAddressAPI.BASE_URL}/customers/{customer_id}/addresses"
-        headers = PagarMeAddressAPI._get_headers()
         try:
-            response = requests.get(url, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="address.list")
             response.raise_for_status()
-            logger.debug(f"Pagar.me addresses listed for customer {customer_id}: {response.json()}")
-            return response.json().get("data", [])
+            body = decode_json(response)
+            logger.debug("Pagar.me addresses listed for customer %s: %s", customer_id, LogBody(body))
+            return body.get("data", [])
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to list Pagar.me addresses: {e.response.json()}")
-            raise Exception(f"Failed to list Pagar.me addresses: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me addresses: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me addresses: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error listing Pagar.me addresses: {str(e)}")
+            logger.error("Unexpected error listing Pagar.me addresses: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def get_address(customer_id: str, address_id: str) -> Dict[str, Any]:
         """Obtém detalhes de um endereço específico."""
         url = f"{PagarMeAddressAPI.BASE_URL}/customers/{customer_id}/addresses/{address_id}"
-        headers = PagarMeAddressAPI._get_headers()
         try:
-            response = requests.get(url, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="address.get")
             response.raise_for_status()
-            logger.debug(f"Pagar.me address retrieved: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me address retrieved: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to get Pagar.me address: {e.response.json()}")
-            raise Exception(f"Failed to get Pagar.me address: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me address: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me address: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error getting Pagar.me address: {str(e)}")
+            logger.error("Unexpected error getting Pagar.me address: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def update_address(customer_id: str, address_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza um endereço existente."""
         url = f"{PagarMeAddressAPI.BASE_URL}/customers/{customer_id}/addresses/{address_id}"
-        headers = PagarMeAddressAPI._get_headers()
         try:
-            response = requests.patch(url, json=data, headers=headers)
+            response = PagarMeClient.request("PATCH", url, operation="address.update", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me address updated: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me address updated: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to update Pagar.me address: {e.response.json()}")
-            raise Exception(f"Failed to update Pagar.me address: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me address: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me address: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error updating Pagar.me address: {str(e)}")
+            logger.error("Unexpected error updating Pagar.me address: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def delete_address(customer_id: str, address_id: str) -> None:
         """Exclui um endereço."""
         url = f"{PagarMeAddressAPI.BASE_URL}/customers/{customer_id}/addresses/{address_id}"
-        headers = PagarMeAddressAPI._get_headers()
         try:
-            response = requests.delete(url, headers=headers)
+            response = PagarMeClient.request("DELETE", url, operation="address.delete")
             response.raise_for_status()
-            logger.debug(f"Pagar.me address deleted: customer_id={customer_id}, address_id={address_id}")
+            logger.debug("Pagar.me address deleted: customer_id=%s, address_id=%s", customer_id, address_id)
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to delete Pagar.me address: {e.response.json()}")
-            raise Exception(f"Failed to delete Pagar.me address: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to delete Pagar.me address: %s", LogBody(error))
+            raise Exception(f"Failed to delete Pagar.me address: {error}")
+        except Exception as e:
+            logger.error("Unexpected error deleting Pagar.me address: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+
+class AsyncPagarMeAddressAPI:
+    BASE_URL = PagarMeAddressAPI.BASE_URL
+
+    @staticmethod
+    async def create_address(customer_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Cria um endereço para um cliente na Pagar.me."""
+        url = f"{AsyncPagarMeAddressAPI.BASE_URL}/customers/{customer_id}/addresses"
+        try:
+            response = await AsyncPagarMeClient.request("POST", url, operation="address.create", json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me address created for customer %s: %s", customer_id, LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me address: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me address: {error}")
+        except Exception as e:
+            logger.error("Unexpected error creating Pagar.me address: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def list_addresses(customer_id: str) -> List[Dict[str, Any]]:
+        """Lista todos os endereços de um cliente."""
+        url = f"{AsyncPagarMeAddressAPI.BASE_URL}/customers/{customer_id}/addresses"
+        try:
+            response = await AsyncPagarMeClient.request("GET", url, operation="address.list")
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me addresses listed for customer %s: %s", customer_id, LogBody(body))
+            return body.get("data", [])
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me addresses: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me addresses: {error}")
+        except Exception as e:
+            logger.error("Unexpected error listing Pagar.me addresses: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def get_address(customer_id: str, address_id: str) -> Dict[str, Any]:
+        """Obtém detalhes de um endereço específico."""
+        url = f"{AsyncPagarMeAddressAPI.BASE_URL}/customers/{customer_id}/addresses/{address_id}"
+        try:
+            response = await AsyncPagarMeClient.request("GET", url, operation="address.get")
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me address retrieved: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me address: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me address: {error}")
+        except Exception as e:
+            logger.error("Unexpected error getting Pagar.me address: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def update_address(customer_id: str, address_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Atualiza um endereço existente."""
+        url = f"{AsyncPagarMeAddressAPI.BASE_URL}/customers/{customer_id}/addresses/{address_id}"
+        try:
+            response = await AsyncPagarMeClient.request("PATCH", url, operation="address.update", json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me address updated: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me address: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me address: {error}")
+        except Exception as e:
+            logger.error("Unexpected error updating Pagar.me address: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def delete_address(customer_id: str, address_id: str) -> None:
+        """Exclui um endereço."""
+        url = f"{AsyncPagarMeAddressAPI.BASE_URL}/customers/{customer_id}/addresses/{address_id}"
+        try:
+            response = await AsyncPagarMeClient.request("DELETE", url, operation="address.delete")
+            response.raise_for_status()
+            logger.debug("Pagar.me address deleted: customer_id=%s, address_id=%s", customer_id, address_id)
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to delete Pagar.me address: %s", LogBody(error))
+            raise Exception(f"Failed to delete Pagar.me address: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error deleting Pagar.me address: {str(e)}")
-            raise Exception(f"Unexpected error: {str(e)}")
\ No newline at end of file
+            logger.error("Unexpected error deleting Pagar.me address: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
@@ -0,0 +1,113 @@
+import httpx
+import asyncio
+import time
+from typing import Optional
+import logging
+
+from app.pagarme.client import PagarMeClient
+from app.pagarme.resilience import PagarMeResilience, RETRYABLE_STATUSES
+from app.pagarme.metrics import PagarMeMetrics, body_size
+from app.pagarme.rate_limit import PagarMeRateLimiter
+from app.pagarme.coalesce import AsyncSingleFlight, request_key
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPagarMeClient:
+    """Cliente assíncrono compartilhado para a API da Pagar.me.
+
+    Usa um único httpx.AsyncClient com pool de conexões keep-alive, permitindo
+    que um worker mantenha muitas chamadas ao gateway em andamento sem ocupar
+    o threadpool do anyio.
+    """
+    MAX_CONNECTIONS = int(PagarMeClient.POOL_MAXSIZE * 8)
+    MAX_KEEPALIVE_CONNECTIONS = PagarMeClient.POOL_MAXSIZE
+
+    _client: Optional[httpx.AsyncClient] = None
+    _single_flight = AsyncSingleFlight()
+
+    @staticmethod
+    def get_client() -> httpx.AsyncClient:
+        """Retorna o cliente compartilhado, criando-o na primeira chamada."""
+        if AsyncPagarMeClient._client is None or AsyncPagarMeClient._client.is_closed:
+            AsyncPagarMeClient._client = httpx.AsyncClient(
+                headers=PagarMeClient._build_headers(),
+                limits=httpx.Limits(
+                    max_connections=AsyncPagarMeClient.MAX_CONNECTIONS,
+                    max_keepalive_connections=AsyncPagarMeClient.MAX_KEEPALIVE_CONNECTIONS
+                ),
+                timeout=httpx.Timeout(PagarMeClient.READ_TIMEOUT, connect=PagarMeClient.CONNECT_TIMEOUT)
+            )
+            logger.debug(
+                f"Pagar.me async client created: max_connections={AsyncPagarMeClient.MAX_CONNECTIONS}"
+            )
+        return AsyncPagarMeClient._client
+
+    @staticmethod
+    async def request(method: str, url: str, operation: Optional[str] = None,
+                      idempotency_key: Optional[str] = None, **kwargs) -> httpx.Response:
+        """Executa uma chamada assíncrona, unificando GETs idênticos e simultâneos como o cliente síncrono."""
+        key = request_key(method, url, kwargs)
+        if key is None:
+            return await AsyncPagarMeClient._send(method, url, operation, idempotency_key, **kwargs)
+        response, shared = await AsyncPagarMeClient._single_flight.do(
+            key, lambda: AsyncPagarMeClient._send(method, url, operation, idempotency_key, **kwargs))
+        if shared:
+            PagarMeResilience.record("coalesced", operation or method.upper())
+        return response
+
+    @staticmethod
+    async def _send(method: str, url: str, operation: Optional[str] = None,
+                    idempotency_key: Optional[str] = None, **kwargs) -> httpx.Response:
+        """Envia a chamada com as mesmas retentativas, rate limiter e circuit breakers do cliente síncrono."""
+        endpoint = operation or method.upper()
+        if idempotency_key:
+            kwargs["headers"] = {**kwargs.get("headers", {}), "Idempotency-Key": idempotency_key}
+        can_retry = PagarMeResilience.can_retry(method, idempotency_key)
+        breaker = PagarMeResilience.get_breaker(endpoint)
+        client = AsyncPagarMeClient.get_client()
+
+        attempt = 0
+        while True:
+            if await PagarMeRateLimiter.wait_async(method):
+                PagarMeResilience.record("throttled", endpoint)
+            breaker.before_call()
+            started = time.perf_counter()
+            settled = False
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                PagarMeMetrics.observe(endpoint, "error", time.perf_counter() - started, attempt=attempt)
+                breaker.record_failure()
+                settled = True
+                if not can_retry or attempt >= PagarMeResilience.MAX_RETRIES:
+                    raise
+                delay = PagarMeResilience.backoff(attempt)
+                logger.warning(f"Pagar.me {endpoint} failed ({e.__class__.__name__}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                settled = True
+                PagarMeMetrics.observe(endpoint, str(response.status_code), time.perf_counter() - started,
+                                       body_size(response.request.content), len(response.content), attempt)
+                if (response.status_code not in RETRYABLE_STATUSES or not can_retry
+                        or attempt >= PagarMeResilience.MAX_RETRIES):
+                    return response
+                delay = PagarMeResilience.backoff(attempt, response.headers.get("Retry-After"))
+                logger.warning(f"Pagar.me {endpoint} returned {response.status_code}, retrying in {delay:.2f}s")
+            finally:
+                if not settled:
+                    # Qualquer outra exceção conta como falha, senão a sondagem do circuito meio-aberto nunca termina
+                    breaker.record_failure()
+            PagarMeResilience.record("retries", endpoint)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    async def close() -> None:
+        """Fecha o cliente compartilhado e libera as conexões do pool."""
+        if AsyncPagarMeClient._client is not None:
+            await AsyncPagarMeClient._client.aclose()
+            AsyncPagarMeClient._client = None
@@ -1,39 +1,49 @@
 import requests
 import os
-from dotenv import load_dotenv
 from typing import Dict, Any
 import logging
-import base64
 
-load_dotenv()
+from app.pagarme.client import PagarMeClient
+from app.pagarme.responses import decode_json, decode_error, LogBody
+from app.pagarme.cache import StaleWhileRevalidateCache
 
 logger = logging.getLogger(__name__)
 
 class PagarMeBalanceAPI:
-    BASE_URL = "https://api.pagar.me/core/v5"
-    API_KEY = os.getenv("PAGARME_API_KEY")
-
-    @staticmethod
-    def _get_headers() -> Dict[str, str]:
-        """Retorna headers comuns para chamadas à API."""
-        return {
-            "Authorization": f"Basic {base64.b64encode(f'{PagarMeBalanceAPI.API_KEY}:'.encode()).decode()}",
-            "Content-Type": "application/json"
-        }
+    BASE_URL = PagarMeClient.BASE_URL
 
     @staticmethod
     def get_balance(recipient_id: str) -> Dict[str, Any]:
         """Obtém o saldo de um recebedor."""
         url = f"{PagarMeBalanceAPI.BASE_URL}/recipients/{recipient_id}/balance"
-        headers = PagarMeBalanceAPI._get_headers()
         try:
-            response = requests.get(url, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="balance.get")
             response.raise_for_status()
-            logger.debug(f"Pagar.me balance retrieved: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me balance retrieved: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to get Pagar.me balance: {e.response.json()}")
-            raise Exception(f"Failed to get Pagar.me balance: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me balance: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me balance: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error getting Pagar.me balance: {str(e)}")
-            raise Exception(f"Unexpected error: {str(e)}")
\ No newline at end of file
+            logger.error("Unexpected error getting Pagar.me balance: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    def get_cached_balance(recipient_id: str) -> Dict[str, Any]:
+        """Obtém o saldo de um recebedor servindo valores recentes do cache e atualizando-os em segundo plano."""
+        return balance_cache.get(recipient_id)
+
+    @staticmethod
+    def invalidate_cached_balance(recipient_id: str) -> None:
+        """Descarta o saldo em cache de um recebedor."""
+        balance_cache.invalidate(recipient_id)
+
+
+balance_cache = StaleWhileRevalidateCache(
+    "balance",
+    PagarMeBalanceAPI.get_balance,
+    soft_ttl=float(os.getenv("PAGARME_BALANCE_SOFT_TTL", "15")),
+    hard_ttl=float(os.getenv("PAGARME_BALANCE_HARD_TTL", "300"))
+)
@@ -1,39 +1,32 @@
 import requests
-import os
-from dotenv import load_dotenv
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import logging
-import base64
 
-load_dotenv()
+from app.pagarme.client import PagarMeClient
+from app.pagarme.responses import decode_json, decode_error, LogBody
 
 logger = logging.getLogger(__name__)
 
 class PagarMeBinAPI:
-    BASE_URL = "https://api.pagar.me/core/v5"
-    API_KEY = os.getenv("PAGARME_API_KEY")
+    BASE_URL = PagarMeClient.BASE_URL
 
     @staticmethod
-    def _get_headers() -> Dict[str, str]:
-        """Retorna headers comuns para chamadas à API."""
-        return {
-            "Authorization": f"Basic {base64.b64encode(f'{PagarMeBinAPI.API_KEY}:'.encode()).decode()}",
-            "Content-Type": "application/json"
-        }
-
-    @staticmethod
-    def get_bin(bin_number: str) -> Dict[str, Any]:
-        """Obtém informações de um bin."""
+    def get_bin(bin_number: str) -> Optional[Dict[str, Any]]:
+        """Obtém informações de um bin. Retorna None se o bin não for conhecido pela Pagar.me."""
         url = f"{PagarMeBinAPI.BASE_URL}/bins/{bin_number}"
-        headers = PagarMeBinAPI._get_headers()
         try:
-            response = requests.get(url, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="bin.get")
             response.raise_for_status()
-            logger.debug(f"Pagar.me bin retrieved: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me bin retrieved: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to get Pagar.me bin: {e.response.json()}")
-            raise Exception(f"Failed to get Pagar.me bin: {e.response.json()}")
+            if e.response.status_code == 404:
+                logger.debug("Pagar.me bin not found: bin=%s", bin_number)
+                return None
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me bin: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me bin: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error getting Pagar.me bin: {str(e)}")
+            logger.error("Unexpected error getting Pagar.me bin: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,64 @@
+import os
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, NamedTuple, Optional
+import logging
+
+from app.pagarme.client import PagarMeClient
+from app.pagarme.rate_limit import PagarMeRateLimiter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = int(os.getenv("PAGARME_BULK_CONCURRENCY", "16"))
+
+
+class FetchResult(NamedTuple):
+    """Resultado da busca de um id: data preenchido em caso de sucesso, error caso contrário."""
+    id: str
+    data: Optional[Dict[str, Any]]
+    error: Optional[str]
+
+
+def _fetch_in_background(fetch: Callable[[str], Dict[str, Any]], object_id: str) -> Dict[str, Any]:
+    with PagarMeRateLimiter.background():
+        return fetch(object_id)
+
+
+def fetch_many(fetch: Callable[[str], Dict[str, Any]], ids: Iterable[str], resource: str,
+               concurrency: int = DEFAULT_CONCURRENCY) -> Iterator[FetchResult]:
+    """Busca vários ids em paralelo e devolve os resultados na ordem em que terminam.
+
+    No máximo `concurrency` chamadas ficam em andamento (limitado ao tamanho do
+    pool de conexões), e a falha de um id é devolvida no próprio resultado sem
+    interromper os demais. As chamadas contam como tráfego de segundo plano no
+    rate limiter, preservando a reserva do tráfego interativo.
+    """
+    workers = max(1, min(concurrency, PagarMeClient.POOL_MAXSIZE))
+    pending_ids = iter(dict.fromkeys(ids))
+    inflight: Dict[Future, str] = {}
+    fetched = failed = 0
+
+    def submit_next() -> None:
+        for object_id in pending_ids:
+            inflight[executor.submit(contextvars.copy_context().run, _fetch_in_background, fetch, object_id)] = object_id
+            return
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"pagarme-{resource}-bulk")
+    try:
+        for _ in range(workers):
+            submit_next()
+        while inflight:
+            done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for future in done:
+                object_id = inflight.pop(future)
+                submit_next()
+                try:
+                    result = FetchResult(object_id, future.result(), None)
+                    fetched += 1
+                except Exception as e:
+                    result = FetchResult(object_id, None, str(e))
+                    failed += 1
+                yield result
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        logger.debug(f"Pagar.me {resource} bulk fetch finished: fetched={fetched}, failed={failed}")
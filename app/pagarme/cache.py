@@ -0,0 +1,91 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pagarme-cache-refresh")
+
+
+class StaleWhileRevalidateCache:
+    """Cache em memória que serve valores recentes na hora e os atualiza em segundo plano.
+
+    - Até soft_ttl o valor é servido sem tocar o gateway.
+    - Entre soft_ttl e hard_ttl o valor é servido e uma atualização é disparada
+      em segundo plano.
+    - Depois de hard_ttl (ou sem valor) a chamada espera o carregamento.
+
+    Atualizações concorrentes da mesma chave são unificadas em uma só chamada.
+    """
+
+    def __init__(self, name: str, loader: Callable[[Hashable], Any], soft_ttl: float, hard_ttl: float):
+        self.name = name
+        self.loader = loader
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, Future] = {}
+        self._generations: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age < self.soft_ttl:
+                    return entry[1]
+                if age < self.hard_ttl:
+                    if key not in self._inflight:
+                        future, generation = self._register(key)
+                        _refresh_executor.submit(self._load, key, generation, future)
+                    return entry[1]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future, generation = self._register(key)
+        # O primeiro chamador carrega no próprio thread; os demais aguardam o mesmo Future
+        if owner:
+            self._load(key, generation, future)
+        return future.result()
+
+    def invalidate(self, key: Hashable) -> None:
+        """Descarta o valor da chave; atualizações em andamento não o repõem."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._inflight.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+        logger.debug(f"{self.name} cache invalidated: key={key}")
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._generations[key] = self._generations.get(key, 0) + 1
+            self._entries.clear()
+            self._inflight.clear()
+
+    def _register(self, key: Hashable) -> Tuple[Future, int]:
+        """Registra um carregamento em andamento para a chave. Deve ser chamado com o lock."""
+        future = Future()
+        self._inflight[key] = future
+        return future, self._generations.get(key, 0)
+
+    def _load(self, key: Hashable, generation: int, future: Future) -> None:
+        try:
+            value = self.loader(key)
+        except Exception as e:
+            logger.warning(f"{self.name} cache refresh failed: key={key}, error={str(e)}")
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+            future.set_exception(e)
+            return
+        with self._lock:
+            if self._generations.get(key, 0) == generation:
+                self._entries[key] = (time.monotonic(), value)
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        future.set_result(value)
@@ -1,89 +1,166 @@
 import requests
-import os
-from dotenv import load_dotenv
-from typing import Dict, Any, List
+import httpx
+from typing import Dict, Any, Iterator, List
 import logging
-import base64
 
-load_dotenv()
+from app.pagarme.client import PagarMeClient
+from app.pagarme.responses import decode_json, decode_error, LogBody
+from app.pagarme.pagination import iter_pages, DateFilter, DEFAULT_PAGE_SIZE
+from app.pagarme.async_client import AsyncPagarMeClient
 
 logger = logging.getLogger(__name__)
 
 class PagarMeCardsAPI:
-    BASE_URL = "https://api.pagar.me/core/v5"
-    API_KEY = os.getenv("PAGARME_API_KEY")
-
-    @staticmethod
-    def _get_headers() -> Dict[str, str]:
-        """Retorna headers comuns para chamadas à API."""
-        return {
-            "Authorization": f"Basic {base64.b64encode(f'{PagarMeCardsAPI.API_KEY}:'.encode()).decode()}",
-            "Content-Type": "application/json"
-        }
+    BASE_URL = PagarMeClient.BASE_URL
 
     @staticmethod
     def create_card(data: Dict[str, Any]) -> Dict[str, Any]:
         """Cria um cartão na Pagar.me."""
         url = f"{PagarMeCardsAPI.BASE_URL}/cards"
-        headers = PagarMeCardsAPI._get_headers()
         try:
-            response = requests.post(url, json=data, headers=headers)
+            response = PagarMeClient.request("POST", url, operation="cards.create", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me card created: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me card created: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to create Pagar.me card: {e.response.json()}")
-            raise Exception(f"Failed to create Pagar.me card: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me card: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me card: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error creating Pagar.me card: {str(e)}")
+            logger.error("Unexpected error creating Pagar.me card: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def list_cards(params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Lista todos os cartões."""
         url = f"{PagarMeCardsAPI.BASE_URL}/cards"
-        headers = PagarMeCardsAPI._get_headers()
         try:
-            response = requests.get(url, params=params or {}, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="cards.list", params=params or {})
             response.raise_for_status()
-            logger.debug(f"Pagar.me cards listed: {response.json()}")
-            return response.json().get("data", [])
+            body = decode_json(response)
+            logger.debug("Pagar.me cards listed: %s", LogBody(body))
+            return body.get("data", [])
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to list Pagar.me cards: {e.response.json()}")
-            raise Exception(f"Failed to list Pagar.me cards: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me cards: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me cards: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error listing Pagar.me cards: {str(e)}")
+            logger.error("Unexpected error listing Pagar.me cards: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
+    @staticmethod
+    def iter_cards(params: Dict[str, Any] = None, created_since: DateFilter = None,
+                   created_until: DateFilter = None,
+                   page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """Percorre todas as páginas de cartões, buscando a próxima em segundo plano."""
+        url = f"{PagarMeCardsAPI.BASE_URL}/cards"
+        return iter_pages(url, "cards", params, page_size, created_since, created_until)
+
     @staticmethod
     def get_card(card_id: str) -> Dict[str, Any]:
         """Obtém detalhes de um cartão específico."""
         url = f"{PagarMeCardsAPI.BASE_URL}/cards/{card_id}"
-        headers = PagarMeCardsAPI._get_headers()
         try:
-            response = requests.get(url, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="cards.get")
             response.raise_for_status()
-            logger.debug(f"Pagar.me card retrieved: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me card retrieved: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to get Pagar.me card: {e.response.json()}")
-            raise Exception(f"Failed to get Pagar.me card: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me card: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me card: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error getting Pagar.me card: {str(e)}")
+            logger.error("Unexpected error getting Pagar.me card: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def delete_card(card_id: str) -> None:
         """Exclui um cartão."""
         url = f"{PagarMeCardsAPI.BASE_URL}/cards/{card_id}"
-        headers = PagarMeCardsAPI._get_headers()
         try:
-            response = requests.delete(url, headers=headers)
+            response = PagarMeClient.request("DELETE", url, operation="cards.delete")
             response.raise_for_status()
-            logger.debug(f"Pagar.me card deleted: card_id={card_id}")
+            logger.debug("Pagar.me card deleted: card_id=%s", card_id)
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to delete Pagar.me card: {e.response.json()}")
-            raise Exception(f"Failed to delete Pagar.me card: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to delete Pagar.me card: %s", LogBody(error))
+            raise Exception(f"Failed to delete Pagar.me card: {error}")
+        except Exception as e:
+            logger.error("Unexpected error deleting Pagar.me card: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+
+class AsyncPagarMeCardsAPI:
+    BASE_URL = PagarMeCardsAPI.BASE_URL
+
+    @staticmethod
+    async def create_card(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Cria um cartão na Pagar.me."""
+        url = f"{AsyncPagarMeCardsAPI.BASE_URL}/cards"
+        try:
+            response = await AsyncPagarMeClient.request("POST", url, operation="cards.create", json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me card created: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me card: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me card: {error}")
+        except Exception as e:
+            logger.error("Unexpected error creating Pagar.me card: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def list_cards(params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Lista todos os cartões."""
+        url = f"{AsyncPagarMeCardsAPI.BASE_URL}/cards"
+        try:
+            response = await AsyncPagarMeClient.request("GET", url, operation="cards.list", params=params or {})
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me cards listed: %s", LogBody(body))
+            return body.get("data", [])
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me cards: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me cards: {error}")
+        except Exception as e:
+            logger.error("Unexpected error listing Pagar.me cards: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def get_card(card_id: str) -> Dict[str, Any]:
+        """Obtém detalhes de um cartão específico."""
+        url = f"{AsyncPagarMeCardsAPI.BASE_URL}/cards/{card_id}"
+        try:
+            response = await AsyncPagarMeClient.request("GET", url, operation="cards.get")
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me card retrieved: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me card: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me card: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error deleting Pagar.me card: {str(e)}")
-            raise Exception(f"Unexpected error: {str(e)}")
\ No newline at end of file
+            logger.error("Unexpected error getting Pagar.me card: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def delete_card(card_id: str) -> None:
+        """Exclui um cartão."""
+        url = f"{AsyncPagarMeCardsAPI.BASE_URL}/cards/{card_id}"
+        try:
+            response = await AsyncPagarMeClient.request("DELETE", url, operation="cards.delete")
+            response.raise_for_status()
+            logger.debug("Pagar.me card deleted: card_id=%s", card_id)
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to delete Pagar.me card: %s", LogBody(error))
+            raise Exception(f"Failed to delete Pagar.me card: {error}")
+        except Exception as e:
+            logger.error("Unexpected error deleting Pagar.me card: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
@@ -1,141 +1,285 @@
 import requests
-import os
-from dotenv import load_dotenv
-from typing import Dict, Any, List
+import httpx
+from typing import Dict, Any, Iterable, Iterator, List
 import logging
-import base64
 
-load_dotenv()
+from app.pagarme.client import PagarMeClient
+from app.pagarme.responses import decode_json, decode_error, LogBody
+from app.pagarme.pagination import iter_pages, DateFilter, DEFAULT_PAGE_SIZE
+from app.pagarme.async_client import AsyncPagarMeClient
+from app.pagarme.bulk import fetch_many, FetchResult, DEFAULT_CONCURRENCY
 
 logger = logging.getLogger(__name__)
 
 class PagarMeChargesAPI:
-    BASE_URL = "https://api.pagar.me/core/v5"
-    API_KEY = os.getenv("PAGARME_API_KEY")
-
-    @staticmethod
-    def _get_headers() -> Dict[str, str]:
-        """Retorna headers comuns para chamadas à API."""
-        return {
-            "Authorization": f"Basic {base64.b64encode(f'{PagarMeChargesAPI.API_KEY}:'.encode()).decode()}",
-            "Content-Type": "application/json"
-        }
+    BASE_URL = PagarMeClient.BASE_URL
 
     @staticmethod
     def list_charges(params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Lista todas as cobranças."""
         url = f"{PagarMeChargesAPI.BASE_URL}/charges"
-        headers = PagarMeChargesAPI._get_headers()
         try:
-            response = requests.get(url, params=params or {}, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="charges.list", params=params or {})
             response.raise_for_status()
-            logger.debug(f"Pagar.me charges listed: {response.json()}")
-            return response.json().get("data", [])
+            body = decode_json(response)
+            logger.debug("Pagar.me charges listed: %s", LogBody(body))
+            return body.get("data", [])
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to list Pagar.me charges: {e.response.json()}")
-            raise Exception(f"Failed to list Pagar.me charges: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me charges: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me charges: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error listing Pagar.me charges: {str(e)}")
+            logger.error("Unexpected error listing Pagar.me charges: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
+    @staticmethod
+    def iter_charges(params: Dict[str, Any] = None, created_since: DateFilter = None,
+                     created_until: DateFilter = None,
+                     page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """Percorre todas as páginas de cobranças, buscando a próxima em segundo plano."""
+        url = f"{PagarMeChargesAPI.BASE_URL}/charges"
+        return iter_pages(url, "charges", params, page_size, created_since, created_until)
+
+    @staticmethod
+    def get_many_charges(charge_ids: Iterable[str],
+                         concurrency: int = DEFAULT_CONCURRENCY) -> Iterator[FetchResult]:
+        """Busca várias cobranças em paralelo, devolvendo cada resultado (ou erro) assim que termina."""
+        return fetch_many(PagarMeChargesAPI.get_charge, charge_ids, "charges", concurrency)
+
     @staticmethod
     def get_charge(charge_id: str) -> Dict[str, Any]:
         """Obtém detalhes de uma cobrança específica."""
         url = f"{PagarMeChargesAPI.BASE_URL}/charges/{charge_id}"
-        headers = PagarMeChargesAPI._get_headers()
         try:
-            response = requests.get(url, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="charges.get")
             response.raise_for_status()
-            logger.debug(f"Pagar.me charge retrieved: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me charge retrieved: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to get Pagar.me charge: {e.response.json()}")
-            raise Exception(f"Failed to get Pagar.me charge: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me charge: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me charge: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error getting Pagar.me charge: {str(e)}")
+            logger.error("Unexpected error getting Pagar.me charge: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def update_charge_card(charge_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza o cartão de uma cobrança."""
         url = f"{PagarMeChargesAPI.BASE_URL}/charges/{charge_id}/card"
-        headers = PagarMeChargesAPI._get_headers()
         try:
-            response = requests.patch(url, json=data, headers=headers)
+            response = PagarMeClient.request("PATCH", url, operation="charges.update_card", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me charge card updated: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me charge card updated: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to update Pagar.me charge card: {e.response.json()}")
-            raise Exception(f"Failed to update Pagar.me charge card: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me charge card: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me charge card: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error updating Pagar.me charge card: {str(e)}")
+            logger.error("Unexpected error updating Pagar.me charge card: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def update_charge_due_date(charge_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza a data de vencimento de uma cobrança."""
         url = f"{PagarMeChargesAPI.BASE_URL}/charges/{charge_id}/due-date"
-        headers = PagarMeChargesAPI._get_headers()
         try:
-            response = requests.patch(url, json=data, headers=headers)
+            response = PagarMeClient.request("PATCH", url, operation="charges.update_due_date", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me charge due date updated: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me charge due date updated: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to update Pagar.me charge due date: {e.response.json()}")
-            raise Exception(f"Failed to update Pagar.me charge due date: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me charge due date: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me charge due date: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error updating Pagar.me charge due date: {str(e)}")
+            logger.error("Unexpected error updating Pagar.me charge due date: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def capture_charge(charge_id: str, data: Dict[str, Any] = None) -> Dict[str, Any]:
         """Captura uma cobrança."""
         url = f"{PagarMeChargesAPI.BASE_URL}/charges/{charge_id}/capture"
-        headers = PagarMeChargesAPI._get_headers()
         try:
-            response = requests.post(url, json=data or {}, headers=headers)
+            response = PagarMeClient.request("POST", url, operation="charges.capture", json=data or {})
             response.raise_for_status()
-            logger.debug(f"Pagar.me charge captured: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me charge captured: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to capture Pagar.me charge: {e.response.json()}")
-            raise Exception(f"Failed to capture Pagar.me charge: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to capture Pagar.me charge: %s", LogBody(error))
+            raise Exception(f"Failed to capture Pagar.me charge: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error capturing Pagar.me charge: {str(e)}")
+            logger.error("Unexpected error capturing Pagar.me charge: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def retry_charge(charge_id: str) -> Dict[str, Any]:
         """Tenta novamente uma cobrança."""
         url = f"{PagarMeChargesAPI.BASE_URL}/charges/{charge_id}/retry"
-        headers = PagarMeChargesAPI._get_headers()
         try:
-            response = requests.post(url, headers=headers)
+            response = PagarMeClient.request("POST", url, operation="charges.retry")
             response.raise_for_status()
-            logger.debug(f"Pagar.me charge retried: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me charge retried: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to retry Pagar.me charge: {e.response.json()}")
-            raise Exception(f"Failed to retry Pagar.me charge: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to retry Pagar.me charge: %s", LogBody(error))
+            raise Exception(f"Failed to retry Pagar.me charge: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error retrying Pagar.me charge: {str(e)}")
+            logger.error("Unexpected error retrying Pagar.me charge: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def cancel_charge(charge_id: str) -> Dict[str, Any]:
         """Cancela uma cobrança."""
         url = f"{PagarMeChargesAPI.BASE_URL}/charges/{charge_id}/cancel"
-        headers = PagarMeChargesAPI._get_headers()
         try:
-            response = requests.post(url, headers=headers)
+            response = PagarMeClient.request("POST", url, operation="charges.cancel")
             response.raise_for_status()
-            logger.debug(f"Pagar.me charge canceled: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me charge canceled: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to cancel Pagar.me charge: {e.response.json()}")
-            raise Exception(f"Failed to cancel Pagar.me charge: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to cancel Pagar.me charge: %s", LogBody(error))
+            raise Exception(f"Failed to cancel Pagar.me charge: {error}")
+        except Exception as e:
+            logger.error("Unexpected error canceling Pagar.me charge: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+
+class AsyncPagarMeChargesAPI:
+    BASE_URL = PagarMeChargesAPI.BASE_URL
+
+    @staticmethod
+    async def list_charges(params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Lista todas as cobranças."""
+        url = f"{AsyncPagarMeChargesAPI.BASE_URL}/charges"
+        try:
+            response = await AsyncPagarMeClient.request("GET", url, operation="charges.list", params=params or {})
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me charges listed: %s", LogBody(body))
+            return body.get("data", [])
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me charges: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me charges: {error}")
+        except Exception as e:
+            logger.error("Unexpected error listing Pagar.me charges: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def get_charge(charge_id: str) -> Dict[str, Any]:
+        """Obtém detalhes de uma cobrança específica."""
+        url = f"{AsyncPagarMeChargesAPI.BASE_URL}/charges/{charge_id}"
+        try:
+            response = await AsyncPagarMeClient.request("GET", url, operation="charges.get")
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me charge retrieved: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me charge: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me charge: {error}")
+        except Exception as e:
+            logger.error("Unexpected error getting Pagar.me charge: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def update_charge_card(charge_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Atualiza o cartão de uma cobrança."""
+        url = f"{AsyncPagarMeChargesAPI.BASE_URL}/charges/{charge_id}/card"
+        try:
+            response = await AsyncPagarMeClient.request("PATCH", url, operation="charges.update_card", json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me charge card updated: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me charge card: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me charge card: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error canceling Pagar.me charge: {str(e)}")
-            raise Exception(f"Unexpected error: {str(e)}")
\ No newline at end of file
+            logger.error("Unexpected error updating Pagar.me charge card: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def update_charge_due_date(charge_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Atualiza a data de vencimento de uma cobrança."""
+        url = f"{AsyncPagarMeChargesAPI.BASE_URL}/charges/{charge_id}/due-date"
+        try:
+            response = await AsyncPagarMeClient.request("PATCH", url, operation="charges.update_due_date", json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me charge due date updated: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me charge due date: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me charge due date: {error}")
+        except Exception as e:
+            logger.error("Unexpected error updating Pagar.me charge due date: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def capture_charge(charge_id: str, data: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Captura uma cobrança."""
+        url = f"{AsyncPagarMeChargesAPI.BASE_URL}/charges/{charge_id}/capture"
+        try:
+            response = await AsyncPagarMeClient.request("POST", url, operation="charges.capture", json=data or {})
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me charge captured: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to capture Pagar.me charge: %s", LogBody(error))
+            raise Exception(f"Failed to capture Pagar.me charge: {error}")
+        except Exception as e:
+            logger.error("Unexpected error capturing Pagar.me charge: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def retry_charge(charge_id: str) -> Dict[str, Any]:
+        """Tenta novamente uma cobrança."""
+        url = f"{AsyncPagarMeChargesAPI.BASE_URL}/charges/{charge_id}/retry"
+        try:
+            response = await AsyncPagarMeClient.request("POST", url, operation="charges.retry")
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me charge retried: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to retry Pagar.me charge: %s", LogBody(error))
+            raise Exception(f"Failed to retry Pagar.me charge: {error}")
+        except Exception as e:
+            logger.error("Unexpected error retrying Pagar.me charge: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def cancel_charge(charge_id: str) -> Dict[str, Any]:
+        """Cancela uma cobrança."""
+        url = f"{AsyncPagarMeChargesAPI.BASE_URL}/charges/{charge_id}/cancel"
+        try:
+            response = await AsyncPagarMeClient.request("POST", url, operation="charges.cancel")
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me charge canceled: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to cancel Pagar.me charge: %s", LogBody(error))
+            raise Exception(f"Failed to cancel Pagar.me charge: {error}")
+        except Exception as e:
+            logger.error("Unexpected error canceling Pagar.me charge: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
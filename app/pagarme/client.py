@@ -0,0 +1,148 @@
+import requests
+import os
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from typing import Dict, Optional
+import logging
+import base64
+import threading
+import time
+
+from app.pagarme.resilience import PagarMeResilience, RETRYABLE_STATUSES
+from app.pagarme.metrics import PagarMeMetrics, body_size
+from app.pagarme.rate_limit import PagarMeRateLimiter
+from app.pagarme.coalesce import SingleFlight, request_key
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class PagarMeClient:
+    """Sessão HTTP compartilhada por todas as classes de recurso da Pagar.me.
+
+    Mantém um único pool de conexões keep-alive por processo, de modo que
+    chamadas consecutivas reaproveitam a conexão TCP/TLS com a API.
+    """
+    BASE_URL = os.getenv("PAGARME_BASE_URL", "https://api.pagar.me/core/v5")
+    API_KEY = os.getenv("PAGARME_API_KEY")
+    POOL_CONNECTIONS = int(os.getenv("PAGARME_POOL_CONNECTIONS", "4"))
+    POOL_MAXSIZE = int(os.getenv("PAGARME_POOL_MAXSIZE", "32"))
+    CONNECT_TIMEOUT = float(os.getenv("PAGARME_CONNECT_TIMEOUT", "3.05"))
+    READ_TIMEOUT = float(os.getenv("PAGARME_READ_TIMEOUT", "30"))
+
+    _session: Optional[requests.Session] = None
+    _lock = threading.Lock()
+    _single_flight = SingleFlight()
+
+    @staticmethod
+    def _build_headers() -> Dict[str, str]:
+        """Monta os headers comuns uma única vez por processo."""
+        token = base64.b64encode(f"{PagarMeClient.API_KEY}:".encode()).decode()
+        return {
+            "Authorization": f"Basic {token}",
+            "Content-Type": "application/json",
+            "Connection": "keep-alive"
+        }
+
+    @staticmethod
+    def get_session() -> requests.Session:
+        """Retorna a sessão compartilhada, criando-a na primeira chamada."""
+        if PagarMeClient._session is None:
+            with PagarMeClient._lock:
+                if PagarMeClient._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=PagarMeClient.POOL_CONNECTIONS,
+                        pool_maxsize=PagarMeClient.POOL_MAXSIZE
+                    )
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update(PagarMeClient._build_headers())
+                    PagarMeClient._session = session
+                    logger.debug(
+                        f"Pagar.me session created: pool_connections={PagarMeClient.POOL_CONNECTIONS}, "
+                        f"pool_maxsize={PagarMeClient.POOL_MAXSIZE}"
+                    )
+        return PagarMeClient._session
+
+    @staticmethod
+    def request(method: str, url: str, operation: Optional[str] = None,
+                idempotency_key: Optional[str] = None, **kwargs) -> requests.Response:
+        """Executa uma chamada à API usando o pool compartilhado.
+
+        GETs idênticos e simultâneos compartilham uma única chamada (e, com
+        PAGARME_COALESCE_TTL, a resposta é reaproveitada por alguns instantes).
+        """
+        key = request_key(method, url, kwargs)
+        if key is None:
+            return PagarMeClient._send(method, url, operation, idempotency_key, **kwargs)
+        response, shared = PagarMeClient._single_flight.do(
+            key, lambda: PagarMeClient._send(method, url, operation, idempotency_key, **kwargs))
+        if shared:
+            PagarMeResilience.record("coalesced", operation or method.upper())
+        return response
+
+    @staticmethod
+    def _send(method: str, url: str, operation: Optional[str] = None,
+              idempotency_key: Optional[str] = None, **kwargs) -> requests.Response:
+        """Envia a chamada de fato.
+
+        Cada tentativa passa pelo rate limiter compartilhado. Falhas transitórias
+        (rede, 429, 5xx) são repetidas com backoff apenas em chamadas idempotentes
+        ou com chave de idempotência, e cada endpoint tem seu próprio circuit breaker.
+        """
+        endpoint = operation or method.upper()
+        kwargs.setdefault("timeout", (PagarMeClient.CONNECT_TIMEOUT, PagarMeClient.READ_TIMEOUT))
+        if idempotency_key:
+            kwargs["headers"] = {**kwargs.get("headers", {}), "Idempotency-Key": idempotency_key}
+        can_retry = PagarMeResilience.can_retry(method, idempotency_key)
+        breaker = PagarMeResilience.get_breaker(endpoint)
+        session = PagarMeClient.get_session()
+
+        attempt = 0
+        while True:
+            if PagarMeRateLimiter.wait(method):
+                PagarMeResilience.record("throttled", endpoint)
+            breaker.before_call()
+            started = time.perf_counter()
+            settled = False
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                PagarMeMetrics.observe(endpoint, "error", time.perf_counter() - started, attempt=attempt)
+                breaker.record_failure()
+                settled = True
+                if not can_retry or attempt >= PagarMeResilience.MAX_RETRIES:
+                    raise
+                delay = PagarMeResilience.backoff(attempt)
+                logger.warning(f"Pagar.me {endpoint} failed ({e.__class__.__name__}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                settled = True
+                PagarMeMetrics.observe(endpoint, str(response.status_code), time.perf_counter() - started,
+                                       body_size(response.request.body), len(response.content), attempt)
+                if (response.status_code not in RETRYABLE_STATUSES or not can_retry
+                        or attempt >= PagarMeResilience.MAX_RETRIES):
+                    return response
+                delay = PagarMeResilience.backoff(attempt, response.headers.get("Retry-After"))
+                logger.warning(f"Pagar.me {endpoint} returned {response.status_code}, retrying in {delay:.2f}s")
+                response.close()
+            finally:
+                if not settled:
+                    # Qualquer outra exceção conta como falha, senão a sondagem do circuito meio-aberto nunca termina
+                    breaker.record_failure()
+            PagarMeResilience.record("retries", endpoint)
+            attempt += 1
+            time.sleep(delay)
+
+    @staticmethod
+    def close() -> None:
+        """Fecha a sessão compartilhada e libera as conexões do pool."""
+        with PagarMeClient._lock:
+            if PagarMeClient._session is not None:
+                PagarMeClient._session.close()
+                PagarMeClient._session = None
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+COALESCE_TTL = float(os.getenv("PAGARME_COALESCE_TTL", "0"))
+RECENT_MAX_SIZE = 1024
+
+
+def request_key(method: str, url: str, kwargs: Dict[str, Any]) -> Optional[Hashable]:
+    """Chave de unificação de uma chamada, ou None se ela não puder ser compartilhada.
+
+    Só GETs sem corpo nem headers próprios são unificados; parâmetros em ordem
+    diferente geram a mesma chave.
+    """
+    if method.upper() != "GET" or set(kwargs) - {"params", "timeout"}:
+        return None
+    params = kwargs.get("params") or {}
+    return url, tuple(sorted((str(name), repr(value)) for name, value in params.items()))
+
+
+def _remember(recent: Dict[Hashable, Tuple[float, Any]], key: Hashable, response: Any, ttl: float) -> None:
+    """Guarda uma resposta 2xx por ttl segundos, descartando as expiradas quando o dicionário cresce."""
+    if ttl <= 0 or not 200 <= response.status_code < 300:
+        return
+    now = time.monotonic()
+    if len(recent) >= RECENT_MAX_SIZE:
+        for stale in [k for k, (expires_at, _) in recent.items() if expires_at <= now]:
+            del recent[stale]
+    recent[key] = (now + ttl, response)
+
+
+class SingleFlight:
+    """Faz chamadas idênticas e simultâneas compartilharem uma única ida ao gateway.
+
+    Quem chega enquanto a chamada está em andamento recebe a mesma resposta (ou
+    exceção). Com ttl > 0 respostas 2xx continuam sendo servidas por esse tempo.
+    """
+
+    def __init__(self, ttl: float = COALESCE_TTL):
+        self.ttl = ttl
+        self._inflight: Dict[Hashable, Future] = {}
+        self._recent: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, call: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Executa call uma vez por chave. Retorna a resposta e se ela foi compartilhada."""
+        with self._lock:
+            recent = self._recent.get(key)
+            if recent is not None:
+                if recent[0] > time.monotonic():
+                    return recent[1], True
+                del self._recent[key]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result(), True
+
+        try:
+            response = call()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._inflight[key]
+            _remember(self._recent, key, response, self.ttl)
+        future.set_result(response)
+        return response, False
+
+
+class AsyncSingleFlight:
+    """Equivalente assíncrono de SingleFlight para um event loop."""
+
+    def __init__(self, ttl: float = COALESCE_TTL):
+        self.ttl = ttl
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._recent: Dict[Hashable, Tuple[float, Any]] = {}
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        recent = self._recent.get(key)
+        if recent is not None:
+            if recent[0] > time.monotonic():
+                return recent[1], True
+            del self._recent[key]
+        future = self._inflight.get(key)
+        if future is not None:
+            # shield: o cancelamento de um seguidor não cancela a chamada dos demais
+            return await asyncio.shield(future), True
+
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            response = await call()
+        except BaseException as e:
+            del self._inflight[key]
+            future.set_exception(e)
+            # Evita o aviso de exceção nunca lida quando não há seguidores
+            future.exception()
+            raise
+        del self._inflight[key]
+        _remember(self._recent, key, response, self.ttl)
+        future.set_result(response)
+        return response, False
@@ -1,106 +1,202 @@
 import requests
-import os
-from dotenv import load_dotenv
-from typing import Dict, Any, List
+import httpx
+from typing import Dict, Any, Iterator, List
 import logging
-import base64
 
-load_dotenv()
+from app.pagarme.client import PagarMeClient
+from app.pagarme.responses import decode_json, decode_error, LogBody
+from app.pagarme.pagination import iter_pages, DateFilter, DEFAULT_PAGE_SIZE
+from app.pagarme.async_client import AsyncPagarMeClient
 
 logger = logging.getLogger(__name__)
 
 class PagarMeCustomerAPI:
-    BASE_URL = "https://api.pagar.me/core/v5"
-    API_KEY = os.getenv("PAGARME_API_KEY")
-
-    @staticmethod
-    def _get_headers() -> Dict[str, str]:
-        """Retorna headers comuns para chamadas à API."""
-        return {
-            "Authorization": f"Basic {base64.b64encode(f'{PagarMeCustomerAPI.API_KEY}:'.encode()).decode()}",
-            "Content-Type": "application/json"
-        }
+    BASE_URL = PagarMeClient.BASE_URL
 
     @staticmethod
     def create_customer(data: Dict[str, Any]) -> Dict[str, Any]:
         """Cria um cliente na Pagar.me."""
         url = f"{PagarMeCustomerAPI.BASE_URL}/customers"
-        headers = PagarMeCustomerAPI._get_headers()
         try:
-            response = requests.post(url, json=data, headers=headers)
+            response = PagarMeClient.request("POST", url, operation="customers.create", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me customer created: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me customer created: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to create Pagar.me customer: {e.response.json()}")
-            raise Exception(f"Failed to create Pagar.me customer: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me customer: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me customer: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error creating Pagar.me customer: {str(e)}")
+            logger.error("Unexpected error creating Pagar.me customer: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def list_customers(params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Lista todos os clientes."""
         url = f"{PagarMeCustomerAPI.BASE_URL}/customers"
-        headers = PagarMeCustomerAPI._get_headers()
         try:
-            response = requests.get(url, params=params or {}, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="customers.list", params=params or {})
             response.raise_for_status()
-            logger.debug(f"Pagar.me customers listed: {response.json()}")
-            return response.json().get("data", [])
+            body = decode_json(response)
+            logger.debug("Pagar.me customers listed: %s", LogBody(body))
+            return body.get("data", [])
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to list Pagar.me customers: {e.response.json()}")
-            raise Exception(f"Failed to list Pagar.me customers: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me customers: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me customers: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error listing Pagar.me customers: {str(e)}")
+            logger.error("Unexpected error listing Pagar.me customers: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
+    @staticmethod
+    def iter_customers(params: Dict[str, Any] = None, created_since: DateFilter = None,
+                       created_until: DateFilter = None,
+                       page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """Percorre todas as páginas de clientes, buscando a próxima em segundo plano."""
+        url = f"{PagarMeCustomerAPI.BASE_URL}/customers"
+        return iter_pages(url, "customers", params, page_size, created_since, created_until)
+
     @staticmethod
     def get_customer(customer_id: str) -> Dict[str, Any]:
         """Obtém detalhes de um cliente específico."""
         url = f"{PagarMeCustomerAPI.BASE_URL}/customers/{customer_id}"
-        headers = PagarMeCustomerAPI._get_headers()
         try:
-            response = requests.get(url, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="customers.get")
             response.raise_for_status()
-            logger.debug(f"Pagar.me customer retrieved: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me customer retrieved: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to get Pagar.me customer: {e.response.json()}")
-            raise Exception(f"Failed to get Pagar.me customer: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me customer: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me customer: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error getting Pagar.me customer: {str(e)}")
+            logger.error("Unexpected error getting Pagar.me customer: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def update_customer(customer_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza um cliente existente."""
         url = f"{PagarMeCustomerAPI.BASE_URL}/customers/{customer_id}"
-        headers = PagarMeCustomerAPI._get_headers()
         try:
-            response = requests.patch(url, json=data, headers=headers)
+            response = PagarMeClient.request("PATCH", url, operation="customers.update", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me customer updated: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me customer updated: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to update Pagar.me customer: {e.response.json()}")
-            raise Exception(f"Failed to update Pagar.me customer: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me customer: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me customer: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error updating Pagar.me customer: {str(e)}")
+            logger.error("Unexpected error updating Pagar.me customer: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def delete_customer(customer_id: str) -> None:
         """Exclui um cliente."""
         url = f"{PagarMeCustomerAPI.BASE_URL}/customers/{customer_id}"
-        headers = PagarMeCustomerAPI._get_headers()
         try:
-            response = requests.delete(url, headers=headers)
+            response = PagarMeClient.request("DELETE", url, operation="customers.delete")
             response.raise_for_status()
-            logger.debug(f"Pagar.me customer deleted: customer_id={customer_id}")
+            logger.debug("Pagar.me customer deleted: customer_id=%s", customer_id)
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to delete Pagar.me customer: {e.response.json()}")
-            raise Exception(f"Failed to delete Pagar.me customer: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to delete Pagar.me customer: %s", LogBody(error))
+            raise Exception(f"Failed to delete Pagar.me customer: {error}")
+        except Exception as e:
+            logger.error("Unexpected error deleting Pagar.me customer: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+
+class AsyncPagarMeCustomerAPI:
+    BASE_URL = PagarMeCustomerAPI.BASE_URL
+
+    @staticmethod
+    async def create_customer(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Cria um cliente na Pagar.me."""
+        url = f"{AsyncPagarMeCustomerAPI.BASE_URL}/customers"
+        try:
+            response = await AsyncPagarMeClient.request("POST", url, operation="customers.create", json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me customer created: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me customer: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me customer: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error deleting Pagar.me customer: {str(e)}")
-            raise Exception(f"Unexpected error: {str(e)}")
\ No newline at end of file
+            logger.error("Unexpected error creating Pagar.me customer: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def list_customers(params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Lista todos os clientes."""
+        url = f"{AsyncPagarMeCustomerAPI.BASE_URL}/customers"
+        try:
+            response = await AsyncPagarMeClient.request("GET", url, operation="customers.list", params=params or {})
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me customers listed: %s", LogBody(body))
+            return body.get("data", [])
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me customers: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me customers: {error}")
+        except Exception as e:
+            logger.error("Unexpected error listing Pagar.me customers: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def get_customer(customer_id: str) -> Dict[str, Any]:
+        """Obtém detalhes de um cliente específico."""
+        url = f"{AsyncPagarMeCustomerAPI.BASE_URL}/customers/{customer_id}"
+        try:
+            response = await AsyncPagarMeClient.request("GET", url, operation="customers.get")
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me customer retrieved: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me customer: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me customer: {error}")
+        except Exception as e:
+            logger.error("Unexpected error getting Pagar.me customer: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def update_customer(customer_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Atualiza um cliente existente."""
+        url = f"{AsyncPagarMeCustomerAPI.BASE_URL}/customers/{customer_id}"
+        try:
+            response = await AsyncPagarMeClient.request("PATCH", url, operation="customers.update", json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me customer updated: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me customer: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me customer: {error}")
+        except Exception as e:
+            logger.error("Unexpected error updating Pagar.me customer: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def delete_customer(customer_id: str) -> None:
+        """Exclui um cliente."""
+        url = f"{AsyncPagarMeCustomerAPI.BASE_URL}/customers/{customer_id}"
+        try:
+            response = await AsyncPagarMeClient.request("DELETE", url, operation="customers.delete")
+            response.raise_for_status()
+            logger.debug("Pagar.me customer deleted: customer_id=%s", customer_id)
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to delete Pagar.me customer: %s", LogBody(error))
+            raise Exception(f"Failed to delete Pagar.me customer: {error}")
+        except Exception as e:
+            logger.error("Unexpected error deleting Pagar.me customer: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
@@ -1,56 +1,56 @@
 import requests
-import os
-from dotenv import load_dotenv
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List
 import logging
-import base64
 
-load_dotenv()
+from app.pagarme.client import PagarMeClient
+from app.pagarme.responses import decode_json, decode_error, LogBody
+from app.pagarme.pagination import iter_pages, DateFilter, DEFAULT_PAGE_SIZE
 
 logger = logging.getLogger(__name__)
 
 class PagarMeCyclesAPI:
-    BASE_URL = "https://api.pagar.me/core/v5"
-    API_KEY = os.getenv("PAGARME_API_KEY")
-
-    @staticmethod
-    def _get_headers() -> Dict[str, str]:
-        """Retorna headers comuns para chamadas à API."""
-        return {
-            "Authorization": f"Basic {base64.b64encode(f'{PagarMeCyclesAPI.API_KEY}:'.encode()).decode()}",
-            "Content-Type": "application/json"
-        }
+    BASE_URL = PagarMeClient.BASE_URL
 
     @staticmethod
     def list_cycles(subscription_id: str, params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Lista ciclos de uma assinatura."""
         url = f"{PagarMeCyclesAPI.BASE_URL}/subscriptions/{subscription_id}/cycles"
-        headers = PagarMeCyclesAPI._get_headers()
         try:
-            response = requests.get(url, params=params or {}, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="cycles.list", params=params or {})
             response.raise_for_status()
-            logger.debug(f"Pagar.me cycles listed: {response.json()}")
-            return response.json().get("data", [])
+            body = decode_json(response)
+            logger.debug("Pagar.me cycles listed: %s", LogBody(body))
+            return body.get("data", [])
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to list Pagar.me cycles: {e.response.json()}")
-            raise Exception(f"Failed to list Pagar.me cycles: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me cycles: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me cycles: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error listing Pagar.me cycles: {str(e)}")
+            logger.error("Unexpected error listing Pagar.me cycles: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
+    @staticmethod
+    def iter_cycles(subscription_id: str, params: Dict[str, Any] = None, created_since: DateFilter = None,
+                    created_until: DateFilter = None,
+                    page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """Percorre todas as páginas de ciclos, buscando a próxima em segundo plano."""
+        url = f"{PagarMeCyclesAPI.BASE_URL}/subscriptions/{subscription_id}/cycles"
+        return iter_pages(url, "cycles", params, page_size, created_since, created_until)
+
     @staticmethod
     def get_cycle(subscription_id: str, cycle_id: str) -> Dict[str, Any]:
         """Obtém detalhes de um ciclo específico."""
         url = f"{PagarMeCyclesAPI.BASE_URL}/subscriptions/{subscription_id}/cycles/{cycle_id}"
-        headers = PagarMeCyclesAPI._get_headers()
         try:
-            response = requests.get(url, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="cycles.get")
             response.raise_for_status()
-            logger.debug(f"Pagar.me cycle retrieved: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me cycle retrieved: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to get Pagar.me cycle: {e.response.json()}")
-            raise Exception(f"Failed to get Pagar.me cycle: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me cycle: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me cycle: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error getting Pagar.me cycle: {str(e)}")
+            logger.error("Unexpected error getting Pagar.me cycle: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
\ No newline at end of file
@@ -1,56 +1,56 @@
 import requests
-import os
-from dotenv import load_dotenv
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List
 import logging
-import base64
 
-load_dotenv()
+from app.pagarme.client import PagarMeClient
+from app.pagarme.responses import decode_json, decode_error, LogBody
+from app.pagarme.pagination import iter_pages, DateFilter, DEFAULT_PAGE_SIZE
 
 logger = logging.getLogger(__name__)
 
 class PagarMeInvoicesAPI:
-    BASE_URL = "https://api.pagar.me/core/v5"
-    API_KEY = os.getenv("PAGARME_API_KEY")
-
-    @staticmethod
-    def _get_headers() -> Dict[str, str]:
-        """Retorna headers comuns para chamadas à API."""
-        return {
-            "Authorization": f"Basic {base64.b64encode(f'{PagarMeInvoicesAPI.API_KEY}:'.encode()).decode()}",
-            "Content-Type": "application/json"
-        }
+    BASE_URL = PagarMeClient.BASE_URL
 
     @staticmethod
     def list_invoices(subscription_id: str, params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Lista faturas de uma assinatura."""
         url = f"{PagarMeInvoicesAPI.BASE_URL}/subscriptions/{subscription_id}/invoices"
-        headers = PagarMeInvoicesAPI._get_headers()
         try:
-            response = requests.get(url, params=params or {}, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="invoices.list", params=params or {})
             response.raise_for_status()
-            logger.debug(f"Pagar.me invoices listed: {response.json()}")
-            return response.json().get("data", [])
+            body = decode_json(response)
+            logger.debug("Pagar.me invoices listed: %s", LogBody(body))
+            return body.get("data", [])
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to list Pagar.me invoices: {e.response.json()}")
-            raise Exception(f"Failed to list Pagar.me invoices: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me invoices: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me invoices: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error listing Pagar.me invoices: {str(e)}")
+            logger.error("Unexpected error listing Pagar.me invoices: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
+    @staticmethod
+    def iter_invoices(subscription_id: str, params: Dict[str, Any] = None, created_since: DateFilter = None,
+                      created_until: DateFilter = None,
+                      page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """Percorre todas as páginas de faturas, buscando a próxima em segundo plano."""
+        url = f"{PagarMeInvoicesAPI.BASE_URL}/subscriptions/{subscription_id}/invoices"
+        return iter_pages(url, "invoices", params, page_size, created_since, created_until)
+
     @staticmethod
     def get_invoice(subscription_id: str, invoice_id: str) -> Dict[str, Any]:
         """Obtém detalhes de uma fatura específica."""
         url = f"{PagarMeInvoicesAPI.BASE_URL}/subscriptions/{subscription_id}/invoices/{invoice_id}"
-        headers = PagarMeInvoicesAPI._get_headers()
         try:
-            response = requests.get(url, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="invoices.get")
             response.raise_for_status()
-            logger.debug(f"Pagar.me invoice retrieved: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me invoice retrieved: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to get Pagar.me invoice: {e.response.json()}")
-            raise Exception(f"Failed to get Pagar.me invoice: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me invoice: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me invoice: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error getting Pagar.me invoice: {str(e)}")
+            logger.error("Unexpected error getting Pagar.me invoice: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,194 @@
+import bisect
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from app.pagarme.resilience import PagarMeResilience
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = tuple(
+    float(bucket) for bucket in os.getenv(
+        "PAGARME_LATENCY_BUCKETS", "0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30"
+    ).split(",")
+)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "total", "count")
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(LATENCY_BUCKETS, value)
+        if index < len(self.buckets):
+            self.buckets[index] += 1
+        self.total += value
+        self.count += 1
+
+
+class RequestSummary:
+    """Tempo e volume gastos com a Pagar.me durante uma requisição da nossa API."""
+
+    def __init__(self):
+        self.operations: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, operation: str, duration: float, bytes_out: int, bytes_in: int, retry: bool) -> None:
+        with self._lock:
+            entry = self.operations.setdefault(operation, [0, 0, 0.0, 0, 0])
+            entry[0] += 1
+            entry[1] += int(retry)
+            entry[2] += duration
+            entry[3] += bytes_out
+            entry[4] += bytes_in
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(entry[2] for entry in self.operations.values())
+
+    def server_timing(self) -> str:
+        """Formata o resumo como header Server-Timing (uma métrica por operação)."""
+        parts = [f"pagarme;dur={self.total_seconds * 1000:.1f}"]
+        for operation, (calls, _, seconds, _, _) in self.operations.items():
+            parts.append(f'pagarme-{operation.replace(".", "-")};dur={seconds * 1000:.1f};desc="{calls}x"')
+        return ", ".join(parts)
+
+    def __str__(self) -> str:
+        return ", ".join(
+            f"{operation}: calls={calls} retries={retries} time={seconds * 1000:.1f}ms out={out}B in={inbound}B"
+            for operation, (calls, retries, seconds, out, inbound) in self.operations.items()
+        )
+
+
+_current_summary: ContextVar[Optional[RequestSummary]] = ContextVar("pagarme_request_summary", default=None)
+
+
+class PagarMeMetrics:
+    """Métricas das chamadas feitas à Pagar.me, agregadas por operação (ex.: orders.create)."""
+
+    _latency: Dict[str, _Histogram] = {}
+    _statuses: Dict[Tuple[str, str], int] = {}
+    _bytes: Dict[Tuple[str, str], int] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def observe(operation: str, status: str, duration: float, bytes_out: int = 0,
+                bytes_in: int = 0, attempt: int = 0) -> None:
+        """Registra uma tentativa de chamada ao gateway."""
+        with PagarMeMetrics._lock:
+            histogram = PagarMeMetrics._latency.get(operation)
+            if histogram is None:
+                histogram = PagarMeMetrics._latency[operation] = _Histogram()
+            histogram.observe(duration)
+            key = (operation, status)
+            PagarMeMetrics._statuses[key] = PagarMeMetrics._statuses.get(key, 0) + 1
+            for direction, size in (("out", bytes_out), ("in", bytes_in)):
+                key = (operation, direction)
+                PagarMeMetrics._bytes[key] = PagarMeMetrics._bytes.get(key, 0) + size
+        summary = _current_summary.get()
+        if summary is not None:
+            summary.add(operation, duration, bytes_out, bytes_in, attempt > 0)
+
+    @staticmethod
+    def start_summary() -> Tuple[RequestSummary, object]:
+        """Inicia o resumo de chamadas da requisição atual. Retorna o resumo e o token para encerrá-lo."""
+        summary = RequestSummary()
+        return summary, _current_summary.set(summary)
+
+    @staticmethod
+    def end_summary(token) -> None:
+        _current_summary.reset(token)
+
+    @staticmethod
+    def render() -> str:
+        """Exporta as métricas no formato texto do Prometheus."""
+        with PagarMeMetrics._lock:
+            latency = {operation: (list(h.buckets), h.total, h.count) for operation, h in PagarMeMetrics._latency.items()}
+            statuses = dict(PagarMeMetrics._statuses)
+            sizes = dict(PagarMeMetrics._bytes)
+        resilience = PagarMeResilience.stats()
+
+        lines = [
+            "# HELP pagarme_request_duration_seconds Latency of Pagar.me API calls.",
+            "# TYPE pagarme_request_duration_seconds histogram",
+        ]
+        for operation, (buckets, total, count) in sorted(latency.items()):
+            labels = _labels(operation)
+            cumulative = 0
+            for bound, value in zip(LATENCY_BUCKETS, buckets):
+                cumulative += value
+                lines.append(f'pagarme_request_duration_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'pagarme_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"pagarme_request_duration_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"pagarme_request_duration_seconds_count{{{labels}}} {count}")
+
+        lines += [
+            "# HELP pagarme_requests_total Pagar.me API calls by response status.",
+            "# TYPE pagarme_requests_total counter",
+        ]
+        for (operation, status), value in sorted(statuses.items()):
+            lines.append(f'pagarme_requests_total{{{_labels(operation)},status="{status}"}} {value}')
+
+        lines += [
+            "# HELP pagarme_bytes_total Bytes sent to and received from the Pagar.me API.",
+            "# TYPE pagarme_bytes_total counter",
+        ]
+        for (operation, direction), value in sorted(sizes.items()):
+            lines.append(f'pagarme_bytes_total{{{_labels(operation)},direction="{direction}"}} {value}')
+
+        for counter, help_text in (("retries", "Retried Pagar.me API calls."),
+                                   ("trips", "Circuit breaker openings."),
+                                   ("short_circuits", "Calls rejected by an open circuit breaker."),
+                                   ("throttled", "Calls delayed by the outbound rate limiter."),
+                                   ("coalesced", "GETs served by an identical in-flight or recent call.")):
+            lines += [f"# HELP pagarme_{counter}_total {help_text}", f"# TYPE pagarme_{counter}_total counter"]
+            for operation, value in sorted(resilience[counter].items()):
+                lines.append(f"pagarme_{counter}_total{{{_labels(operation)}}} {value}")
+
+        lines += [
+            "# HELP pagarme_circuit_open Whether the circuit breaker of an operation is not closed.",
+            "# TYPE pagarme_circuit_open gauge",
+        ]
+        for operation, state in sorted(resilience["circuits"].items()):
+            lines.append(f"pagarme_circuit_open{{{_labels(operation)}}} {int(state != 'closed')}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(operation: str) -> str:
+    resource = operation.split(".", 1)[0]
+    return f'resource="{resource}",operation="{operation}"'
+
+
+def body_size(body) -> int:
+    """Tamanho em bytes do corpo de uma requisição já preparada."""
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode())
+    try:
+        return len(body)
+    except TypeError:
+        return 0
+
+
+async def pagarme_summary_middleware(request, call_next):
+    """Coleta as chamadas à Pagar.me feitas durante a requisição e as expõe no header Server-Timing."""
+    summary, token = PagarMeMetrics.start_summary()
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        PagarMeMetrics.end_summary(token)
+    if summary.operations:
+        response.headers["Server-Timing"] = summary.server_timing()
+        logger.info("Pagar.me calls for %s %s (%.1fms total, %.1fms in gateway): %s",
+                    request.method, request.url.path, (time.perf_counter() - started) * 1000,
+                    summary.total_seconds * 1000, summary)
+    return response
@@ -1,123 +1,247 @@
 import requests
-import os
-from dotenv import load_dotenv
-from typing import Dict, Any, List
+import httpx
+from typing import Dict, Any, Iterable, Iterator, List, Optional
 import logging
-import base64
 
-load_dotenv()
+from app.pagarme.client import PagarMeClient
+from app.pagarme.responses import decode_json, decode_error, LogBody
+from app.pagarme.pagination import iter_pages, DateFilter, DEFAULT_PAGE_SIZE
+from app.pagarme.async_client import AsyncPagarMeClient
+from app.pagarme.bulk import fetch_many, FetchResult, DEFAULT_CONCURRENCY
 
 logger = logging.getLogger(__name__)
 
 class PagarMeOrdersAPI:
-    BASE_URL = "https://api.pagar.me/core/v5"
-    API_KEY = os.getenv("PAGARME_API_KEY")
+    BASE_URL = PagarMeClient.BASE_URL
 
     @staticmethod
-    def _get_headers() -> Dict[str, str]:
-        """Retorna headers comuns para chamadas à API."""
-        return {
-            "Authorization": f"Basic {base64.b64encode(f'{PagarMeOrdersAPI.API_KEY}:'.encode()).decode()}",
-            "Content-Type": "application/json"
-        }
-
-    @staticmethod
-    def create_order(data: Dict[str, Any]) -> Dict[str, Any]:
-        """Cria um pedido na Pagar.me."""
+    def create_order(data: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Cria um pedido na Pagar.me. Com idempotency_key, repetir a chamada não duplica o pedido."""
         url = f"{PagarMeOrdersAPI.BASE_URL}/orders"
-        headers = PagarMeOrdersAPI._get_headers()
         try:
-            response = requests.post(url, json=data, headers=headers)
+            response = PagarMeClient.request("POST", url, operation="orders.create",
+                                             idempotency_key=idempotency_key, json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me order created: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me order created: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to create Pagar.me order: {e.response.json()}")
-            raise Exception(f"Failed to create Pagar.me order: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me order: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me order: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error creating Pagar.me order: {str(e)}")
+            logger.error("Unexpected error creating Pagar.me order: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def list_orders(params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Lista todos os pedidos."""
         url = f"{PagarMeOrdersAPI.BASE_URL}/orders"
-        headers = PagarMeOrdersAPI._get_headers()
         try:
-            response = requests.get(url, params=params or {}, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="orders.list", params=params or {})
             response.raise_for_status()
-            logger.debug(f"Pagar.me orders listed: {response.json()}")
-            return response.json().get("data", [])
+            body = decode_json(response)
+            logger.debug("Pagar.me orders listed: %s", LogBody(body))
+            return body.get("data", [])
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to list Pagar.me orders: {e.response.json()}")
-            raise Exception(f"Failed to list Pagar.me orders: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me orders: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me orders: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error listing Pagar.me orders: {str(e)}")
+            logger.error("Unexpected error listing Pagar.me orders: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
+    @staticmethod
+    def iter_orders(params: Dict[str, Any] = None, created_since: DateFilter = None,
+                    created_until: DateFilter = None,
+                    page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """Percorre todas as páginas de pedidos, buscando a próxima em segundo plano."""
+        url = f"{PagarMeOrdersAPI.BASE_URL}/orders"
+        return iter_pages(url, "orders", params, page_size, created_since, created_until)
+
+    @staticmethod
+    def get_many_orders(order_ids: Iterable[str],
+                        concurrency: int = DEFAULT_CONCURRENCY) -> Iterator[FetchResult]:
+        """Busca vários pedidos em paralelo, devolvendo cada resultado (ou erro) assim que termina."""
+        return fetch_many(PagarMeOrdersAPI.get_order, order_ids, "orders", concurrency)
+
     @staticmethod
     def get_order(order_id: str) -> Dict[str, Any]:
         """Obtém detalhes de um pedido específico."""
         url = f"{PagarMeOrdersAPI.BASE_URL}/orders/{order_id}"
-        headers = PagarMeOrdersAPI._get_headers()
         try:
-            response = requests.get(url, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="orders.get")
             response.raise_for_status()
-            logger.debug(f"Pagar.me order retrieved: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me order retrieved: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to get Pagar.me order: {e.response.json()}")
-            raise Exception(f"Failed to get Pagar.me order: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me order: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me order: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error getting Pagar.me order: {str(e)}")
+            logger.error("Unexpected error getting Pagar.me order: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def update_order(order_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza um pedido existente."""
         url = f"{PagarMeOrdersAPI.BASE_URL}/orders/{order_id}"
-        headers = PagarMeOrdersAPI._get_headers()
         try:
-            response = requests.patch(url, json=data, headers=headers)
+            response = PagarMeClient.request("PATCH", url, operation="orders.update", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me order updated: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me order updated: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to update Pagar.me order: {e.response.json()}")
-            raise Exception(f"Failed to update Pagar.me order: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me order: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me order: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error updating Pagar.me order: {str(e)}")
+            logger.error("Unexpected error updating Pagar.me order: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def delete_all_order_items(order_id: str) -> None:
         """Deleta todos os itens de um pedido."""
         url = f"{PagarMeOrdersAPI.BASE_URL}/orders/{order_id}/items"
-        headers = PagarMeOrdersAPI._get_headers()
         try:
-            response = requests.delete(url, headers=headers)
+            response = PagarMeClient.request("DELETE", url, operation="orders.delete_items")
             response.raise_for_status()
-            logger.debug(f"Pagar.me order items deleted: order_id={order_id}")
+            logger.debug("Pagar.me order items deleted: order_id=%s", order_id)
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to delete Pagar.me order items: {e.response.json()}")
-            raise Exception(f"Failed to delete Pagar.me order items: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to delete Pagar.me order items: %s", LogBody(error))
+            raise Exception(f"Failed to delete Pagar.me order items: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error deleting Pagar.me order items: {str(e)}")
+            logger.error("Unexpected error deleting Pagar.me order items: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def close_order(order_id: str) -> Dict[str, Any]:
         """Fecha um pedido."""
         url = f"{PagarMeOrdersAPI.BASE_URL}/orders/{order_id}/closed"
-        headers = PagarMeOrdersAPI._get_headers()
         try:
-            response = requests.post(url, headers=headers)
+            response = PagarMeClient.request("POST", url, operation="orders.close")
             response.raise_for_status()
-            logger.debug(f"Pagar.me order closed: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me order closed: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to close Pagar.me order: {e.response.json()}")
-            raise Exception(f"Failed to close Pagar.me order: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to close Pagar.me order: %s", LogBody(error))
+            raise Exception(f"Failed to close Pagar.me order: {error}")
+        except Exception as e:
+            logger.error("Unexpected error closing Pagar.me order: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+
+class AsyncPagarMeOrdersAPI:
+    BASE_URL = PagarMeOrdersAPI.BASE_URL
+
+    @staticmethod
+    async def create_order(data: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Cria um pedido na Pagar.me. Com idempotency_key, repetir a chamada não duplica o pedido."""
+        url = f"{AsyncPagarMeOrdersAPI.BASE_URL}/orders"
+        try:
+            response = await AsyncPagarMeClient.request("POST", url, operation="orders.create",
+                                                        idempotency_key=idempotency_key, json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me order created: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me order: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me order: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error closing Pagar.me order: {str(e)}")
-            raise Exception(f"Unexpected error: {str(e)}")
\ No newline at end of file
+            logger.error("Unexpected error creating Pagar.me order: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def list_orders(params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Lista todos os pedidos."""
+        url = f"{AsyncPagarMeOrdersAPI.BASE_URL}/orders"
+        try:
+            response = await AsyncPagarMeClient.request("GET", url, operation="orders.list", params=params or {})
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me orders listed: %s", LogBody(body))
+            return body.get("data", [])
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me orders: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me orders: {error}")
+        except Exception as e:
+            logger.error("Unexpected error listing Pagar.me orders: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def get_order(order_id: str) -> Dict[str, Any]:
+        """Obtém detalhes de um pedido específico."""
+        url = f"{AsyncPagarMeOrdersAPI.BASE_URL}/orders/{order_id}"
+        try:
+            response = await AsyncPagarMeClient.request("GET", url, operation="orders.get")
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me order retrieved: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me order: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me order: {error}")
+        except Exception as e:
+            logger.error("Unexpected error getting Pagar.me order: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def update_order(order_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Atualiza um pedido existente."""
+        url = f"{AsyncPagarMeOrdersAPI.BASE_URL}/orders/{order_id}"
+        try:
+            response = await AsyncPagarMeClient.request("PATCH", url, operation="orders.update", json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me order updated: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me order: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me order: {error}")
+        except Exception as e:
+            logger.error("Unexpected error updating Pagar.me order: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def delete_all_order_items(order_id: str) -> None:
+        """Deleta todos os itens de um pedido."""
+        url = f"{AsyncPagarMeOrdersAPI.BASE_URL}/orders/{order_id}/items"
+        try:
+            response = await AsyncPagarMeClient.request("DELETE", url, operation="orders.delete_items")
+            response.raise_for_status()
+            logger.debug("Pagar.me order items deleted: order_id=%s", order_id)
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to delete Pagar.me order items: %s", LogBody(error))
+            raise Exception(f"Failed to delete Pagar.me order items: {error}")
+        except Exception as e:
+            logger.error("Unexpected error deleting Pagar.me order items: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def close_order(order_id: str) -> Dict[str, Any]:
+        """Fecha um pedido."""
+        url = f"{AsyncPagarMeOrdersAPI.BASE_URL}/orders/{order_id}/closed"
+        try:
+            response = await AsyncPagarMeClient.request("POST", url, operation="orders.close")
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me order closed: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to close Pagar.me order: %s", LogBody(error))
+            raise Exception(f"Failed to close Pagar.me order: {error}")
+        except Exception as e:
+            logger.error("Unexpected error closing Pagar.me order: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
@@ -0,0 +1,75 @@
+import requests
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
+import logging
+
+from app.pagarme.client import PagarMeClient
+from app.pagarme.responses import decode_json, decode_error, LogBody
+
+logger = logging.getLogger(__name__)
+
+DateFilter = Optional[Union[str, date, datetime]]
+
+DEFAULT_PAGE_SIZE = 100
+
+
+def _format_date(value: DateFilter) -> Optional[str]:
+    """Converte filtros de data para o formato ISO aceito pela Pagar.me."""
+    if value is None or isinstance(value, str):
+        return value
+    return value.isoformat()
+
+
+def _fetch_page(url: str, params: Dict[str, Any], resource: str) -> Tuple[List[Dict[str, Any]], bool]:
+    """Busca uma página e indica se há uma próxima."""
+    try:
+        response = PagarMeClient.request("GET", url, operation=f"{resource}.list", params=params)
+        response.raise_for_status()
+        body = decode_json(response)
+    except requests.exceptions.HTTPError as e:
+        error = decode_error(e.response)
+        logger.error("Failed to list Pagar.me %s: %s", resource, LogBody(error))
+        raise Exception(f"Failed to list Pagar.me {resource}: {error}")
+    except Exception as e:
+        logger.error("Unexpected error listing Pagar.me %s: %s", resource, e)
+        raise Exception(f"Unexpected error: {str(e)}")
+
+    data = body.get("data", [])
+    paging = body.get("paging") or {}
+    has_next = bool(paging.get("next")) if "next" in paging else len(data) >= params["size"]
+    logger.debug("Pagar.me %s page %s fetched: %s items", resource, params['page'], len(data))
+    return data, has_next and bool(data)
+
+
+def iter_pages(url: str, resource: str, params: Dict[str, Any] = None, page_size: int = DEFAULT_PAGE_SIZE,
+               created_since: DateFilter = None, created_until: DateFilter = None) -> Iterator[Dict[str, Any]]:
+    """Percorre todas as páginas de um endpoint de listagem da Pagar.me.
+
+    A próxima página é buscada em segundo plano enquanto o chamador consome a
+    atual, de modo que no máximo duas páginas ficam em memória.
+    """
+    query = dict(params or {})
+    query["size"] = page_size
+    if created_since is not None:
+        query["created_since"] = _format_date(created_since)
+    if created_until is not None:
+        query["created_until"] = _format_date(created_until)
+    page = int(query.pop("page", 1))
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"pagarme-{resource}-prefetch")
+
+    def prefetch(number: int):
+        # Copia o contexto para que a chamada conte no resumo da requisição atual
+        return executor.submit(contextvars.copy_context().run, _fetch_page, url, {**query, "page": number}, resource)
+
+    try:
+        future = prefetch(page)
+        while future is not None:
+            data, has_next = future.result()
+            page += 1
+            future = prefetch(page) if has_next else None
+            yield from data
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
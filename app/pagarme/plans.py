@@ -1,90 +1,83 @@
 import requests
-import os
-from dotenv import load_dotenv
 from typing import Dict, Any, List
 import logging
-import base64
 
-load_dotenv()
+from app.pagarme.client import PagarMeClient
+from app.pagarme.responses import decode_json, decode_error, LogBody
 
 logger = logging.getLogger(__name__)
 
 class PagarMePlansAPI:
-    BASE_URL = "https://api.pagar.me/core/v5"
-    API_KEY = os.getenv("PAGARME_API_KEY")
-
-    @staticmethod
-    def _get_headers() -> Dict[str, str]:
-        """Retorna headers comuns para chamadas à API."""
-        return {
-            "Authorization": f"Basic {base64.b64encode(f'{PagarMePlansAPI.API_KEY}:'.encode()).decode()}",
-            "Content-Type": "application/json"
-        }
+    BASE_URL = PagarMeClient.BASE_URL
 
     @staticmethod
     def create_plan(data: Dict[str, Any]) -> Dict[str, Any]:
         """Cria um plano na Pagar.me."""
         url = f"{PagarMePlansAPI.BASE_URL}/plans"
-        headers = PagarMePlansAPI._get_headers()
         try:
-            response = requests.post(url, json=data, headers=headers)
+            response = PagarMeClient.request("POST", url, operation="plans.create", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me plan created: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me plan created: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to create Pagar.me plan: {e.response.json()}")
-            raise Exception(f"Failed to create Pagar.me plan: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me plan: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me plan: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error creating Pagar.me plan: {str(e)}")
+            logger.error("Unexpected error creating Pagar.me plan: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def list_plans(params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Lista todos os planos."""
         url = f"{PagarMePlansAPI.BASE_URL}/plans"
-        headers = PagarMePlansAPI._get_headers()
         try:
-            response = requests.get(url, params=params or {}, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="plans.list", params=params or {})
             response.raise_for_status()
-            logger.debug(f"Pagar.me plans listed: {response.json()}")
-            return response.json().get("data", [])
+            body = decode_json(response)
+            logger.debug("Pagar.me plans listed: %s", LogBody(body))
+            return body.get("data", [])
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to list Pagar.me plans: {e.response.json()}")
-            raise Exception(f"Failed to list Pagar.me plans: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me plans: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me plans: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error listing Pagar.me plans: {str(e)}")
+            logger.error("Unexpected error listing Pagar.me plans: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def get_plan(plan_id: str) -> Dict[str, Any]:
         """Obtém detalhes de um plano específico."""
         url = f"{PagarMePlansAPI.BASE_URL}/plans/{plan_id}"
-        headers = PagarMePlansAPI._get_headers()
         try:
-            response = requests.get(url, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="plans.get")
             response.raise_for_status()
-            logger.debug(f"Pagar.me plan retrieved: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me plan retrieved: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to get Pagar.me plan: {e.response.json()}")
-            raise Exception(f"Failed to get Pagar.me plan: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me plan: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me plan: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error getting Pagar.me plan: {str(e)}")
+            logger.error("Unexpected error getting Pagar.me plan: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def update_plan(plan_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza um plano existente."""
         url = f"{PagarMePlansAPI.BASE_URL}/plans/{plan_id}"
-        headers = PagarMePlansAPI._get_headers()
         try:
-            response = requests.patch(url, json=data, headers=headers)
+            response = PagarMeClient.request("PATCH", url, operation="plans.update", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me plan updated: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me plan updated: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to update Pagar.me plan: {e.response.json()}")
-            raise Exception(f"Failed to update Pagar.me plan: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me plan: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me plan: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error updating Pagar.me plan: {str(e)}")
+            logger.error("Unexpected error updating Pagar.me plan: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,207 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+_priority: ContextVar[str] = ContextVar("pagarme_priority", default=INTERACTIVE)
+
+
+class RateLimitTimeout(Exception):
+    """Não foi possível obter permissão para chamar a Pagar.me dentro do tempo máximo de espera."""
+
+    def __init__(self, bucket: str, waited: float):
+        self.bucket = bucket
+        self.waited = waited
+        super().__init__(f"Pagar.me {bucket} rate limit: no capacity after waiting {waited:.1f}s")
+
+
+class _MemoryStore:
+    """Baldes mantidos no próprio processo."""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, name: str, rate: float, burst: float, floor: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated_at = self._buckets.get(name, (burst, now))
+            tokens, wait = _consume(tokens, now - updated_at, rate, burst, floor)
+            self._buckets[name] = (tokens, now)
+            return wait
+
+
+class _SqliteStore:
+    """Baldes gravados em um arquivo SQLite local, compartilhados por todos os workers da máquina.
+
+    Se o arquivo continuar travado depois de timeout segundos (ou der outro
+    erro), a ficha é tirada de um balde local do processo: o limite fica menos
+    preciso por alguns instantes, mas a chamada à Pagar.me não falha por isso.
+    """
+
+    def __init__(self, path: str, timeout: float = 5):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._fallback = _MemoryStore()
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def take(self, name: str, rate: float, burst: float, floor: float) -> float:
+        try:
+            return self._take(name, rate, burst, floor)
+        except sqlite3.OperationalError as e:
+            logger.warning("Pagar.me rate limit store unavailable, using local bucket: %s", e)
+            return self._fallback.take(name, rate, burst, floor)
+
+    def _take(self, name: str, rate: float, burst: float, floor: float) -> float:
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Relógio de parede: monotonic não é comparável entre processos
+            now = time.time()
+            row = connection.execute("SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)).fetchone()
+            tokens, updated_at = row if row else (burst, now)
+            tokens, wait = _consume(tokens, max(0.0, now - updated_at), rate, burst, floor)
+            connection.execute(
+                "INSERT INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (name, tokens, now)
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        return wait
+
+
+def _consume(tokens: float, elapsed: float, rate: float, burst: float, floor: float) -> Tuple[float, float]:
+    """Repõe o balde e tenta consumir uma ficha sem deixá-lo abaixo de floor.
+
+    Retorna o novo saldo e quanto esperar antes de tentar de novo (0 se a ficha foi obtida).
+    """
+    tokens = min(burst, tokens + elapsed * rate)
+    if tokens - 1 >= floor:
+        return tokens - 1, 0.0
+    return tokens, (floor + 1 - tokens) / rate
+
+
+class PagarMeRateLimiter:
+    """Token bucket para as chamadas à Pagar.me, com baldes separados para leitura e escrita.
+
+    Chamadas em segundo plano (sincronizações, varreduras, importações) só
+    consomem fichas enquanto o balde estiver acima de uma reserva, que fica
+    disponível apenas para o tráfego interativo de doações.
+
+    Com PAGARME_RATE_LIMIT_DB definido os baldes ficam em um arquivo SQLite,
+    compartilhados por todos os processos que apontam para ele.
+    """
+    ENABLED = os.getenv("PAGARME_RATE_LIMIT_ENABLED", "true").lower() == "true"
+    READ_RATE = float(os.getenv("PAGARME_READ_RATE", "20"))
+    READ_BURST = float(os.getenv("PAGARME_READ_BURST", "40"))
+    WRITE_RATE = float(os.getenv("PAGARME_WRITE_RATE", "10"))
+    WRITE_BURST = float(os.getenv("PAGARME_WRITE_BURST", "20"))
+    BACKGROUND_RESERVE = float(os.getenv("PAGARME_BACKGROUND_RESERVE", "0.3"))
+    MAX_WAIT = float(os.getenv("PAGARME_RATE_LIMIT_MAX_WAIT", "30"))
+    STORE_PATH = os.getenv("PAGARME_RATE_LIMIT_DB")
+    STORE_TIMEOUT = float(os.getenv("PAGARME_RATE_LIMIT_DB_TIMEOUT", "5"))
+
+    _store = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_store():
+        if PagarMeRateLimiter._store is None:
+            with PagarMeRateLimiter._lock:
+                if PagarMeRateLimiter._store is None:
+                    path = PagarMeRateLimiter.STORE_PATH
+                    if path:
+                        PagarMeRateLimiter._store = _SqliteStore(path, PagarMeRateLimiter.STORE_TIMEOUT)
+                    else:
+                        PagarMeRateLimiter._store = _MemoryStore()
+        return PagarMeRateLimiter._store
+
+    @staticmethod
+    @contextmanager
+    def background() -> Iterator[None]:
+        """Marca as chamadas feitas dentro do bloco como tráfego de segundo plano."""
+        token = _priority.set(BACKGROUND)
+        try:
+            yield
+        finally:
+            _priority.reset(token)
+
+    @staticmethod
+    def _bucket(method: str) -> Tuple[str, float, float]:
+        if method.upper() in ("GET", "HEAD", "OPTIONS"):
+            return "read", PagarMeRateLimiter.READ_RATE, PagarMeRateLimiter.READ_BURST
+        return "write", PagarMeRateLimiter.WRITE_RATE, PagarMeRateLimiter.WRITE_BURST
+
+    @staticmethod
+    def try_acquire(method: str) -> Tuple[str, float]:
+        """Tenta obter uma ficha. Retorna o nome do balde e a espera necessária (0 se obtida)."""
+        name, rate, burst = PagarMeRateLimiter._bucket(method)
+        floor = burst * PagarMeRateLimiter.BACKGROUND_RESERVE if _priority.get() == BACKGROUND else 0.0
+        return name, PagarMeRateLimiter.get_store().take(name, rate, burst, floor)
+
+    @staticmethod
+    def acquire(method: str, waited: float = 0.0) -> Optional[float]:
+        """Obtém uma ficha ou retorna quanto esperar. Lança RateLimitTimeout se a espera exceder MAX_WAIT."""
+        if not PagarMeRateLimiter.ENABLED:
+            return None
+        name, wait = PagarMeRateLimiter.try_acquire(method)
+        if not wait:
+            return None
+        if waited + wait > PagarMeRateLimiter.MAX_WAIT:
+            raise RateLimitTimeout(name, waited)
+        return wait
+
+    @staticmethod
+    def wait(method: str) -> float:
+        """Bloqueia até obter uma ficha do balde correspondente ao método. Retorna o tempo esperado."""
+        waited = 0.0
+        while (delay := PagarMeRateLimiter.acquire(method, waited)) is not None:
+            time.sleep(delay)
+            waited += delay
+        return waited
+
+    @staticmethod
+    async def wait_async(method: str) -> float:
+        """Versão assíncrona de wait, que não bloqueia o event loop durante a espera.
+
+        Com os baldes em SQLite, cada tentativa (que pode aguardar o arquivo
+        destravar por até STORE_TIMEOUT) roda em uma thread; o balde em memória
+        é consultado direto no event loop.
+        """
+        offload = PagarMeRateLimiter.ENABLED and isinstance(PagarMeRateLimiter.get_store(), _SqliteStore)
+        waited = 0.0
+        while True:
+            if offload:
+                delay = await asyncio.to_thread(PagarMeRateLimiter.acquire, method, waited)
+            else:
+                delay = PagarMeRateLimiter.acquire(method, waited)
+            if delay is None:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
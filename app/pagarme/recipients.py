@@ -1,90 +1,181 @@
 import requests
 import os
-from dotenv import load_dotenv
+import httpx
 from typing import Dict, Any, List
 import logging
-import base64
 
-load_dotenv()
+from app.pagarme.client import PagarMeClient
+from app.pagarme.responses import decode_json, decode_error, LogBody
+from app.pagarme.cache import StaleWhileRevalidateCache
+from app.pagarme.async_client import AsyncPagarMeClient
 
 logger = logging.getLogger(__name__)
 
 class PagarMeRecipientsAPI:
-    BASE_URL = "https://api.pagar.me/core/v5"
-    API_KEY = os.getenv("PAGARME_API_KEY")
-
-    @staticmethod
-    def _get_headers() -> Dict[str, str]:
-        """Retorna headers comuns para chamadas à API."""
-        return {
-            "Authorization": f"Basic {base64.b64encode(f'{PagarMeRecipientsAPI.API_KEY}:'.encode()).decode()}",
-            "Content-Type": "application/json"
-        }
+    BASE_URL = PagarMeClient.BASE_URL
 
     @staticmethod
     def create_recipient(data: Dict[str, Any]) -> Dict[str, Any]:
         """Cria um recebedor na Pagar.me."""
         url = f"{PagarMeRecipientsAPI.BASE_URL}/recipients"
-        headers = PagarMeRecipientsAPI._get_headers()
         try:
-            response = requests.post(url, json=data, headers=headers)
+            response = PagarMeClient.request("POST", url, operation="recipients.create", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me recipient created: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me recipient created: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to create Pagar.me recipient: {e.response.json()}")
-            raise Exception(f"Failed to create Pagar.me recipient: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me recipient: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me recipient: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error creating Pagar.me recipient: {str(e)}")
+            logger.error("Unexpected error creating Pagar.me recipient: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def list_recipients(params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Lista todos os recebedores."""
         url = f"{PagarMeRecipientsAPI.BASE_URL}/recipients"
-        headers = PagarMeRecipientsAPI._get_headers()
         try:
-            response = requests.get(url, params=params or {}, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="recipients.list", params=params or {})
             response.raise_for_status()
-            logger.debug(f"Pagar.me recipients listed: {response.json()}")
-            return response.json().get("data", [])
+            body = decode_json(response)
+            logger.debug("Pagar.me recipients listed: %s", LogBody(body))
+            return body.get("data", [])
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to list Pagar.me recipients: {e.response.json()}")
-            raise Exception(f"Failed to list Pagar.me recipients: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me recipients: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me recipients: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error listing Pagar.me recipients: {str(e)}")
+            logger.error("Unexpected error listing Pagar.me recipients: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def get_recipient(recipient_id: str) -> Dict[str, Any]:
         """Obtém detalhes de um recebedor específico."""
         url = f"{PagarMeRecipientsAPI.BASE_URL}/recipients/{recipient_id}"
-        headers = PagarMeRecipientsAPI._get_headers()
         try:
-            response = requests.get(url, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="recipients.get")
             response.raise_for_status()
-            logger.debug(f"Pagar.me recipient retrieved: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me recipient retrieved: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to get Pagar.me recipient: {e.response.json()}")
-            raise Exception(f"Failed to get Pagar.me recipient: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me recipient: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me recipient: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error getting Pagar.me recipient: {str(e)}")
+            logger.error("Unexpected error getting Pagar.me recipient: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def update_recipient(recipient_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza um recebedor existente."""
         url = f"{PagarMeRecipientsAPI.BASE_URL}/recipients/{recipient_id}"
-        headers = PagarMeRecipientsAPI._get_headers()
         try:
-            response = requests.patch(url, json=data, headers=headers)
+            response = PagarMeClient.request("PATCH", url, operation="recipients.update", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me recipient updated: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me recipient updated: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to update Pagar.me recipient: {e.response.json()}")
-            raise Exception(f"Failed to update Pagar.me recipient: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me recipient: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me recipient: {error}")
+        except Exception as e:
+            logger.error("Unexpected error updating Pagar.me recipient: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+
+    @staticmethod
+    def get_cached_recipient(recipient_id: str) -> Dict[str, Any]:
+        """Obtém um recebedor servindo valores recentes do cache e atualizando-os em segundo plano."""
+        return recipient_cache.get(recipient_id)
+
+    @staticmethod
+    def invalidate_cached_recipient(recipient_id: str) -> None:
+        """Descarta os dados em cache de um recebedor."""
+        recipient_cache.invalidate(recipient_id)
+
+
+recipient_cache = StaleWhileRevalidateCache(
+    "recipient",
+    PagarMeRecipientsAPI.get_recipient,
+    soft_ttl=float(os.getenv("PAGARME_RECIPIENT_SOFT_TTL", "300")),
+    hard_ttl=float(os.getenv("PAGARME_RECIPIENT_HARD_TTL", "3600"))
+)
+
+class AsyncPagarMeRecipientsAPI:
+    BASE_URL = PagarMeRecipientsAPI.BASE_URL
+
+    @staticmethod
+    async def create_recipient(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Cria um recebedor na Pagar.me."""
+        url = f"{AsyncPagarMeRecipientsAPI.BASE_URL}/recipients"
+        try:
+            response = await AsyncPagarMeClient.request("POST", url, operation="recipients.create", json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me recipient created: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me recipient: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me recipient: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error updating Pagar.me recipient: {str(e)}")
-            raise Exception(f"Unexpected error: {str(e)}")
\ No newline at end of file
+            logger.error("Unexpected error creating Pagar.me recipient: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def list_recipients(params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Lista todos os recebedores."""
+        url = f"{AsyncPagarMeRecipientsAPI.BASE_URL}/recipients"
+        try:
+            response = await AsyncPagarMeClient.request("GET", url, operation="recipients.list", params=params or {})
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me recipients listed: %s", LogBody(body))
+            return body.get("data", [])
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me recipients: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me recipients: {error}")
+        except Exception as e:
+            logger.error("Unexpected error listing Pagar.me recipients: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def get_recipient(recipient_id: str) -> Dict[str, Any]:
+        """Obtém detalhes de um recebedor específico."""
+        url = f"{AsyncPagarMeRecipientsAPI.BASE_URL}/recipients/{recipient_id}"
+        try:
+            response = await AsyncPagarMeClient.request("GET", url, operation="recipients.get")
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me recipient retrieved: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me recipient: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me recipient: {error}")
+        except Exception as e:
+            logger.error("Unexpected error getting Pagar.me recipient: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def update_recipient(recipient_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Atualiza um recebedor existente."""
+        url = f"{AsyncPagarMeRecipientsAPI.BASE_URL}/recipients/{recipient_id}"
+        try:
+            response = await AsyncPagarMeClient.request("PATCH", url, operation="recipients.update", json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me recipient updated: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me recipient: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me recipient: {error}")
+        except Exception as e:
+            logger.error("Unexpected error updating Pagar.me recipient: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
@@ -1,73 +1,65 @@
 import requests
-import os
-from dotenv import load_dotenv
 from typing import Dict, Any
 import logging
-import base64
 
-load_dotenv()
+from app.pagarme.client import PagarMeClient
+from app.pagarme.responses import decode_json, decode_error, LogBody
 
 logger = logging.getLogger(__name__)
 
 class PagarMeRecurringSplitsAPI:
-    BASE_URL = "https://api.pagar.me/core/v5"
-    API_KEY = os.getenv("PAGARME_API_KEY")
-
-    @staticmethod
-    def _get_headers() -> Dict[str, str]:
-        """Retorna headers comuns para chamadas à API."""
-        return {
-            "Authorization": f"Basic {base64.b64encode(f'{PagarMeRecurringSplitsAPI.API_KEY}:'.encode()).decode()}",
-            "Content-Type": "application/json"
-        }
+    BASE_URL = PagarMeClient.BASE_URL
 
     @staticmethod
     def create_recurring_split(subscription_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Cria um split de recorrência na Pagar.me."""
         url = f"{PagarMeRecurringSplitsAPI.BASE_URL}/subscriptions/{subscription_id}/split"
-        headers = PagarMeRecurringSplitsAPI._get_headers()
         try:
-            response = requests.post(url, json=data, headers=headers)
+            response = PagarMeClient.request("POST", url, operation="recurring_splits.create", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me recurring split created: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me recurring split created: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to create Pagar.me recurring split: {e.response.json()}")
-            raise Exception(f"Failed to create Pagar.me recurring split: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me recurring split: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me recurring split: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error creating Pagar.me recurring split: {str(e)}")
+            logger.error("Unexpected error creating Pagar.me recurring split: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def get_recurring_split(subscription_id: str) -> Dict[str, Any]:
         """Obtém detalhes de um split de recorrência."""
         url = f"{PagarMeRecurringSplitsAPI.BASE_URL}/subscriptions/{subscription_id}/split"
-        headers = PagarMeRecurringSplitsAPI._get_headers()
         try:
-            response = requests.get(url, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="recurring_splits.get")
             response.raise_for_status()
-            logger.debug(f"Pagar.me recurring split retrieved: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me recurring split retrieved: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to get Pagar.me recurring split: {e.response.json()}")
-            raise Exception(f"Failed to get Pagar.me recurring split: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me recurring split: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me recurring split: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error getting Pagar.me recurring split: {str(e)}")
+            logger.error("Unexpected error getting Pagar.me recurring split: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def update_recurring_split(subscription_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza um split de recorrência."""
         url = f"{PagarMeRecurringSplitsAPI.BASE_URL}/subscriptions/{subscription_id}/split"
-        headers = PagarMeRecurringSplitsAPI._get_headers()
         try:
-            response = requests.patch(url, json=data, headers=headers)
+            response = PagarMeClient.request("PATCH", url, operation="recurring_splits.update", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me recurring split updated: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me recurring split updated: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to update Pagar.me recurring split: {e.response.json()}")
-            raise Exception(f"Failed to update Pagar.me recurring split: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me recurring split: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me recurring split: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error updating Pagar.me recurring split: {str(e)}")
+            logger.error("Unexpected error updating Pagar.me recurring split: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
\ No newline at end of file
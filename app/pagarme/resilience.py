@@ -0,0 +1,129 @@
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Métodos que podem ser repetidos com segurança sem chave de idempotência
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+# Status que indicam falha transitória do gateway
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Disparada quando o circuito de um endpoint da Pagar.me está aberto."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+        super().__init__(f"Pagar.me endpoint {endpoint} unavailable (circuit open, retry in {retry_in:.1f}s)")
+
+
+class CircuitBreaker:
+    """Circuit breaker de um endpoint: abre após falhas seguidas e meio-abre para sondar."""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, endpoint: str, failure_threshold: int, recovery_timeout: float):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Libera a chamada ou falha imediatamente se o circuito estiver aberto."""
+        with self._lock:
+            if self.state == CircuitBreaker.CLOSED:
+                return
+            elapsed = time.monotonic() - self.opened_at
+            if self.state == CircuitBreaker.OPEN and elapsed >= self.recovery_timeout:
+                self.state = CircuitBreaker.HALF_OPEN
+                self.probing = False
+                logger.info(f"Pagar.me circuit half-open: endpoint={self.endpoint}")
+            if self.state == CircuitBreaker.HALF_OPEN and not self.probing:
+                self.probing = True
+                return
+        PagarMeResilience.record("short_circuits", self.endpoint)
+        raise CircuitOpenError(self.endpoint, max(self.recovery_timeout - elapsed, 0.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CircuitBreaker.CLOSED:
+                logger.info(f"Pagar.me circuit closed: endpoint={self.endpoint}")
+            self.state = CircuitBreaker.CLOSED
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            should_trip = (self.state == CircuitBreaker.HALF_OPEN
+                           or (self.state == CircuitBreaker.CLOSED and self.failures >= self.failure_threshold))
+            if should_trip:
+                self.state = CircuitBreaker.OPEN
+                self.opened_at = time.monotonic()
+                self.probing = False
+        if should_trip:
+            PagarMeResilience.record("trips", self.endpoint)
+            logger.warning(f"Pagar.me circuit opened: endpoint={self.endpoint}, failures={self.failures}")
+
+
+class PagarMeResilience:
+    """Política de retentativas e registro de circuit breakers compartilhados pelos clientes da Pagar.me."""
+    MAX_RETRIES = int(os.getenv("PAGARME_MAX_RETRIES", "3"))
+    BACKOFF_BASE = float(os.getenv("PAGARME_BACKOFF_BASE", "0.2"))
+    BACKOFF_MAX = float(os.getenv("PAGARME_BACKOFF_MAX", "5"))
+    FAILURE_THRESHOLD = int(os.getenv("PAGARME_BREAKER_FAILURES", "5"))
+    RECOVERY_TIMEOUT = float(os.getenv("PAGARME_BREAKER_RECOVERY", "30"))
+
+    _breakers: Dict[str, CircuitBreaker] = {}
+    _counters: Dict[str, Dict[str, int]] = {"retries": {}, "trips": {}, "short_circuits": {}, "throttled": {},
+                                          "coalesced": {}}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_breaker(endpoint: str) -> CircuitBreaker:
+        breaker = PagarMeResilience._breakers.get(endpoint)
+        if breaker is None:
+            with PagarMeResilience._lock:
+                breaker = PagarMeResilience._breakers.setdefault(endpoint, CircuitBreaker(
+                    endpoint, PagarMeResilience.FAILURE_THRESHOLD, PagarMeResilience.RECOVERY_TIMEOUT))
+        return breaker
+
+    @staticmethod
+    def can_retry(method: str, idempotency_key: Optional[str]) -> bool:
+        """Só repete chamadas idempotentes ou protegidas por chave de idempotência."""
+        return method.upper() in IDEMPOTENT_METHODS or bool(idempotency_key)
+
+    @staticmethod
+    def backoff(attempt: int, retry_after: Optional[str] = None) -> float:
+        """Calcula a espera antes da próxima tentativa (backoff exponencial com jitter total)."""
+        if retry_after:
+            try:
+                return min(float(retry_after), PagarMeResilience.BACKOFF_MAX)
+            except ValueError:
+                pass
+        ceiling = min(PagarMeResilience.BACKOFF_MAX, PagarMeResilience.BACKOFF_BASE * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def record(counter: str, endpoint: str) -> None:
+        with PagarMeResilience._lock:
+            counters = PagarMeResilience._counters[counter]
+            counters[endpoint] = counters.get(endpoint, 0) + 1
+
+    @staticmethod
+    def stats() -> Dict[str, Dict]:
+        """Retorna contadores de retentativas e aberturas de circuito, e o estado de cada circuito."""
+        with PagarMeResilience._lock:
+            stats = {name: dict(values) for name, values in PagarMeResilience._counters.items()}
+            stats["circuits"] = {endpoint: breaker.state for endpoint, breaker in PagarMeResilience._breakers.items()}
+        return stats
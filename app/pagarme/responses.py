@@ -0,0 +1,55 @@
+import os
+from typing import Any, Union
+import logging
+
+import requests
+import httpx
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson é opcional
+    import json
+
+    _loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+LOG_BODY_LIMIT = int(os.getenv("PAGARME_LOG_BODY_LIMIT", "2000"))
+
+Response = Union[requests.Response, httpx.Response]
+
+
+class LogBody:
+    """Adia a renderização de um corpo de resposta até o log ser de fato emitido.
+
+    Usado como argumento %s do logger: se o nível estiver desabilitado o corpo
+    nunca é convertido em texto, e quando é, fica limitado a LOG_BODY_LIMIT caracteres.
+    """
+    __slots__ = ("body",)
+
+    def __init__(self, body: Any):
+        self.body = body
+
+    def __str__(self) -> str:
+        text = str(self.body)
+        if len(text) > LOG_BODY_LIMIT:
+            return f"{text[:LOG_BODY_LIMIT]}... ({len(text)} chars)"
+        return text
+
+
+def decode_json(response: Response) -> Any:
+    """Decodifica o corpo JSON de uma resposta uma única vez. Corpo vazio retorna None."""
+    content = response.content
+    if not content:
+        return None
+    return _loads(content)
+
+
+def decode_error(response: Response) -> Any:
+    """Decodifica o corpo de uma resposta de erro, caindo para o texto bruto se não for JSON."""
+    try:
+        return decode_json(response)
+    except ValueError:
+        return response.text
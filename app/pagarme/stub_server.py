@@ -0,0 +1,473 @@
+"""Servidor local que imita a API v5 da Pagar.me para testes de carga.
+
+Uso:
+    uvicorn app.pagarme.stub_server:app --port 8090
+    PAGARME_BASE_URL=http://localhost:8090/core/v5 uvicorn app.main:app
+
+Configuração por variáveis de ambiente (ou em tempo de execução via
+POST /__stub/config):
+    STUB_LATENCY        distribuição da latência em ms: "fixed:50", "uniform:20,120"
+                        ou "lognormal:80,0.5" (mediana, sigma). Padrão: "fixed:0"
+    STUB_ERROR_RATE     fração de respostas 5xx/429 aleatórias (0 a 1). Padrão: 0
+    STUB_ERROR_STATUSES status usados nas falhas injetadas. Padrão: "500,502,503,504,429"
+    STUB_WEBHOOK_URL    URL que recebe os webhooks (ex.: http://localhost:8000/webhooks/pagarme)
+    STUB_WEBHOOK_DELAY  atraso em ms entre a criação do pedido e o webhook. Padrão: 1000
+    STUB_PAID_RATE      fração de pedidos que terminam pagos; os demais falham. Padrão: 1
+"""
+import asyncio
+import logging
+import os
+import random
+import uuid
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import httpx
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+class StubConfig:
+    """Configuração mutável do servidor de testes."""
+    latency = os.getenv("STUB_LATENCY", "fixed:0")
+    error_rate = float(os.getenv("STUB_ERROR_RATE", "0"))
+    error_statuses = [int(s) for s in os.getenv("STUB_ERROR_STATUSES", "500,502,503,504,429").split(",")]
+    webhook_url = os.getenv("STUB_WEBHOOK_URL")
+    webhook_delay = float(os.getenv("STUB_WEBHOOK_DELAY", "1000"))
+    paid_rate = float(os.getenv("STUB_PAID_RATE", "1"))
+
+    @staticmethod
+    def sample_latency() -> float:
+        """Sorteia a latência de uma resposta, em segundos."""
+        kind, _, raw = StubConfig.latency.partition(":")
+        values = [float(v) for v in raw.split(",") if v]
+        if kind == "uniform":
+            millis = random.uniform(values[0], values[1])
+        elif kind == "lognormal":
+            millis = random.lognormvariate(0, values[1] if len(values) > 1 else 0.5) * values[0]
+        else:
+            millis = values[0] if values else 0
+        return max(millis, 0) / 1000
+
+    @staticmethod
+    def as_dict() -> Dict[str, Any]:
+        return {
+            "latency": StubConfig.latency,
+            "error_rate": StubConfig.error_rate,
+            "error_statuses": StubConfig.error_statuses,
+            "webhook_url": StubConfig.webhook_url,
+            "webhook_delay": StubConfig.webhook_delay,
+            "paid_rate": StubConfig.paid_rate,
+        }
+
+
+class StubStore:
+    """Armazenamento em memória dos recursos criados no servidor de testes."""
+    customers: Dict[str, Dict[str, Any]] = {}
+    addresses: Dict[str, Dict[str, Any]] = {}
+    cards: Dict[str, Dict[str, Any]] = {}
+    orders: Dict[str, Dict[str, Any]] = {}
+    charges: Dict[str, Dict[str, Any]] = {}
+    subscriptions: Dict[str, Dict[str, Any]] = {}
+    cycles: Dict[str, List[Dict[str, Any]]] = {}
+    invoices: Dict[str, List[Dict[str, Any]]] = {}
+    recipients: Dict[str, Dict[str, Any]] = {}
+    transfers: Dict[str, Dict[str, Any]] = {}
+    webhooks_sent = 0
+
+    @staticmethod
+    def new_id(prefix: str) -> str:
+        return f"{prefix}_{uuid.uuid4().hex[:16]}"
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def _get_or_404(collection: Dict[str, Dict[str, Any]], resource_id: str) -> Dict[str, Any]:
+    if resource_id not in collection:
+        raise HTTPException(status_code=404, detail={"message": f"{resource_id} not found"})
+    return collection[resource_id]
+
+
+def _paginate(items: List[Dict[str, Any]], request: Request) -> Dict[str, Any]:
+    page = int(request.query_params.get("page", 1))
+    size = int(request.query_params.get("size", 10))
+    since = request.query_params.get("created_since")
+    until = request.query_params.get("created_until")
+    if since:
+        items = [item for item in items if item["created_at"] >= since]
+    if until:
+        items = [item for item in items if item["created_at"] <= until]
+    start = (page - 1) * size
+    data = items[start:start + size]
+    has_next = start + size < len(items)
+    return {
+        "data": data,
+        "paging": {"total": len(items), "next": f"?page={page + 1}&size={size}" if has_next else None}
+    }
+
+
+app = FastAPI(title="Pagar.me stub")
+router = APIRouter(prefix="/core/v5")
+
+
+@app.middleware("http")
+async def inject_latency_and_errors(request: Request, call_next):
+    """Aplica a latência configurada e injeta falhas na taxa configurada."""
+    if request.url.path.startswith("/__stub"):
+        return await call_next(request)
+    await asyncio.sleep(StubConfig.sample_latency())
+    if StubConfig.error_rate and random.random() < StubConfig.error_rate:
+        status = random.choice(StubConfig.error_statuses)
+        return JSONResponse(status_code=status, content={"message": "Injected failure"})
+    return await call_next(request)
+
+
+@app.get("/__stub/config")
+def get_config():
+    return StubConfig.as_dict()
+
+
+@app.post("/__stub/config")
+def update_config(data: Dict[str, Any]):
+    """Altera a configuração em tempo de execução (ex.: durante um teste de carga)."""
+    for key, value in data.items():
+        if key not in StubConfig.as_dict():
+            raise HTTPException(status_code=400, detail=f"Unknown config key: {key}")
+        setattr(StubConfig, key, value)
+    return StubConfig.as_dict()
+
+
+@app.get("/__stub/stats")
+def get_stats():
+    return {
+        "customers": len(StubStore.customers),
+        "cards": len(StubStore.cards),
+        "orders": len(StubStore.orders),
+        "subscriptions": len(StubStore.subscriptions),
+        "recipients": len(StubStore.recipients),
+        "webhooks_sent": StubStore.webhooks_sent,
+    }
+
+
+# Clientes e endereços
+
+@router.post("/customers")
+def create_customer(data: Dict[str, Any]):
+    customer = {**data, "id": StubStore.new_id("cus"), "created_at": _now(), "updated_at": _now()}
+    StubStore.customers[customer["id"]] = customer
+    return customer
+
+
+@router.get("/customers")
+def list_customers(request: Request):
+    return _paginate(list(StubStore.customers.values()), request)
+
+
+@router.get("/customers/{customer_id}")
+def get_customer(customer_id: str):
+    return _get_or_404(StubStore.customers, customer_id)
+
+
+@router.patch("/customers/{customer_id}")
+def update_customer(customer_id: str, data: Dict[str, Any]):
+    customer = _get_or_404(StubStore.customers, customer_id)
+    customer.update(data, updated_at=_now())
+    return customer
+
+
+@router.delete("/customers/{customer_id}")
+def delete_customer(customer_id: str):
+    _get_or_404(StubStore.customers, customer_id)
+    return StubStore.customers.pop(customer_id)
+
+
+@router.post("/customers/{customer_id}/addresses")
+def create_address(customer_id: str, data: Dict[str, Any]):
+    _get_or_404(StubStore.customers, customer_id)
+    address = {**data, "id": StubStore.new_id("addr"), "customer_id": customer_id, "created_at": _now()}
+    StubStore.addresses[address["id"]] = address
+    return address
+
+
+@router.get("/customers/{customer_id}/addresses")
+def list_addresses(customer_id: str, request: Request):
+    items = [a for a in StubStore.addresses.values() if a["customer_id"] == customer_id]
+    return _paginate(items, request)
+
+
+# Cartões e BINs
+
+@router.post("/cards")
+def create_card(data: Dict[str, Any]):
+    number = str(data.get("number", ""))
+    if data.get("expiration_date") in ("0000", "00/00"):
+        raise HTTPException(status_code=422, detail={"message": "Card expired"})
+    card = {
+        "id": StubStore.new_id("card"),
+        "first_six_digits": number[:6],
+        "last_four_digits": number[-4:],
+        "brand": "Visa" if number.startswith("4") else "Mastercard",
+        "holder_name": data.get("holder_name"),
+        "exp_month": int(str(data.get("expiration_date", "0000"))[:2] or 0),
+        "exp_year": int(str(data.get("expiration_date", "0000"))[-2:] or 0),
+        "status": "active",
+        "created_at": _now(),
+    }
+    StubStore.cards[card["id"]] = card
+    return card
+
+
+@router.get("/cards")
+def list_cards(request: Request):
+    return _paginate(list(StubStore.cards.values()), request)
+
+
+@router.get("/cards/{card_id}")
+def get_card(card_id: str):
+    return _get_or_404(StubStore.cards, card_id)
+
+
+@router.get("/bins/{bin_number}")
+def get_bin(bin_number: str):
+    if bin_number.startswith("0"):
+        raise HTTPException(status_code=404, detail={"message": "Bin not found"})
+    return {"brand": "visa" if bin_number.startswith("4") else "mastercard", "bin": bin_number,
+            "issuer": "Stub Bank", "type": "credit"}
+
+
+# Pedidos e cobranças
+
+def _build_charge(order: Dict[str, Any], payment: Dict[str, Any]) -> Dict[str, Any]:
+    method = payment.get("payment_method")
+    charge_id = StubStore.new_id("ch")
+    last_transaction: Dict[str, Any] = {"id": StubStore.new_id("tran"), "transaction_type": method}
+    status = "pending"
+    if method == "boleto":
+        last_transaction.update(url=f"https://stub.pagar.me/boleto/{charge_id}", barcode="0" * 44)
+    elif method == "pix":
+        last_transaction.update(qr_code=f"00020126stub{charge_id}", qr_code_url=f"https://stub.pagar.me/pix/{charge_id}")
+    elif method == "credit_card":
+        status = "paid" if random.random() < StubConfig.paid_rate else "failed"
+        if status == "failed":
+            last_transaction["refuse_reason"] = "Stub refused"
+    return {
+        "id": charge_id, "code": order["code"], "amount": payment.get("amount", order["amount"]),
+        "status": status, "payment_method": method, "order_id": order["id"],
+        "last_transaction": last_transaction, "created_at": _now(), "updated_at": _now(),
+    }
+
+
+async def _send_webhook(event: str, data: Dict[str, Any]) -> None:
+    if not StubConfig.webhook_url:
+        return
+    payload = {"id": StubStore.new_id("hook"), "type": event, "created_at": _now(), "data": data}
+    try:
+        async with httpx.AsyncClient(timeout=10) as client:
+            await client.post(StubConfig.webhook_url, json=payload)
+        StubStore.webhooks_sent += 1
+    except httpx.HTTPError as e:
+        logger.warning(f"Stub webhook {event} failed: {str(e)}")
+
+
+async def _settle_order(order_id: str) -> None:
+    """Simula a confirmação assíncrona do pagamento e notifica a aplicação."""
+    await asyncio.sleep(StubConfig.webhook_delay / 1000)
+    order = StubStore.orders.get(order_id)
+    if not order or order["status"] != "pending":
+        return
+    status = "paid" if random.random() < StubConfig.paid_rate else "failed"
+    order.update(status=status, updated_at=_now())
+    for charge in order["charges"]:
+        charge.update(status=status, updated_at=_now())
+    await _send_webhook(f"order.{status}", order)
+
+
+@router.post("/orders")
+async def create_order(data: Dict[str, Any], request: Request):
+    idempotency_key = request.headers.get("Idempotency-Key")
+    if idempotency_key:
+        for existing in StubStore.orders.values():
+            if existing.get("idempotency_key") == idempotency_key:
+                return existing
+    amount = sum(item.get("amount", 0) * item.get("quantity", 1) for item in data.get("items", []))
+    order = {
+        "id": StubStore.new_id("or"), "code": uuid.uuid4().hex[:10].upper(), "amount": amount,
+        "customer_id": data.get("customer_id"), "items": data.get("items", []), "status": "pending",
+        "idempotency_key": idempotency_key, "metadata": data.get("metadata") or {},
+        "created_at": _now(), "updated_at": _now(),
+    }
+    order["charges"] = [_build_charge(order, payment) for payment in data.get("payments", [])]
+    for charge in order["charges"]:
+        StubStore.charges[charge["id"]] = charge
+    if order["charges"] and all(charge["status"] != "pending" for charge in order["charges"]):
+        order["status"] = order["charges"][0]["status"]
+    StubStore.orders[order["id"]] = order
+    if order["status"] == "pending":
+        asyncio.create_task(_settle_order(order["id"]))
+    else:
+        asyncio.create_task(_send_webhook(f"order.{order['status']}", order))
+    return order
+
+
+@router.get("/orders")
+def list_orders(request: Request):
+    return _paginate(list(StubStore.orders.values()), request)
+
+
+@router.get("/orders/{order_id}")
+def get_order(order_id: str):
+    return _get_or_404(StubStore.orders, order_id)
+
+
+@router.post("/orders/{order_id}/closed")
+def close_order(order_id: str):
+    order = _get_or_404(StubStore.orders, order_id)
+    order.update(closed=True, updated_at=_now())
+    return order
+
+
+@router.get("/charges")
+def list_charges(request: Request):
+    return _paginate(list(StubStore.charges.values()), request)
+
+
+@router.get("/charges/{charge_id}")
+def get_charge(charge_id: str):
+    return _get_or_404(StubStore.charges, charge_id)
+
+
+@router.post("/charges/{charge_id}/cancel")
+async def cancel_charge(charge_id: str):
+    charge = _get_or_404(StubStore.charges, charge_id)
+    charge.update(status="canceled", updated_at=_now())
+    order = StubStore.orders.get(charge["order_id"])
+    if order:
+        order.update(status="canceled", updated_at=_now())
+        asyncio.create_task(_send_webhook("order.canceled", order))
+    return charge
+
+
+@router.post("/charges/{charge_id}/capture")
+def capture_charge(charge_id: str):
+    charge = _get_or_404(StubStore.charges, charge_id)
+    charge.update(status="paid", updated_at=_now())
+    return charge
+
+
+# Assinaturas
+
+@router.post("/subscriptions")
+def create_subscription(data: Dict[str, Any]):
+    subscription = {**data, "id": StubStore.new_id("sub"), "status": "active",
+                    "created_at": _now(), "updated_at": _now()}
+    StubStore.subscriptions[subscription["id"]] = subscription
+    # Primeiro ciclo e fatura, como a Pagar.me gera na criação
+    cycle = {"id": StubStore.new_id("cycle"), "cycle": 1, "status": "billed",
+             "start_at": _now(), "billing_at": _now(), "created_at": _now()}
+    amount = sum((item.get("pricing_scheme") or {}).get("price", 0) * item.get("quantity", 1)
+                 for item in data.get("items", []))
+    invoice = {"id": StubStore.new_id("in"), "status": "paid", "amount": amount,
+               "subscription": {"id": subscription["id"]}, "cycle": cycle,
+               "charge": {"id": StubStore.new_id("ch")}, "due_at": _now(),
+               "created_at": _now(), "updated_at": _now()}
+    StubStore.cycles[subscription["id"]] = [cycle]
+    StubStore.invoices[subscription["id"]] = [invoice]
+    return subscription
+
+
+@router.get("/subscriptions")
+def list_subscriptions(request: Request):
+    return _paginate(list(StubStore.subscriptions.values()), request)
+
+
+@router.get("/subscriptions/{subscription_id}")
+def get_subscription(subscription_id: str):
+    return _get_or_404(StubStore.subscriptions, subscription_id)
+
+
+@router.get("/subscriptions/{subscription_id}/cycles")
+def list_cycles(subscription_id: str, request: Request):
+    _get_or_404(StubStore.subscriptions, subscription_id)
+    return _paginate(StubStore.cycles.get(subscription_id, []), request)
+
+
+@router.get("/subscriptions/{subscription_id}/invoices")
+def list_invoices(subscription_id: str, request: Request):
+    _get_or_404(StubStore.subscriptions, subscription_id)
+    return _paginate(StubStore.invoices.get(subscription_id, []), request)
+
+
+@router.post("/subscriptions/{subscription_id}/cancel")
+def cancel_subscription(subscription_id: str):
+    subscription = _get_or_404(StubStore.subscriptions, subscription_id)
+    subscription.update(status="canceled", canceled_at=_now(), updated_at=_now())
+    return subscription
+
+
+# Recebedores, saldo e transferências
+
+@router.post("/recipients")
+def create_recipient(data: Dict[str, Any]):
+    recipient = {**data, "id": StubStore.new_id("re"), "status": "active",
+                 "created_at": _now(), "updated_at": _now()}
+    StubStore.recipients[recipient["id"]] = recipient
+    return recipient
+
+
+@router.get("/recipients")
+def list_recipients(request: Request):
+    return _paginate(list(StubStore.recipients.values()), request)
+
+
+@router.get("/recipients/{recipient_id}")
+def get_recipient(recipient_id: str):
+    return StubStore.recipients.get(recipient_id) or {"id": recipient_id, "status": "active", "created_at": _now()}
+
+
+@router.patch("/recipients/{recipient_id}")
+def update_recipient(recipient_id: str, data: Dict[str, Any]):
+    recipient = _get_or_404(StubStore.recipients, recipient_id)
+    recipient.update(data, updated_at=_now())
+    return recipient
+
+
+@router.get("/recipients/{recipient_id}/balance")
+def get_balance(recipient_id: str):
+    paid_out = sum(t["amount"] for t in StubStore.transfers.values() if t.get("recipient_id") == recipient_id)
+    return {"currency": "BRL", "available_amount": max(10_000_000 - paid_out, 0),
+            "waiting_funds_amount": 0, "transferred_amount": paid_out, "recipient": {"id": recipient_id}}
+
+
+@router.post("/transfers")
+def create_transfer(data: Dict[str, Any], request: Request):
+    idempotency_key = request.headers.get("Idempotency-Key")
+    if idempotency_key:
+        for existing in StubStore.transfers.values():
+            if existing.get("idempotency_key") == idempotency_key:
+                return existing
+    transfer = {**data, "id": StubStore.new_id("tran"), "status": "pending",
+                "idempotency_key": idempotency_key, "created_at": _now()}
+    StubStore.transfers[transfer["id"]] = transfer
+    return transfer
+
+
+@router.get("/transfers")
+def list_transfers(request: Request):
+    return _paginate(list(StubStore.transfers.values()), request)
+
+
+@router.get("/transfers/{transfer_id}")
+def get_transfer(transfer_id: str):
+    return _get_or_404(StubStore.transfers, transfer_id)
+
+
+@router.post("/recipients/{recipient_id}/withdrawals")
+def create_withdrawal(recipient_id: str, data: Dict[str, Any], request: Request):
+    return create_transfer({**data, "recipient_id": recipient_id}, request)
+
+
+app.include_router(router)
@@ -1,175 +1,357 @@
 import requests
-import os
-from dotenv import load_dotenv
-from typing import Dict, Any, List
+import httpx
+from typing import Dict, Any, Iterable, Iterator, List
 import logging
-import base64
 
-load_dotenv()
+from app.pagarme.client import PagarMeClient
+from app.pagarme.responses import decode_json, decode_error, LogBody
+from app.pagarme.pagination import iter_pages, DateFilter, DEFAULT_PAGE_SIZE
+from app.pagarme.async_client import AsyncPagarMeClient
+from app.pagarme.bulk import fetch_many, FetchResult, DEFAULT_CONCURRENCY
 
 logger = logging.getLogger(__name__)
 
 class PagarMeSubscriptionsAPI:
-    BASE_URL = "https://api.pagar.me/core/v5"
-    API_KEY = os.getenv("PAGARME_API_KEY")
-
-    @staticmethod
-    def _get_headers() -> Dict[str, str]:
-        """Retorna headers comuns para chamadas à API."""
-        return {
-            "Authorization": f"Basic {base64.b64encode(f'{PagarMeSubscriptionsAPI.API_KEY}:'.encode()).decode()}",
-            "Content-Type": "application/json"
-        }
+    BASE_URL = PagarMeClient.BASE_URL
 
     @staticmethod
     def create_subscription(data: Dict[str, Any]) -> Dict[str, Any]:
         """Cria uma assinatura na Pagar.me."""
         url = f"{PagarMeSubscriptionsAPI.BASE_URL}/subscriptions"
-        headers = PagarMeSubscriptionsAPI._get_headers()
         try:
-            response = requests.post(url, json=data, headers=headers)
+            response = PagarMeClient.request("POST", url, operation="subscriptions.create", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me subscription created: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscription created: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to create Pagar.me subscription: {e.response.json()}")
-            raise Exception(f"Failed to create Pagar.me subscription: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me subscription: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me subscription: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error creating Pagar.me subscription: {str(e)}")
+            logger.error("Unexpected error creating Pagar.me subscription: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def list_subscriptions(params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Lista todas as assinaturas."""
         url = f"{PagarMeSubscriptionsAPI.BASE_URL}/subscriptions"
-        headers = PagarMeSubscriptionsAPI._get_headers()
         try:
-            response = requests.get(url, params=params or {}, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="subscriptions.list", params=params or {})
             response.raise_for_status()
-            logger.debug(f"Pagar.me subscriptions listed: {response.json()}")
-            return response.json().get("data", [])
+            body = decode_json(response)
+            logger.debug("Pagar.me subscriptions listed: %s", LogBody(body))
+            return body.get("data", [])
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to list Pagar.me subscriptions: {e.response.json()}")
-            raise Exception(f"Failed to list Pagar.me subscriptions: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me subscriptions: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me subscriptions: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error listing Pagar.me subscriptions: {str(e)}")
+            logger.error("Unexpected error listing Pagar.me subscriptions: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
+    @staticmethod
+    def iter_subscriptions(params: Dict[str, Any] = None, created_since: DateFilter = None,
+                           created_until: DateFilter = None,
+                           page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """Percorre todas as páginas de assinaturas, buscando a próxima em segundo plano."""
+        url = f"{PagarMeSubscriptionsAPI.BASE_URL}/subscriptions"
+        return iter_pages(url, "subscriptions", params, page_size, created_since, created_until)
+
+    @staticmethod
+    def get_many_subscriptions(subscription_ids: Iterable[str],
+                               concurrency: int = DEFAULT_CONCURRENCY) -> Iterator[FetchResult]:
+        """Busca várias assinaturas em paralelo, devolvendo cada resultado (ou erro) assim que termina."""
+        return fetch_many(PagarMeSubscriptionsAPI.get_subscription, subscription_ids, "subscriptions", concurrency)
+
     @staticmethod
     def get_subscription(subscription_id: str) -> Dict[str, Any]:
         """Obtém detalhes de uma assinatura específica."""
         url = f"{PagarMeSubscriptionsAPI.BASE_URL}/subscriptions/{subscription_id}"
-        headers = PagarMeSubscriptionsAPI._get_headers()
         try:
-            response = requests.get(url, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="subscriptions.get")
             response.raise_for_status()
-            logger.debug(f"Pagar.me subscription retrieved: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscription retrieved: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to get Pagar.me subscription: {e.response.json()}")
-            raise Exception(f"Failed to get Pagar.me subscription: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me subscription: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me subscription: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error getting Pagar.me subscription: {str(e)}")
+            logger.error("Unexpected error getting Pagar.me subscription: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def update_subscription(subscription_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza uma assinatura existente."""
         url = f"{PagarMeSubscriptionsAPI.BASE_URL}/subscriptions/{subscription_id}"
-        headers = PagarMeSubscriptionsAPI._get_headers()
         try:
-            response = requests.patch(url, json=data, headers=headers)
+            response = PagarMeClient.request("PATCH", url, operation="subscriptions.update", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me subscription updated: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscription updated: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to update Pagar.me subscription: {e.response.json()}")
-            raise Exception(f"Failed to update Pagar.me subscription: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me subscription: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me subscription: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error updating Pagar.me subscription: {str(e)}")
+            logger.error("Unexpected error updating Pagar.me subscription: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def update_subscription_card(subscription_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza o cartão de uma assinatura."""
         url = f"{PagarMeSubscriptionsAPI.BASE_URL}/subscriptions/{subscription_id}/card"
-        headers = PagarMeSubscriptionsAPI._get_headers()
         try:
-            response = requests.patch(url, json=data, headers=headers)
+            response = PagarMeClient.request("PATCH", url, operation="subscriptions.update_card", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me subscription card updated: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscription card updated: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to update Pagar.me subscription card: {e.response.json()}")
-            raise Exception(f"Failed to update Pagar.me subscription card: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me subscription card: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me subscription card: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error updating Pagar.me subscription card: {str(e)}")
+            logger.error("Unexpected error updating Pagar.me subscription card: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def update_subscription_payment_method(subscription_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza o método de pagamento de uma assinatura."""
         url = f"{PagarMeSubscriptionsAPI.BASE_URL}/subscriptions/{subscription_id}/payment-method"
-        headers = PagarMeSubscriptionsAPI._get_headers()
         try:
-            response = requests.patch(url, json=data, headers=headers)
+            response = PagarMeClient.request("PATCH", url, operation="subscriptions.update_payment_method", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me subscription payment method updated: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscription payment method updated: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to update Pagar.me subscription payment method: {e.response.json()}")
-            raise Exception(f"Failed to update Pagar.me subscription payment method: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me subscription payment method: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me subscription payment method: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error updating Pagar.me subscription payment method: {str(e)}")
+            logger.error("Unexpected error updating Pagar.me subscription payment method: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def update_subscription_due_date(subscription_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza a data de vencimento de uma assinatura."""
         url = f"{PagarMeSubscriptionsAPI.BASE_URL}/subscriptions/{subscription_id}/due-date"
-        headers = PagarMeSubscriptionsAPI._get_headers()
         try:
-            response = requests.patch(url, json=data, headers=headers)
+            response = PagarMeClient.request("PATCH", url, operation="subscriptions.update_due_date", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me subscription due date updated: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscription due date updated: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to update Pagar.me subscription due date: {e.response.json()}")
-            raise Exception(f"Failed to update Pagar.me subscription due date: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me subscription due date: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me subscription due date: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error updating Pagar.me subscription due date: {str(e)}")
+            logger.error("Unexpected error updating Pagar.me subscription due date: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def update_subscription_minimum_price(subscription_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Atualiza o preço mínimo de uma assinatura."""
         url = f"{PagarMeSubscriptionsAPI.BASE_URL}/subscriptions/{subscription_id}/minimum-price"
-        headers = PagarMeSubscriptionsAPI._get_headers()
         try:
-            response = requests.patch(url, json=data, headers=headers)
+            response = PagarMeClient.request("PATCH", url, operation="subscriptions.update_minimum_price", json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me subscription minimum price updated: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscription minimum price updated: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to update Pagar.me subscription minimum price: {e.response.json()}")
-            raise Exception(f"Failed to update Pagar.me subscription minimum price: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me subscription minimum price: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me subscription minimum price: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error updating Pagar.me subscription minimum price: {str(e)}")
+            logger.error("Unexpected error updating Pagar.me subscription minimum price: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def cancel_subscription(subscription_id: str) -> Dict[str, Any]:
         """Cancela uma assinatura."""
         url = f"{PagarMeSubscriptionsAPI.BASE_URL}/subscriptions/{subscription_id}/cancel"
-        headers = PagarMeSubscriptionsAPI._get_headers()
         try:
-            response = requests.post(url, headers=headers)
+            response = PagarMeClient.request("POST", url, operation="subscriptions.cancel")
             response.raise_for_status()
-            logger.debug(f"Pagar.me subscription canceled: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscription canceled: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to cancel Pagar.me subscription: {e.response.json()}")
-            raise Exception(f"Failed to cancel Pagar.me subscription: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to cancel Pagar.me subscription: %s", LogBody(error))
+            raise Exception(f"Failed to cancel Pagar.me subscription: {error}")
+        except Exception as e:
+            logger.error("Unexpected error canceling Pagar.me subscription: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+
+class AsyncPagarMeSubscriptionsAPI:
+    BASE_URL = PagarMeSubscriptionsAPI.BASE_URL
+
+    @staticmethod
+    async def create_subscription(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Cria uma assinatura na Pagar.me."""
+        url = f"{AsyncPagarMeSubscriptionsAPI.BASE_URL}/subscriptions"
+        try:
+            response = await AsyncPagarMeClient.request("POST", url, operation="subscriptions.create", json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscription created: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me subscription: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me subscription: {error}")
+        except Exception as e:
+            logger.error("Unexpected error creating Pagar.me subscription: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def list_subscriptions(params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Lista todas as assinaturas."""
+        url = f"{AsyncPagarMeSubscriptionsAPI.BASE_URL}/subscriptions"
+        try:
+            response = await AsyncPagarMeClient.request("GET", url, operation="subscriptions.list", params=params or {})
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscriptions listed: %s", LogBody(body))
+            return body.get("data", [])
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me subscriptions: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me subscriptions: {error}")
+        except Exception as e:
+            logger.error("Unexpected error listing Pagar.me subscriptions: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def get_subscription(subscription_id: str) -> Dict[str, Any]:
+        """Obtém detalhes de uma assinatura específica."""
+        url = f"{AsyncPagarMeSubscriptionsAPI.BASE_URL}/subscriptions/{subscription_id}"
+        try:
+            response = await AsyncPagarMeClient.request("GET", url, operation="subscriptions.get")
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscription retrieved: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me subscription: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me subscription: {error}")
+        except Exception as e:
+            logger.error("Unexpected error getting Pagar.me subscription: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def update_subscription(subscription_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Atualiza uma assinatura existente."""
+        url = f"{AsyncPagarMeSubscriptionsAPI.BASE_URL}/subscriptions/{subscription_id}"
+        try:
+            response = await AsyncPagarMeClient.request("PATCH", url, operation="subscriptions.update", json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscription updated: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me subscription: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me subscription: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error canceling Pagar.me subscription: {str(e)}")
-            raise Exception(f"Unexpected error: {str(e)}")
\ No newline at end of file
+            logger.error("Unexpected error updating Pagar.me subscription: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def update_subscription_card(subscription_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Atualiza o cartão de uma assinatura."""
+        url = f"{AsyncPagarMeSubscriptionsAPI.BASE_URL}/subscriptions/{subscription_id}/card"
+        try:
+            response = await AsyncPagarMeClient.request("PATCH", url, operation="subscriptions.update_card", json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscription card updated: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me subscription card: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me subscription card: {error}")
+        except Exception as e:
+            logger.error("Unexpected error updating Pagar.me subscription card: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def update_subscription_payment_method(subscription_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Atualiza o método de pagamento de uma assinatura."""
+        url = f"{AsyncPagarMeSubscriptionsAPI.BASE_URL}/subscriptions/{subscription_id}/payment-method"
+        try:
+            response = await AsyncPagarMeClient.request("PATCH", url, operation="subscriptions.update_payment_method", json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscription payment method updated: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me subscription payment method: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me subscription payment method: {error}")
+        except Exception as e:
+            logger.error("Unexpected error updating Pagar.me subscription payment method: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def update_subscription_due_date(subscription_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Atualiza a data de vencimento de uma assinatura."""
+        url = f"{AsyncPagarMeSubscriptionsAPI.BASE_URL}/subscriptions/{subscription_id}/due-date"
+        try:
+            response = await AsyncPagarMeClient.request("PATCH", url, operation="subscriptions.update_due_date", json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscription due date updated: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me subscription due date: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me subscription due date: {error}")
+        except Exception as e:
+            logger.error("Unexpected error updating Pagar.me subscription due date: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def update_subscription_minimum_price(subscription_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Atualiza o preço mínimo de uma assinatura."""
+        url = f"{AsyncPagarMeSubscriptionsAPI.BASE_URL}/subscriptions/{subscription_id}/minimum-price"
+        try:
+            response = await AsyncPagarMeClient.request("PATCH", url, operation="subscriptions.update_minimum_price", json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscription minimum price updated: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to update Pagar.me subscription minimum price: %s", LogBody(error))
+            raise Exception(f"Failed to update Pagar.me subscription minimum price: {error}")
+        except Exception as e:
+            logger.error("Unexpected error updating Pagar.me subscription minimum price: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def cancel_subscription(subscription_id: str) -> Dict[str, Any]:
+        """Cancela uma assinatura."""
+        url = f"{AsyncPagarMeSubscriptionsAPI.BASE_URL}/subscriptions/{subscription_id}/cancel"
+        try:
+            response = await AsyncPagarMeClient.request("POST", url, operation="subscriptions.cancel")
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me subscription canceled: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to cancel Pagar.me subscription: %s", LogBody(error))
+            raise Exception(f"Failed to cancel Pagar.me subscription: {error}")
+        except Exception as e:
+            logger.error("Unexpected error canceling Pagar.me subscription: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
@@ -1,90 +1,180 @@
 import requests
-import os
-from dotenv import load_dotenv
-from typing import Dict, Any, List
+import httpx
+from typing import Dict, Any, Iterator, List, Optional
 import logging
-import base64
 
-load_dotenv()
+from app.pagarme.client import PagarMeClient
+from app.pagarme.responses import decode_json, decode_error, LogBody
+from app.pagarme.balance import PagarMeBalanceAPI
+from app.pagarme.recipients import PagarMeRecipientsAPI
+from app.pagarme.pagination import iter_pages, DateFilter, DEFAULT_PAGE_SIZE
+from app.pagarme.async_client import AsyncPagarMeClient
 
 logger = logging.getLogger(__name__)
 
 class PagarMeTransfersAPI:
-    BASE_URL = "https://api.pagar.me/core/v5"
-    API_KEY = os.getenv("PAGARME_API_KEY")
+    BASE_URL = PagarMeClient.BASE_URL
 
     @staticmethod
-    def _get_headers() -> Dict[str, str]:
-        """Retorna headers comuns para chamadas à API."""
-        return {
-            "Authorization": f"Basic {base64.b64encode(f'{PagarMeTransfersAPI.API_KEY}:'.encode()).decode()}",
-            "Content-Type": "application/json"
-        }
-
-    @staticmethod
-    def create_transfer(data: Dict[str, Any]) -> Dict[str, Any]:
-        """Cria uma transferência na Pagar.me."""
+    def create_transfer(data: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Cria uma transferência na Pagar.me. Com idempotency_key, repetir a chamada não duplica a transferência."""
         url = f"{PagarMeTransfersAPI.BASE_URL}/transfers"
-        headers = PagarMeTransfersAPI._get_headers()
         try:
-            response = requests.post(url, json=data, headers=headers)
+            response = PagarMeClient.request("POST", url, operation="transfers.create",
+                                             idempotency_key=idempotency_key, json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me transfer created: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me transfer created: %s", LogBody(body))
+            if data.get("recipient_id"):
+                PagarMeBalanceAPI.invalidate_cached_balance(data["recipient_id"])
+                PagarMeRecipientsAPI.invalidate_cached_recipient(data["recipient_id"])
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to create Pagar.me transfer: {e.response.json()}")
-            raise Exception(f"Failed to create Pagar.me transfer: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me transfer: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me transfer: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error creating Pagar.me transfer: {str(e)}")
+            logger.error("Unexpected error creating Pagar.me transfer: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def list_transfers(params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Lista todas as transferências."""
         url = f"{PagarMeTransfersAPI.BASE_URL}/transfers"
-        headers = PagarMeTransfersAPI._get_headers()
         try:
-            response = requests.get(url, params=params or {}, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="transfers.list", params=params or {})
             response.raise_for_status()
-            logger.debug(f"Pagar.me transfers listed: {response.json()}")
-            return response.json().get("data", [])
+            body = decode_json(response)
+            logger.debug("Pagar.me transfers listed: %s", LogBody(body))
+            return body.get("data", [])
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to list Pagar.me transfers: {e.response.json()}")
-            raise Exception(f"Failed to list Pagar.me transfers: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me transfers: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me transfers: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error listing Pagar.me transfers: {str(e)}")
+            logger.error("Unexpected error listing Pagar.me transfers: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
+    @staticmethod
+    def iter_transfers(params: Dict[str, Any] = None, created_since: DateFilter = None,
+                       created_until: DateFilter = None,
+                       page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """Percorre todas as páginas de transferências, buscando a próxima em segundo plano."""
+        url = f"{PagarMeTransfersAPI.BASE_URL}/transfers"
+        return iter_pages(url, "transfers", params, page_size, created_since, created_until)
+
     @staticmethod
     def get_transfer(transfer_id: str) -> Dict[str, Any]:
         """Obtém detalhes de uma transferência específica."""
         url = f"{PagarMeTransfersAPI.BASE_URL}/transfers/{transfer_id}"
-        headers = PagarMeTransfersAPI._get_headers()
         try:
-            response = requests.get(url, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="transfers.get")
             response.raise_for_status()
-            logger.debug(f"Pagar.me transfer retrieved: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me transfer retrieved: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to get Pagar.me transfer: {e.response.json()}")
-            raise Exception(f"Failed to get Pagar.me transfer: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me transfer: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me transfer: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error getting Pagar.me transfer: {str(e)}")
+            logger.error("Unexpected error getting Pagar.me transfer: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def cancel_transfer(transfer_id: str) -> Dict[str, Any]:
         """Cancela uma transferência."""
         url = f"{PagarMeTransfersAPI.BASE_URL}/transfers/{transfer_id}/cancel"
-        headers = PagarMeTransfersAPI._get_headers()
         try:
-            response = requests.post(url, headers=headers)
+            response = PagarMeClient.request("POST", url, operation="transfers.cancel")
             response.raise_for_status()
-            logger.debug(f"Pagar.me transfer canceled: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me transfer canceled: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to cancel Pagar.me transfer: {e.response.json()}")
-            raise Exception(f"Failed to cancel Pagar.me transfer: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to cancel Pagar.me transfer: %s", LogBody(error))
+            raise Exception(f"Failed to cancel Pagar.me transfer: {error}")
+        except Exception as e:
+            logger.error("Unexpected error canceling Pagar.me transfer: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+
+class AsyncPagarMeTransfersAPI:
+    BASE_URL = PagarMeTransfersAPI.BASE_URL
+
+    @staticmethod
+    async def create_transfer(data: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Cria uma transferência na Pagar.me. Com idempotency_key, repetir a chamada não duplica a transferência."""
+        url = f"{AsyncPagarMeTransfersAPI.BASE_URL}/transfers"
+        try:
+            response = await AsyncPagarMeClient.request("POST", url, operation="transfers.create",
+                                                         idempotency_key=idempotency_key, json=data)
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me transfer created: %s", LogBody(body))
+            if data.get("recipient_id"):
+                PagarMeBalanceAPI.invalidate_cached_balance(data["recipient_id"])
+                PagarMeRecipientsAPI.invalidate_cached_recipient(data["recipient_id"])
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me transfer: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me transfer: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error canceling Pagar.me transfer: {str(e)}")
-            raise Exception(f"Unexpected error: {str(e)}")
\ No newline at end of file
+            logger.error("Unexpected error creating Pagar.me transfer: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def list_transfers(params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Lista todas as transferências."""
+        url = f"{AsyncPagarMeTransfersAPI.BASE_URL}/transfers"
+        try:
+            response = await AsyncPagarMeClient.request("GET", url, operation="transfers.list", params=params or {})
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me transfers listed: %s", LogBody(body))
+            return body.get("data", [])
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me transfers: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me transfers: {error}")
+        except Exception as e:
+            logger.error("Unexpected error listing Pagar.me transfers: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def get_transfer(transfer_id: str) -> Dict[str, Any]:
+        """Obtém detalhes de uma transferência específica."""
+        url = f"{AsyncPagarMeTransfersAPI.BASE_URL}/transfers/{transfer_id}"
+        try:
+            response = await AsyncPagarMeClient.request("GET", url, operation="transfers.get")
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me transfer retrieved: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me transfer: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me transfer: {error}")
+        except Exception as e:
+            logger.error("Unexpected error getting Pagar.me transfer: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
+
+    @staticmethod
+    async def cancel_transfer(transfer_id: str) -> Dict[str, Any]:
+        """Cancela uma transferência."""
+        url = f"{AsyncPagarMeTransfersAPI.BASE_URL}/transfers/{transfer_id}/cancel"
+        try:
+            response = await AsyncPagarMeClient.request("POST", url, operation="transfers.cancel")
+            response.raise_for_status()
+            body = decode_json(response)
+            logger.debug("Pagar.me transfer canceled: %s", LogBody(body))
+            return body
+        except httpx.HTTPStatusError as e:
+            error = decode_error(e.response)
+            logger.error("Failed to cancel Pagar.me transfer: %s", LogBody(error))
+            raise Exception(f"Failed to cancel Pagar.me transfer: {error}")
+        except Exception as e:
+            logger.error("Unexpected error canceling Pagar.me transfer: %s", e)
+            raise Exception(f"Unexpected error: {str(e)}")
@@ -1,73 +1,71 @@
 import requests
-import os
-from dotenv import load_dotenv
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import logging
-import base64
 
-load_dotenv()
+from app.pagarme.client import PagarMeClient
+from app.pagarme.responses import decode_json, decode_error, LogBody
+from app.pagarme.balance import PagarMeBalanceAPI
+from app.pagarme.recipients import PagarMeRecipientsAPI
 
 logger = logging.getLogger(__name__)
 
 class PagarMeWithdrawalsAPI:
-    BASE_URL = "https://api.pagar.me/core/v5"
-    API_KEY = os.getenv("PAGARME_API_KEY")
+    BASE_URL = PagarMeClient.BASE_URL
 
     @staticmethod
-    def _get_headers() -> Dict[str, str]:
-        """Retorna headers comuns para chamadas à API."""
-        return {
-            "Authorization": f"Basic {base64.b64encode(f'{PagarMeWithdrawalsAPI.API_KEY}:'.encode()).decode()}",
-            "Content-Type": "application/json"
-        }
-
-    @staticmethod
-    def create_withdrawal(recipient_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Cria um saque na Pagar.me."""
+    def create_withdrawal(recipient_id: str, data: Dict[str, Any],
+                          idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Cria um saque na Pagar.me. Com idempotency_key, repetir a chamada não duplica o saque."""
         url = f"{PagarMeWithdrawalsAPI.BASE_URL}/recipients/{recipient_id}/withdrawals"
-        headers = PagarMeWithdrawalsAPI._get_headers()
         try:
-            response = requests.post(url, json=data, headers=headers)
+            response = PagarMeClient.request("POST", url, operation="withdrawals.create",
+                                             idempotency_key=idempotency_key, json=data)
             response.raise_for_status()
-            logger.debug(f"Pagar.me withdrawal created: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me withdrawal created: %s", LogBody(body))
+            PagarMeBalanceAPI.invalidate_cached_balance(recipient_id)
+            PagarMeRecipientsAPI.invalidate_cached_recipient(recipient_id)
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to create Pagar.me withdrawal: {e.response.json()}")
-            raise Exception(f"Failed to create Pagar.me withdrawal: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to create Pagar.me withdrawal: %s", LogBody(error))
+            raise Exception(f"Failed to create Pagar.me withdrawal: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error creating Pagar.me withdrawal: {str(e)}")
+            logger.error("Unexpected error creating Pagar.me withdrawal: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def list_withdrawals(recipient_id: str, params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Lista saques de um recebedor."""
         url = f"{PagarMeWithdrawalsAPI.BASE_URL}/recipients/{recipient_id}/withdrawals"
-        headers = PagarMeWithdrawalsAPI._get_headers()
         try:
-            response = requests.get(url, params=params or {}, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="withdrawals.list", params=params or {})
             response.raise_for_status()
-            logger.debug(f"Pagar.me withdrawals listed: {response.json()}")
-            return response.json().get("data", [])
+            body = decode_json(response)
+            logger.debug("Pagar.me withdrawals listed: %s", LogBody(body))
+            return body.get("data", [])
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to list Pagar.me withdrawals: {e.response.json()}")
-            raise Exception(f"Failed to list Pagar.me withdrawals: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to list Pagar.me withdrawals: %s", LogBody(error))
+            raise Exception(f"Failed to list Pagar.me withdrawals: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error listing Pagar.me withdrawals: {str(e)}")
+            logger.error("Unexpected error listing Pagar.me withdrawals: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
 
     @staticmethod
     def get_withdrawal(recipient_id: str, withdrawal_id: str) -> Dict[str, Any]:
         """Obtém detalhes de um saque específico."""
         url = f"{PagarMeWithdrawalsAPI.BASE_URL}/recipients/{recipient_id}/withdrawals/{withdrawal_id}"
-        headers = PagarMeWithdrawalsAPI._get_headers()
         try:
-            response = requests.get(url, headers=headers)
+            response = PagarMeClient.request("GET", url, operation="withdrawals.get")
             response.raise_for_status()
-            logger.debug(f"Pagar.me withdrawal retrieved: {response.json()}")
-            return response.json()
+            body = decode_json(response)
+            logger.debug("Pagar.me withdrawal retrieved: %s", LogBody(body))
+            return body
         except requests.exceptions.HTTPError as e:
-            logger.error(f"Failed to get Pagar.me withdrawal: {e.response.json()}")
-            raise Exception(f"Failed to get Pagar.me withdrawal: {e.response.json()}")
+            error = decode_error(e.response)
+            logger.error("Failed to get Pagar.me withdrawal: %s", LogBody(error))
+            raise Exception(f"Failed to get Pagar.me withdrawal: {error}")
         except Exception as e:
-            logger.error(f"Unexpected error getting Pagar.me withdrawal: {str(e)}")
+            logger.error("Unexpected error getting Pagar.me withdrawal: %s", e)
             raise Exception(f"Unexpected error: {str(e)}")
\ No newline at end of file
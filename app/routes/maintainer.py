@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.schemas.maintainer import MaintainerCreate, MaintainerResponse, MaintainerBase
 from app.schemas.address import AddressCreate, AddressResponse
-from app.services.maintainer_service import create_maintainer, get_maintainers, get_maintainer_by_id
+from app.services.maintainer_service import create_maintainer_async, get_maintainers, get_maintainer_by_id
 from app.services.auth_service import get_current_user
 from app.config.database import get_db
 from ..models.maintainer import Maintainer
@@ -16,12 +16,12 @@ from ..schemas.user import UserResponse
 router = APIRouter(prefix="/maintainers", tags=["maintainers"])
 
 @router.post("/create", response_model=MaintainerResponse)
-def create_new_maintainer(
+async def create_new_maintainer(
     maintainer: MaintainerCreate,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    db_maintainer = create_maintainer(db, maintainer, current_user)
+    db_maintainer = await create_maintainer_async(db, maintainer, current_user)
 
     return db_maintainer
 
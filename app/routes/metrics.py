@@ -0,0 +1,33 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.pagarme.metrics import PagarMeMetrics
+from app.services.bin_cache_service import BinCacheService
+
+router = APIRouter(tags=["Metrics"])
+
+# Contador de BinCacheService.stats() -> valor do label result
+BIN_CACHE_RESULTS = {"memory_hits": "memory_hit", "db_hits": "db_hit", "negative_hits": "negative_hit",
+                     "misses": "miss"}
+
+
+def _bin_cache_metrics() -> str:
+    stats = BinCacheService.stats()
+    lines = [
+        "# HELP bin_cache_lookups_total BIN lookups by cache level that answered them.",
+        "# TYPE bin_cache_lookups_total counter",
+    ]
+    for counter, result in BIN_CACHE_RESULTS.items():
+        lines.append(f'bin_cache_lookups_total{{result="{result}"}} {stats[counter]}')
+    lines += [
+        "# HELP bin_cache_memory_entries BINs held in the in-memory LRU.",
+        "# TYPE bin_cache_memory_entries gauge",
+        f"bin_cache_memory_entries {stats['memory_size']}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """Exporta as métricas das chamadas à Pagar.me e do cache de BIN no formato do Prometheus."""
+    return PlainTextResponse(PagarMeMetrics.render() + _bin_cache_metrics(),
+                             media_type="text/plain; version=0.0.4")
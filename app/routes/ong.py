@@ -1,12 +1,13 @@
+from datetime import datetime
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.schemas.address import AddressResponse
-from app.schemas.ong import ONGCreate, ONGResponse
+from app.schemas.ong import DonationTotalsResponse, ONGCreate, ONGResponse
 from app.schemas.user import UserResponse
-from app.services.ong_service import create_ong, get_ong_by_id, get_ongs
+from app.services.ong_service import create_ong, get_ong_by_id, get_ong_donation_totals, get_ongs
 from app.config.database import get_db
 from app.services.auth_service import get_current_user
 
@@ -39,4 +40,15 @@ def get_ong_by_id_endpoint(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    return get_ong_by_id(db, ong_id)
\ No newline at end of file
+    return get_ong_by_id(db, ong_id)
+
+@router.get("/{ong_id}/donations/totals", response_model=DonationTotalsResponse)
+def get_ong_donation_totals_endpoint(
+    ong_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    group_by: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    return get_ong_donation_totals(db, ong_id, current_user, since, until, group_by)
@@ -1,25 +1,133 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.schemas.payment import PaymentRequest, PaymentResponse
+from app.schemas.payment import (PaymentRequest, PaymentResponse, PaymentBatchRequest,
+                                 PaymentBatchItemResult, PaymentBatchResponse)
 from app.services.payment_service import PaymentService
+from app.services.payment_outbox_service import PaymentOutboxService
+from app.services.idempotency_service import IdempotencyService
+from app.models.transaction import Transaction
+from app.models.maintainer import Maintainer
+from app.services.bin_cache_service import BinCacheService
+from app.services.card_wallet_service import CardWalletService
+from app.schemas.card import CardResponse
 from app.config.database import get_db
+from app.services.auth_service import get_current_user
+from typing import List, Optional
 import logging
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 logger = logging.getLogger(__name__)
 
-@router.post("/", response_model=PaymentResponse)
-def create_payment(
+
+def get_current_user_id(current_user: dict = Depends(get_current_user)) -> int:
+    """Obtém o id do usuário autenticado, qualquer que seja o seu tipo."""
+    if current_user.get("user"):
+        return current_user["user"].id
+    if current_user.get("user_id"):
+        return current_user["user_id"]
+    raise HTTPException(status_code=403, detail="Only maintainers can make payments")
+
+def _payment_response(transaction: Transaction) -> PaymentResponse:
+    payment = PaymentResponse.model_validate(transaction)
+    payment.status_url = f"{router.prefix}/{transaction.id}"
+    return payment
+
+
+@router.post("/", response_model=PaymentResponse, status_code=202)
+async def create_payment(
     payment_data: PaymentRequest,
+    response: Response,
     db: Session = Depends(get_db),
-    user_id: int = Depends()
+    user_id: int = Depends(get_current_user_id),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
-    """Cria um pagamento avulso."""
+    """Registra um pagamento avulso; o pedido na Pagar.me é criado em segundo plano.
+
+    Com o header Idempotency-Key, repetições da mesma requisição devolvem o
+    pagamento já criado em vez de criar outro.
+    """
+    idempotency = None
     try:
-        transaction = PaymentService.create_payment(db, user_id, payment_data)
-        return transaction
-    except HTTPException as e:
+        if idempotency_key:
+            idempotency, transaction_id = await run_in_threadpool(
+                IdempotencyService.acquire, db, user_id, idempotency_key,
+                IdempotencyService.fingerprint(payment_data))
+            if transaction_id is not None:
+                payment = await run_in_threadpool(lambda: _payment_response(db.get(Transaction, transaction_id)))
+                response.headers["Location"] = payment.status_url
+                response.headers["Idempotent-Replayed"] = "true"
+                return payment
+
+        transaction = await PaymentService.create_payment_async(db, user_id, payment_data, idempotency)
+        # A resposta lê a transação expirada pelo commit; a consulta fica fora do event loop
+        payment = await run_in_threadpool(_payment_response, transaction)
+        PaymentOutboxService.dispatch(payment.transaction_id)
+        response.headers["Location"] = payment.status_url
+        return payment
+    except HTTPException:
+        if idempotency is not None:
+            await run_in_threadpool(IdempotencyService.release, db, idempotency)
         raise
     except Exception as e:
+        if idempotency is not None:
+            await run_in_threadpool(IdempotencyService.release, db, idempotency)
         logger.error(f"Error creating payment: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/batch", response_model=PaymentBatchResponse, status_code=202)
+async def create_payment_batch(
+    batch: PaymentBatchRequest,
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """Registra vários pagamentos de uma vez, com um resultado por item."""
+    results = await PaymentService.create_payments_batch_async(db, user_id, batch.items)
+    items = []
+    for index, (transaction, error) in enumerate(results):
+        if error is not None:
+            items.append(PaymentBatchItemResult(index=index, status_code=error.status_code, error=error.detail))
+            continue
+        PaymentOutboxService.dispatch(transaction.id)
+        items.append(PaymentBatchItemResult(index=index, status_code=202, payment=_payment_response(transaction)))
+    queued = sum(1 for item in items if item.payment is not None)
+    return PaymentBatchResponse(queued=queued, failed=len(items) - queued, items=items)
+
+
+@router.get("/cards", response_model=List[CardResponse])
+def list_cards(
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """Lista os cartões salvos do mantenedor autenticado."""
+    return CardWalletService.list_cards(db, user_id)
+
+
+@router.get("/{transaction_id}", response_model=PaymentResponse)
+def get_payment(
+    transaction_id: int,
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """Consulta o status de um pagamento do mantenedor autenticado."""
+    transaction = db.query(Transaction).join(Maintainer, Maintainer.id == Transaction.maintainer_id).filter(
+        Transaction.id == transaction_id,
+        Maintainer.user_id == user_id
+    ).first()
+    if not transaction:
+        raise HTTPException(status_code=404, detail="Payment not found")
+    return _payment_response(transaction)
+
+
+@router.get("/bins/{bin_number}")
+def get_card_bin(
+    bin_number: str,
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """Consulta bandeira, emissor e tipo do cartão pelo BIN, usando o cache local."""
+    data = BinCacheService.get_bin(db, bin_number)
+    if data is None:
+        raise HTTPException(status_code=404, detail="BIN not found")
+    return data
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.schemas.subscription import SubscriptionResponse, SubscriptionInvoiceResponse, OngMrrResponse
+from app.services.subscription_service import SubscriptionService
+from app.services.auth_service import get_current_user
+from app.routes.payment import get_current_user_id
+from app.config.database import get_db
+from typing import List
+
+router = APIRouter(prefix="/subscriptions", tags=["Subscriptions"])
+
+
+@router.get("/me", response_model=List[SubscriptionResponse])
+def list_my_subscriptions(
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """Lista as doações recorrentes do mantenedor autenticado."""
+    return SubscriptionService.list_for_user(db, user_id)
+
+
+@router.get("/me/{subscription_id}/invoices", response_model=List[SubscriptionInvoiceResponse])
+def list_my_subscription_invoices(
+    subscription_id: str,
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """Lista as últimas faturas de uma doação recorrente do mantenedor autenticado."""
+    return SubscriptionService.list_invoices(db, user_id, subscription_id)
+
+
+@router.get("/ongs/{ong_id}/mrr", response_model=OngMrrResponse)
+def get_ong_mrr(
+    ong_id: int,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Receita recorrente mensal da ONG, calculada sobre o espelho local das assinaturas."""
+    return SubscriptionService.ong_mrr(db, ong_id, current_user)
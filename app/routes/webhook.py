@@ -1,19 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.services.webhook_service import WebhookService
+from app.services.webhook_queue_service import WebhookQueueService
 from app.config.database import get_db
-from typing import Dict, Any
 import logging
 
 router = APIRouter(prefix="/webhooks", tags=["Webhooks"])
 logger = logging.getLogger(__name__)
 
 @router.post("/pagarme")
-def receive_pagarme_webhook(payload: Dict[str, Any], db: Session = Depends(get_db)):
-    """Recebe notificações da Pagar.me."""
+async def receive_pagarme_webhook(request: Request, db: Session = Depends(get_db)):
+    """Recebe notificações da Pagar.me: grava o corpo na fila e responde sem processá-lo."""
+    raw_body = (await request.body()).decode("utf-8", errors="replace")
     try:
-        WebhookService.handle_pagarme_webhook(db, payload)
+        await run_in_threadpool(WebhookQueueService.enqueue, db, raw_body)
         return {"status": "received"}
     except Exception as e:
-        logger.error(f"Error processing Pagar.me webhook: {str(e)}")
-        raise HTTPException(status_code=500, detail="Webhook processing failed")
\ No newline at end of file
+        logger.error(f"Error enqueuing Pagar.me webhook: {str(e)}")
+        raise HTTPException(status_code=500, detail="Webhook processing failed")
@@ -31,6 +31,9 @@ class CampaignResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     photos: List["CampaignPhotoResponse"] = []
+    raised_cents: int = 0  # Total arrecadado em doações pagas
+    donor_count: int = 0
+    last_donation_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
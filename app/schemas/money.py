@@ -0,0 +1,29 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Annotated, Union
+
+from pydantic import AfterValidator, Field
+
+CENT = Decimal("0.01")
+
+
+def to_cents(value: Union[Decimal, float, int, str]) -> int:
+    """Converte um valor em reais para centavos, arredondando meio centavo para cima."""
+    return int((Decimal(str(value)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> Decimal:
+    """Converte centavos para reais sem passar por float."""
+    return (Decimal(cents) / 100).quantize(CENT)
+
+
+def percent_of(cents: int, rate: Union[Decimal, float]) -> int:
+    """Aplica uma taxa (ex.: comissão de 0.04) a um valor em centavos."""
+    return int((Decimal(cents) * Decimal(str(rate))).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+# Valor em reais recebido pela API: até duas casas decimais, sempre normalizado para duas
+Money = Annotated[
+    Decimal,
+    Field(gt=0, max_digits=12, decimal_places=2),
+    AfterValidator(lambda value: value.quantize(CENT))
+]
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -21,4 +21,11 @@ class ONGResponse(ONGBase):
     user: UserResponse
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class DonationTotalsResponse(BaseModel):
+    count: int
+    amount_cents: int
+    commission_cents: int
+    net_cents: int
+    groups: List[Dict[str, Any]] = []
@@ -1,6 +1,9 @@
-from pydantic import BaseModel
-from typing import Optional, Literal
+from pydantic import BaseModel, AliasChoices, Field, field_validator
+from typing import List, Optional, Literal
 from datetime import datetime
+from enum import Enum
+
+from app.schemas.money import Money
 
 class CardDetails(BaseModel):
     card_id: Optional[str] = None
@@ -10,7 +13,7 @@ class CardDetails(BaseModel):
     cvv: Optional[str] = None
 
 class PaymentRequest(BaseModel):
-    amount: float
+    amount: Money
     payment_method: Literal["credit_card", "boleto", "pix"]
     card_details: Optional[CardDetails] = None
     ong_id: int
@@ -20,9 +23,11 @@ class PaymentRequest(BaseModel):
     attendee_id: Optional[int] = None
 
 class PaymentResponse(BaseModel):
-    transaction_id: int
+    transaction_id: int = Field(validation_alias=AliasChoices("transaction_id", "id"))
     amount: float
     commission_amount: float
+    amount_cents: int
+    commission_cents: int
     payment_method: str
     status: str
     ong_id: int
@@ -39,6 +44,27 @@ class PaymentResponse(BaseModel):
     pix_code: Optional[str] = None
     error_message: Optional[str] = None
     created_at: datetime
+    status_url: Optional[str] = None
+
+    @field_validator("payment_method", "status", mode="before")
+    @classmethod
+    def enum_value(cls, value):
+        # Os modelos guardam enums; a resposta expõe o valor
+        return value.value if isinstance(value, Enum) else value
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PaymentBatchRequest(BaseModel):
+    items: List[PaymentRequest] = Field(min_length=1, max_length=100)
+
+class PaymentBatchItemResult(BaseModel):
+    index: int
+    status_code: int
+    payment: Optional[PaymentResponse] = None
+    error: Optional[str] = None
+
+class PaymentBatchResponse(BaseModel):
+    queued: int
+    failed: int
+    items: List[PaymentBatchItemResult]
@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class SubscriptionResponse(BaseModel):
+    id: int
+    subscription_id: str  # ID da assinatura na Pagar.me
+    ong_id: Optional[int] = None
+    status: str
+    payment_method: Optional[str] = None
+    interval: Optional[str] = None
+    interval_count: int
+    amount_cents: int
+    monthly_amount_cents: int
+    next_billing_at: Optional[datetime] = None
+    canceled_at: Optional[datetime] = None
+    gateway_created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class SubscriptionInvoiceResponse(BaseModel):
+    invoice_id: str  # ID da fatura na Pagar.me
+    subscription_id: str
+    cycle_id: Optional[str] = None
+    charge_id: Optional[str] = None
+    status: str
+    amount_cents: int
+    due_at: Optional[datetime] = None
+    gateway_created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class OngMrrResponse(BaseModel):
+    ong_id: int
+    active_subscriptions: int
+    mrr_cents: int
@@ -0,0 +1,119 @@
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.card_bin import CardBin
+from app.pagarme.bin import PagarMeBinAPI
+
+logger = logging.getLogger(__name__)
+
+
+class BinCacheService:
+    """Cache de consultas de BIN em dois níveis: LRU em memória e tabela card_bins."""
+    MEMORY_SIZE = int(os.getenv("BIN_CACHE_MEMORY_SIZE", "4096"))
+    TTL = timedelta(days=int(os.getenv("BIN_CACHE_TTL_DAYS", "30")))
+    NEGATIVE_TTL = timedelta(hours=int(os.getenv("BIN_CACHE_NEGATIVE_TTL_HOURS", "24")))
+
+    # bin -> (expires_at, data); data None indica BIN desconhecido
+    _memory: "OrderedDict[str, Tuple[datetime, Optional[Dict[str, Any]]]]" = OrderedDict()
+    _lock = threading.Lock()
+    _stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "negative_hits": 0}
+
+    @staticmethod
+    def normalize_bin(number: str) -> str:
+        """Extrai o BIN (6 primeiros dígitos) de um número de cartão ou BIN informado."""
+        digits = re.sub(r'\D', '', number or "")
+        if len(digits) < 6:
+            raise HTTPException(status_code=400, detail="BIN must have at least 6 digits")
+        return digits[:6]
+
+    @staticmethod
+    def _count(key: str) -> None:
+        with BinCacheService._lock:
+            BinCacheService._stats[key] += 1
+
+    @staticmethod
+    def _remember(bin_number: str, expires_at: datetime, data: Optional[Dict[str, Any]]) -> None:
+        with BinCacheService._lock:
+            BinCacheService._memory[bin_number] = (expires_at, data)
+            BinCacheService._memory.move_to_end(bin_number)
+            while len(BinCacheService._memory) > BinCacheService.MEMORY_SIZE:
+                BinCacheService._memory.popitem(last=False)
+
+    @staticmethod
+    def _from_memory(bin_number: str, now: datetime) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        with BinCacheService._lock:
+            entry = BinCacheService._memory.get(bin_number)
+            if entry is None:
+                return False, None
+            expires_at, data = entry
+            if expires_at <= now:
+                del BinCacheService._memory[bin_number]
+                return False, None
+            BinCacheService._memory.move_to_end(bin_number)
+            return True, data
+
+    @staticmethod
+    def _store(db: Session, bin_number: str, data: Optional[Dict[str, Any]], now: datetime) -> datetime:
+        expires_at = now + (BinCacheService.TTL if data is not None else BinCacheService.NEGATIVE_TTL)
+        values = {"bin": bin_number, "found": data is not None, "data": data,
+                  "fetched_at": now, "expires_at": expires_at}
+        stmt = insert(CardBin).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CardBin.bin],
+            set_={key: stmt.excluded[key] for key in ("found", "data", "fetched_at", "expires_at")}
+        )
+        db.execute(stmt)
+        db.commit()
+        return expires_at
+
+    @staticmethod
+    def get_bin(db: Session, number: str) -> Optional[Dict[str, Any]]:
+        """Retorna os dados do BIN (bandeira, emissor, tipo) ou None se ele for desconhecido."""
+        bin_number = BinCacheService.normalize_bin(number)
+        now = datetime.utcnow()
+
+        found, data = BinCacheService._from_memory(bin_number, now)
+        if found:
+            BinCacheService._count("memory_hits" if data is not None else "negative_hits")
+            return data
+
+        db_entry = db.query(CardBin).filter(CardBin.bin == bin_number, CardBin.expires_at > now).first()
+        if db_entry:
+            data = db_entry.data if db_entry.found else None
+            BinCacheService._remember(bin_number, db_entry.expires_at, data)
+            BinCacheService._count("db_hits" if data is not None else "negative_hits")
+            return data
+
+        BinCacheService._count("misses")
+        data = PagarMeBinAPI.get_bin(bin_number)
+        try:
+            expires_at = BinCacheService._store(db, bin_number, data, now)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Failed to persist bin cache entry for {bin_number}: {str(e)}")
+            expires_at = now + (BinCacheService.TTL if data is not None else BinCacheService.NEGATIVE_TTL)
+        BinCacheService._remember(bin_number, expires_at, data)
+        logger.debug(f"Bin cache miss resolved: bin={bin_number}, found={data is not None}")
+        return data
+
+    @staticmethod
+    def invalidate(db: Session, number: str) -> None:
+        """Remove um BIN dos dois níveis do cache."""
+        bin_number = BinCacheService.normalize_bin(number)
+        with BinCacheService._lock:
+            BinCacheService._memory.pop(bin_number, None)
+        db.query(CardBin).filter(CardBin.bin == bin_number).delete()
+        db.commit()
+
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        """Retorna os contadores de acertos e falhas do cache."""
+        with BinCacheService._lock:
+            return {**BinCacheService._stats, "memory_size": len(BinCacheService._memory)}
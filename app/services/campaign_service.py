@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.models.campaign import Campaign, CampaignPhoto
 from app.schemas.campaign import CampaignCreate, CampaignUpdate, CampaignResponse, CampaignPhotoResponse
+from app.services.donation_totals_service import DonationTotalsService
 
 # Configuração explícita do logging
 logging.basicConfig(
@@ -13,6 +14,14 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _raised(total) -> dict:
+    """Campos de progresso da campanha a partir do total arrecadado (se houver)."""
+    if total is None:
+        return {}
+    return {"raised_cents": total.raised_cents, "donor_count": total.donor_count,
+            "last_donation_at": total.last_donation_at}
+
+
 def create_campaign(db: Session, campaign: CampaignCreate, current_user: dict) -> CampaignResponse:
     if current_user["type"] not in ["admin", "ong", "staff"]:
         logger.error(f"Permission denied for user type: {current_user['type']}")
@@ -72,6 +81,7 @@ def get_campaign(db: Session, campaign_id: int) -> CampaignResponse:
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found or excluded")
 
+    total = DonationTotalsService.get_many(db, "campaign", [campaign.id]).get(campaign.id)
     return CampaignResponse(
         id=campaign.id,
         base_id=campaign.base_id,
@@ -83,12 +93,15 @@ def get_campaign(db: Session, campaign_id: int) -> CampaignResponse:
         status=campaign.status,
         created_at=campaign.created_at,
         updated_at=campaign.updated_at,
-        photos=[CampaignPhotoResponse.from_orm(photo) for photo in campaign.photos]
+        photos=[CampaignPhotoResponse.from_orm(photo) for photo in campaign.photos],
+        **_raised(total)
     )
 
 
 def get_campaigns(db: Session, skip: int = 0, limit: int = 100) -> list[CampaignResponse]:
     campaigns = db.query(Campaign).filter(Campaign.status != "E").offset(skip).limit(limit).all()
+    # Totais arrecadados de todas as campanhas da página em uma consulta
+    totals = DonationTotalsService.get_many(db, "campaign", [c.id for c in campaigns])
     return [
         CampaignResponse(
             id=c.id,
@@ -101,7 +114,8 @@ def get_campaigns(db: Session, skip: int = 0, limit: int = 100) -> list[Campaign
             status=c.status,
             created_at=c.created_at,
             updated_at=c.updated_at,
-            photos=[CampaignPhotoResponse.from_orm(photo) for photo in c.photos]
+            photos=[CampaignPhotoResponse.from_orm(photo) for photo in c.photos],
+            **_raised(totals.get(c.id))
         ) for c in campaigns
     ]
 
@@ -0,0 +1,71 @@
+import hashlib
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy.orm import Session
+from app.models.card import Card
+from app.models.maintainer import Maintainer
+
+logger = logging.getLogger(__name__)
+
+
+class CardWalletService:
+    """Cartões salvos de cada mantenedor, reaproveitados sem tokenizar de novo na Pagar.me."""
+
+    @staticmethod
+    def fingerprint(card_data: Dict[str, Any]) -> str:
+        """Identifica o cartão sem guardar dados sensíveis: BIN, últimos 4, validade e hash do titular.
+
+        O BIN (6 primeiros dígitos) determina a bandeira e, ao contrário dela,
+        é conhecido antes da tokenização.
+        """
+        digits = re.sub(r'\D', '', card_data["number"])
+        expiration = re.sub(r'\D', '', card_data["expiration_date"])
+        holder = " ".join(card_data["holder_name"].upper().split())
+        holder_hash = hashlib.sha256(holder.encode()).hexdigest()
+        raw = f"{digits[:6]}|{digits[-4:]}|{expiration}|{holder_hash}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @staticmethod
+    def find_many(db: Session, maintainer_id: int, fingerprints: Iterable[str]) -> Dict[str, Card]:
+        """Busca em uma consulta os cartões ativos do mantenedor com as impressões informadas."""
+        fingerprints = set(fingerprints)
+        if not fingerprints:
+            return {}
+        cards = db.query(Card).filter(
+            Card.maintainer_id == maintainer_id,
+            Card.fingerprint.in_(fingerprints),
+            Card.status == "active"
+        ).all()
+        return {card.fingerprint: card for card in cards}
+
+    @staticmethod
+    def find(db: Session, maintainer_id: int, fingerprint: str) -> Optional[Card]:
+        """Retorna o cartão ativo do mantenedor com essa impressão, se já estiver salvo."""
+        card = CardWalletService.find_many(db, maintainer_id, [fingerprint]).get(fingerprint)
+        if card:
+            logger.info(f"Reusing saved card: maintainer_id={maintainer_id}, card_id={card.card_id}")
+        return card
+
+    @staticmethod
+    def save(db: Session, maintainer_id: int, card_response: Dict[str, Any],
+             fingerprint: Optional[str] = None) -> Card:
+        """Guarda o cartão recém-tokenizado na carteira do mantenedor."""
+        card = Card(
+            maintainer_id=maintainer_id,
+            card_id=card_response["id"],
+            last_four_digits=card_response["last_four_digits"],
+            brand=card_response["brand"],
+            fingerprint=fingerprint,
+            status="active"
+        )
+        db.add(card)
+        return card
+
+    @staticmethod
+    def list_cards(db: Session, user_id: int) -> List[Card]:
+        """Lista os cartões ativos do mantenedor do usuário, mais recentes primeiro."""
+        return db.query(Card).join(Maintainer, Maintainer.id == Card.maintainer_id).filter(
+            Maintainer.user_id == user_id,
+            Card.status == "active"
+        ).order_by(Card.created_at.desc()).all()
@@ -0,0 +1,92 @@
+import logging
+from typing import Dict, Any, Optional
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.maintainer import Maintainer
+from app.models.pagarme_customer import PagarMeCustomer
+from app.pagarme.customers import PagarMeCustomerAPI
+
+logger = logging.getLogger(__name__)
+
+
+class CustomerService:
+    """Resolve o cliente da Pagar.me de um mantenedor sem criar duplicatas."""
+
+    @staticmethod
+    def build_customer_data(maintainer: Maintainer) -> Dict[str, Any]:
+        """Monta os dados do cliente na Pagar.me a partir do mantenedor."""
+        user = maintainer.user
+        return {
+            "name": user.name,
+            "email": user.email,
+            "type": "individual",
+            "document": user.document,
+            "phones": {
+                "mobile_phone": {
+                    "country_code": "+55",
+                    "area_code": user.phone_number[:2],
+                    "number": user.phone_number[2:]
+                }
+            }
+        }
+
+    @staticmethod
+    def _lookup(db: Session, maintainer: Maintainer) -> Optional[str]:
+        """Procura o cliente no mantenedor e depois no índice local por documento."""
+        if maintainer.client_id:
+            return maintainer.client_id
+
+        document = maintainer.user.document
+        if not document:
+            return None
+        customer_id = db.query(PagarMeCustomer.customer_id).filter(PagarMeCustomer.document == document).scalar()
+        if customer_id:
+            logger.debug(f"Pagar.me customer found in local index: document={document}")
+            CustomerService._link_maintainer(db, maintainer, customer_id)
+        return customer_id
+
+    @staticmethod
+    def _link_maintainer(db: Session, maintainer: Maintainer, customer_id: str) -> None:
+        """Grava o cliente no mantenedor apenas se ele ainda não tiver um."""
+        db.query(Maintainer).filter(
+            Maintainer.id == maintainer.id,
+            Maintainer.client_id.is_(None)
+        ).update({Maintainer.client_id: customer_id}, synchronize_session=False)
+        maintainer.client_id = customer_id
+
+    @staticmethod
+    def remember(db: Session, maintainer: Maintainer, customer_id: str) -> str:
+        """Registra o cliente no índice local e no mantenedor.
+
+        Se outra requisição registrou um cliente para o mesmo documento ao mesmo
+        tempo, o registro existente prevalece e é devolvido.
+        """
+        document = maintainer.user.document
+        if document:
+            stmt = insert(PagarMeCustomer).values(document=document, customer_id=customer_id)
+            stmt = stmt.on_conflict_do_nothing(index_elements=[PagarMeCustomer.document])
+            stmt = stmt.returning(PagarMeCustomer.customer_id)
+            inserted = db.execute(stmt).scalar()
+            if inserted is None:
+                customer_id = db.query(PagarMeCustomer.customer_id).filter(
+                    PagarMeCustomer.document == document).scalar()
+                logger.warning(f"Pagar.me customer already indexed for document={document}, reusing {customer_id}")
+        CustomerService._link_maintainer(db, maintainer, customer_id)
+        return customer_id
+
+    @staticmethod
+    def resolve_customer_id(db: Session, maintainer: Maintainer) -> str:
+        """Obtém o cliente da Pagar.me do mantenedor, criando-o apenas em último caso.
+
+        Faz commit antes de criar o cliente, para que nenhuma transação do banco
+        fique aberta durante a chamada à Pagar.me.
+        """
+        customer_id = CustomerService._lookup(db, maintainer)
+        if customer_id:
+            return customer_id
+
+        customer_data = CustomerService.build_customer_data(maintainer)
+        db.commit()
+        customer_response = PagarMeCustomerAPI.create_customer(customer_data)
+        logger.info(f"Pagar.me customer created for maintainer {maintainer.id}: {customer_response['id']}")
+        return CustomerService.remember(db, maintainer, customer_response["id"])
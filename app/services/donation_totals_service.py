@@ -0,0 +1,161 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+from sqlalchemy import case, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models.donation_total import DonationTotal
+from app.models.transaction import Transaction, TransactionStatus
+
+logger = logging.getLogger(__name__)
+
+# Escopo do total -> coluna da transação que o identifica
+SCOPE_COLUMNS = {
+    "ong": Transaction.ong_id,
+    "campaign": Transaction.campaign_id,
+    "project": Transaction.project_id,
+    "base": Transaction.base_id,
+}
+
+
+class DonationTotalsService:
+    """Totais arrecadados por ONG, campanha, projeto e base.
+
+    Os totais são ajustados na mesma transação do banco que muda o status de um
+    pagamento para PAID ou o tira de PAID (cancelamento ou estorno), então
+    exibir o progresso de uma campanha é uma leitura de linha única.
+    """
+
+    @staticmethod
+    def scopes(transaction: Any) -> Iterable[Tuple[str, int]]:
+        """Escopos (ONG, campanha, projeto, base) que a transação alimenta."""
+        for scope, column in SCOPE_COLUMNS.items():
+            scope_id = getattr(transaction, column.key)
+            if scope_id is not None:
+                yield scope, scope_id
+
+    @staticmethod
+    def _has_other_paid(db: Session, transaction: Any, scope: str, scope_id: int) -> bool:
+        """Indica se o mantenedor tem outra doação paga no mesmo escopo."""
+        return db.query(Transaction.id).filter(
+            Transaction.maintainer_id == transaction.maintainer_id,
+            Transaction.status == TransactionStatus.PAID,
+            SCOPE_COLUMNS[scope] == scope_id,
+            Transaction.id != transaction.id
+        ).first() is not None
+
+    @staticmethod
+    def _lock(db: Session, scope: str, scope_id: int, create: bool) -> bool:
+        """Trava a linha do total até o commit, criando-a zerada se create. Indica se ela existe.
+
+        Com a linha travada antes de _has_other_paid, duas mudanças simultâneas do
+        mesmo escopo são serializadas, e a segunda já vê a doação paga pela
+        primeira: o mesmo doador não é contado (nem descontado) duas vezes.
+        """
+        if create:
+            db.execute(pg_insert(DonationTotal).values(
+                scope=scope, scope_id=scope_id, raised_cents=0, donation_count=0, donor_count=0,
+                updated_at=datetime.utcnow()
+            ).on_conflict_do_nothing(index_elements=[DonationTotal.scope, DonationTotal.scope_id]))
+        return db.query(DonationTotal.id).filter(
+            DonationTotal.scope == scope, DonationTotal.scope_id == scope_id
+        ).with_for_update().first() is not None
+
+    @staticmethod
+    def _add(db: Session, transaction: Any, scope: str, scope_id: int) -> None:
+        DonationTotalsService._lock(db, scope, scope_id, create=True)
+        new_donor = 0 if DonationTotalsService._has_other_paid(db, transaction, scope, scope_id) else 1
+        db.execute(update(DonationTotal).where(
+            DonationTotal.scope == scope, DonationTotal.scope_id == scope_id
+        ).values(
+            raised_cents=DonationTotal.raised_cents + transaction.amount_cents,
+            donation_count=DonationTotal.donation_count + 1,
+            donor_count=DonationTotal.donor_count + new_donor,
+            last_donation_at=case(
+                (DonationTotal.last_donation_at.is_(None), transaction.created_at),
+                (DonationTotal.last_donation_at < transaction.created_at, transaction.created_at),
+                else_=DonationTotal.last_donation_at
+            ),
+            updated_at=datetime.utcnow()
+        ))
+
+    @staticmethod
+    def _subtract(db: Session, transaction: Any, scope: str, scope_id: int) -> None:
+        if not DonationTotalsService._lock(db, scope, scope_id, create=False):
+            return
+        lost_donor = 0 if DonationTotalsService._has_other_paid(db, transaction, scope, scope_id) else 1
+        # A última doação pode ter sido a que saiu de PAID
+        last_donation = select(func.max(Transaction.created_at)).where(
+            SCOPE_COLUMNS[scope] == scope_id,
+            Transaction.status == TransactionStatus.PAID,
+            Transaction.id != transaction.id
+        ).scalar_subquery()
+        db.execute(update(DonationTotal).where(
+            DonationTotal.scope == scope, DonationTotal.scope_id == scope_id
+        ).values(
+            raised_cents=DonationTotal.raised_cents - transaction.amount_cents,
+            donation_count=DonationTotal.donation_count - 1,
+            donor_count=DonationTotal.donor_count - lost_donor,
+            last_donation_at=last_donation,
+            updated_at=datetime.utcnow()
+        ))
+
+    @staticmethod
+    def apply_transition(db: Session, transaction: Any, old_status: TransactionStatus,
+                         new_status: TransactionStatus) -> None:
+        """Ajusta os totais quando uma transação entra em PAID ou sai dele. Não faz commit."""
+        if old_status == new_status or TransactionStatus.PAID not in (old_status, new_status):
+            return
+        for scope, scope_id in DonationTotalsService.scopes(transaction):
+            if new_status == TransactionStatus.PAID:
+                DonationTotalsService._add(db, transaction, scope, scope_id)
+            else:
+                DonationTotalsService._subtract(db, transaction, scope, scope_id)
+        logger.debug(f"Donation totals updated for transaction {transaction.id}: {old_status} -> {new_status}")
+
+    @staticmethod
+    def _recompute(db: Session, scope: str, scope_ids: Optional[Set[int]] = None) -> None:
+        """Recalcula no banco os totais de um escopo (todos ou só os ids informados)."""
+        column = SCOPE_COLUMNS[scope]
+        delete_query = db.query(DonationTotal).filter(DonationTotal.scope == scope)
+        source = select(
+            literal(scope), column, func.sum(Transaction.amount_cents), func.count(Transaction.id),
+            func.count(func.distinct(Transaction.maintainer_id)), func.max(Transaction.created_at),
+            literal(datetime.utcnow())
+        ).where(Transaction.status == TransactionStatus.PAID, column.isnot(None)).group_by(column)
+        if scope_ids is not None:
+            delete_query = delete_query.filter(DonationTotal.scope_id.in_(scope_ids))
+            source = source.where(column.in_(scope_ids))
+        delete_query.delete(synchronize_session=False)
+        db.execute(insert(DonationTotal).from_select(
+            ["scope", "scope_id", "raised_cents", "donation_count", "donor_count",
+             "last_donation_at", "updated_at"], source))
+
+    @staticmethod
+    def refresh(db: Session, keys: Iterable[Tuple[str, int]]) -> None:
+        """Recalcula os totais dos escopos informados. Não faz commit."""
+        grouped: Dict[str, Set[int]] = {}
+        for scope, scope_id in keys:
+            grouped.setdefault(scope, set()).add(scope_id)
+        for scope, scope_ids in grouped.items():
+            DonationTotalsService._recompute(db, scope, scope_ids)
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Recalcula todos os totais a partir das transações pagas, em uma única transação."""
+        for scope in SCOPE_COLUMNS:
+            DonationTotalsService._recompute(db, scope)
+        db.commit()
+        count = db.query(func.count(DonationTotal.id)).scalar()
+        logger.info(f"Donation totals rebuilt: {count} rows")
+        return count
+
+    @staticmethod
+    def get_many(db: Session, scope: str, scope_ids: Iterable[int]) -> Dict[int, DonationTotal]:
+        """Busca em uma consulta os totais de vários itens de um mesmo escopo."""
+        scope_ids = list(set(scope_ids))
+        if not scope_ids:
+            return {}
+        totals = db.query(DonationTotal).filter(
+            DonationTotal.scope == scope, DonationTotal.scope_id.in_(scope_ids)).all()
+        return {total.scope_id: total for total in totals}
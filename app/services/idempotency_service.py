@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.idempotency_key import PaymentIdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyService:
+    """Garante que repetições de POST /payments/ com a mesma Idempotency-Key criem um único pagamento."""
+    TTL = timedelta(hours=float(os.getenv("PAYMENT_IDEMPOTENCY_TTL_HOURS", "24")))
+    WAIT_TIMEOUT = float(os.getenv("PAYMENT_IDEMPOTENCY_WAIT", "30"))
+    POLL_INTERVAL = float(os.getenv("PAYMENT_IDEMPOTENCY_POLL_INTERVAL", "0.1"))
+    # Reserva sem transação há mais tempo que isso é de uma requisição que morreu
+    ABANDONED_AFTER = timedelta(seconds=float(os.getenv("PAYMENT_IDEMPOTENCY_ABANDONED", "120")))
+    MAX_KEY_LENGTH = 255
+
+    @staticmethod
+    def fingerprint(payment_data: Any) -> str:
+        """Resume o corpo da requisição sem incluir o número completo nem o CVV do cartão."""
+        data = payment_data.model_dump()
+        card = data.get("card_details")
+        if card:
+            if card.get("number"):
+                card["number"] = card["number"][-4:]
+            card.pop("cvv", None)
+        return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+    @staticmethod
+    def gateway_key(record: PaymentIdempotencyKey) -> str:
+        """Chave repassada à Pagar.me, isolada por usuário (as chaves da Pagar.me valem para a conta toda)."""
+        return f"payment-{record.user_id}-{record.key}"
+
+    @staticmethod
+    def _claim(db: Session, user_id: int, key: str, fingerprint: str) -> Optional[PaymentIdempotencyKey]:
+        """Tenta reservar a chave. Retorna None se outra requisição já a reservou."""
+        now = datetime.utcnow()
+        db.query(PaymentIdempotencyKey).filter(
+            PaymentIdempotencyKey.user_id == user_id,
+            PaymentIdempotencyKey.key == key,
+            or_(
+                PaymentIdempotencyKey.expires_at <= now,
+                and_(PaymentIdempotencyKey.status == "in_progress",
+                     PaymentIdempotencyKey.transaction_id.is_(None),
+                     PaymentIdempotencyKey.created_at < now - IdempotencyService.ABANDONED_AFTER)
+            )
+        ).delete(synchronize_session=False)
+        stmt = insert(PaymentIdempotencyKey).values(
+            user_id=user_id,
+            key=key,
+            fingerprint=fingerprint,
+            status="in_progress",
+            created_at=now,
+            expires_at=now + IdempotencyService.TTL
+        )
+        stmt = stmt.on_conflict_do_nothing(index_elements=[PaymentIdempotencyKey.user_id, PaymentIdempotencyKey.key])
+        stmt = stmt.returning(PaymentIdempotencyKey.id)
+        record_id = db.execute(stmt).scalar()
+        db.commit()
+        return db.get(PaymentIdempotencyKey, record_id) if record_id else None
+
+    @staticmethod
+    def acquire(db: Session, user_id: int, key: str,
+                fingerprint: str) -> Tuple[Optional[PaymentIdempotencyKey], Optional[int]]:
+        """Reserva a chave para esta requisição ou obtém a transação criada por uma anterior.
+
+        Retorna (reserva, None) quando esta requisição deve criar o pagamento e
+        (None, transaction_id) quando ela é uma repetição. Uma repetição
+        simultânea espera a original terminar, por até WAIT_TIMEOUT segundos.
+        Consulta o banco e dorme entre as tentativas: nas rotas assíncronas,
+        deve rodar no threadpool.
+        """
+        if len(key) > IdempotencyService.MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail="Idempotency-Key too long")
+
+        deadline = time.monotonic() + IdempotencyService.WAIT_TIMEOUT
+        while True:
+            record = IdempotencyService._claim(db, user_id, key, fingerprint)
+            if record:
+                return record, None
+
+            existing = db.query(PaymentIdempotencyKey).filter(
+                PaymentIdempotencyKey.user_id == user_id,
+                PaymentIdempotencyKey.key == key
+            ).first()
+            if existing is None:
+                # A requisição original falhou e liberou a chave entre as duas consultas
+                continue
+            if existing.fingerprint != fingerprint:
+                raise HTTPException(status_code=422,
+                                    detail="Idempotency-Key already used with a different request")
+            if existing.status == "completed":
+                logger.info(f"Idempotent payment replayed: user_id={user_id}, transaction_id={existing.transaction_id}")
+                return None, existing.transaction_id
+            if time.monotonic() >= deadline:
+                raise HTTPException(status_code=409,
+                                    detail="A request with this Idempotency-Key is still being processed")
+            # Encerra a leitura para enxergar o commit da requisição original
+            db.rollback()
+            time.sleep(IdempotencyService.POLL_INTERVAL)
+
+    @staticmethod
+    def complete(record: PaymentIdempotencyKey, transaction_id: int) -> None:
+        """Associa a transação à chave; gravado no mesmo commit que enfileira o pagamento."""
+        record.status = "completed"
+        record.transaction_id = transaction_id
+
+    @staticmethod
+    def release(db: Session, record: PaymentIdempotencyKey) -> None:
+        """Libera a chave de uma requisição que falhou, permitindo que o cliente tente de novo."""
+        db.rollback()
+        db.query(PaymentIdempotencyKey).filter(
+            PaymentIdempotencyKey.id == record.id,
+            PaymentIdempotencyKey.status == "in_progress"
+        ).delete(synchronize_session=False)
+        db.commit()
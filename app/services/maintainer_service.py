@@ -1,17 +1,19 @@
 from typing import Optional
 
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.models.maintainer import Maintainer
 from app.models.ong import ONG, OngMaintainer
 from app.models.address import Address
 from app.schemas.maintainer import MaintainerCreate, MaintainerResponse
 from app.services.auth_service import get_password_hash, get_current_user
+from app.services.customer_service import CustomerService
 from ..config.pagarme import configure_pagarme
 from ..models.staff import Staff
 from ..models.user import User, UserType
-from ..pagarme.address import PagarMeAddressAPI
-from ..pagarme.customers import PagarMeCustomerAPI
+from ..pagarme.address import PagarMeAddressAPI, AsyncPagarMeAddressAPI
+from ..pagarme.customers import PagarMeCustomerAPI, AsyncPagarMeCustomerAPI
 from ..schemas.address import AddressResponse
 import logging
 import re
@@ -41,7 +43,150 @@ def format_phone_number(phone: str) -> str:
         raise ValueError(f"Invalid phone number format: {phone}")
     return phone
 
-def create_maintainer(db: Session, maintainer: MaintainerCreate, current_user: dict,):
+def _create_local_maintainer(db: Session, maintainer: MaintainerCreate, current_user: dict):
+    """Cria endereço, usuário, mantenedor e vínculo com a ONG, sem confirmar a transação."""
+    # Create address
+    db_address = Address(**maintainer.address.dict())
+    db.add(db_address)
+    db.flush()
+    logger.debug(f"Address created with id: {db_address.id}")
+
+    maintainer_type = db.query(UserType).filter(UserType.name == "maintainer").first()
+    if not maintainer_type:
+        logger.error("User type 'maintainer' not found")
+        raise HTTPException(status_code=500, detail="User type 'maintainer' not found")
+
+    # Create user for maintainer
+    db_user = User(
+        username=maintainer.user.username.lower(),
+        password=get_password_hash(maintainer.user.password),
+        user_type_id=maintainer_type.id,
+        name=maintainer.user.name,
+        document=maintainer.user.document,
+        email=maintainer.user.email,
+        phone_number=maintainer.user.phone_number,
+        photo=maintainer.user.photo,  # Foto agora em User
+        status="I"
+    )
+    db.add(db_user)
+    db.flush()
+    logger.debug(f"User created with id: {db_user.id}")
+
+    # Create maintainer and associate do address and user
+    db_maintainer = Maintainer(
+        address_id=db_address.id,
+        user_id=db_user.id,
+        client_id=None,  # Será preenchido após criar o cliente na Pagar.me
+        is_business=maintainer.is_business
+    )
+    db.add(db_maintainer)
+    db.flush()
+    logger.debug(f"Maintainer created with id: {db_maintainer.id}")
+
+    # Verificar ONG
+    ong = None
+    if current_user["type"] == "ong":
+        ong = db.query(ONG).filter(ONG.user_id == current_user["id"]).first()
+        if not ong:
+            logger.error(f"ONG not found for user_id: {current_user['id']}")
+            raise HTTPException(status_code=400, detail="ONG not found for current user")
+    elif current_user["type"] in ["admin", "staff"] and maintainer.ong_id:
+        ong = db.query(ONG).filter(ONG.id == maintainer.ong_id).first()
+        if not ong:
+            logger.error(f"ONG not found for ong_id: {maintainer.ong_id}")
+            raise HTTPException(status_code=404, detail=f"ONG with id {maintainer.ong_id} not found")
+    else:
+        raise HTTPException(status_code=400, detail="ong_id is mandatory for non-ONG users")
+
+    # Criar relação na tabela ong_maintainer
+    ong_maintainer = OngMaintainer(
+        ong_id=ong.id,
+        maintainer_id=db_maintainer.id
+    )
+    db.add(ong_maintainer)
+    db.flush()
+    logger.debug(f"OngMaintainer created with ong_id: {ong.id}, maintainer_id: {db_maintainer.id}")
+
+    return db_address, db_user, db_maintainer, ong
+
+
+def _build_client_data(db_user: User, db_maintainer: Maintainer) -> dict:
+    """Monta os dados do cliente na Pagar.me."""
+    formatted_phone = format_phone_number(db_user.phone_number)
+    return {
+        "external_id": str(db_maintainer.id),
+        "name": db_user.name or db_user.username,
+        "email": db_user.email,
+        "type": "individual",
+        "country": "br",
+        "phone_numbers": [formatted_phone],
+        "documents": [
+            {
+                "type": "cpf",
+                "number": db_user.document
+            }
+        ]
+    }
+
+
+def _build_address_data(db_address: Address) -> dict:
+    """Monta os dados do endereço do cliente na Pagar.me."""
+    return {
+        "line_1": f"{db_address.street}, {db_address.street_number or ''}".strip(),
+        "line_2": db_address.complementary or "",
+        "zip_code": db_address.zip_code,
+        "city": db_address.city,
+        "state": db_address.state.lower(),
+        "country": "br",
+        "status": "active"
+    }
+
+
+def _build_maintainer_response(db: Session, db_address: Address, db_user: User, db_maintainer: Maintainer,
+                               ong: ONG, current_user: dict) -> MaintainerResponse:
+    db.refresh(db_address)
+    db.refresh(db_user)
+    db.refresh(db_maintainer)
+
+    logger.debug(f"Created address: {db_address.__dict__}")
+    logger.debug(f"Created user: {db_user.__dict__}")
+    logger.debug(f"Created maintainer: {db_maintainer.__dict__}")
+    if current_user["type"] == "ong":
+        logger.debug(f"Created ong_maintainer relation: ong_id={ong.id}, maintainer_id={db_maintainer.id}")
+
+    return MaintainerResponse(
+        id=db_maintainer.id,
+        client_id=db_maintainer.client_id,
+        ong_id=ong.id,
+        user=UserResponse(
+            id=db_user.id,
+            username=db_user.username,
+            name=db_user.name,
+            document=db_user.document,
+            email=db_user.email,
+            phone_number=db_user.phone_number,
+            user_type=db_user.user_type.name,
+            status=db_user.status,
+            photo=db_user.photo
+        ),
+        address=AddressResponse(
+            id=db_address.id,
+            street=db_address.street,
+            street_number=db_address.street_number,
+            complementary=db_address.complementary,
+            city=db_address.city,
+            state=db_address.state,
+            zip_code=db_address.zip_code
+        )
+    )
+
+
+def _start_maintainer(db: Session, maintainer: MaintainerCreate, current_user: dict):
+    """Grava o mantenedor e monta os dados do cliente e do endereço na Pagar.me.
+
+    Faz commit antes de qualquer chamada à Pagar.me, para que nenhuma transação
+    do banco fique aberta enquanto o gateway responde.
+    """
     logger.debug(f"Current user: {current_user}")
     logger.debug(f"Maintainer data: {maintainer.dict()}")
 
@@ -51,155 +196,16 @@ def create_maintainer(db: Session, maintainer: MaintainerCreate, current_user: d
         raise HTTPException(status_code=403, detail="Permission denied: only ONG or Staff can create maintainers")
 
     try:
-        # Create address
-        db_address = Address(**maintainer.address.dict())
-        db.add(db_address)
-        db.flush()
-        logger.debug(f"Address created with id: {db_address.id}")
-
-        maintainer_type = db.query(UserType).filter(UserType.name == "maintainer").first()
-        if not maintainer_type:
-            logger.error("User type 'maintainer' not found")
-            raise HTTPException(status_code=500, detail="User type 'maintainer' not found")
-
-        # Create user for maintainer
-        db_user = User(
-            username=maintainer.user.username.lower(),
-            password=get_password_hash(maintainer.user.password),
-            user_type_id=maintainer_type.id,
-            name=maintainer.user.name,
-            document=maintainer.user.document,
-            email=maintainer.user.email,
-            phone_number=maintainer.user.phone_number,
-            photo=maintainer.user.photo,  # Foto agora em User
-            status="I"
-        )
-        db.add(db_user)
-        db.flush()
-        logger.debug(f"User created with id: {db_user.id}")
-
-        # Create maintainer and associate do address and user
-        db_maintainer = Maintainer(
-            address_id=db_address.id,
-            user_id=db_user.id,
-            client_id=None,  # Será preenchido após criar o cliente na Pagar.me
-            is_business=maintainer.is_business
-        )
-        db.add(db_maintainer)
-        db.flush()
-        logger.debug(f"Maintainer created with id: {db_maintainer.id}")
-
-        # Verificar ONG
-        ong = None
-        if current_user["type"] == "ong":
-            ong = db.query(ONG).filter(ONG.user_id == current_user["id"]).first()
-            if not ong:
-                logger.error(f"ONG not found for user_id: {current_user['id']}")
-                raise HTTPException(status_code=400, detail="ONG not found for current user")
-        elif current_user["type"] in ["admin", "staff"] and maintainer.ong_id:
-            ong = db.query(ONG).filter(ONG.id == maintainer.ong_id).first()
-            if not ong:
-                logger.error(f"ONG not found for ong_id: {maintainer.ong_id}")
-                raise HTTPException(status_code=404, detail=f"ONG with id {maintainer.ong_id} not found")
-        else:
-            raise HTTPException(status_code=400, detail="ong_id is mandatory for non-ONG users")
-
-        # Criar relação na tabela ong_maintainer
-        ong_maintainer = OngMaintainer(
-            ong_id=ong.id,
-            maintainer_id=db_maintainer.id
-        )
-        db.add(ong_maintainer)
-        db.flush()
-        logger.debug(f"OngMaintainer created with ong_id: {ong.id}, maintainer_id: {db_maintainer.id}")
-
-        # Configurar Pagar.me
-        configure_pagarme()
-
-        # Criar cliente na Pagar.me
-        try:
-            formatted_phone = format_phone_number(db_user.phone_number)
-            client_data = {
-                "external_id": str(db_maintainer.id),
-                "name": db_user.name or db_user.username,
-                "email": db_user.email,
-                "type": "individual",
-                "country": "br",
-                "phone_numbers": [formatted_phone],
-                "documents": [
-                    {
-                        "type": "cpf",
-                        "number": db_user.document
-                    }
-                ]
-            }
-            logger.debug(f"Sending client data to Pagar.me: {client_data}")
-            client = PagarMeCustomerAPI.create_customer(client_data)
-            db_maintainer.client_id = client["id"]
-            logger.debug(f"Pagar.me client created: client_id={client['id']}")
-
-            # Criar endereço na Pagar.me
-            address_data = {
-                "line_1": f"{db_address.street}, {db_address.street_number or ''}".strip(),
-                "line_2": db_address.complementary or "",
-                "zip_code": db_address.zip_code,
-                "city": db_address.city,
-                "state": db_address.state.lower(),
-                "country": "br",
-                "status": "active"
-            }
-            logger.debug(f"Sending address data to Pagar.me: {address_data}")
-            PagarMeAddressAPI.create_address(client["id"], address_data)
-            logger.debug(f"Pagar.me address created for client_id={client['id']}")
-
-            db.commit()
-        except ValueError as ve:
-            logger.error(f"Phone number validation failed: {str(ve)}")
-            db.rollback()
-            raise HTTPException(status_code=400, detail=str(ve))
-        except Exception as e:
-            logger.error(f"Failed to create Pagar.me client or address: {str(e)}")
-            db.rollback()
-            raise HTTPException(status_code=500, detail=f"Failed to create Pagar.me client or address: {str(e)}")
-
+        records = _create_local_maintainer(db, maintainer, current_user)
+        db_address, db_user, db_maintainer, ong = records
+        client_data = _build_client_data(db_user, db_maintainer)
+        address_data = _build_address_data(db_address)
         db.commit()
-
-        db.refresh(db_address)
-        db.refresh(db_user)
-        db.refresh(db_maintainer)
-
-        logger.debug(f"Created address: {db_address.__dict__}")
-        logger.debug(f"Created user: {db_user.__dict__}")
-        logger.debug(f"Created maintainer: {db_maintainer.__dict__}")
-        if current_user["type"] == "ong":
-            logger.debug(f"Created ong_maintainer relation: ong_id={ong.id}, maintainer_id={db_maintainer.id}")
-
-        return MaintainerResponse(
-            id=db_maintainer.id,
-            client_id=db_maintainer.client_id,
-            ong_id=ong.id,
-            user=UserResponse(
-                id=db_user.id,
-                username=db_user.username,
-                name=db_user.name,
-                document=db_user.document,
-                email=db_user.email,
-                phone_number=db_user.phone_number,
-                user_type=db_user.user_type.name,
-                status=db_user.status,
-                photo=db_user.photo
-            ),
-            address=AddressResponse(
-                id=db_address.id,
-                street=db_address.street,
-                street_number=db_address.street_number,
-                complementary=db_address.complementary,
-                city=db_address.city,
-                state=db_address.state,
-                zip_code=db_address.zip_code
-            )
-        )
-
+        return records, client_data, address_data
+    except ValueError as ve:
+        db.rollback()
+        logger.error(f"Phone number validation failed: {str(ve)}")
+        raise HTTPException(status_code=400, detail=str(ve))
     except HTTPException as e:
         db.rollback()
         logger.error(f"Error creating maintainer: {e.detail}")
@@ -210,6 +216,66 @@ def create_maintainer(db: Session, maintainer: MaintainerCreate, current_user: d
         raise HTTPException(status_code=500, detail=f"Failed to create maintainer: {str(e)}")
 
 
+def _finish_maintainer(db: Session, records, customer_id: str, current_user: dict) -> MaintainerResponse:
+    """Associa o cliente criado na Pagar.me ao mantenedor e monta a resposta."""
+    db_address, db_user, db_maintainer, ong = records
+    CustomerService.remember(db, db_maintainer, customer_id)
+    db.commit()
+    logger.debug(f"Pagar.me client linked: maintainer_id={db_maintainer.id}, client_id={customer_id}")
+    return _build_maintainer_response(db, db_address, db_user, db_maintainer, ong, current_user)
+
+
+def _discard_maintainer(db: Session, records, error: Exception) -> None:
+    """Remove o cadastro local quando a Pagar.me recusa o cliente ou o endereço, e converte o erro."""
+    db.rollback()
+    db_address, db_user, db_maintainer, ong = records
+    logger.error(f"Failed to create Pagar.me client or address: {str(error)}")
+    db.query(OngMaintainer).filter(OngMaintainer.maintainer_id == db_maintainer.id).delete(synchronize_session=False)
+    db.query(Maintainer).filter(Maintainer.id == db_maintainer.id).delete(synchronize_session=False)
+    db.query(User).filter(User.id == db_user.id).delete(synchronize_session=False)
+    db.query(Address).filter(Address.id == db_address.id).delete(synchronize_session=False)
+    db.commit()
+    raise HTTPException(status_code=500, detail=f"Failed to create Pagar.me client or address: {str(error)}")
+
+
+def create_maintainer(db: Session, maintainer: MaintainerCreate, current_user: dict,):
+    records, client_data, address_data = _start_maintainer(db, maintainer, current_user)
+
+    # Configurar Pagar.me
+    configure_pagarme()
+
+    # Criar cliente e endereço na Pagar.me
+    try:
+        logger.debug(f"Sending client data to Pagar.me: {client_data}")
+        client = PagarMeCustomerAPI.create_customer(client_data)
+        logger.debug(f"Sending address data to Pagar.me: {address_data}")
+        PagarMeAddressAPI.create_address(client["id"], address_data)
+    except Exception as e:
+        _discard_maintainer(db, records, e)
+
+    return _finish_maintainer(db, records, client["id"], current_user)
+
+
+async def create_maintainer_async(db: Session, maintainer: MaintainerCreate, current_user: dict):
+    """Versão assíncrona de create_maintainer: aguarda a Pagar.me sem ocupar o threadpool.
+
+    O acesso ao banco e o hash da senha continuam síncronos e rodam no threadpool,
+    fora do event loop.
+    """
+    records, client_data, address_data = await run_in_threadpool(
+        _start_maintainer, db, maintainer, current_user)
+
+    try:
+        logger.debug(f"Sending client data to Pagar.me: {client_data}")
+        client = await AsyncPagarMeCustomerAPI.create_customer(client_data)
+        logger.debug(f"Sending address data to Pagar.me: {address_data}")
+        await AsyncPagarMeAddressAPI.create_address(client["id"], address_data)
+    except Exception as e:
+        await run_in_threadpool(_discard_maintainer, db, records, e)
+
+    return await run_in_threadpool(_finish_maintainer, db, records, client["id"], current_user)
+
+
 def get_maintainers(
     db: Session,
     current_user: dict,
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 
 from fastapi import HTTPException
@@ -7,9 +8,10 @@ from app.models.address import Address
 from app.models.staff import Staff
 from app.models.user import UserType, User
 from app.schemas.address import AddressResponse
-from app.schemas.ong import ONGCreate, ONGResponse
+from app.schemas.ong import DonationTotalsResponse, ONGCreate, ONGResponse
 from app.schemas.user import UserResponse
 from app.services.auth_service import get_password_hash
+from app.services.transaction_aggregate_service import TransactionAggregateService
 import logging
 
 # Configuração explícita do logging
@@ -198,4 +200,45 @@ def get_ong_by_id(db: Session, id: int):
             photo=ong.user.photo
         ),
         address=AddressResponse.from_orm(ong.address)
-    )
\ No newline at end of file
+    )
+
+
+# Restringe a ONG e o staff que não é admin aos dados da própria ONG
+def check_ong_access(db: Session, ong: ONG, current_user: dict) -> None:
+    user_id = current_user.get("user_id") or (current_user["user"].id if current_user.get("user") else None)
+    if current_user["type"] == "ong" and user_id != ong.user_id:
+        raise HTTPException(status_code=403, detail="Permission denied: ONG can only see its own data")
+    if current_user["type"] == "staff" and current_user.get("role") != "admin":
+        user_staff = db.query(Staff).filter(Staff.user_id == user_id).first()
+        if not user_staff or user_staff.ong_id != ong.id:
+            raise HTTPException(status_code=403, detail="Permission denied: staff not associated with this ONG")
+
+
+# Totais das doações pagas de uma ONG
+def get_ong_donation_totals(
+        db: Session,
+        ong_id: int,
+        current_user: dict,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        group_by: Optional[str] = None
+) -> DonationTotalsResponse:
+    if current_user["type"] not in ["admin", "ong", "staff"]:
+        logger.error(f"Permission denied for user type: {current_user['type']}")
+        raise HTTPException(status_code=403, detail="Permission denied: only ONG or Staff can see donation totals")
+
+    ong = db.query(ONG).filter(ONG.id == ong_id).first()
+    if not ong:
+        raise HTTPException(status_code=404, detail="ONG not found")
+    check_ong_access(db, ong, current_user)
+
+    filters = {"ong_id": ong_id, "since": since, "until": until}
+    groups = []
+    if group_by:
+        if group_by == "ong":
+            raise HTTPException(status_code=400, detail="Invalid group_by: ong")
+        try:
+            groups = TransactionAggregateService.totals_by(db, group_by, **filters)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return DonationTotalsResponse(**TransactionAggregateService.totals(db, **filters), groups=groups)
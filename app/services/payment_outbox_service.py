@@ -0,0 +1,186 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.models.payment_outbox import PaymentOutbox
+from app.models.transaction import Transaction, TransactionStatus
+from app.services.payment_service import PaymentService
+
+logger = logging.getLogger(__name__)
+
+
+class PaymentOutboxService:
+    """Worker que executa, fora da requisição, as chamadas à Pagar.me dos pagamentos em fila.
+
+    As transações chegam aqui já gravadas como PENDING. Cada registro do outbox é
+    reservado com um UPDATE condicional, então vários processos podem rodar o
+    worker ao mesmo tempo sem processar o mesmo pagamento duas vezes.
+    """
+    WORKERS = int(os.getenv("PAYMENT_OUTBOX_WORKERS", "8"))
+    POLL_INTERVAL = float(os.getenv("PAYMENT_OUTBOX_POLL_INTERVAL", "2"))
+    BATCH_SIZE = int(os.getenv("PAYMENT_OUTBOX_BATCH_SIZE", "100"))
+    MAX_ATTEMPTS = int(os.getenv("PAYMENT_OUTBOX_MAX_ATTEMPTS", "5"))
+    RETRY_DELAY = float(os.getenv("PAYMENT_OUTBOX_RETRY_DELAY", "5"))
+    LOCK_TIMEOUT = float(os.getenv("PAYMENT_OUTBOX_LOCK_TIMEOUT", "300"))
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _poller: Optional[threading.Thread] = None
+    _stopping = threading.Event()
+    _scheduled: Set[int] = set()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def start() -> None:
+        """Inicia o pool de workers e a varredura periódica do outbox."""
+        with PaymentOutboxService._lock:
+            if PaymentOutboxService._executor is not None:
+                return
+            PaymentOutboxService._stopping.clear()
+            PaymentOutboxService._executor = ThreadPoolExecutor(
+                max_workers=PaymentOutboxService.WORKERS, thread_name_prefix="payment-outbox")
+            PaymentOutboxService._poller = threading.Thread(
+                target=PaymentOutboxService._poll_loop, name="payment-outbox-poller", daemon=True)
+            PaymentOutboxService._poller.start()
+        logger.info(f"Payment outbox worker started: workers={PaymentOutboxService.WORKERS}")
+
+    @staticmethod
+    def stop() -> None:
+        """Para a varredura e aguarda os pagamentos em andamento."""
+        PaymentOutboxService._stopping.set()
+        with PaymentOutboxService._lock:
+            executor = PaymentOutboxService._executor
+            PaymentOutboxService._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def dispatch(transaction_id: int) -> None:
+        """Agenda o processamento imediato de uma transação recém-enfileirada.
+
+        Sem worker ativo neste processo, a transação fica para a varredura de
+        outro processo.
+        """
+        with PaymentOutboxService._lock:
+            executor = PaymentOutboxService._executor
+            if executor is None or transaction_id in PaymentOutboxService._scheduled:
+                return
+            PaymentOutboxService._scheduled.add(transaction_id)
+        executor.submit(PaymentOutboxService._run, transaction_id)
+
+    @staticmethod
+    def _run(transaction_id: int) -> None:
+        try:
+            PaymentOutboxService.process(transaction_id)
+        except Exception as e:
+            logger.error(f"Payment outbox worker crashed: transaction_id={transaction_id}, error={str(e)}")
+        finally:
+            with PaymentOutboxService._lock:
+                PaymentOutboxService._scheduled.discard(transaction_id)
+
+    @staticmethod
+    def _poll_loop() -> None:
+        while not PaymentOutboxService._stopping.is_set():
+            try:
+                for transaction_id in PaymentOutboxService._due():
+                    PaymentOutboxService.dispatch(transaction_id)
+            except Exception as e:
+                logger.error(f"Payment outbox poll failed: {str(e)}")
+            PaymentOutboxService._stopping.wait(PaymentOutboxService.POLL_INTERVAL)
+
+    @staticmethod
+    def _claimable(now: datetime):
+        """Registros prontos para processar, incluindo os travados por um worker que morreu."""
+        stale = now - timedelta(seconds=PaymentOutboxService.LOCK_TIMEOUT)
+        return or_(
+            and_(PaymentOutbox.status == "pending", PaymentOutbox.available_at <= now),
+            and_(PaymentOutbox.status == "processing", PaymentOutbox.locked_at < stale)
+        )
+
+    @staticmethod
+    def _due() -> List[int]:
+        db = SessionLocal()
+        try:
+            rows = db.query(PaymentOutbox.transaction_id).filter(
+                PaymentOutboxService._claimable(datetime.utcnow())
+            ).order_by(PaymentOutbox.available_at).limit(PaymentOutboxService.BATCH_SIZE).all()
+            return [row.transaction_id for row in rows]
+        finally:
+            db.close()
+
+    @staticmethod
+    def _claim(db: Session, transaction_id: int) -> Optional[PaymentOutbox]:
+        """Reserva o registro do outbox. Retorna None se outro worker já o pegou."""
+        now = datetime.utcnow()
+        claimed = db.query(PaymentOutbox).filter(
+            PaymentOutbox.transaction_id == transaction_id,
+            PaymentOutboxService._claimable(now)
+        ).update({
+            PaymentOutbox.status: "processing",
+            PaymentOutbox.locked_at: now,
+            PaymentOutbox.attempts: PaymentOutbox.attempts + 1
+        }, synchronize_session=False)
+        db.commit()
+        if not claimed:
+            return None
+        return db.query(PaymentOutbox).filter(PaymentOutbox.transaction_id == transaction_id).one()
+
+    @staticmethod
+    def process(transaction_id: int) -> None:
+        """Processa um pagamento do outbox em uma sessão própria."""
+        db = SessionLocal()
+        try:
+            outbox = PaymentOutboxService._claim(db, transaction_id)
+            if outbox is None:
+                return
+            attempt, idempotency_key = outbox.attempts, outbox.idempotency_key
+            try:
+                PaymentService.process_payment(db, transaction_id, idempotency_key)
+            except Exception as e:
+                db.rollback()
+                PaymentOutboxService._record_failure(db, transaction_id, attempt, e)
+                return
+            db.query(PaymentOutbox).filter(PaymentOutbox.transaction_id == transaction_id).update({
+                PaymentOutbox.status: "done",
+                PaymentOutbox.processed_at: datetime.utcnow(),
+                PaymentOutbox.last_error: None
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _record_failure(db: Session, transaction_id: int, attempt: int, error: Exception) -> None:
+        """Reagenda o pagamento com backoff ou, esgotadas as tentativas, marca a transação como falha."""
+        error_message = str(error)
+        outbox = db.query(PaymentOutbox).filter(PaymentOutbox.transaction_id == transaction_id)
+        if attempt < PaymentOutboxService.MAX_ATTEMPTS:
+            delay = PaymentOutboxService.RETRY_DELAY * (2 ** (attempt - 1))
+            outbox.update({
+                PaymentOutbox.status: "pending",
+                PaymentOutbox.available_at: datetime.utcnow() + timedelta(seconds=delay),
+                PaymentOutbox.last_error: error_message
+            }, synchronize_session=False)
+            db.commit()
+            logger.warning(f"Payment processing failed, retrying in {delay:.0f}s: "
+                           f"transaction_id={transaction_id}, attempt={attempt}, error={error_message}")
+            return
+
+        outbox.update({
+            PaymentOutbox.status: "failed",
+            PaymentOutbox.processed_at: datetime.utcnow(),
+            PaymentOutbox.last_error: error_message
+        }, synchronize_session=False)
+        db.query(Transaction).filter(
+            Transaction.id == transaction_id,
+            Transaction.status == TransactionStatus.PENDING
+        ).update({
+            Transaction.status: TransactionStatus.FAILED,
+            Transaction.error_message: "Card expired" if "expired" in error_message.lower() else error_message
+        }, synchronize_session=False)
+        db.commit()
+        logger.error(f"Payment processing failed permanently: transaction_id={transaction_id}, error={error_message}")
@@ -1,38 +1,103 @@
 import logging
-from typing import Dict, Any
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Set, Tuple
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_
+from sqlalchemy.orm import Session, joinedload
 from app.models.transaction import Transaction, PaymentMethod, TransactionStatus
 from app.models.maintainer import Maintainer
 from app.models.ong import ONG
 from app.models.campaign import Campaign
 from app.models.base import Base
-from app.models.project import Project
+from app.models.project import Project, ProjectAttendee
 from app.models.attendee import Attendee
-from app.models.card import Card
+from app.models.payment_outbox import PaymentOutbox
+from app.models.idempotency_key import PaymentIdempotencyKey
 from app.pagarme.orders import PagarMeOrdersAPI
-from app.pagarme.cards import PagarMeCardsAPI
-from app.pagarme.charges import PagarMeChargesAPI
-from app.pagarme.customers import PagarMeCustomerAPI
+from app.schemas.money import to_cents, from_cents, percent_of
+from app.pagarme.cards import PagarMeCardsAPI, AsyncPagarMeCardsAPI
+from app.services.customer_service import CustomerService
+from app.services.card_wallet_service import CardWalletService
+from app.services.idempotency_service import IdempotencyService
 import os
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class PaymentContext:
+    """Registros validados de um pagamento, carregados de uma só vez por _validate_payment."""
+    maintainer: Maintainer
+    ong: Optional[ONG]
+    campaign: Optional[Campaign] = None
+    base: Optional[Base] = None
+    project: Optional[Project] = None
+    attendee: Optional[Attendee] = None
+
+
+@dataclass
+class BatchPlan:
+    """Itens de um lote já validados, entre a validação e a gravação no outbox."""
+    maintainer: Maintainer
+    results: List[Tuple[Optional[Transaction], Optional[HTTPException]]]
+    accepted: List[Tuple[int, Any, Transaction, Optional[Dict[str, Any]]]] = field(default_factory=list)
+    fingerprints: Dict[int, str] = field(default_factory=dict)
+    saved_cards: Dict[str, Any] = field(default_factory=dict)
+    to_tokenize: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
 class PaymentService:
     LEET_RECIPIENT_ID = os.getenv("LEET_RECIPIENT_ID")
+    BATCH_CONCURRENCY = int(os.getenv("PAYMENT_BATCH_CONCURRENCY", "8"))
 
     @staticmethod
-    def create_payment(db: Session, user_id: int, payment_data: Dict[str, Any]) -> Transaction:
-        """Cria um pagamento avulso."""
-        # Verificar se o usuário é um mantenedor
+    def _get_maintainer(db: Session, user_id: int) -> Maintainer:
+        """Obtém o mantenedor do usuário, recusando usuários de outros tipos."""
         maintainer = db.query(Maintainer).filter(Maintainer.user_id == user_id).first()
         if not maintainer:
             logger.error(f"User {user_id} is not a maintainer")
             raise HTTPException(status_code=403, detail="Only maintainers can make payments")
+        return maintainer
+
+    @staticmethod
+    def _load_destinations(db: Session, payments: List[Any]) -> Dict[str, Dict[Any, Any]]:
+        """Carrega, com uma consulta por tabela, todas as ONGs e destinos citados pelos pagamentos."""
+        def ids(field: str) -> Set[int]:
+            return {getattr(payment, field) for payment in payments if getattr(payment, field)}
+
+        def load(model, field: str) -> Dict[int, Any]:
+            wanted = ids(field)
+            if not wanted:
+                return {}
+            return {row.id: row for row in db.query(model).filter(model.id.in_(wanted)).all()}
+
+        # Participantes são indexados pelo par (projeto, participante) de project_attendees
+        attendees = {}
+        pairs = {(payment.project_id, payment.attendee_id) for payment in payments
+                 if payment.project_id and payment.attendee_id}
+        if pairs:
+            rows = db.query(ProjectAttendee.project_id, Attendee).join(
+                Attendee, Attendee.id == ProjectAttendee.attendee_id
+            ).filter(ProjectAttendee.attendee_id.in_({attendee_id for _, attendee_id in pairs})).all()
+            attendees = {(project_id, attendee.id): attendee for project_id, attendee in rows
+                         if (project_id, attendee.id) in pairs}
 
+        return {
+            "ongs": load(ONG, "ong_id"),
+            "campaigns": load(Campaign, "campaign_id"),
+            "bases": load(Base, "base_id"),
+            "projects": load(Project, "project_id"),
+            "attendees": attendees
+        }
+
+    @staticmethod
+    def _check_destinations(payment_data: Any, destinations: Dict[str, Dict[Any, Any]]) -> Tuple[
+            ONG, Optional[Campaign], Optional[Base], Optional[Project], Optional[Attendee]]:
+        """Valida a ONG e os destinos opcionais de um pagamento contra os registros já carregados."""
         # Validar ONG
-        ong = db.query(ONG).filter(ONG.id == payment_data.ong_id).first()
+        ong = destinations["ongs"].get(payment_data.ong_id)
         if not ong:
             logger.error(f"ONG {payment_data.ong_id} not found")
             raise HTTPException(status_code=404, detail="ONG not found")
@@ -44,21 +109,20 @@ class PaymentService:
         attendee = None
 
         if payment_data.campaign_id:
-            campaign = db.query(Campaign).filter(Campaign.id == payment_data.campaign_id,
-                                                 Campaign.ong_id == ong.id).first()
-            if not campaign:
+            campaign = destinations["campaigns"].get(payment_data.campaign_id)
+            if not campaign or campaign.ong_id != ong.id:
                 logger.error(f"Campaign {payment_data.campaign_id} not found or not associated with ONG {ong.id}")
                 raise HTTPException(status_code=404, detail="Campaign not found or not associated with ONG")
 
         if payment_data.base_id:
-            base = db.query(Base).filter(Base.id == payment_data.base_id, Base.ong_id == ong.id).first()
-            if not base:
+            base = destinations["bases"].get(payment_data.base_id)
+            if not base or base.ong_id != ong.id:
                 logger.error(f"Base {payment_data.base_id} not found or not associated with ONG {ong.id}")
                 raise HTTPException(status_code=404, detail="Base not found or not associated with ONG")
 
         if payment_data.project_id:
-            project = db.query(Project).filter(Project.id == payment_data.project_id, Project.ong_id == ong.id).first()
-            if not project:
+            project = destinations["projects"].get(payment_data.project_id)
+            if not project or project.ong_id != ong.id:
                 logger.error(f"Project {payment_data.project_id} not found or not associated with ONG {ong.id}")
                 raise HTTPException(status_code=404, detail="Project not found or not associated with ONG")
 
@@ -66,176 +130,457 @@ class PaymentService:
             if not payment_data.project_id:
                 logger.error("Attendee specified without project")
                 raise HTTPException(status_code=400, detail="Project ID is required when specifying an attendee")
-            attendee = db.query(Attendee).filter(
-                Attendee.id == payment_data.attendee_id,
-                Attendee.project_id == payment_data.project_id
-            ).first()
+            attendee = destinations["attendees"].get((payment_data.project_id, payment_data.attendee_id))
             if not attendee:
                 logger.error(
                     f"Attendee {payment_data.attendee_id} not found or not associated with project {payment_data.project_id}")
                 raise HTTPException(status_code=404, detail="Attendee not found or not associated with project")
 
-        # Calcular comissão
-        commission_rate = ong.commission_rate
-        commission_amount = payment_data.amount * commission_rate
-        net_amount = payment_data.amount - commission_amount
+        return ong, campaign, base, project, attendee
 
-        # Criar transação inicial
-        transaction = Transaction(
+    @staticmethod
+    def _validate_payment(db: Session, user_id: int, payment_data: Dict[str, Any]) -> PaymentContext:
+        """Valida o mantenedor, a ONG e os destinos opcionais do pagamento em uma única consulta.
+
+        Cada destino entra por outer join já restrito à ONG (ou ao projeto, via
+        project_attendees, no caso do participante); um destino informado que
+        volta nulo não existe ou não pertence à ONG.
+        """
+        if payment_data.attendee_id and not payment_data.project_id:
+            logger.error("Attendee specified without project")
+            raise HTTPException(status_code=400, detail="Project ID is required when specifying an attendee")
+
+        row = db.query(Maintainer, ONG, Campaign, Base, Project, Attendee).select_from(Maintainer).options(
+            joinedload(Maintainer.user)
+        ).outerjoin(
+            ONG, ONG.id == payment_data.ong_id
+        ).outerjoin(
+            Campaign, and_(Campaign.id == payment_data.campaign_id, Campaign.ong_id == ONG.id)
+        ).outerjoin(
+            Base, and_(Base.id == payment_data.base_id, Base.ong_id == ONG.id)
+        ).outerjoin(
+            Project, and_(Project.id == payment_data.project_id, Project.ong_id == ONG.id)
+        ).outerjoin(
+            ProjectAttendee, and_(ProjectAttendee.attendee_id == payment_data.attendee_id,
+                                  ProjectAttendee.project_id == Project.id)
+        ).outerjoin(
+            Attendee, Attendee.id == ProjectAttendee.attendee_id
+        ).filter(Maintainer.user_id == user_id).first()
+
+        # Verificar se o usuário é um mantenedor
+        if not row:
+            logger.error(f"User {user_id} is not a maintainer")
+            raise HTTPException(status_code=403, detail="Only maintainers can make payments")
+        context = PaymentContext(*row)
+
+        if not context.ong:
+            logger.error(f"ONG {payment_data.ong_id} not found")
+            raise HTTPException(status_code=404, detail="ONG not found")
+        if payment_data.campaign_id and not context.campaign:
+            logger.error(f"Campaign {payment_data.campaign_id} not found or not associated with ONG {context.ong.id}")
+            raise HTTPException(status_code=404, detail="Campaign not found or not associated with ONG")
+        if payment_data.base_id and not context.base:
+            logger.error(f"Base {payment_data.base_id} not found or not associated with ONG {context.ong.id}")
+            raise HTTPException(status_code=404, detail="Base not found or not associated with ONG")
+        if payment_data.project_id and not context.project:
+            logger.error(f"Project {payment_data.project_id} not found or not associated with ONG {context.ong.id}")
+            raise HTTPException(status_code=404, detail="Project not found or not associated with ONG")
+        if payment_data.attendee_id and not context.attendee:
+            logger.error(
+                f"Attendee {payment_data.attendee_id} not found or not associated with project {payment_data.project_id}")
+            raise HTTPException(status_code=404, detail="Attendee not found or not associated with project")
+        return context
+
+    @staticmethod
+    def _build_transaction(maintainer: Maintainer, ong: ONG, payment_data: Dict[str, Any]) -> Transaction:
+        """Monta a transação inicial como pendente."""
+        # Calcular comissão em centavos; os campos em reais derivam deles
+        amount_cents = to_cents(payment_data.amount)
+        commission_cents = percent_of(amount_cents, ong.commission_rate)
+
+        return Transaction(
             maintainer_id=maintainer.id,
             ong_id=ong.id,
             campaign_id=payment_data.campaign_id,
             base_id=payment_data.base_id,
             project_id=payment_data.project_id,
             attendee_id=payment_data.attendee_id,
-            amount=payment_data.amount,
-            commission_amount=commission_amount,
-            payment_method=payment_data.payment_method,
+            amount=float(from_cents(amount_cents)),
+            commission_amount=float(from_cents(commission_cents)),
+            amount_cents=amount_cents,
+            commission_cents=commission_cents,
+            payment_method=PaymentMethod(payment_data.payment_method),
             status=TransactionStatus.PENDING
         )
+
+    @staticmethod
+    def _create_transaction(db: Session, maintainer: Maintainer, ong: ONG,
+                            payment_data: Dict[str, Any]) -> Transaction:
+        """Registra a transação inicial como pendente."""
+        transaction = PaymentService._build_transaction(maintainer, ong, payment_data)
         db.add(transaction)
         db.flush()
+        return transaction
 
-        try:
-            # Criar ou obter cliente na Pagar.me
-            customer_data = {
-                "name": maintainer.user.name,
-                "email": maintainer.user.email,
-                "type": "individual",
-                "document": maintainer.user.document,
-                "phones": {
-                    "mobile_phone": {
-                        "country_code": "+55",
-                        "area_code": maintainer.user.phone_number[:2],
-                        "number": maintainer.user.phone_number[2:]
-                    }
+    @staticmethod
+    def ong_recipient_id(ong_id: int) -> str:
+        """Recebedor da ONG na Pagar.me, destino do split e dos repasses."""
+        return f"re_ong_{ong_id}"
+
+    @staticmethod
+    def _build_order_data(customer_id: str, ong: ONG, transaction: Transaction,
+                          campaign: Optional[Campaign], base: Optional[Base],
+                          project: Optional[Project], attendee: Optional[Attendee]) -> Dict[str, Any]:
+        """Monta o pedido na Pagar.me com o split entre a ONG e a Leet."""
+        # Preparar descrição do item
+        description = f"Doação para ONG {ong.id}"
+        if campaign:
+            description += f", campanha {campaign.title}"
+        elif base:
+            description += f", base {base.name}"
+        elif project:
+            description += f", projeto {project.title}"
+            if attendee:
+                description += f", participante {attendee.name}"
+
+        net_cents = transaction.amount_cents - transaction.commission_cents
+        order_data = {
+            "customer_id": customer_id,
+            "items": [
+                {
+                    "amount": transaction.amount_cents,
+                    "description": description,
+                    "quantity": 1
+                }
+            ],
+            "payments": [
+                {
+                    "payment_method": transaction.payment_method.value,
+                    "amount": transaction.amount_cents,
+                    "split": [
+                        {
+                            "amount": net_cents,
+                            "recipient_id": PaymentService.ong_recipient_id(ong.id),
+                            "type": "flat"
+                        },
+                        {
+                            "amount": transaction.commission_cents,
+                            "recipient_id": PaymentService.LEET_RECIPIENT_ID,
+                            "type": "flat"
+                        }
+                    ]
                 }
+            ],
+            # Permite ao webhook achar a transação mesmo antes de o order_id ser gravado
+            "metadata": {"transaction_id": str(transaction.id)}
+        }
+
+        if transaction.payment_method == PaymentMethod.CREDIT_CARD:
+            order_data["payments"][0]["credit_card"] = {"card_id": transaction.card_id}
+        elif transaction.payment_method == PaymentMethod.BOLETO:
+            order_data["payments"][0]["boleto"] = {
+                "instructions": "Pague até o vencimento para garantir a doação."
             }
-            customer_response = PagarMeCustomerAPI.create_customer(customer_data)
-            customer_id = customer_response["id"]
-
-            # Preparar descrição do item
-            description = f"Doação para ONG {ong.id}"
-            if campaign:
-                description += f", campanha {campaign.name}"
-            elif base:
-                description += f", base {base.name}"
-            elif project:
-                description += f", projeto {project.name}"
-                if attendee:
-                    description += f", participante {attendee.name}"
-
-            # Preparar dados do pedido
-            order_data = {
-                "customer_id": customer_id,
-                "items": [
-                    {
-                        "amount": int(payment_data.amount * 100),
-                        "description": description,
-                        "quantity": 1
-                    }
-                ],
-                "payments": [
-                    {
-                        "payment_method": payment_data.payment_method,
-                        "amount": int(payment_data.amount * 100),
-                        "split": [
-                            {
-                                "amount": int(net_amount * 100),
-                                "recipient_id": f"re_ong_{ong.id}",
-                                "type": "flat"
-                            },
-                            {
-                                "amount": int(commission_amount * 100),
-                                "recipient_id": PaymentService.LEET_RECIPIENT_ID,
-                                "type": "flat"
-                            }
-                        ]
-                    }
-                ]
+        elif transaction.payment_method == PaymentMethod.PIX:
+            order_data["payments"][0]["pix"] = {
+                "expires_in": 3600
             }
+        return order_data
+
+    @staticmethod
+    def _get_card_data(payment_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Valida os dados do cartão; retorna None quando um cartão salvo é usado."""
+        card_details = payment_data.card_details
+        if not card_details:
+            raise HTTPException(status_code=400, detail="Card details required for credit card payment")
+        if card_details.card_id:
+            return None
+        if not all([card_details.number, card_details.holder_name, card_details.expiration_date,
+                    card_details.cvv]):
+            raise HTTPException(status_code=400, detail="Complete card details required")
+        return {
+            "number": card_details.number,
+            "holder_name": card_details.holder_name,
+            "expiration_date": card_details.expiration_date,
+            "cvv": card_details.cvv
+        }
 
-            # Lógica por método de pagamento
-            if payment_data.payment_method == PaymentMethod.CREDIT_CARD:
-                card_details = payment_data.card_details
-                if not card_details:
-                    raise HTTPException(status_code=400, detail="Card details required for credit card payment")
+    @staticmethod
+    def _resolve_card(db: Session, maintainer: Maintainer,
+                      payment_data: Dict[str, Any]) -> Tuple[Optional[str], Optional[Dict[str, Any]], Optional[str]]:
+        """Decide de onde vem o cartão: (card_id, dados a tokenizar, impressão).
 
-                if card_details.card_id:
-                    transaction.card_id = card_details.card_id
-                    order_data["payments"][0]["credit_card"] = {"card_id": card_details.card_id}
-                else:
-                    if not all([card_details.number, card_details.holder_name, card_details.expiration_date,
-                                card_details.cvv]):
-                        raise HTTPException(status_code=400, detail="Complete card details required")
-
-                    card_data = {
-                        "number": card_details.number,
-                        "holder_name": card_details.holder_name,
-                        "expiration_date": card_details.expiration_date,
-                        "cvv": card_details.cvv
-                    }
-                    card_response = PagarMeCardsAPI.create_card(card_data)
-                    card_id = card_response["id"]
-                    transaction.card_id = card_id
-                    order_data["payments"][0]["credit_card"] = {"card_id": card_id}
-
-                    new_card = Card(
-                        maintainer_id=maintainer.id,
-                        card_id=card_id,
-                        last_four_digits=card_response["last_four_digits"],
-                        brand=card_response["brand"],
-                        status="active"
-                    )
-                    db.add(new_card)
-
-            elif payment_data.payment_method == PaymentMethod.BOLETO:
-                order_data["payments"][0]["boleto"] = {
-                    "instructions": "Pague até o vencimento para garantir a doação."
-                }
+        Um cartão informado por extenso que o mantenedor já salvou é reaproveitado
+        pelo card_id, sem nova chamada à Pagar.me.
+        """
+        card_data = PaymentService._get_card_data(payment_data)
+        if card_data is None:
+            return payment_data.card_details.card_id, None, None
+        fingerprint = CardWalletService.fingerprint(card_data)
+        saved_card = CardWalletService.find(db, maintainer.id, fingerprint)
+        if saved_card:
+            return saved_card.card_id, None, fingerprint
+        return None, card_data, fingerprint
 
-            elif payment_data.payment_method == PaymentMethod.PIX:
-                order_data["payments"][0]["pix"] = {
-                    "expires_in": 3600
-                }
+    @staticmethod
+    def _attach_card(db: Session, maintainer: Maintainer, transaction: Transaction, card_id: str,
+                     card_response: Optional[Dict[str, Any]] = None, fingerprint: Optional[str] = None) -> None:
+        """Associa o cartão à transação e salva cartões recém-criados na carteira."""
+        transaction.card_id = card_id
+        if card_response:
+            CardWalletService.save(db, maintainer.id, card_response, fingerprint)
+
+    @staticmethod
+    def _apply_order_response(transaction: Transaction, order_response: Dict[str, Any]) -> None:
+        """Atualiza a transação com o pedido e a cobrança retornados pela Pagar.me.
+
+        O status só é alterado se a transação ainda estiver pendente, pois o
+        webhook pode ter chegado antes desta atualização.
+        """
+        transaction.order_id = order_response["id"]
+        charge = order_response["charges"][0]
+        transaction.charge_id = charge["id"]
+
+        if transaction.payment_method == PaymentMethod.BOLETO:
+            transaction.boleto_url = charge["last_transaction"]["url"]
+            transaction.boleto_barcode = charge["last_transaction"]["barcode"]
+        elif transaction.payment_method == PaymentMethod.PIX:
+            transaction.pix_qr_code = charge["last_transaction"]["qr_code_url"]
+            transaction.pix_code = charge["last_transaction"]["qr_code"]
 
-            # Criar pedido na Pagar.me
-            order_response = PagarMeOrdersAPI.create_order(order_data)
-            transaction.order_id = order_response["id"]
-            charge = order_response["charges"][0]
-            transaction.charge_id = charge["id"]
-
-            # Atualizar transação com detalhes
-            if payment_data.payment_method == PaymentMethod.BOLETO:
-                transaction.boleto_url = charge["last_transaction"]["url"]
-                transaction.boleto_barcode = charge["last_transaction"]["barcode"]
-            elif payment_data.payment_method == PaymentMethod.PIX:
-                transaction.pix_qr_code = charge["last_transaction"]["qr_code_url"]
-                transaction.pix_code = charge["last_transaction"]["qr_code"]
-
-            transaction.status = TransactionStatus.PENDING
-            if charge["status"] == "failed":
-                transaction.status = TransactionStatus.FAILED
-                transaction.error_message = charge["last_transaction"].get("refuse_reason", "Unknown error")
-                raise HTTPException(status_code=400, detail=transaction.error_message)
+        if charge["status"] == "failed" and transaction.status == TransactionStatus.PENDING:
+            transaction.status = TransactionStatus.FAILED
+            transaction.error_message = charge["last_transaction"].get("refuse_reason", "Unknown error")
 
+    @staticmethod
+    def _handle_failure(db: Session, transaction: Transaction, error: Exception) -> None:
+        """Marca a transação como falha e converte o erro em HTTPException."""
+        db.rollback()
+        logger.error(f"Failed to process payment: {str(error)}")
+        error_message = str(error)
+        if "expired" in error_message.lower():
+            transaction.error_message = "Card expired"
+            transaction.status = TransactionStatus.FAILED
             db.commit()
-            logger.info(f"Payment created: transaction_id={transaction.id}, order_id={transaction.order_id}")
+            raise HTTPException(status_code=400, detail="Card expired")
+        transaction.error_message = error_message
+        transaction.status = TransactionStatus.FAILED
+        db.commit()
+        raise HTTPException(status_code=500, detail=f"Payment processing failed: {error_message}")
+
+    @staticmethod
+    def _enqueue(db: Session, transaction: Transaction,
+                 idempotency: Optional[PaymentIdempotencyKey] = None) -> Transaction:
+        """Grava a transação pendente junto com o registro do outbox (e a chave de idempotência) em um único commit."""
+        outbox = PaymentOutbox(transaction_id=transaction.id)
+        if idempotency is not None:
+            outbox.idempotency_key = IdempotencyService.gateway_key(idempotency)
+            IdempotencyService.complete(idempotency, transaction.id)
+        db.add(outbox)
+        db.commit()
+        logger.info(f"Payment queued: transaction_id={transaction.id}")
+        return transaction
+
+    @staticmethod
+    def _register(db: Session, user_id: int, payment_data: Dict[str, Any],
+                  idempotency: Optional[PaymentIdempotencyKey] = None) -> Tuple[
+            Transaction, Maintainer, Optional[Dict[str, Any]], Optional[str]]:
+        """Valida e grava a transação pendente: (transação, mantenedor, cartão a tokenizar, impressão).
+
+        Sem cartão a tokenizar, a transação já sai daqui no outbox. Caso
+        contrário, ela é gravada com commit, liberando a conexão antes da
+        chamada ao gateway.
+        """
+        context = PaymentService._validate_payment(db, user_id, payment_data)
+        maintainer, ong = context.maintainer, context.ong
+        card_id = card_data = fingerprint = None
+        if payment_data.payment_method == PaymentMethod.CREDIT_CARD.value:
+            card_id, card_data, fingerprint = PaymentService._resolve_card(db, maintainer, payment_data)
+        transaction = PaymentService._create_transaction(db, maintainer, ong, payment_data)
+
+        if card_data is None:
+            if card_id:
+                PaymentService._attach_card(db, maintainer, transaction, card_id)
+            return PaymentService._enqueue(db, transaction, idempotency), maintainer, None, None
+
+        db.commit()
+        return transaction, maintainer, card_data, fingerprint
+
+    @staticmethod
+    def _enqueue_tokenized(db: Session, maintainer: Maintainer, transaction: Transaction,
+                           card_response: Dict[str, Any], fingerprint: Optional[str],
+                           idempotency: Optional[PaymentIdempotencyKey] = None) -> Transaction:
+        """Associa o cartão recém-tokenizado à transação e a coloca no outbox."""
+        PaymentService._attach_card(db, maintainer, transaction, card_response["id"], card_response, fingerprint)
+        return PaymentService._enqueue(db, transaction, idempotency)
+
+    @staticmethod
+    def create_payment(db: Session, user_id: int, payment_data: Dict[str, Any],
+                       idempotency: Optional[PaymentIdempotencyKey] = None) -> Transaction:
+        """Registra um pagamento avulso como pendente e o coloca no outbox.
+
+        O pedido na Pagar.me é criado depois, pelo PaymentOutboxService. Um cartão
+        informado por extenso é tokenizado aqui, com a transação já gravada, para
+        que os dados do cartão nunca sejam persistidos. Com uma reserva de
+        Idempotency-Key, a chave é concluída no mesmo commit que enfileira o pagamento.
+        """
+        transaction, maintainer, card_data, fingerprint = PaymentService._register(
+            db, user_id, payment_data, idempotency)
+        if card_data is None:
             return transaction
+        try:
+            card_response = PagarMeCardsAPI.create_card(card_data)
+        except Exception as e:
+            PaymentService._handle_failure(db, transaction, e)
+        return PaymentService._enqueue_tokenized(db, maintainer, transaction, card_response, fingerprint, idempotency)
 
-        except HTTPException:
-            db.rollback()
-            raise
+    @staticmethod
+    async def create_payment_async(db: Session, user_id: int, payment_data: Dict[str, Any],
+                                   idempotency: Optional[PaymentIdempotencyKey] = None) -> Transaction:
+        """Versão assíncrona de create_payment, que tokeniza o cartão sem bloquear o event loop.
+
+        O acesso ao banco roda no threadpool; só a chamada à Pagar.me é aguardada no event loop.
+        """
+        transaction, maintainer, card_data, fingerprint = await run_in_threadpool(
+            PaymentService._register, db, user_id, payment_data, idempotency)
+        if card_data is None:
+            return transaction
+        try:
+            card_response = await AsyncPagarMeCardsAPI.create_card(card_data)
         except Exception as e:
-            db.rollback()
-            logger.error(f"Failed to process payment: {str(e)}")
-            error_message = str(e)
-            if "expired" in error_message.lower():
-                transaction.error_message = "Card expired"
-                transaction.status = TransactionStatus.FAILED
-                db.commit()
-                raise HTTPException(status_code=400, detail="Card expired")
-            transaction.error_message = error_message
-            transaction.status = TransactionStatus.FAILED
+            await run_in_threadpool(PaymentService._handle_failure, db, transaction, e)
+        return await run_in_threadpool(PaymentService._enqueue_tokenized, db, maintainer, transaction,
+                                       card_response, fingerprint, idempotency)
+
+    @staticmethod
+    def _plan_batch(db: Session, user_id: int, payments: List[Any]) -> BatchPlan:
+        """Valida os itens do lote e separa os cartões que precisam ser tokenizados. Faz commit."""
+        maintainer = PaymentService._get_maintainer(db, user_id)
+        destinations = PaymentService._load_destinations(db, payments)
+        plan = BatchPlan(maintainer=maintainer, results=[(None, None)] * len(payments))
+
+        for index, payment_data in enumerate(payments):
+            try:
+                ong = PaymentService._check_destinations(payment_data, destinations)[0]
+                card_data = None
+                if payment_data.payment_method == PaymentMethod.CREDIT_CARD.value:
+                    card_data = PaymentService._get_card_data(payment_data)
+            except HTTPException as e:
+                plan.results[index] = (None, e)
+                continue
+            transaction = PaymentService._build_transaction(maintainer, ong, payment_data)
+            plan.accepted.append((index, payment_data, transaction, card_data))
+
+        # Cartões já salvos são reaproveitados e repetidos no lote são tokenizados uma única vez
+        plan.fingerprints = {index: CardWalletService.fingerprint(card_data)
+                             for index, _, _, card_data in plan.accepted if card_data is not None}
+        plan.saved_cards = CardWalletService.find_many(db, maintainer.id, plan.fingerprints.values())
+        for index, _, _, card_data in plan.accepted:
+            fingerprint = plan.fingerprints.get(index)
+            if fingerprint is not None and fingerprint not in plan.saved_cards:
+                plan.to_tokenize.setdefault(fingerprint, card_data)
+
+        # Libera a conexão enquanto os cartões são tokenizados
+        db.commit()
+        return plan
+
+    @staticmethod
+    def _queue_batch(db: Session, plan: BatchPlan, card_responses: Dict[str, Any]) -> List[
+            Tuple[Optional[Transaction], Optional[HTTPException]]]:
+        """Grava as transações válidas do lote e seus registros do outbox em um único commit."""
+        maintainer, results = plan.maintainer, plan.results
+        queued = []
+        stored = set()
+        for index, payment_data, transaction, _ in plan.accepted:
+            fingerprint = plan.fingerprints.get(index)
+            card_response = card_responses.get(fingerprint)
+            if isinstance(card_response, Exception):
+                logger.error(f"Failed to tokenize card for batch item {index}: {str(card_response)}")
+                if "expired" in str(card_response).lower():
+                    results[index] = (None, HTTPException(status_code=400, detail="Card expired"))
+                else:
+                    results[index] = (None, HTTPException(
+                        status_code=500, detail=f"Payment processing failed: {str(card_response)}"))
+                continue
+            if transaction.payment_method == PaymentMethod.CREDIT_CARD:
+                if fingerprint in plan.saved_cards:
+                    card_id = plan.saved_cards[fingerprint].card_id
+                elif card_response:
+                    card_id = card_response["id"]
+                    # Um mesmo cartão repetido no lote entra na carteira uma vez só
+                    card_response = None if fingerprint in stored else card_response
+                    stored.add(fingerprint)
+                else:
+                    card_id = payment_data.card_details.card_id
+                PaymentService._attach_card(db, maintainer, transaction, card_id, card_response, fingerprint)
+            queued.append((index, transaction))
+
+        if queued:
+            db.add_all([transaction for _, transaction in queued])
+            db.flush()
+            db.add_all([PaymentOutbox(transaction_id=transaction.id) for _, transaction in queued])
             db.commit()
-            raise HTTPException(status_code=500, detail=f"Payment processing failed: {error_message}")
\ No newline at end of file
+            # Recarrega as transações expiradas pelo commit em uma única consulta
+            db.query(Transaction).filter(Transaction.id.in_([transaction.id for _, transaction in queued])).all()
+            for index, transaction in queued:
+                results[index] = (transaction, None)
+        logger.info(f"Payment batch queued: maintainer_id={maintainer.id}, queued={len(queued)}, "
+                    f"failed={len(results) - len(queued)}")
+        return results
+
+    @staticmethod
+    async def create_payments_batch_async(db: Session, user_id: int, payments: List[Any]) -> List[
+            Tuple[Optional[Transaction], Optional[HTTPException]]]:
+        """Registra vários pagamentos do mesmo mantenedor de uma vez.
+
+        Os destinos de todos os itens são validados com uma consulta por tabela,
+        os cartões informados por extenso que não estão na carteira são
+        tokenizados em paralelo (até BATCH_CONCURRENCY por vez) e as transações
+        válidas entram no outbox em um único commit. As etapas com o banco rodam
+        no threadpool. Retorna, na ordem dos itens, a transação criada ou o erro.
+        """
+        plan = await run_in_threadpool(PaymentService._plan_batch, db, user_id, payments)
+        semaphore = asyncio.Semaphore(PaymentService.BATCH_CONCURRENCY)
+
+        async def tokenize(card_data: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await AsyncPagarMeCardsAPI.create_card(card_data)
+
+        card_responses = dict(zip(plan.to_tokenize, await asyncio.gather(
+            *(tokenize(card_data) for card_data in plan.to_tokenize.values()), return_exceptions=True)))
+        return await run_in_threadpool(PaymentService._queue_batch, db, plan, card_responses)
+
+    @staticmethod
+    def process_payment(db: Session, transaction_id: int, idempotency_key: Optional[str] = None) -> Transaction:
+        """Cria o pedido na Pagar.me de uma transação do outbox e grava o resultado.
+
+        Nenhuma transação do banco fica aberta durante a criação do pedido, e a
+        chave de idempotência torna seguro repetir o processamento.
+        """
+        transaction = db.query(Transaction).options(
+            joinedload(Transaction.maintainer).joinedload(Maintainer.user),
+            joinedload(Transaction.ong),
+            joinedload(Transaction.campaign),
+            joinedload(Transaction.base),
+            joinedload(Transaction.project),
+            joinedload(Transaction.attendee)
+        ).filter(Transaction.id == transaction_id).one()
+        if transaction.status != TransactionStatus.PENDING or transaction.order_id:
+            logger.info(f"Payment already processed: transaction_id={transaction_id}")
+            return transaction
+        db.commit()
+
+        customer_id = CustomerService.resolve_customer_id(db, transaction.maintainer)
+        order_data = PaymentService._build_order_data(customer_id, transaction.ong, transaction,
+                                                      transaction.campaign, transaction.base,
+                                                      transaction.project, transaction.attendee)
+        db.commit()
+
+        order_response = PagarMeOrdersAPI.create_order(
+            order_data, idempotency_key=idempotency_key or f"payment-{transaction_id}")
+
+        transaction = db.query(Transaction).filter(Transaction.id == transaction_id).with_for_update().one()
+        PaymentService._apply_order_response(transaction, order_response)
+        db.commit()
+        logger.info(f"Payment processed: transaction_id={transaction.id}, order_id={transaction.order_id}")
+        return transaction
@@ -0,0 +1,181 @@
+import logging
+import os
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional, Set
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+from app.models.ong import ONG
+from app.models.payout import Payout, PayoutBatch
+from app.models.transaction import Transaction, TransactionStatus
+from app.pagarme.balance import PagarMeBalanceAPI
+from app.pagarme.bulk import fetch_many
+from app.pagarme.transfers import PagarMeTransfersAPI
+from app.pagarme.withdrawals import PagarMeWithdrawalsAPI
+from app.services.payment_service import PaymentService
+
+logger = logging.getLogger(__name__)
+
+
+class PayoutService:
+    """Repasses em lote do valor líquido das doações pagas a cada ONG.
+
+    Cada ciclo (identificado pela data de corte) gera no máximo um repasse por
+    ONG, somando amount - comissão das doações pagas e ainda não repassadas. As
+    doações são marcadas com o repasse na mesma transação do banco que o cria, e
+    a chave de idempotência do repasse é fixa, então reexecutar o ciclo (ou
+    executar o seguinte) só reenvia o que não chegou à Pagar.me, sem duplicar saques.
+    """
+    CONCURRENCY = int(os.getenv("PAYOUT_CONCURRENCY", "4"))
+    MINIMUM_CENTS = int(os.getenv("PAYOUT_MINIMUM_CENTS", "100"))
+    METHOD = os.getenv("PAYOUT_METHOD", "withdrawal")  # withdrawal ou transfer
+
+    @staticmethod
+    def _batch(db: Session, period_end: date) -> PayoutBatch:
+        batch = db.query(PayoutBatch).filter(PayoutBatch.period_end == period_end).first()
+        if batch is None:
+            batch = PayoutBatch(period_end=period_end, status="pending")
+            db.add(batch)
+            db.flush()
+        return batch
+
+    @staticmethod
+    def _create_payouts(db: Session, batch: PayoutBatch) -> None:
+        """Cria os repasses do ciclo e marca as doações incluídas em cada um. Não faz commit."""
+        cutoff = datetime.combine(batch.period_end, time.min)
+        net = func.sum(Transaction.amount_cents - Transaction.commission_cents)
+        eligible = (
+            Transaction.status == TransactionStatus.PAID,
+            Transaction.payout_id.is_(None),
+            Transaction.created_at < cutoff,
+        )
+        # ONGs com saldo líquido acima do mínimo; as demais acumulam para o próximo ciclo
+        rows = db.query(Transaction.ong_id, net.label("net_cents")).join(
+            ONG, ONG.id == Transaction.ong_id
+        ).filter(*eligible).group_by(Transaction.ong_id).having(
+            net >= PayoutService.MINIMUM_CENTS).all()
+        existing = {ong_id for (ong_id,) in db.query(Payout.ong_id).filter(Payout.batch_id == batch.id)}
+        new_rows = [row for row in rows if row.ong_id not in existing]
+        if not new_rows:
+            return
+
+        now = datetime.utcnow()
+        db.execute(insert(Payout), [{
+            "batch_id": batch.id, "ong_id": row.ong_id,
+            "recipient_id": PaymentService.ong_recipient_id(row.ong_id),
+            "idempotency_key": f"payout-{batch.id}-{row.ong_id}",
+            "status": "pending", "attempts": 0, "created_at": now
+        } for row in new_rows])
+
+        # Marca as doações com o repasse da sua ONG e recalcula os valores a partir delas
+        payout_for_ong = select(Payout.id).where(
+            Payout.batch_id == batch.id, Payout.ong_id == Transaction.ong_id).scalar_subquery()
+        db.execute(update(Transaction).where(
+            *eligible, Transaction.ong_id.in_([row.ong_id for row in new_rows])
+        ).values(payout_id=payout_for_ong).execution_options(synchronize_session=False))
+
+        sums = db.query(
+            Transaction.payout_id, net.label("net_cents"), func.count(Transaction.id).label("count")
+        ).join(Payout, Payout.id == Transaction.payout_id).filter(
+            Payout.batch_id == batch.id).group_by(Transaction.payout_id).all()
+        db.execute(update(Payout), [
+            {"id": row.payout_id, "amount_cents": int(row.net_cents), "transaction_count": row.count}
+            for row in sums
+        ])
+
+    @staticmethod
+    def _submit(payout: Dict[str, Any]) -> Dict[str, Any]:
+        """Confere o saldo disponível do recebedor e solicita o saque (ou transferência)."""
+        balance = PagarMeBalanceAPI.get_balance(payout["recipient_id"])
+        available = int(balance.get("available_amount") or 0)
+        if available < payout["amount_cents"]:
+            return {"status": "insufficient_funds", "available_amount": available}
+        data = {"amount": payout["amount_cents"],
+                "metadata": {"payout_id": str(payout["id"]), "ong_id": str(payout["ong_id"])}}
+        if PayoutService.METHOD == "transfer":
+            response = PagarMeTransfersAPI.create_transfer(
+                {**data, "recipient_id": payout["recipient_id"]}, idempotency_key=payout["idempotency_key"])
+        else:
+            response = PagarMeWithdrawalsAPI.create_withdrawal(
+                payout["recipient_id"], data, idempotency_key=payout["idempotency_key"])
+        return {"status": "submitted", "gateway_id": response.get("id")}
+
+    @staticmethod
+    def _send(db: Session) -> Set[int]:
+        """Envia em paralelo, com concorrência limitada, os repasses ainda não aceitos pela Pagar.me.
+
+        Inclui os de ciclos anteriores: as doações de um repasse ficam presas a
+        ele, então só reenviá-lo libera o valor da ONG. Retorna os ciclos tocados.
+        """
+        payouts = db.query(Payout).filter(
+            Payout.status.in_(["pending", "insufficient_funds", "failed"]),
+            Payout.amount_cents > 0
+        ).order_by(Payout.id).all()
+        if not payouts:
+            return set()
+        # As threads recebem só dados simples; a sessão fica na thread principal
+        by_key = {payout.idempotency_key: {
+            "id": payout.id, "ong_id": payout.ong_id, "recipient_id": payout.recipient_id,
+            "amount_cents": payout.amount_cents, "idempotency_key": payout.idempotency_key
+        } for payout in payouts}
+        payout_by_key = {payout.idempotency_key: payout for payout in payouts}
+
+        now = datetime.utcnow()
+        results = fetch_many(lambda key: PayoutService._submit(by_key[key]), list(by_key),
+                             "payouts", PayoutService.CONCURRENCY)
+        for result in results:
+            payout = payout_by_key[result.id]
+            payout.attempts += 1
+            if result.error:
+                payout.status = "failed"
+                payout.error = result.error[:500]
+                logger.error(f"Payout {payout.id} failed for ONG {payout.ong_id}: {result.error}")
+            elif result.data["status"] == "insufficient_funds":
+                payout.status = "insufficient_funds"
+                payout.error = f"available_amount={result.data['available_amount']}"
+                logger.warning(f"Payout {payout.id} postponed for ONG {payout.ong_id}: "
+                               f"amount={payout.amount_cents}, available={result.data['available_amount']}")
+            else:
+                payout.status = "submitted"
+                payout.gateway_id = result.data["gateway_id"]
+                payout.error = None
+                payout.submitted_at = now
+        db.commit()
+        return {payout.batch_id for payout in payouts}
+
+    @staticmethod
+    def _summarize(db: Session, batch: PayoutBatch) -> Dict[str, int]:
+        """Atualiza a situação e os totais do ciclo a partir dos seus repasses. Retorna a contagem por status."""
+        counts = dict(db.query(Payout.status, func.count(Payout.id)).filter(
+            Payout.batch_id == batch.id).group_by(Payout.status).all())
+        batch.payout_count = sum(counts.values())
+        batch.total_cents = db.query(func.coalesce(func.sum(Payout.amount_cents), 0)).filter(
+            Payout.batch_id == batch.id, Payout.status == "submitted").scalar()
+        batch.status = "done" if counts.get("submitted", 0) == batch.payout_count else "partial"
+        batch.finished_at = datetime.utcnow()
+        return counts
+
+    @staticmethod
+    def run(db: Session, period_end: Optional[date] = None) -> PayoutBatch:
+        """Executa (ou retoma) o ciclo de repasses com as doações criadas antes de period_end."""
+        period_end = period_end or date.today()
+        batch = PayoutService._batch(db, period_end)
+        PayoutService._create_payouts(db, batch)
+        db.commit()
+        logger.info(f"Payout batch {batch.id} started: period_end={period_end}")
+
+        touched = PayoutService._send(db)
+
+        for earlier_id in sorted(touched - {batch.id}):
+            earlier = db.get(PayoutBatch, earlier_id)
+            PayoutService._summarize(db, earlier)
+            logger.info(f"Payout batch {earlier.id} retried: status={earlier.status}")
+        counts = PayoutService._summarize(db, batch)
+        db.commit()
+        logger.info(f"Payout batch {batch.id} finished: status={batch.status}, payouts={counts}, "
+                    f"submitted_cents={batch.total_cents}")
+        return batch
+
+    @staticmethod
+    def list_payouts(db: Session, batch_id: int) -> List[Payout]:
+        """Lista os repasses de um ciclo."""
+        return db.query(Payout).filter(Payout.batch_id == batch_id).order_by(Payout.ong_id).all()
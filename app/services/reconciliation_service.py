@@ -0,0 +1,226 @@
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+from sqlalchemy import insert, or_, update
+from sqlalchemy.orm import Session
+from app.models.reconciliation import ReconciliationRun, ReconciliationDiscrepancy
+from app.models.sync_state import SyncState
+from app.models.transaction import Transaction, TransactionStatus
+from app.pagarme.orders import PagarMeOrdersAPI
+from app.pagarme.rate_limit import PagarMeRateLimiter
+from app.services.webhook_service import ORDER_STATUS_MAP, WebhookService
+from app.services.donation_totals_service import DonationTotalsService
+
+logger = logging.getLogger(__name__)
+
+
+class ReconciliationService:
+    """Concilia os pedidos da Pagar.me com as transações locais.
+
+    Os pedidos são lidos pela listagem paginada e comparados às transações em
+    blocos de CHUNK_SIZE, de modo que a memória usada não cresce com o volume.
+    Como a Pagar.me só filtra pela data de criação, cada execução relê os
+    pedidos criados desde a marca d'água menos LOOKBACK (boletos e PIX mudam de
+    status dias depois de criados); transações ainda pendentes mais antigas que
+    a janela são consultadas uma a uma, em paralelo.
+    """
+    RESOURCE = "orders"
+    CHUNK_SIZE = int(os.getenv("RECONCILIATION_CHUNK_SIZE", "1000"))
+    LOOKBACK = timedelta(days=int(os.getenv("RECONCILIATION_LOOKBACK_DAYS", "7")))
+
+    @staticmethod
+    def _state(db: Session) -> SyncState:
+        state = db.get(SyncState, ReconciliationService.RESOURCE)
+        if state is None:
+            state = SyncState(resource=ReconciliationService.RESOURCE)
+            db.add(state)
+            db.flush()
+        return state
+
+    @staticmethod
+    def _chunks(items: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def _stale_pending_orders(db: Session, run: ReconciliationRun, before: datetime) -> Iterator[Dict[str, Any]]:
+        """Pedidos de transações pendentes criadas antes da janela, buscados em paralelo por id.
+
+        Os que não puderam ser buscados ficam registrados como divergência fetch_failed.
+        """
+        last_id = 0
+        while True:
+            rows = db.query(Transaction.id, Transaction.order_id).filter(
+                Transaction.id > last_id,
+                Transaction.status == TransactionStatus.PENDING,
+                Transaction.order_id.isnot(None),
+                Transaction.created_at < before
+            ).order_by(Transaction.id).limit(ReconciliationService.CHUNK_SIZE).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+            transaction_by_order = {row.order_id: row.id for row in rows}
+            failures = []
+            for result in PagarMeOrdersAPI.get_many_orders(list(transaction_by_order)):
+                if result.error:
+                    logger.warning(f"Failed to fetch order {result.id} for reconciliation: {result.error}")
+                    failures.append({
+                        "run_id": run.id, "transaction_id": transaction_by_order.get(result.id),
+                        "order_id": result.id, "kind": "fetch_failed",
+                        "local_value": TransactionStatus.PENDING.value, "remote_value": result.error[:500],
+                        "corrected": False, "created_at": datetime.utcnow()
+                    })
+                    continue
+                yield result.data
+            if failures:
+                db.execute(insert(ReconciliationDiscrepancy), failures)
+                run.discrepancies += len(failures)
+                db.commit()
+
+    @staticmethod
+    def _matching_rows(db: Session, order_ids: List[str], charge_ids: List[str], transaction_ids: List[int]):
+        """Transações de um bloco de pedidos, travadas até o commit do bloco.
+
+        Com as linhas travadas, um webhook processado ao mesmo tempo espera a
+        correção (e a vê) em vez de ser sobrescrito por um status lido antes.
+        Só as colunas comparadas, para não materializar as entidades inteiras.
+        """
+        return db.query(
+            Transaction.id, Transaction.order_id, Transaction.charge_id,
+            Transaction.status, Transaction.amount_cents, Transaction.maintainer_id, Transaction.created_at,
+            Transaction.ong_id, Transaction.campaign_id, Transaction.project_id, Transaction.base_id
+        ).filter(or_(
+            Transaction.order_id.in_(order_ids),
+            Transaction.charge_id.in_(charge_ids),
+            Transaction.id.in_(transaction_ids)
+        )).order_by(Transaction.id).with_for_update()
+
+    @staticmethod
+    def _reconcile_chunk(db: Session, run: ReconciliationRun, orders: List[Dict[str, Any]]) -> None:
+        """Compara um bloco de pedidos com as transações e aplica as correções em lote."""
+        by_order = {order["id"]: order for order in orders}
+        by_charge = {charge["id"]: order for order in orders for charge in order.get("charges") or []}
+        by_transaction = {}
+        for order in orders:
+            transaction_id = (order.get("metadata") or {}).get("transaction_id")
+            if transaction_id and str(transaction_id).isdigit():
+                by_transaction[int(transaction_id)] = order
+
+        rows = ReconciliationService._matching_rows(db, list(by_order), list(by_charge), list(by_transaction)).all()
+
+        now = datetime.utcnow()
+        updates, discrepancies, seen_orders, totals = [], [], set(), set()
+
+        def discrepancy(row, order, kind, local, remote, corrected):
+            discrepancies.append({
+                "run_id": run.id, "transaction_id": row.id if row else None, "order_id": order["id"],
+                "kind": kind, "local_value": None if local is None else str(local),
+                "remote_value": None if remote is None else str(remote), "corrected": corrected,
+                "created_at": now
+            })
+
+        for row in rows:
+            order = by_order.get(row.order_id) or by_charge.get(row.charge_id) or by_transaction.get(row.id)
+            if order is None:
+                continue
+            seen_orders.add(order["id"])
+            changes = {}
+            charges = order.get("charges") or []
+
+            if row.order_id != order["id"]:
+                changes["order_id"] = order["id"]
+                if charges:
+                    changes["charge_id"] = charges[0]["id"]
+                discrepancy(row, order, "missing_order_id", row.order_id, order["id"], True)
+
+            remote_status = ORDER_STATUS_MAP.get(order.get("status"))
+            if remote_status and remote_status != row.status and \
+                    not WebhookService.can_transition(row.status, remote_status):
+                # Mesma guarda dos webhooks: status terminal ou regressão não é sobrescrito
+                discrepancy(row, order, "status", row.status.value, remote_status.value, False)
+            elif remote_status and remote_status != row.status:
+                changes["status"] = remote_status
+                if remote_status == TransactionStatus.FAILED and charges:
+                    changes["error_message"] = (charges[0].get("last_transaction") or {}).get(
+                        "refuse_reason", "Unknown error")
+                discrepancy(row, order, "status", row.status.value, remote_status.value, True)
+                if TransactionStatus.PAID in (row.status, remote_status):
+                    totals.update(DonationTotalsService.scopes(row))
+
+            if order.get("amount") is not None and int(order["amount"]) != row.amount_cents:
+                # Valor divergente é apenas relatado; a correção exige análise manual
+                discrepancy(row, order, "amount", row.amount_cents, order["amount"], False)
+
+            if changes:
+                updates.append({"id": row.id, "updated_at": now, **changes})
+
+        for transaction_id, order in by_transaction.items():
+            if order["id"] not in seen_orders:
+                discrepancy(None, order, "unknown_order", transaction_id, order.get("status"), False)
+
+        if updates:
+            # UPDATE em lote pela chave primária (executemany)
+            db.execute(update(Transaction), updates)
+        if totals:
+            # Recalcula os totais afetados, já com os status corrigidos
+            DonationTotalsService.refresh(db, totals)
+        if discrepancies:
+            db.execute(insert(ReconciliationDiscrepancy), discrepancies)
+        run.orders_seen += len(orders)
+        run.matched += len(rows)
+        run.corrected += len(updates)
+        run.discrepancies += len(discrepancies)
+        db.commit()
+
+    @staticmethod
+    def run(db: Session, full: bool = False) -> ReconciliationRun:
+        """Executa a conciliação e devolve o registro da execução com os totais."""
+        started = datetime.utcnow()
+        state = ReconciliationService._state(db)
+        since = None if full or not state.watermark else state.watermark - ReconciliationService.LOOKBACK
+        run = ReconciliationRun(status="running", since=since, started_at=started)
+        db.add(run)
+        db.commit()
+        logger.info(f"Reconciliation {run.id} started: since={since}")
+
+        try:
+            with PagarMeRateLimiter.background():
+                orders = PagarMeOrdersAPI.iter_orders(created_since=since)
+                for chunk in ReconciliationService._chunks(orders, ReconciliationService.CHUNK_SIZE):
+                    ReconciliationService._reconcile_chunk(db, run, chunk)
+                if since is not None:
+                    stale = ReconciliationService._stale_pending_orders(db, run, since)
+                    for chunk in ReconciliationService._chunks(stale, ReconciliationService.CHUNK_SIZE):
+                        ReconciliationService._reconcile_chunk(db, run, chunk)
+        except Exception as e:
+            db.rollback()
+            run.status = "failed"
+            run.error = str(e)[:500]
+            run.finished_at = datetime.utcnow()
+            db.commit()
+            logger.error(f"Reconciliation {run.id} failed: {str(e)}")
+            raise
+
+        state = ReconciliationService._state(db)
+        state.watermark = started
+        state.last_run_at = datetime.utcnow()
+        run.status = "done"
+        run.finished_at = datetime.utcnow()
+        db.commit()
+        logger.info(f"Reconciliation {run.id} finished: orders={run.orders_seen}, matched={run.matched}, "
+                    f"corrected={run.corrected}, discrepancies={run.discrepancies}")
+        return run
+
+    @staticmethod
+    def iter_report(db: Session, run_id: int) -> Iterator[ReconciliationDiscrepancy]:
+        """Percorre as divergências de uma execução sem carregá-las todas de uma vez."""
+        return db.query(ReconciliationDiscrepancy).filter(
+            ReconciliationDiscrepancy.run_id == run_id
+        ).order_by(ReconciliationDiscrepancy.id).yield_per(ReconciliationService.CHUNK_SIZE)
@@ -0,0 +1,53 @@
+import logging
+from typing import Any, Dict, List
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.maintainer import Maintainer
+from app.models.ong import ONG
+from app.models.subscription import Subscription, SubscriptionInvoice
+from app.services.ong_service import check_ong_access
+
+logger = logging.getLogger(__name__)
+
+
+class SubscriptionService:
+    """Consultas das doações recorrentes servidas pelo espelho local, sem chamar a Pagar.me."""
+    INVOICE_LIMIT = 50
+
+    @staticmethod
+    def list_for_user(db: Session, user_id: int) -> List[Subscription]:
+        """Assinaturas do mantenedor do usuário, mais recentes primeiro."""
+        return db.query(Subscription).join(Maintainer, Maintainer.id == Subscription.maintainer_id).filter(
+            Maintainer.user_id == user_id
+        ).order_by(Subscription.gateway_created_at.desc()).all()
+
+    @staticmethod
+    def list_invoices(db: Session, user_id: int, subscription_id: str) -> List[SubscriptionInvoice]:
+        """Últimas faturas de uma assinatura do mantenedor do usuário."""
+        owned = db.query(Subscription.id).join(Maintainer, Maintainer.id == Subscription.maintainer_id).filter(
+            Subscription.subscription_id == subscription_id,
+            Maintainer.user_id == user_id
+        ).first()
+        if not owned:
+            raise HTTPException(status_code=404, detail="Subscription not found")
+        return db.query(SubscriptionInvoice).filter(
+            SubscriptionInvoice.subscription_id == subscription_id
+        ).order_by(SubscriptionInvoice.gateway_created_at.desc()).limit(SubscriptionService.INVOICE_LIMIT).all()
+
+    @staticmethod
+    def ong_mrr(db: Session, ong_id: int, current_user: dict) -> Dict[str, Any]:
+        """Receita recorrente mensal da ONG: soma dos valores mensais das assinaturas ativas."""
+        if current_user["type"] not in ("ong", "staff"):
+            raise HTTPException(status_code=403, detail="Permission denied")
+        ong = db.query(ONG).filter(ONG.id == ong_id).first()
+        if not ong:
+            raise HTTPException(status_code=404, detail="ONG not found")
+        check_ong_access(db, ong, current_user)
+
+        count, mrr_cents = db.query(
+            func.count(Subscription.id),
+            func.coalesce(func.sum(Subscription.monthly_amount_cents), 0)
+        ).filter(Subscription.ong_id == ong_id, Subscription.status == "active").one()
+        logger.debug(f"ONG {ong_id} MRR: {mrr_cents} cents from {count} subscriptions")
+        return {"ong_id": ong_id, "active_subscriptions": int(count), "mrr_cents": int(mrr_cents)}
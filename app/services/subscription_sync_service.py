@@ -0,0 +1,334 @@
+import logging
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, List, Optional
+from sqlalchemy import and_, func, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models.maintainer import Maintainer
+from app.models.subscription import Subscription, SubscriptionCycle, SubscriptionInvoice
+from app.models.sync_state import SyncState
+from app.pagarme.bulk import fetch_many
+from app.pagarme.cycles import PagarMeCyclesAPI
+from app.pagarme.invoices import PagarMeInvoicesAPI
+from app.pagarme.rate_limit import PagarMeRateLimiter
+from app.pagarme.subscriptions import PagarMeSubscriptionsAPI
+
+logger = logging.getLogger(__name__)
+
+# Fração de um mês coberta por um intervalo de cobrança
+MONTHS_PER_INTERVAL = {
+    "day": Decimal(12) / Decimal(365),
+    "week": Decimal(12) / Decimal(52),
+    "month": Decimal(1),
+    "year": Decimal(12),
+}
+
+ONG_RECIPIENT = re.compile(r"^re_ong_(\d+)$")
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Converte datas ISO da Pagar.me para datetime UTC sem fuso, como o resto dos modelos."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class SubscriptionSyncService:
+    """Mantém o espelho local de assinaturas, ciclos e faturas da Pagar.me.
+
+    A sincronização é incremental e tem duas etapas. Primeiro lista as
+    assinaturas criadas depois da marca d'água (com uma margem de segurança) e
+    até o início da execução (snapshot_at); com a janela fechada, assinaturas
+    criadas durante a execução não deslocam as páginas, e a página em andamento
+    fica salva como cursor para retomar uma execução interrompida. Depois busca
+    de novo, em ordem de subscription_id, as assinaturas do espelho que ainda não
+    terminaram e estão devidas: com uma cobrança (next_billing_at) vencida desde
+    a última sincronização ou sincronizadas há mais de REFRESH_MAX_AGE. Em ambas,
+    os ciclos e faturas vêm desde a última sincronização de cada assinatura.
+    Entre uma execução e outra, e para as demais assinaturas, os webhooks
+    atualizam o espelho.
+    """
+    RESOURCE = "subscriptions"
+    # Assinaturas nesses status não mudam mais e não são buscadas de novo
+    FINAL_STATUSES = ("canceled",)
+    PAGE_SIZE = int(os.getenv("SUBSCRIPTION_SYNC_PAGE_SIZE", "100"))
+    OVERLAP = timedelta(minutes=int(os.getenv("SUBSCRIPTION_SYNC_OVERLAP_MINUTES", "10")))
+    REFRESH_MAX_AGE = timedelta(hours=int(os.getenv("SUBSCRIPTION_SYNC_REFRESH_MAX_AGE_HOURS", "168")))
+
+    @staticmethod
+    def _state(db: Session) -> SyncState:
+        state = db.get(SyncState, SubscriptionSyncService.RESOURCE)
+        if state is None:
+            state = SyncState(resource=SubscriptionSyncService.RESOURCE)
+            db.add(state)
+            db.flush()
+        return state
+
+    @staticmethod
+    def _amount_cents(data: Dict[str, Any]) -> int:
+        """Soma o preço dos itens da assinatura, em centavos."""
+        total = 0
+        for item in data.get("items") or []:
+            price = (item.get("pricing_scheme") or {}).get("price") or 0
+            total += int(price) * int(item.get("quantity") or 1)
+        return total
+
+    @staticmethod
+    def _monthly_cents(amount_cents: int, interval: Optional[str], interval_count: int) -> int:
+        """Normaliza o valor por cobrança para um mês, base do MRR."""
+        months = MONTHS_PER_INTERVAL.get(interval or "month", Decimal(1)) * max(interval_count, 1)
+        return int((Decimal(amount_cents) / months).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+    @staticmethod
+    def _ong_id(data: Dict[str, Any]) -> Optional[int]:
+        """Identifica a ONG pelo metadata ou pelo recebedor do split."""
+        ong_id = (data.get("metadata") or {}).get("ong_id")
+        if ong_id:
+            return int(ong_id)
+        for rule in (data.get("split") or {}).get("rules") or []:
+            match = ONG_RECIPIENT.match(rule.get("recipient_id") or "")
+            if match:
+                return int(match.group(1))
+        return None
+
+    @staticmethod
+    def _subscription_row(data: Dict[str, Any], maintainers: Dict[str, int]) -> Dict[str, Any]:
+        customer_id = (data.get("customer") or {}).get("id") or data.get("customer_id")
+        interval_count = int(data.get("interval_count") or 1)
+        amount_cents = SubscriptionSyncService._amount_cents(data)
+        return {
+            "subscription_id": data["id"],
+            "customer_id": customer_id,
+            "maintainer_id": maintainers.get(customer_id),
+            "ong_id": SubscriptionSyncService._ong_id(data),
+            "status": data.get("status") or "active",
+            "payment_method": data.get("payment_method"),
+            "interval": data.get("interval"),
+            "interval_count": interval_count,
+            "amount_cents": amount_cents,
+            "monthly_amount_cents": SubscriptionSyncService._monthly_cents(
+                amount_cents, data.get("interval"), interval_count),
+            "next_billing_at": _parse_datetime(data.get("next_billing_at")),
+            "canceled_at": _parse_datetime(data.get("canceled_at")),
+            "gateway_created_at": _parse_datetime(data.get("created_at")),
+            "gateway_updated_at": _parse_datetime(data.get("updated_at")),
+        }
+
+    @staticmethod
+    def _cycle_row(data: Dict[str, Any], subscription_id: str) -> Dict[str, Any]:
+        return {
+            "cycle_id": data["id"],
+            "subscription_id": subscription_id,
+            "cycle": data.get("cycle"),
+            "status": data.get("status"),
+            "start_at": _parse_datetime(data.get("start_at")),
+            "end_at": _parse_datetime(data.get("end_at")),
+            "billing_at": _parse_datetime(data.get("billing_at")),
+            "gateway_created_at": _parse_datetime(data.get("created_at")),
+        }
+
+    @staticmethod
+    def _invoice_row(data: Dict[str, Any], subscription_id: str) -> Dict[str, Any]:
+        return {
+            "invoice_id": data["id"],
+            "subscription_id": subscription_id,
+            "cycle_id": (data.get("cycle") or {}).get("id"),
+            "charge_id": (data.get("charge") or {}).get("id"),
+            "status": data.get("status") or "pending",
+            "amount_cents": int(data.get("amount") or data.get("total_amount") or 0),
+            "due_at": _parse_datetime(data.get("due_at")),
+            "gateway_created_at": _parse_datetime(data.get("created_at")),
+            "gateway_updated_at": _parse_datetime(data.get("updated_at")),
+        }
+
+    @staticmethod
+    def _maintainers_by_customer(db: Session, customer_ids: List[str]) -> Dict[str, int]:
+        customer_ids = [customer_id for customer_id in set(customer_ids) if customer_id]
+        if not customer_ids:
+            return {}
+        rows = db.query(Maintainer.client_id, Maintainer.id).filter(Maintainer.client_id.in_(customer_ids)).all()
+        return {client_id: maintainer_id for client_id, maintainer_id in rows}
+
+    @staticmethod
+    def _upsert(db: Session, model, key: str, rows: List[Dict[str, Any]]) -> None:
+        """Insere ou atualiza as linhas pela chave da Pagar.me em um único comando.
+
+        Linhas com gateway_updated_at só substituem versões mais antigas, de modo
+        que um webhook atrasado não desfaz uma atualização mais nova.
+        """
+        if not rows:
+            return
+        # Uma mesma linha não pode ser atualizada duas vezes no mesmo comando
+        rows = list({row[key]: row for row in rows}.values())
+        table = model.__table__
+        stmt = insert(model).values(rows)
+        updates = {column: stmt.excluded[column] for column in rows[0] if column != key}
+        for column in ("maintainer_id", "ong_id"):
+            if column in updates:
+                updates[column] = func.coalesce(stmt.excluded[column], table.c[column])
+        where = None
+        if "gateway_updated_at" in table.c:
+            where = or_(table.c.gateway_updated_at.is_(None), stmt.excluded.gateway_updated_at.is_(None),
+                        table.c.gateway_updated_at <= stmt.excluded.gateway_updated_at)
+        db.execute(stmt.on_conflict_do_update(index_elements=[table.c[key]], set_=updates, where=where))
+
+    @staticmethod
+    def _pull_children(subscription_id: str, since: Optional[datetime]) -> Dict[str, Any]:
+        return {
+            "cycles": list(PagarMeCyclesAPI.iter_cycles(subscription_id, created_since=since)),
+            "invoices": list(PagarMeInvoicesAPI.iter_invoices(subscription_id, created_since=since)),
+        }
+
+    @staticmethod
+    def _apply_page(db: Session, page: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Grava uma página de assinaturas e os ciclos e faturas novos de cada uma."""
+        ids = [data["id"] for data in page]
+        last_synced = dict(db.query(Subscription.subscription_id, Subscription.synced_at).filter(
+            Subscription.subscription_id.in_(ids)).all())
+        maintainers = SubscriptionSyncService._maintainers_by_customer(
+            db, [(data.get("customer") or {}).get("id") or data.get("customer_id") for data in page])
+        SubscriptionSyncService._upsert(db, Subscription, "subscription_id",
+                                        [SubscriptionSyncService._subscription_row(data, maintainers) for data in page])
+
+        started = datetime.utcnow()
+        cycles, invoices, failed = [], [], []
+
+        def pull(subscription_id: str) -> Dict[str, Any]:
+            since = last_synced.get(subscription_id)
+            return SubscriptionSyncService._pull_children(
+                subscription_id, since - SubscriptionSyncService.OVERLAP if since else None)
+
+        for result in fetch_many(pull, ids, "subscription-children"):
+            if result.error:
+                logger.warning(f"Failed to sync cycles/invoices of {result.id}: {result.error}")
+                failed.append(result.id)
+                continue
+            cycles += [SubscriptionSyncService._cycle_row(item, result.id) for item in result.data["cycles"]]
+            invoices += [SubscriptionSyncService._invoice_row(item, result.id) for item in result.data["invoices"]]
+
+        SubscriptionSyncService._upsert(db, SubscriptionCycle, "cycle_id", cycles)
+        SubscriptionSyncService._upsert(db, SubscriptionInvoice, "invoice_id", invoices)
+        # Assinaturas que falharam mantêm a marca antiga e são refeitas na próxima execução
+        synced = [subscription_id for subscription_id in ids if subscription_id not in failed]
+        if synced:
+            db.query(Subscription).filter(Subscription.subscription_id.in_(synced)).update(
+                {Subscription.synced_at: started}, synchronize_session=False)
+        return {"subscriptions": len(page), "cycles": len(cycles), "invoices": len(invoices), "failed": len(failed)}
+
+    @staticmethod
+    def _refresh(db: Session, state: SyncState, totals: Dict[str, int]) -> None:
+        """Busca de novo as assinaturas em aberto devidas e ainda não sincronizadas nesta execução."""
+        due = or_(
+            Subscription.synced_at.is_(None),
+            Subscription.synced_at < state.snapshot_at - SubscriptionSyncService.REFRESH_MAX_AGE,
+            and_(Subscription.next_billing_at <= state.snapshot_at, Subscription.synced_at < state.snapshot_at)
+        )
+        last_id = ""
+        while True:
+            # Cursor pela chave: a ordem não muda com assinaturas novas nem com as já atualizadas
+            ids = [subscription_id for (subscription_id,) in db.query(Subscription.subscription_id).filter(
+                Subscription.status.notin_(SubscriptionSyncService.FINAL_STATUSES),
+                due,
+                Subscription.subscription_id > last_id
+            ).order_by(Subscription.subscription_id).limit(SubscriptionSyncService.PAGE_SIZE)]
+            if not ids:
+                return
+            last_id = ids[-1]
+
+            page = []
+            for result in PagarMeSubscriptionsAPI.get_many_subscriptions(ids):
+                if result.error:
+                    logger.warning(f"Failed to refresh subscription {result.id}: {result.error}")
+                    totals["failed"] += 1
+                    continue
+                page.append(result.data)
+            if page:
+                for name, count in SubscriptionSyncService._apply_page(db, page).items():
+                    totals[name] += count
+            state.last_run_at = datetime.utcnow()
+            db.commit()
+
+    @staticmethod
+    def sync(db: Session, full: bool = False) -> Dict[str, int]:
+        """Executa uma sincronização incremental (ou completa, com full=True)."""
+        state = SubscriptionSyncService._state(db)
+        if full:
+            state.watermark = None
+            state.cursor = None
+            state.snapshot_at = None
+        if state.snapshot_at is None:
+            # Execução nova; uma interrompida mantém a janela e o cursor
+            state.snapshot_at = datetime.utcnow()
+            state.cursor = None
+            db.commit()
+        since = state.watermark - SubscriptionSyncService.OVERLAP if state.watermark else None
+        page_number = int(state.cursor or 1)
+        totals = {"subscriptions": 0, "cycles": 0, "invoices": 0, "failed": 0}
+        logger.info(f"Subscription sync started: since={since}, until={state.snapshot_at}, page={page_number}")
+
+        def flush(page: List[Dict[str, Any]]) -> None:
+            nonlocal page_number
+            for name, count in SubscriptionSyncService._apply_page(db, page).items():
+                totals[name] += count
+            page_number += 1
+            state.cursor = str(page_number)
+            state.last_run_at = datetime.utcnow()
+            db.commit()
+
+        try:
+            with PagarMeRateLimiter.background():
+                page = []
+                for data in PagarMeSubscriptionsAPI.iter_subscriptions(
+                        params={"page": page_number}, created_since=since, created_until=state.snapshot_at,
+                        page_size=SubscriptionSyncService.PAGE_SIZE):
+                    page.append(data)
+                    if len(page) == SubscriptionSyncService.PAGE_SIZE:
+                        flush(page)
+                        page = []
+                if page:
+                    flush(page)
+                SubscriptionSyncService._refresh(db, state, totals)
+        except Exception as e:
+            db.rollback()
+            state = SubscriptionSyncService._state(db)
+            state.last_error = str(e)[:500]
+            db.commit()
+            logger.error(f"Subscription sync failed at page {page_number}: {str(e)}")
+            raise
+
+        # A listagem cobriu até snapshot_at; linhas mais novas vindas de webhooks não avançam a marca
+        state.watermark = state.snapshot_at
+        state.cursor = None
+        state.snapshot_at = None
+        state.last_error = None
+        state.last_run_at = datetime.utcnow()
+        db.commit()
+        logger.info(f"Subscription sync finished: {totals}, watermark={state.watermark}")
+        return totals
+
+    @staticmethod
+    def apply_subscription_event(db: Session, data: Dict[str, Any]) -> None:
+        """Atualiza o espelho a partir de um webhook subscription.*, sem chamar a Pagar.me."""
+        customer_id = (data.get("customer") or {}).get("id") or data.get("customer_id")
+        maintainers = SubscriptionSyncService._maintainers_by_customer(db, [customer_id])
+        SubscriptionSyncService._upsert(db, Subscription, "subscription_id",
+                                        [SubscriptionSyncService._subscription_row(data, maintainers)])
+
+    @staticmethod
+    def apply_invoice_event(db: Session, data: Dict[str, Any]) -> None:
+        """Atualiza o espelho a partir de um webhook invoice.*, incluindo o ciclo que vem na fatura."""
+        subscription_id = (data.get("subscription") or {}).get("id") or data.get("subscription_id")
+        if not subscription_id:
+            logger.warning(f"Invoice {data.get('id')} without subscription, ignoring")
+            return
+        SubscriptionSyncService._upsert(db, SubscriptionInvoice, "invoice_id",
+                                        [SubscriptionSyncService._invoice_row(data, subscription_id)])
+        if (data.get("cycle") or {}).get("id"):
+            SubscriptionSyncService._upsert(db, SubscriptionCycle, "cycle_id",
+                                            [SubscriptionSyncService._cycle_row(data["cycle"], subscription_id)])
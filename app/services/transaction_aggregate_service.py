@@ -0,0 +1,88 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.transaction import Transaction, TransactionStatus
+
+logger = logging.getLogger(__name__)
+
+# Colunas pelas quais os totais podem ser agrupados
+GROUP_COLUMNS = {
+    "ong": Transaction.ong_id,
+    "campaign": Transaction.campaign_id,
+    "base": Transaction.base_id,
+    "project": Transaction.project_id,
+    "attendee": Transaction.attendee_id,
+    "payment_method": Transaction.payment_method,
+}
+
+
+class TransactionAggregateService:
+    """Totais de doações calculados no banco sobre as colunas em centavos."""
+
+    @staticmethod
+    def _filtered(query, ong_id: Optional[int] = None, campaign_id: Optional[int] = None,
+                  base_id: Optional[int] = None, project_id: Optional[int] = None,
+                  status: Optional[TransactionStatus] = TransactionStatus.PAID,
+                  since: Optional[datetime] = None, until: Optional[datetime] = None):
+        """Aplica os filtros comuns às consultas de agregação."""
+        if ong_id is not None:
+            query = query.filter(Transaction.ong_id == ong_id)
+        if campaign_id is not None:
+            query = query.filter(Transaction.campaign_id == campaign_id)
+        if base_id is not None:
+            query = query.filter(Transaction.base_id == base_id)
+        if project_id is not None:
+            query = query.filter(Transaction.project_id == project_id)
+        if status is not None:
+            query = query.filter(Transaction.status == status)
+        if since is not None:
+            query = query.filter(Transaction.created_at >= since)
+        if until is not None:
+            query = query.filter(Transaction.created_at < until)
+        return query
+
+    @staticmethod
+    def _sums():
+        return (
+            func.count(Transaction.id).label("count"),
+            func.coalesce(func.sum(Transaction.amount_cents), 0).label("amount_cents"),
+            func.coalesce(func.sum(Transaction.commission_cents), 0).label("commission_cents"),
+        )
+
+    @staticmethod
+    def _as_dict(row) -> Dict[str, int]:
+        amount_cents = int(row.amount_cents)
+        commission_cents = int(row.commission_cents)
+        return {
+            "count": int(row.count),
+            "amount_cents": amount_cents,
+            "commission_cents": commission_cents,
+            "net_cents": amount_cents - commission_cents,
+        }
+
+    @staticmethod
+    def totals(db: Session, **filters) -> Dict[str, int]:
+        """Soma quantidade, valor, comissão e líquido das transações filtradas (por padrão, as pagas)."""
+        query = TransactionAggregateService._filtered(
+            db.query(*TransactionAggregateService._sums()), **filters)
+        return TransactionAggregateService._as_dict(query.one())
+
+    @staticmethod
+    def totals_by(db: Session, group_by: str, **filters) -> List[Dict[str, Any]]:
+        """Mesmos totais agrupados por ONG, campanha, base, projeto, participante ou forma de pagamento."""
+        if group_by not in GROUP_COLUMNS:
+            raise ValueError(f"Invalid group_by: {group_by}")
+        column = GROUP_COLUMNS[group_by]
+        query = TransactionAggregateService._filtered(
+            db.query(column.label("key"), *TransactionAggregateService._sums()), **filters
+        ).filter(column.isnot(None)).group_by(column)
+
+        results = []
+        for row in query.all():
+            totals = TransactionAggregateService._as_dict(row)
+            key = row.key.value if hasattr(row.key, "value") else row.key
+            results.append({group_by: key, **totals})
+        logger.debug(f"Transaction totals by {group_by}: {len(results)} groups")
+        return results
@@ -0,0 +1,218 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import and_, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.models.webhook_log import WebhookLog
+from app.services.webhook_service import WebhookService
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookQueueService:
+    """Fila durável das notificações da Pagar.me, processada por workers em segundo plano.
+
+    A rota só grava o corpo recebido e responde; reentregas de um evento já
+    gravado são descartadas pelo índice único de event_id. Os workers reservam
+    lotes da fila com um UPDATE condicional (vários processos podem drenar a
+    mesma fila), juntam os eventos de um mesmo pedido em uma única escrita e
+    marcam as notificações como concluídas no mesmo commit do efeito. As que
+    falham são reagendadas com backoff; esgotadas as tentativas, ficam como
+    "dead" para análise e podem ser reenfileiradas com requeue_dead.
+    """
+    WORKERS = int(os.getenv("WEBHOOK_QUEUE_WORKERS", "4"))
+    POLL_INTERVAL = float(os.getenv("WEBHOOK_QUEUE_POLL_INTERVAL", "1"))
+    BATCH_SIZE = int(os.getenv("WEBHOOK_QUEUE_BATCH_SIZE", "50"))
+    MAX_ATTEMPTS = int(os.getenv("WEBHOOK_QUEUE_MAX_ATTEMPTS", "8"))
+    RETRY_DELAY = float(os.getenv("WEBHOOK_QUEUE_RETRY_DELAY", "5"))
+    LOCK_TIMEOUT = float(os.getenv("WEBHOOK_QUEUE_LOCK_TIMEOUT", "300"))
+
+    _workers: List[threading.Thread] = []
+    _stopping = threading.Event()
+    _wakeup = threading.Event()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def enqueue(db: Session, raw_body: str) -> None:
+        """Grava a notificação na fila, ignorando reentregas, e acorda os workers. Faz commit."""
+        now = datetime.utcnow()
+        try:
+            event_id = json.loads(raw_body).get("id")
+        except (ValueError, AttributeError):
+            event_id = None  # O worker move o corpo inválido para "dead"
+        stmt = pg_insert(WebhookLog).values(
+            raw_body=raw_body, event_id=event_id, status="pending", attempts=0, available_at=now, received_at=now)
+        result = db.execute(stmt.on_conflict_do_nothing(index_elements=[WebhookLog.event_id]))
+        db.commit()
+        if not result.rowcount:
+            logger.debug(f"Duplicate Pagar.me webhook ignored: event_id={event_id}")
+            return
+        WebhookQueueService._wakeup.set()
+
+    @staticmethod
+    def start() -> None:
+        """Inicia os workers que drenam a fila."""
+        with WebhookQueueService._lock:
+            if WebhookQueueService._workers:
+                return
+            WebhookQueueService._stopping.clear()
+            WebhookQueueService._workers = [
+                threading.Thread(target=WebhookQueueService._work_loop, name=f"webhook-queue-{index}", daemon=True)
+                for index in range(WebhookQueueService.WORKERS)
+            ]
+            for worker in WebhookQueueService._workers:
+                worker.start()
+        logger.info(f"Webhook queue workers started: workers={WebhookQueueService.WORKERS}")
+
+    @staticmethod
+    def stop() -> None:
+        """Para os workers depois do lote em andamento."""
+        WebhookQueueService._stopping.set()
+        WebhookQueueService._wakeup.set()
+        with WebhookQueueService._lock:
+            workers = WebhookQueueService._workers
+            WebhookQueueService._workers = []
+        for worker in workers:
+            worker.join(timeout=WebhookQueueService.POLL_INTERVAL + 30)
+
+    @staticmethod
+    def _work_loop() -> None:
+        while not WebhookQueueService._stopping.is_set():
+            processed = 0
+            try:
+                processed = WebhookQueueService.process_batch()
+            except Exception as e:
+                logger.error(f"Webhook queue batch failed: {str(e)}")
+            if processed < WebhookQueueService.BATCH_SIZE:
+                # Fila vazia (ou quase): espera nova notificação ou o próximo ciclo
+                WebhookQueueService._wakeup.wait(WebhookQueueService.POLL_INTERVAL)
+                WebhookQueueService._wakeup.clear()
+
+    @staticmethod
+    def _claimable(now: datetime):
+        """Notificações prontas para processar, incluindo as travadas por um worker que morreu."""
+        stale = now - timedelta(seconds=WebhookQueueService.LOCK_TIMEOUT)
+        return or_(
+            and_(WebhookLog.status == "pending", WebhookLog.available_at <= now),
+            and_(WebhookLog.status == "processing", WebhookLog.locked_at < stale)
+        )
+
+    @staticmethod
+    def _claim(db: Session) -> List[WebhookLog]:
+        """Reserva um lote da fila para este worker, na ordem de chegada."""
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        due = select(WebhookLog.id).where(WebhookQueueService._claimable(now)).order_by(
+            WebhookLog.id).limit(WebhookQueueService.BATCH_SIZE)
+        claimed = db.query(WebhookLog).filter(
+            WebhookLog.id.in_(due),
+            WebhookQueueService._claimable(now)
+        ).update({
+            WebhookLog.status: "processing",
+            WebhookLog.locked_at: now,
+            WebhookLog.locked_by: token,
+            WebhookLog.attempts: WebhookLog.attempts + 1
+        }, synchronize_session=False)
+        db.commit()
+        if not claimed:
+            return []
+        return db.query(WebhookLog).filter(WebhookLog.locked_by == token).order_by(WebhookLog.id).all()
+
+    @staticmethod
+    def process_batch() -> int:
+        """Reserva e processa um lote da fila em uma sessão própria. Retorna quantas notificações pegou."""
+        db = SessionLocal()
+        try:
+            items = WebhookQueueService._claim(db)
+            for order_id, group in WebhookQueueService._group(db, items):
+                WebhookQueueService._process(db, order_id, group)
+            return len(items)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _group(db: Session, items: List[WebhookLog]) -> List[Tuple[Optional[str], List[WebhookLog]]]:
+        """Interpreta o lote e junta, na ordem de chegada, os eventos order.* de cada pedido."""
+        groups: Dict[Any, Tuple[Optional[str], List[WebhookLog]]] = {}
+        for item in items:
+            try:
+                if item.payload is None:
+                    item.payload = json.loads(item.raw_body)
+                item.event = item.payload.get("type")
+                data = item.payload.get("data") or {}
+            except (TypeError, ValueError, AttributeError) as e:
+                # Corpo inválido não melhora com novas tentativas
+                WebhookQueueService._record_failure(db, [item.id], WebhookQueueService.MAX_ATTEMPTS, e)
+                continue
+            order_id = data.get("id") if (item.event or "").startswith("order.") else None
+            key = ("order", order_id) if order_id else ("item", item.id)
+            groups.setdefault(key, (order_id, []))[1].append(item)
+        return list(groups.values())
+
+    @staticmethod
+    def _process(db: Session, order_id: Optional[str], group: List[WebhookLog]) -> None:
+        item_ids = [item.id for item in group]
+        attempt = max(item.attempts for item in group)
+        try:
+            # Savepoint: uma falha desfaz só o efeito das notificações, não os corpos já interpretados
+            with db.begin_nested():
+                if order_id:
+                    WebhookService.apply_order_events(db, [item.payload.get("data") or {} for item in group])
+                else:
+                    WebhookService.handle_pagarme_webhook(db, group[0].payload)
+        except Exception as e:
+            WebhookQueueService._record_failure(db, item_ids, attempt, e)
+            return
+        now = datetime.utcnow()
+        for item in group:
+            item.status = "done"
+            item.processed_at = now
+            item.last_error = None
+        db.commit()
+
+    @staticmethod
+    def _record_failure(db: Session, item_ids: List[int], attempt: int, error: Exception) -> None:
+        """Reagenda as notificações com backoff ou, esgotadas as tentativas, as move para "dead"."""
+        error_message = str(error)[:500]
+        items = db.query(WebhookLog).filter(WebhookLog.id.in_(item_ids)).all()
+        if attempt < WebhookQueueService.MAX_ATTEMPTS:
+            delay = WebhookQueueService.RETRY_DELAY * (2 ** (attempt - 1))
+            for item in items:
+                item.status = "pending"
+                item.available_at = datetime.utcnow() + timedelta(seconds=delay)
+                item.last_error = error_message
+            db.commit()
+            logger.warning(f"Webhook processing failed, retrying in {delay:.0f}s: "
+                           f"webhook_ids={item_ids}, attempt={attempt}, error={error_message}")
+            return
+
+        for item in items:
+            item.status = "dead"
+            item.processed_at = datetime.utcnow()
+            item.last_error = error_message
+        db.commit()
+        logger.error(f"Webhook moved to dead letter: webhook_ids={item_ids}, event={items[0].event}, "
+                     f"error={error_message}")
+
+    @staticmethod
+    def requeue_dead(db: Session, ids: Optional[List[int]] = None) -> int:
+        """Devolve à fila as notificações mortas (todas ou as informadas), com as tentativas zeradas."""
+        query = db.query(WebhookLog).filter(WebhookLog.status == "dead")
+        if ids:
+            query = query.filter(WebhookLog.id.in_(ids))
+        count = query.update({
+            WebhookLog.status: "pending",
+            WebhookLog.attempts: 0,
+            WebhookLog.available_at: datetime.utcnow(),
+            WebhookLog.processed_at: None
+        }, synchronize_session=False)
+        db.commit()
+        WebhookQueueService._wakeup.set()
+        logger.info(f"Requeued {count} dead webhooks")
+        return count
@@ -1,52 +1,121 @@
 import logging
 from sqlalchemy.orm import Session
 from app.models.transaction import Transaction, TransactionStatus
-from app.models.webhook_log import WebhookLog
-from typing import Dict, Any
+from app.services.subscription_sync_service import SubscriptionSyncService
+from app.services.donation_totals_service import DonationTotalsService
+from typing import Dict, Any, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Status de pedido da Pagar.me -> status da transação
+ORDER_STATUS_MAP = {
+    "pending": TransactionStatus.PENDING,
+    "paid": TransactionStatus.PAID,
+    "canceled": TransactionStatus.CANCELED,
+    "failed": TransactionStatus.FAILED,
+    "expired": TransactionStatus.EXPIRED
+}
+
+# Transições aceitas vindas de webhooks. Qualquer outra é evento atrasado ou
+# repetido (ex.: order.pending entregue depois de order.paid) e é ignorada.
+ALLOWED_TRANSITIONS = {
+    TransactionStatus.PENDING: {TransactionStatus.PAID, TransactionStatus.FAILED,
+                                TransactionStatus.CANCELED, TransactionStatus.EXPIRED},
+    TransactionStatus.PAID: {TransactionStatus.CANCELED},
+    TransactionStatus.FAILED: {TransactionStatus.PAID, TransactionStatus.CANCELED},
+    TransactionStatus.EXPIRED: {TransactionStatus.PAID, TransactionStatus.CANCELED},
+    TransactionStatus.CANCELED: set(),
+}
+
 
 class WebhookService:
+    @staticmethod
+    def can_transition(old_status: TransactionStatus, new_status: TransactionStatus) -> bool:
+        """Indica se um webhook pode levar a transação de old_status para new_status."""
+        return new_status in ALLOWED_TRANSITIONS.get(old_status, set())
+
+    @staticmethod
+    def _locked(db: Session):
+        """Consulta de transações que trava a linha até o commit.
+
+        Vários workers da fila podem aplicar eventos do mesmo pedido ao mesmo
+        tempo; com a linha travada, a guarda de transições e os totais
+        arrecadados sempre partem do status gravado pelo worker anterior.
+        """
+        return db.query(Transaction).with_for_update().populate_existing()
+
+    @staticmethod
+    def _find_order_transaction(db: Session, data: Dict[str, Any]) -> Optional[Transaction]:
+        transaction = WebhookService._locked(db).filter(Transaction.order_id == data.get("id")).first()
+        if not transaction and (data.get("metadata") or {}).get("transaction_id"):
+            # O webhook pode chegar antes de o worker do outbox gravar o order_id
+            transaction = WebhookService._locked(db).filter(
+                Transaction.id == int(data["metadata"]["transaction_id"])).first()
+        return transaction
+
+    @staticmethod
+    def apply_order_events(db: Session, events: List[Dict[str, Any]]) -> None:
+        """Aplica, na ordem de chegada, os eventos order.* de um mesmo pedido com uma única escrita. Não faz commit."""
+        order_id = events[-1].get("id")
+        transaction = None
+        for data in events:
+            transaction = WebhookService._find_order_transaction(db, data)
+            if transaction:
+                break
+        if not transaction:
+            logger.warning(f"No transaction found for order_id={order_id}")
+            return
+
+        old_status = final_status = transaction.status
+        final_data = None
+        for data in events:
+            pagarme_status = data.get("status")
+            new_status = ORDER_STATUS_MAP.get(pagarme_status)
+            if not new_status:
+                logger.warning(f"Unknown Pagar.me status: {pagarme_status}")
+            elif WebhookService.can_transition(final_status, new_status):
+                final_status, final_data = new_status, data
+            elif new_status != final_status:
+                logger.info(f"Ignoring out-of-order status {new_status} for transaction {transaction.id} "
+                            f"(current {final_status})")
+
+        if final_status == old_status:
+            return
+        transaction.status = final_status
+        if final_status == TransactionStatus.FAILED:
+            transaction.error_message = final_data.get("last_transaction", {}).get("refuse_reason",
+                                                                                   "Unknown error")
+        # Totais arrecadados mudam no mesmo commit que o status
+        DonationTotalsService.apply_transition(db, transaction, old_status, final_status)
+        logger.info(f"Updated transaction {transaction.id} to status {final_status} "
+                    f"({len(events)} events for order {order_id})")
+
     @staticmethod
     def handle_pagarme_webhook(db: Session, payload: Dict[str, Any]) -> None:
-        """Processa notificações da Pagar.me."""
-        event = payload.get("type")
+        """Aplica uma notificação da Pagar.me. Não faz commit: quem chama grava o efeito junto com o status da fila."""
+        event = payload.get("type") or ""
         data = payload.get("data", {})
 
-        webhook_log = WebhookLog(event=event, payload=payload)
-        db.add(webhook_log)
-        db.flush()
-
-        try:
-            if event.startswith("order."):
-                order_id = data.get("id")
-                transaction = db.query(Transaction).filter(Transaction.order_id == order_id).first()
-                if not transaction:
-                    logger.warning(f"No transaction found for order_id={order_id}")
-                    return
-
-                status_map = {
-                    "pending": TransactionStatus.PENDING,
-                    "paid": TransactionStatus.PAID,
-                    "canceled": TransactionStatus.CANCELED,
-                    "failed": TransactionStatus.FAILED,
-                    "expired": TransactionStatus.EXPIRED
-                }
-                pagarme_status = data.get("status")
-                new_status = status_map.get(pagarme_status)
-
-                if new_status:
-                    transaction.status = new_status
-                    if new_status == TransactionStatus.FAILED:
-                        transaction.error_message = data.get("last_transaction", {}).get("refuse_reason",
-                                                                                         "Unknown error")
-                    db.commit()
-                    logger.info(f"Updated transaction {transaction.id} to status {new_status}")
-                else:
-                    logger.warning(f"Unknown Pagar.me status: {pagarme_status}")
-
-        except Exception as e:
-            db.rollback()
-            logger.error(f"Error processing webhook {event}: {str(e)}")
-            raise
\ No newline at end of file
+        if event.startswith("order."):
+            WebhookService.apply_order_events(db, [data])
+
+        elif event == "charge.refunded":
+            transaction = WebhookService._locked(db).filter(Transaction.charge_id == data.get("id")).first()
+            if not transaction:
+                logger.warning(f"No transaction found for charge_id={data.get('id')}")
+                return
+            if not WebhookService.can_transition(transaction.status, TransactionStatus.CANCELED):
+                return
+            # Estornos ficam como cancelados e saem dos totais arrecadados
+            old_status = transaction.status
+            transaction.status = TransactionStatus.CANCELED
+            DonationTotalsService.apply_transition(db, transaction, old_status, TransactionStatus.CANCELED)
+            logger.info(f"Transaction {transaction.id} refunded")
+
+        elif event.startswith("subscription."):
+            SubscriptionSyncService.apply_subscription_event(db, data)
+            logger.info(f"Updated subscription mirror {data.get('id')} from {event}")
+
+        elif event.startswith("invoice."):
+            SubscriptionSyncService.apply_invoice_event(db, data)
+            logger.info(f"Updated invoice mirror {data.get('id')} from {event}")
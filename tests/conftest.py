@@ -0,0 +1,142 @@
+"""Fixtures compartilhadas: SQLite em memória no lugar do Postgres e um cadastro mínimo.
+
+Nenhum teste fala com a Pagar.me: as chamadas ao gateway são substituídas por
+monkeypatch em cada teste.
+"""
+import json
+import os
+import sys
+
+os.environ.setdefault("PAGARME_API_KEY", "test")
+os.environ.setdefault("PAGARME_RATE_LIMIT_ENABLED", "false")
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.main  # noqa: F401  Registra todos os modelos e rotas
+import app.manage  # noqa: F401
+from app.config import database
+from app.config.database import Base, get_db
+from app.models.address import Address
+from app.models.maintainer import Maintainer
+from app.models.ong import ONG
+from app.models.user import User, UserType
+from app.pagarme.client import PagarMeClient
+from app.pagarme.resilience import PagarMeResilience
+from app.services.auth_service import get_current_user
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+    # Savepoints no pysqlite exigem que o BEGIN seja emitido pelo SQLAlchemy
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    # O SQLite não aceita autoincremento em chave primária composta
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE ong_maintainer (id INTEGER PRIMARY KEY, ong_id INTEGER, maintainer_id INTEGER)")
+    Base.metadata.create_all(engine, tables=[
+        table for name, table in Base.metadata.tables.items() if name != "ong_maintainer"])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine, monkeypatch):
+    """Sessões ligadas ao SQLite, inclusive as abertas pelos workers (SessionLocal)."""
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    original = database.SessionLocal
+    for module in list(sys.modules.values()):
+        if getattr(module, "__name__", "").startswith("app.") and \
+                getattr(module, "SessionLocal", None) is original:
+            monkeypatch.setattr(module, "SessionLocal", factory)
+    return factory
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def seed(db):
+    """Mantenedor 1 (usuário 1, cliente cus_1) e ONG 1 (usuário 2)."""
+    db.add_all([
+        UserType(id=1, name="maintainer"),
+        UserType(id=2, name="ong"),
+        Address(id=1, street="Rua A", street_number="1", city="São Carlos", state="SP", zip_code="13560000"),
+        User(id=1, username="mantenedor", user_type_id=1, name="Mantenedor", document="12345678909",
+             email="m@leet.com", phone_number="16999999999"),
+        User(id=2, username="ong", user_type_id=2, name="ONG"),
+    ])
+    db.flush()
+    db.add_all([
+        Maintainer(id=1, user_id=1, address_id=1, client_id="cus_1"),
+        ONG(id=1, user_id=2, address_id=1),
+    ])
+    db.commit()
+    return {"user_id": 1, "maintainer_id": 1, "ong_id": 1}
+
+
+@pytest.fixture
+def client(session_factory):
+    """Cliente HTTP da aplicação, sem os workers de startup e autenticado como o mantenedor 1."""
+    def override_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.main.app.dependency_overrides[get_db] = override_db
+    app.main.app.dependency_overrides[get_current_user] = lambda: {"user": User(id=1), "type": "maintainer"}
+    yield TestClient(app.main.app)
+    app.main.app.dependency_overrides.clear()
+
+
+class FakeSession:
+    """Sessão HTTP falsa: registra as chamadas e devolve as respostas enfileiradas, (status, corpo) ou exceção."""
+
+    def __init__(self):
+        self.calls = []
+        self.responses = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        outcome = self.responses.pop(0) if self.responses else (200, {})
+        if isinstance(outcome, BaseException):
+            raise outcome
+        status, body = outcome
+        response = requests.Response()
+        response.status_code = status
+        response._content = b"" if body is None else json.dumps(body).encode()
+        response.request = requests.Request(method, url, json=kwargs.get("json")).prepare()
+        return response
+
+
+@pytest.fixture
+def pagarme_session(monkeypatch):
+    """Coloca uma FakeSession no lugar da sessão compartilhada da Pagar.me, com circuitos zerados."""
+    session = FakeSession()
+    monkeypatch.setattr(PagarMeClient, "_session", session)
+    monkeypatch.setattr(PagarMeResilience, "_breakers", {})
+    return session
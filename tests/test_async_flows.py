@@ -0,0 +1,127 @@
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.address import Address
+from app.models.maintainer import Maintainer
+from app.models.ong import OngMaintainer
+from app.models.payment_outbox import PaymentOutbox
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.pagarme.address import AsyncPagarMeAddressAPI
+from app.pagarme.cards import AsyncPagarMeCardsAPI
+from app.pagarme.customers import AsyncPagarMeCustomerAPI
+from app.schemas.maintainer import MaintainerCreate
+from app.services import maintainer_service
+from app.services.payment_outbox_service import PaymentOutboxService
+from app.services.payment_service import PaymentService
+
+CARD = {"number": "4111111111111111", "holder_name": "Ana Souza", "expiration_date": "12/30", "cvv": "123"}
+
+
+@pytest.fixture
+def threads(monkeypatch):
+    """Registra em qual thread roda o acesso ao banco e em qual roda a chamada ao gateway."""
+    seen = {}
+    register = PaymentService._register
+
+    def tracked_register(*args, **kwargs):
+        seen["db"] = threading.get_ident()
+        return register(*args, **kwargs)
+
+    async def create_card(card_data):
+        seen["gateway"] = threading.get_ident()
+        return {"id": f"card_{card_data['number'][-4:]}", "last_four_digits": card_data["number"][-4:],
+                "brand": "visa"}
+
+    monkeypatch.setattr(PaymentService, "_register", staticmethod(tracked_register))
+    monkeypatch.setattr(AsyncPagarMeCardsAPI, "create_card", staticmethod(create_card))
+    monkeypatch.setattr(PaymentOutboxService, "dispatch", staticmethod(lambda transaction_id: None))
+    return seen
+
+
+def test_card_payment_queries_off_the_event_loop(seed, client, db, threads):
+    response = client.post("/payments/", json={
+        "amount": "20.00", "payment_method": "credit_card", "ong_id": 1, "card_details": CARD})
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body["amount_cents"] == 2000
+    assert threads["db"] != threads["gateway"]
+    transaction = db.get(Transaction, body["transaction_id"])
+    assert transaction.card_id == "card_1111"
+    assert db.query(PaymentOutbox).filter_by(transaction_id=transaction.id).count() == 1
+
+
+def test_batch_tokenizes_repeated_card_once(seed, client, db, monkeypatch):
+    calls = []
+
+    async def create_card(card_data):
+        calls.append(card_data["number"])
+        return {"id": "card_1", "last_four_digits": "1111", "brand": "visa"}
+
+    monkeypatch.setattr(AsyncPagarMeCardsAPI, "create_card", staticmethod(create_card))
+    monkeypatch.setattr(PaymentOutboxService, "dispatch", staticmethod(lambda transaction_id: None))
+    item = {"amount": "10.00", "payment_method": "credit_card", "ong_id": 1, "card_details": CARD}
+
+    response = client.post("/payments/batch", json={"items": [item, item, {**item, "ong_id": 99}]})
+
+    assert response.status_code == 202
+    body = response.json()
+    assert (body["queued"], body["failed"]) == (2, 1)
+    assert body["items"][2]["status_code"] == 404
+    assert calls == [CARD["number"]]
+    assert db.query(PaymentOutbox).count() == 2
+
+
+@pytest.fixture
+def fast_hash(monkeypatch):
+    """O hash bcrypt não interessa aqui e só deixaria os testes lentos."""
+    monkeypatch.setattr(maintainer_service, "get_password_hash", lambda password: f"hash:{password}")
+
+
+def _maintainer_payload(username="novo"):
+    return MaintainerCreate(
+        is_business=False,
+        ong_id=1,
+        address={"street": "Rua B", "street_number": "2", "city": "São Carlos", "state": "SP",
+                 "zip_code": "13560000"},
+        user={"username": username, "name": "Novo Mantenedor", "password": "segredo", "user_type": "maintainer",
+              "email": "novo@leet.com", "document": "98765432100", "phone_number": "16988887777"},
+    )
+
+
+@pytest.mark.anyio
+async def test_async_maintainer_links_customer(seed, db, fast_hash, monkeypatch):
+    async def create_customer(data):
+        return {"id": "cus_novo"}
+
+    async def create_address(customer_id, data):
+        return {"id": "addr_1"}
+
+    monkeypatch.setattr(AsyncPagarMeCustomerAPI, "create_customer", staticmethod(create_customer))
+    monkeypatch.setattr(AsyncPagarMeAddressAPI, "create_address", staticmethod(create_address))
+
+    response = await maintainer_service.create_maintainer_async(
+        db, _maintainer_payload(), {"type": "ong", "id": 2})
+
+    assert response.client_id == "cus_novo"
+    assert db.get(Maintainer, response.id).client_id == "cus_novo"
+
+
+@pytest.mark.anyio
+async def test_async_maintainer_is_discarded_when_gateway_fails(seed, db, fast_hash, monkeypatch):
+    async def create_customer(data):
+        raise Exception("gateway down")
+
+    monkeypatch.setattr(AsyncPagarMeCustomerAPI, "create_customer", staticmethod(create_customer))
+
+    with pytest.raises(HTTPException) as error:
+        await maintainer_service.create_maintainer_async(db, _maintainer_payload(), {"type": "ong", "id": 2})
+
+    assert error.value.status_code == 500
+    assert db.query(User).filter_by(username="novo").count() == 0
+    assert db.query(Maintainer).count() == 1
+    assert db.query(OngMaintainer).count() == 0
+    assert db.query(Address).count() == 1
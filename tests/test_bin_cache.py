@@ -0,0 +1,46 @@
+from collections import OrderedDict
+
+import pytest
+
+from app.pagarme.bin import PagarMeBinAPI
+from app.services.bin_cache_service import BinCacheService
+
+
+@pytest.fixture
+def bins(monkeypatch):
+    """Cache vazio e consulta de BIN falsa, que conhece só o 411111."""
+    calls = []
+
+    def get_bin(bin_number):
+        calls.append(bin_number)
+        return {"brand": "visa"} if bin_number == "411111" else None
+
+    monkeypatch.setattr(BinCacheService, "_memory", OrderedDict())
+    monkeypatch.setattr(BinCacheService, "_stats", dict.fromkeys(BinCacheService._stats, 0))
+    monkeypatch.setattr(PagarMeBinAPI, "get_bin", staticmethod(get_bin))
+    return calls
+
+
+def test_lookups_go_through_memory_then_database(bins, db):
+    assert BinCacheService.get_bin(db, "4111 1111 1111 1111") == {"brand": "visa"}
+    assert BinCacheService.get_bin(db, "411111") == {"brand": "visa"}
+    BinCacheService._memory.clear()
+    assert BinCacheService.get_bin(db, "411111") == {"brand": "visa"}
+    assert BinCacheService.get_bin(db, "999999") is None
+    assert BinCacheService.get_bin(db, "999999") is None
+
+    assert bins == ["411111", "999999"]
+    assert BinCacheService.stats() == {"memory_hits": 1, "db_hits": 1, "misses": 2, "negative_hits": 1,
+                                       "memory_size": 2}
+
+
+def test_metrics_expose_bin_cache_counters(bins, db, client):
+    BinCacheService.get_bin(db, "411111")
+    BinCacheService.get_bin(db, "411111")
+
+    body = client.get("/metrics").text
+
+    assert 'bin_cache_lookups_total{result="memory_hit"} 1' in body
+    assert 'bin_cache_lookups_total{result="miss"} 1' in body
+    assert "bin_cache_memory_entries 1" in body
+    assert "# TYPE pagarme_requests_total counter" in body
@@ -0,0 +1,57 @@
+import threading
+import time
+
+from app.pagarme.bulk import fetch_many
+from app.pagarme.client import PagarMeClient
+
+
+class Fetch:
+    """Busca falsa que mede quantas chamadas ficam em andamento ao mesmo tempo."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+        self.running = self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, object_id):
+        with self.lock:
+            self.calls.append(object_id)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.01)
+        with self.lock:
+            self.running -= 1
+        if object_id in self.failing:
+            raise Exception(f"{object_id} not found")
+        return {"id": object_id}
+
+
+def test_every_id_is_fetched_once_with_bounded_concurrency():
+    fetch = Fetch()
+    ids = [f"ch_{i}" for i in range(20)] + ["ch_0", "ch_1"]
+
+    results = list(fetch_many(fetch, ids, "charges", concurrency=4))
+
+    assert sorted(result.id for result in results) == sorted(set(ids))
+    assert sorted(fetch.calls) == sorted(set(ids))
+    assert 1 < fetch.peak <= 4
+
+
+def test_failures_are_reported_per_id():
+    results = {result.id: result for result in fetch_many(Fetch(failing={"ch_2"}), ["ch_1", "ch_2", "ch_3"],
+                                                          "charges")}
+
+    assert results["ch_2"].data is None
+    assert results["ch_2"].error == "ch_2 not found"
+    assert results["ch_1"].data == {"id": "ch_1"} and results["ch_1"].error is None
+    assert results["ch_3"].data == {"id": "ch_3"}
+
+
+def test_concurrency_is_capped_by_the_connection_pool(monkeypatch):
+    monkeypatch.setattr(PagarMeClient, "POOL_MAXSIZE", 2)
+    fetch = Fetch()
+
+    list(fetch_many(fetch, [f"or_{i}" for i in range(10)], "orders", concurrency=50))
+
+    assert fetch.peak <= 2
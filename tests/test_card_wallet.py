@@ -0,0 +1,59 @@
+import pytest
+
+from app.models.card import Card
+from app.models.transaction import Transaction
+from app.pagarme.cards import AsyncPagarMeCardsAPI
+from app.services.card_wallet_service import CardWalletService
+from app.services.payment_outbox_service import PaymentOutboxService
+
+CARD = {"number": "4111111111111111", "holder_name": "Ana Souza", "expiration_date": "12/30", "cvv": "123"}
+
+
+@pytest.fixture
+def tokenized(monkeypatch):
+    calls = []
+
+    async def create_card(card_data):
+        calls.append(card_data["number"])
+        return {"id": f"card_{len(calls)}", "last_four_digits": card_data["number"][-4:], "brand": "visa"}
+
+    monkeypatch.setattr(AsyncPagarMeCardsAPI, "create_card", staticmethod(create_card))
+    monkeypatch.setattr(PaymentOutboxService, "dispatch", staticmethod(lambda transaction_id: None))
+    return calls
+
+
+def _pay(client, card):
+    response = client.post("/payments/", json={
+        "amount": "15.00", "payment_method": "credit_card", "ong_id": 1, "card_details": card})
+    assert response.status_code == 202
+    return response.json()["transaction_id"]
+
+
+def test_fingerprint_ignores_formatting_but_not_the_card():
+    fingerprint = CardWalletService.fingerprint(CARD)
+
+    assert CardWalletService.fingerprint({**CARD, "number": "4111 1111 1111 1111", "holder_name": " ana  souza",
+                                          "expiration_date": "1230", "cvv": "999"}) == fingerprint
+    assert CardWalletService.fingerprint({**CARD, "expiration_date": "12/31"}) != fingerprint
+    assert CardWalletService.fingerprint({**CARD, "number": "4111111111112222"}) != fingerprint
+    assert "4111" not in fingerprint
+
+
+def test_saved_card_is_reused_without_tokenizing_again(seed, client, db, tokenized):
+    first = _pay(client, CARD)
+    second = _pay(client, {**CARD, "holder_name": "ANA SOUZA", "cvv": "321"})
+
+    assert tokenized == [CARD["number"]]
+    assert db.get(Transaction, first).card_id == db.get(Transaction, second).card_id == "card_1"
+    assert db.query(Card).count() == 1
+
+
+def test_inactive_card_is_tokenized_again(seed, client, db, tokenized):
+    _pay(client, CARD)
+    db.query(Card).update({Card.status: "inactive"})
+    db.commit()
+
+    second = _pay(client, CARD)
+
+    assert len(tokenized) == 2
+    assert db.get(Transaction, second).card_id == "card_2"
@@ -0,0 +1,84 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+
+from app.models.transaction import PaymentMethod, Transaction, TransactionStatus
+from app.models.user import User
+from app.schemas.money import from_cents, percent_of, to_cents
+from app.schemas.payment import PaymentRequest
+from app.services.auth_service import get_current_user
+from app.services.payment_outbox_service import PaymentOutboxService
+import app.main
+
+
+@pytest.mark.parametrize("value, cents", [
+    ("0.1", 10), (0.29, 29), (Decimal("19.99"), 1999), ("1.005", 101), (1234567.89, 123456789)])
+def test_to_cents(value, cents):
+    assert to_cents(value) == cents
+
+
+def test_from_cents_round_trips():
+    assert from_cents(1999) == Decimal("19.99")
+    assert to_cents(from_cents(101)) == 101
+
+
+def test_commission_rounds_half_up():
+    assert percent_of(1250, 0.04) == 50
+    assert percent_of(1263, 0.04) == 51  # 50,52 centavos
+    assert percent_of(1237, Decimal("0.04")) == 49  # 49,48 centavos
+
+
+def test_request_rejects_fractions_of_a_cent():
+    assert PaymentRequest(amount="10.5", payment_method="pix", ong_id=1).amount == Decimal("10.50")
+    with pytest.raises(ValidationError):
+        PaymentRequest(amount="10.555", payment_method="pix", ong_id=1)
+
+
+def test_payment_is_stored_in_cents(seed, client, db, monkeypatch):
+    monkeypatch.setattr(PaymentOutboxService, "dispatch", staticmethod(lambda transaction_id: None))
+
+    response = client.post("/payments/", json={"amount": "0.30", "payment_method": "pix", "ong_id": 1})
+
+    transaction = db.get(Transaction, response.json()["transaction_id"])
+    assert (transaction.amount_cents, transaction.commission_cents) == (30, 1)
+    assert transaction.amount == 0.3
+
+
+@pytest.fixture
+def donations(seed, db):
+    rows = [(1000, 40, TransactionStatus.PAID, PaymentMethod.PIX, datetime(2026, 9, 10)),
+            (2550, 102, TransactionStatus.PAID, PaymentMethod.CREDIT_CARD, datetime(2026, 10, 2)),
+            (700, 28, TransactionStatus.PAID, PaymentMethod.PIX, datetime(2026, 10, 5)),
+            (9900, 396, TransactionStatus.CANCELED, PaymentMethod.PIX, datetime(2026, 10, 6))]
+    for amount_cents, commission_cents, status, method, created_at in rows:
+        db.add(Transaction(ong_id=1, maintainer_id=1, amount=amount_cents / 100,
+                           commission_amount=commission_cents / 100, amount_cents=amount_cents,
+                           commission_cents=commission_cents, status=status, payment_method=method,
+                           created_at=created_at))
+    db.commit()
+
+
+def test_ong_totals_sum_paid_cents(donations, client):
+    app.main.app.dependency_overrides[get_current_user] = lambda: {"user_id": 2, "type": "ong", "role": None}
+
+    response = client.get("/ongs/1/donations/totals", params={"since": "2026-10-01T00:00:00",
+                                                              "group_by": "payment_method"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["count"], body["amount_cents"], body["commission_cents"], body["net_cents"]) == (2, 3250, 130, 3120)
+    assert sorted(body["groups"], key=lambda group: group["payment_method"]) == [
+        {"payment_method": "credit_card", "count": 1, "amount_cents": 2550, "commission_cents": 102,
+         "net_cents": 2448},
+        {"payment_method": "pix", "count": 1, "amount_cents": 700, "commission_cents": 28, "net_cents": 672},
+    ]
+
+
+def test_ong_totals_are_private(donations, client):
+    app.main.app.dependency_overrides[get_current_user] = lambda: {"user": User(id=1), "type": "maintainer"}
+    assert client.get("/ongs/1/donations/totals").status_code == 403
+
+    app.main.app.dependency_overrides[get_current_user] = lambda: {"user_id": 3, "type": "ong", "role": None}
+    assert client.get("/ongs/1/donations/totals").status_code == 403
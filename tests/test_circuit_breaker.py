@@ -0,0 +1,119 @@
+import asyncio
+
+import httpx
+import pytest
+import requests
+
+from app.pagarme.async_client import AsyncPagarMeClient
+from app.pagarme.client import PagarMeClient
+from app.pagarme.resilience import CircuitBreaker, CircuitOpenError, PagarMeResilience
+
+URL = "https://api.pagar.me/core/v5/orders/or_1"
+
+
+@pytest.fixture(autouse=True)
+def breakers(monkeypatch):
+    """Circuitos novos a cada teste, abrindo na segunda falha e meio-abrindo na hora."""
+    monkeypatch.setattr(PagarMeResilience, "_breakers", {})
+    monkeypatch.setattr(PagarMeResilience, "FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(PagarMeResilience, "RECOVERY_TIMEOUT", 0)
+    monkeypatch.setattr(PagarMeResilience, "MAX_RETRIES", 0)
+
+
+def _response(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = b"{}"
+    response.request = requests.Request("GET", URL).prepare()
+    return response
+
+
+class FakeSession:
+    """Sessão que devolve (ou levanta) os resultados informados, na ordem."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+
+    def request(self, method, url, **kwargs):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return _response(outcome)
+
+
+def test_breaker_state_machine():
+    breaker = CircuitBreaker("orders.get", failure_threshold=2, recovery_timeout=60)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.opened_at -= 60
+    breaker.before_call()  # Sondagem liberada
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # Só uma sondagem por vez
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.opened_at -= 60
+    breaker.before_call()
+    breaker.record_success()
+    assert (breaker.state, breaker.failures, breaker.probing) == (CircuitBreaker.CLOSED, 0, False)
+
+
+def _open_circuit(monkeypatch, probe_outcome):
+    session = FakeSession(500, 500, probe_outcome, 200)
+    monkeypatch.setattr(PagarMeClient, "get_session", staticmethod(lambda: session))
+    for _ in range(2):
+        PagarMeClient._send("GET", URL, "orders.get")
+    assert PagarMeResilience.get_breaker("orders.get").state == CircuitBreaker.OPEN
+
+
+@pytest.mark.parametrize("error", [requests.exceptions.InvalidHeader("bad header"),
+                                   requests.exceptions.ContentDecodingError("bad gzip"),
+                                   ValueError("unexpected")])
+def test_unexpected_error_during_probe_reopens_the_circuit(monkeypatch, error):
+    _open_circuit(monkeypatch, error)
+
+    with pytest.raises(type(error)):
+        PagarMeClient._send("GET", URL, "orders.get")
+
+    breaker = PagarMeResilience.get_breaker("orders.get")
+    assert (breaker.state, breaker.probing) == (CircuitBreaker.OPEN, False)
+    # Passado o tempo de recuperação, uma nova sondagem é liberada e fecha o circuito
+    assert PagarMeClient._send("GET", URL, "orders.get").status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_error_closes_the_circuit(monkeypatch):
+    _open_circuit(monkeypatch, 404)
+
+    assert PagarMeClient._send("GET", URL, "orders.get").status_code == 404
+    assert PagarMeResilience.get_breaker("orders.get").state == CircuitBreaker.CLOSED
+
+
+def test_async_probe_is_released_on_unexpected_error(monkeypatch):
+    outcomes = [500, 500, ValueError("unexpected"), 200]
+
+    def handler(request):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return httpx.Response(outcome, json={})
+
+    monkeypatch.setattr(AsyncPagarMeClient, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    async def scenario():
+        for _ in range(2):
+            await AsyncPagarMeClient._send("GET", URL, "orders.get")
+        with pytest.raises(ValueError):
+            await AsyncPagarMeClient._send("GET", URL, "orders.get")
+        assert PagarMeResilience.get_breaker("orders.get").probing is False
+        return await AsyncPagarMeClient._send("GET", URL, "orders.get")
+
+    assert asyncio.run(scenario()).status_code == 200
+    assert PagarMeResilience.get_breaker("orders.get").state == CircuitBreaker.CLOSED
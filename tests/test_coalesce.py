@@ -0,0 +1,95 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.pagarme.coalesce import AsyncSingleFlight, SingleFlight, request_key
+
+URL = "https://api.pagar.me/core/v5/orders/or_1"
+
+
+def test_request_key_only_shares_plain_gets():
+    assert request_key("get", URL, {"params": {"b": 1, "a": 2}}) == request_key("GET", URL, {"params": {"a": 2, "b": 1}})
+    assert request_key("GET", URL, {"params": {"a": 1}}) != request_key("GET", URL, {"params": {"a": "1"}})
+    assert request_key("POST", URL, {"json": {}}) is None
+    assert request_key("GET", URL, {"headers": {"Idempotency-Key": "k"}}) is None
+
+
+def test_concurrent_calls_share_one_response():
+    flight = SingleFlight(ttl=0)
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def call():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return SimpleNamespace(status_code=200)
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", call))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    started.wait(2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len({id(response) for response, _ in results}) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    # Sem ttl nada fica guardado depois da chamada
+    assert flight.do("key", call)[1] is False
+
+
+def test_errors_are_shared_but_not_remembered():
+    flight = SingleFlight(ttl=60)
+
+    def fail():
+        raise ConnectionError("reset")
+
+    with pytest.raises(ConnectionError):
+        flight.do("key", fail)
+    response, shared = flight.do("key", lambda: SimpleNamespace(status_code=200))
+    assert (response.status_code, shared) == (200, False)
+
+
+def test_ttl_serves_recent_successes_only():
+    flight = SingleFlight(ttl=60)
+
+    flight.do("ok", lambda: SimpleNamespace(status_code=200))
+    flight.do("missing", lambda: SimpleNamespace(status_code=404))
+
+    assert flight.do("ok", lambda: SimpleNamespace(status_code=500))[1] is True
+    assert flight.do("missing", lambda: SimpleNamespace(status_code=200))[1] is False
+
+
+def test_async_followers_share_the_leader_call():
+    flight = AsyncSingleFlight(ttl=0)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(status_code=200)
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("key", call) for _ in range(4)))
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [shared for _, shared in results] == [False, True, True, True]
+    assert flight._inflight == {}
+
+
+def test_async_error_reaches_every_follower():
+    flight = AsyncSingleFlight(ttl=0)
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("reset")
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, ConnectionError) for result in asyncio.run(scenario()))
@@ -0,0 +1,66 @@
+import pytest
+
+from app.models.maintainer import Maintainer
+from app.models.pagarme_customer import PagarMeCustomer
+from app.pagarme.customers import PagarMeCustomerAPI
+from app.services.customer_service import CustomerService
+
+
+@pytest.fixture
+def maintainer(seed, db):
+    """Mantenedor 1 ainda sem cliente na Pagar.me."""
+    maintainer = db.get(Maintainer, 1)
+    maintainer.client_id = None
+    db.commit()
+    return maintainer
+
+
+@pytest.fixture
+def created(monkeypatch):
+    calls = []
+
+    def create_customer(customer_data):
+        calls.append(customer_data)
+        return {"id": f"cus_{len(calls) + 1}"}
+
+    monkeypatch.setattr(PagarMeCustomerAPI, "create_customer", staticmethod(create_customer))
+    return calls
+
+
+def test_customer_of_the_maintainer_is_reused(seed, db, created):
+    assert CustomerService.resolve_customer_id(db, db.get(Maintainer, 1)) == "cus_1"
+    assert created == []
+
+
+def test_customer_indexed_by_document_is_reused(maintainer, db, created):
+    db.add(PagarMeCustomer(document="12345678909", customer_id="cus_antigo"))
+    db.commit()
+
+    assert CustomerService.resolve_customer_id(db, maintainer) == "cus_antigo"
+    assert created == []
+    db.commit()
+    db.expire_all()
+    assert db.get(Maintainer, 1).client_id == "cus_antigo"
+
+
+def test_customer_is_created_once_and_indexed(maintainer, db, created):
+    customer_id = CustomerService.resolve_customer_id(db, maintainer)
+    db.commit()
+
+    assert customer_id == "cus_2"
+    assert created[0]["document"] == "12345678909"
+    assert created[0]["phones"]["mobile_phone"] == {"country_code": "+55", "area_code": "16", "number": "999999999"}
+    assert db.query(PagarMeCustomer).one().customer_id == "cus_2"
+    assert CustomerService.resolve_customer_id(db, maintainer) == "cus_2"
+    assert len(created) == 1
+
+
+def test_concurrent_registration_keeps_the_first_customer(maintainer, db):
+    db.add(PagarMeCustomer(document="12345678909", customer_id="cus_vencedor"))
+    db.commit()
+
+    assert CustomerService.remember(db, maintainer, "cus_perdedor") == "cus_vencedor"
+    db.commit()
+    db.expire_all()
+    assert db.get(Maintainer, 1).client_id == "cus_vencedor"
+    assert db.query(PagarMeCustomer).count() == 1
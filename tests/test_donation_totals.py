@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.campaign import Campaign
+from app.models.donation_total import DonationTotal
+from app.models.maintainer import Maintainer
+from app.models.transaction import PaymentMethod, Transaction, TransactionStatus
+from app.models.user import User
+from app.services.donation_totals_service import DonationTotalsService
+
+PENDING, PAID, CANCELED = TransactionStatus.PENDING, TransactionStatus.PAID, TransactionStatus.CANCELED
+
+
+@pytest.fixture
+def donations(seed, db):
+    """Cinco doações pendentes: três do mantenedor 1 (duas na campanha 1) e duas do mantenedor 2."""
+    db.add(User(id=3, username="outro", user_type_id=1, name="Outro"))
+    db.add(Campaign(id=1, ong_id=1, title="Inverno", goal=1000))
+    db.flush()
+    db.add(Maintainer(id=2, user_id=3, address_id=1))
+    start = datetime(2026, 10, 1)
+    for transaction_id, maintainer_id, campaign_id, cents in [(1, 1, 1, 1000), (2, 1, 1, 2500), (3, 1, None, 700),
+                                                              (4, 2, 1, 5000), (5, 2, None, 300)]:
+        db.add(Transaction(id=transaction_id, ong_id=1, maintainer_id=maintainer_id, campaign_id=campaign_id,
+                           amount=cents / 100, commission_amount=0, amount_cents=cents, commission_cents=0,
+                           status=PENDING, payment_method=PaymentMethod.PIX,
+                           created_at=start + timedelta(days=transaction_id)))
+    db.commit()
+
+
+def _transition(db, transaction_id, new_status):
+    transaction = db.get(Transaction, transaction_id)
+    old_status, transaction.status = transaction.status, new_status
+    DonationTotalsService.apply_transition(db, transaction, old_status, new_status)
+    db.commit()
+
+
+def _snapshot(db):
+    db.expire_all()
+    return {(total.scope, total.scope_id): (total.raised_cents, total.donation_count, total.donor_count,
+                                            total.last_donation_at)
+            for total in db.query(DonationTotal)}
+
+
+def test_incremental_totals_match_a_rebuild(donations, db):
+    for transaction_id in (1, 2, 3, 4, 5):
+        _transition(db, transaction_id, PAID)
+    _transition(db, 4, CANCELED)
+    _transition(db, 2, CANCELED)
+    _transition(db, 2, CANCELED)  # Repetição não altera nada
+
+    incremental = _snapshot(db)
+    DonationTotalsService.rebuild(db)
+
+    assert incremental == _snapshot(db)
+    assert incremental[("ong", 1)] == (2000, 3, 2, datetime(2026, 10, 6))
+    assert incremental[("campaign", 1)] == (1000, 1, 1, datetime(2026, 10, 2))
+
+
+def test_refresh_recomputes_only_the_given_scopes(donations, db):
+    for transaction_id in (1, 4):
+        _transition(db, transaction_id, PAID)
+    db.query(DonationTotal).update({DonationTotal.raised_cents: 0})
+    db.commit()
+
+    DonationTotalsService.refresh(db, [("campaign", 1)])
+    db.commit()
+
+    totals = _snapshot(db)
+    assert totals[("campaign", 1)][:3] == (6000, 2, 2)
+    assert totals[("ong", 1)][0] == 0
+
+
+def test_total_row_is_locked_before_checking_the_donor(donations, db, monkeypatch):
+    calls = []
+    lock, has_other_paid = DonationTotalsService._lock, DonationTotalsService._has_other_paid
+
+    def tracked_lock(db, scope, scope_id, create):
+        calls.append(("lock", scope))
+        return lock(db, scope, scope_id, create)
+
+    def tracked_check(db, transaction, scope, scope_id):
+        calls.append(("check", scope))
+        return has_other_paid(db, transaction, scope, scope_id)
+
+    monkeypatch.setattr(DonationTotalsService, "_lock", staticmethod(tracked_lock))
+    monkeypatch.setattr(DonationTotalsService, "_has_other_paid", staticmethod(tracked_check))
+
+    _transition(db, 1, PAID)
+    _transition(db, 1, CANCELED)
+
+    assert calls == [("lock", "ong"), ("check", "ong"), ("lock", "campaign"), ("check", "campaign")] * 2
+
+
+def test_leaving_paid_without_a_total_row_is_ignored(donations, db):
+    transaction = db.get(Transaction, 1)
+    DonationTotalsService.apply_transition(db, transaction, PAID, CANCELED)
+    db.commit()
+
+    assert _snapshot(db) == {}
@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.models.idempotency_key import PaymentIdempotencyKey
+from app.models.payment_outbox import PaymentOutbox
+from app.models.transaction import Transaction
+from app.schemas.payment import PaymentRequest
+from app.services.idempotency_service import IdempotencyService
+from app.services.payment_outbox_service import PaymentOutboxService
+
+PIX = {"amount": "15.00", "payment_method": "pix", "ong_id": 1}
+
+
+@pytest.fixture(autouse=True)
+def no_dispatch(monkeypatch):
+    monkeypatch.setattr(PaymentOutboxService, "dispatch", staticmethod(lambda transaction_id: None))
+
+
+def test_repeated_request_replays_the_payment(seed, client, db):
+    first = client.post("/payments/", json=PIX, headers={"Idempotency-Key": "abc"})
+    second = client.post("/payments/", json=PIX, headers={"Idempotency-Key": "abc"})
+
+    assert (first.status_code, second.status_code) == (202, 202)
+    assert second.json()["transaction_id"] == first.json()["transaction_id"]
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert db.query(Transaction).count() == 1
+    outbox = db.query(PaymentOutbox).one()
+    assert outbox.idempotency_key == "payment-1-abc"
+
+
+def test_key_reused_with_another_body_is_rejected(seed, client, db):
+    client.post("/payments/", json=PIX, headers={"Idempotency-Key": "abc"})
+    response = client.post("/payments/", json={**PIX, "amount": "16.00"}, headers={"Idempotency-Key": "abc"})
+
+    assert response.status_code == 422
+    assert db.query(Transaction).count() == 1
+
+
+def test_failed_request_releases_the_key(seed, client, db):
+    failed = client.post("/payments/", json={**PIX, "ong_id": 99}, headers={"Idempotency-Key": "abc"})
+    retried = client.post("/payments/", json=PIX, headers={"Idempotency-Key": "abc"})
+
+    assert failed.status_code == 404
+    assert retried.status_code == 202
+    assert db.query(PaymentIdempotencyKey).one().status == "completed"
+
+
+def test_concurrent_retry_waits_off_the_event_loop(seed, client, db, monkeypatch):
+    now = datetime.utcnow()
+    db.add(PaymentIdempotencyKey(user_id=1, key="abc", fingerprint=IdempotencyService.fingerprint(PaymentRequest(**PIX)),
+                                 status="in_progress", created_at=now, expires_at=now + IdempotencyService.TTL))
+    db.commit()
+    monkeypatch.setattr(IdempotencyService, "WAIT_TIMEOUT", 0.05)
+    monkeypatch.setattr(IdempotencyService, "POLL_INTERVAL", 0.01)
+    on_loop = []
+    claim = IdempotencyService._claim
+
+    def tracked_claim(*args):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return claim(*args)
+
+    monkeypatch.setattr(IdempotencyService, "_claim", staticmethod(tracked_claim))
+
+    response = client.post("/payments/", json=PIX, headers={"Idempotency-Key": "abc"})
+
+    assert response.status_code == 409
+    assert len(on_loop) > 1 and not any(on_loop)
@@ -0,0 +1,46 @@
+import threading
+
+import pytest
+
+from app.pagarme.client import PagarMeClient
+from app.pagarme.customers import PagarMeCustomerAPI
+from app.pagarme.orders import PagarMeOrdersAPI
+
+
+@pytest.fixture
+def fresh_session(monkeypatch):
+    monkeypatch.setattr(PagarMeClient, "_session", None)
+    yield
+    PagarMeClient.close()
+
+
+def test_one_pooled_session_per_process(fresh_session):
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(PagarMeClient.get_session())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(session) for session in sessions}) == 1
+    session = sessions[0]
+    adapter = session.get_adapter(PagarMeClient.BASE_URL)
+    assert adapter._pool_maxsize == PagarMeClient.POOL_MAXSIZE
+    assert session.headers["Authorization"].startswith("Basic ")
+    assert session.headers["Connection"] == "keep-alive"
+
+    PagarMeClient.close()
+    assert PagarMeClient.get_session() is not session
+
+
+def test_resource_classes_share_the_session(pagarme_session):
+    pagarme_session.responses = [(200, {"id": "or_1"}), (200, {"id": "cus_1"})]
+
+    assert PagarMeOrdersAPI.create_order({"items": []}, idempotency_key="payment-1")["id"] == "or_1"
+    assert PagarMeCustomerAPI.get_customer("cus_1")["id"] == "cus_1"
+
+    (create_method, create_url, create_kwargs), (get_method, get_url, get_kwargs) = pagarme_session.calls
+    assert (create_method, create_url) == ("POST", f"{PagarMeClient.BASE_URL}/orders")
+    assert create_kwargs["headers"]["Idempotency-Key"] == "payment-1"
+    assert create_kwargs["timeout"] == (PagarMeClient.CONNECT_TIMEOUT, PagarMeClient.READ_TIMEOUT)
+    assert (get_method, get_url) == ("GET", f"{PagarMeClient.BASE_URL}/customers/cus_1")
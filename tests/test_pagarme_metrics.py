@@ -0,0 +1,50 @@
+import pytest
+
+from app.pagarme.metrics import PagarMeMetrics
+from app.pagarme.orders import PagarMeOrdersAPI
+
+
+@pytest.fixture(autouse=True)
+def metrics(monkeypatch):
+    monkeypatch.setattr(PagarMeMetrics, "_latency", {})
+    monkeypatch.setattr(PagarMeMetrics, "_statuses", {})
+    monkeypatch.setattr(PagarMeMetrics, "_bytes", {})
+
+
+def test_render_exports_latency_statuses_and_bytes():
+    PagarMeMetrics.observe("orders.create", "200", 0.04, bytes_out=120, bytes_in=800)
+    PagarMeMetrics.observe("orders.create", "503", 0.3, bytes_out=120, attempt=1)
+
+    text = PagarMeMetrics.render()
+
+    labels = 'resource="orders",operation="orders.create"'
+    assert f'pagarme_request_duration_seconds_bucket{{{labels},le="0.025"}} 0' in text
+    assert f'pagarme_request_duration_seconds_bucket{{{labels},le="0.05"}} 1' in text
+    assert f'pagarme_request_duration_seconds_bucket{{{labels},le="0.5"}} 2' in text
+    assert f'pagarme_request_duration_seconds_count{{{labels}}} 2' in text
+    assert f'pagarme_requests_total{{{labels},status="503"}} 1' in text
+    assert f'pagarme_bytes_total{{{labels},direction="out"}} 240' in text
+    assert f'pagarme_bytes_total{{{labels},direction="in"}} 800' in text
+
+
+def test_request_summary_collects_the_calls_of_the_request():
+    summary, token = PagarMeMetrics.start_summary()
+    try:
+        PagarMeMetrics.observe("orders.create", "503", 0.1, attempt=0)
+        PagarMeMetrics.observe("orders.create", "200", 0.05, attempt=1)
+    finally:
+        PagarMeMetrics.end_summary(token)
+    PagarMeMetrics.observe("orders.get", "200", 0.01)
+
+    assert list(summary.operations) == ["orders.create"]
+    assert summary.operations["orders.create"][:2] == [2, 1]
+    assert summary.server_timing() == 'pagarme;dur=150.0, pagarme-orders-create;dur=150.0;desc="2x"'
+
+
+def test_gateway_calls_are_metered_and_exposed(pagarme_session, client):
+    pagarme_session.responses = [(200, {"id": "or_1"})]
+    PagarMeOrdersAPI.create_order({"items": []})
+
+    text = client.get("/metrics").text
+
+    assert 'pagarme_requests_total{resource="orders",operation="orders.create",status="200"} 1' in text
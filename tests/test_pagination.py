@@ -0,0 +1,60 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from app.pagarme.client import PagarMeClient
+from app.pagarme.pagination import iter_pages
+
+URL = f"{PagarMeClient.BASE_URL}/orders"
+
+
+def _page(*ids, next_page=None):
+    paging = {} if next_page is None else {"next": next_page}
+    return 200, {"data": [{"id": item} for item in ids], "paging": paging}
+
+
+def test_walks_every_page_with_the_filters(pagarme_session):
+    pagarme_session.responses = [_page("or_1", "or_2", next_page="p2"), _page("or_3", next_page=False)]
+
+    items = list(iter_pages(URL, "orders", params={"status": "paid"}, page_size=2,
+                            created_since=datetime(2026, 10, 1), created_until="2026-10-18"))
+
+    assert [item["id"] for item in items] == ["or_1", "or_2", "or_3"]
+    assert [kwargs["params"] for _, _, kwargs in pagarme_session.calls] == [
+        {"status": "paid", "size": 2, "created_since": "2026-10-01T00:00:00", "created_until": "2026-10-18",
+         "page": page} for page in (1, 2)]
+
+
+def test_without_paging_stops_on_a_short_page(pagarme_session):
+    pagarme_session.responses = [(200, {"data": [{"id": "or_1"}, {"id": "or_2"}]}), (200, {"data": [{"id": "or_3"}]})]
+
+    assert len(list(iter_pages(URL, "orders", params={"page": 4}, page_size=2))) == 3
+    assert [kwargs["params"]["page"] for _, _, kwargs in pagarme_session.calls] == [4, 5]
+
+
+def test_empty_page_ends_the_walk(pagarme_session):
+    pagarme_session.responses = [_page(next_page="p2")]
+
+    assert list(iter_pages(URL, "orders")) == []
+    assert len(pagarme_session.calls) == 1
+
+
+def test_next_page_is_prefetched_while_the_current_one_is_consumed(pagarme_session):
+    pagarme_session.responses = [_page("or_1", next_page="p2"), _page("or_2")]
+    pages = iter_pages(URL, "orders")
+
+    assert next(pages)["id"] == "or_1"
+    # A segunda página é pedida sem que o chamador avance o iterador
+    deadline = time.monotonic() + 2
+    while len(pagarme_session.calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [kwargs["params"]["page"] for _, _, kwargs in pagarme_session.calls] == [1, 2]
+    assert [item["id"] for item in pages] == ["or_2"]
+
+
+def test_http_error_is_raised(pagarme_session):
+    pagarme_session.responses = [(400, {"message": "invalid size"})]
+
+    with pytest.raises(Exception, match="Failed to list Pagar.me orders"):
+        list(iter_pages(URL, "orders"))
@@ -0,0 +1,46 @@
+import pytest
+
+from app.models.payment_outbox import PaymentOutbox
+from app.models.transaction import Transaction
+from app.pagarme.cards import AsyncPagarMeCardsAPI
+from app.services.payment_outbox_service import PaymentOutboxService
+
+CARD = {"number": "4111111111111111", "holder_name": "Ana Souza", "expiration_date": "12/30", "cvv": "123"}
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    ids = []
+    monkeypatch.setattr(PaymentOutboxService, "dispatch", staticmethod(ids.append))
+    return ids
+
+
+def test_batch_reports_one_result_per_item(seed, client, db, dispatched, monkeypatch):
+    async def create_card(card_data):
+        raise Exception("Card expired")
+
+    monkeypatch.setattr(AsyncPagarMeCardsAPI, "create_card", staticmethod(create_card))
+    items = [
+        {"amount": "10.00", "payment_method": "pix", "ong_id": 1},
+        {"amount": "12.50", "payment_method": "boleto", "ong_id": 1, "campaign_id": 7},
+        {"amount": "30.00", "payment_method": "credit_card", "ong_id": 1},
+        {"amount": "20.00", "payment_method": "credit_card", "ong_id": 1, "card_details": CARD},
+        {"amount": "5.00", "payment_method": "pix", "ong_id": 1},
+    ]
+
+    body = client.post("/payments/batch", json={"items": items}).json()
+
+    assert (body["queued"], body["failed"]) == (2, 3)
+    assert [item["status_code"] for item in body["items"]] == [202, 404, 400, 400, 202]
+    assert body["items"][3]["error"] == "Card expired"
+    queued = [item["payment"]["transaction_id"] for item in body["items"] if item["payment"]]
+    assert dispatched == queued
+    assert sorted(row.transaction_id for row in db.query(PaymentOutbox)) == sorted(queued)
+    assert [db.get(Transaction, transaction_id).amount_cents for transaction_id in queued] == [1000, 500]
+
+
+@pytest.mark.parametrize("count", [0, 101])
+def test_batch_size_is_limited(seed, client, count):
+    items = [{"amount": "10.00", "payment_method": "pix", "ong_id": 1}] * count
+
+    assert client.post("/payments/batch", json={"items": items}).status_code == 422
@@ -0,0 +1,105 @@
+from datetime import datetime
+
+import pytest
+
+from app.models.maintainer import Maintainer
+from app.models.pagarme_customer import PagarMeCustomer
+from app.models.payment_outbox import PaymentOutbox
+from app.models.transaction import PaymentMethod, Transaction, TransactionStatus
+from app.pagarme.customers import PagarMeCustomerAPI
+from app.pagarme.orders import PagarMeOrdersAPI
+from app.services.payment_outbox_service import PaymentOutboxService
+from app.services.payment_service import PaymentService
+
+
+@pytest.fixture
+def queued(seed, db):
+    """Doação PIX de R$ 10,00 gravada como PENDING e no outbox."""
+    db.add(Transaction(id=1, ong_id=1, maintainer_id=1, amount=10, commission_amount=1, amount_cents=1000,
+                       commission_cents=100, status=TransactionStatus.PENDING, payment_method=PaymentMethod.PIX,
+                       created_at=datetime(2026, 10, 1)))
+    db.flush()
+    db.add(PaymentOutbox(transaction_id=1, idempotency_key="payment-key-1"))
+    db.commit()
+    return 1
+
+
+@pytest.fixture
+def orders(monkeypatch):
+    """Substitui a criação de pedidos na Pagar.me e guarda o que foi enviado."""
+    sent = []
+
+    def create_order(order_data, idempotency_key=None):
+        sent.append((order_data, idempotency_key))
+        return {"id": "or_1", "charges": [{"id": "ch_1", "status": "pending", "last_transaction": {
+            "qr_code_url": "https://pix/qr", "qr_code": "000201"}}]}
+
+    monkeypatch.setattr(PagarMeOrdersAPI, "create_order", staticmethod(create_order))
+    return sent
+
+
+def _outbox(db, transaction_id):
+    db.expire_all()
+    return db.query(PaymentOutbox).filter_by(transaction_id=transaction_id).one()
+
+
+def test_claim_is_taken_by_a_single_worker(queued, session_factory):
+    first, second = session_factory(), session_factory()
+    try:
+        assert PaymentOutboxService._claim(first, queued).attempts == 1
+        first.commit()
+        assert PaymentOutboxService._claim(second, queued) is None
+    finally:
+        first.close()
+        second.close()
+
+
+def test_process_creates_order_with_outbox_key(queued, orders, db):
+    PaymentOutboxService.process(queued)
+
+    outbox = _outbox(db, queued)
+    assert outbox.status == "done"
+    assert orders[0][1] == "payment-key-1"
+    assert orders[0][0]["payments"][0]["split"][0]["amount"] == 900
+    transaction = db.get(Transaction, queued)
+    assert (transaction.order_id, transaction.pix_code) == ("or_1", "000201")
+    db.commit()
+    # Já processado: nova reserva não acha nada e o pedido não é recriado
+    PaymentOutboxService.process(queued)
+    assert len(orders) == 1
+
+
+def test_failure_is_rescheduled_then_marked_failed(queued, db, monkeypatch):
+    def create_order(order_data, idempotency_key=None):
+        raise Exception("gateway down")
+
+    monkeypatch.setattr(PagarMeOrdersAPI, "create_order", staticmethod(create_order))
+    monkeypatch.setattr(PaymentOutboxService, "MAX_ATTEMPTS", 2)
+
+    PaymentOutboxService.process(queued)
+    outbox = _outbox(db, queued)
+    assert (outbox.status, outbox.attempts, outbox.last_error) == ("pending", 1, "gateway down")
+    assert outbox.available_at > datetime.utcnow()
+
+    outbox.available_at = datetime.utcnow()
+    db.commit()
+    PaymentOutboxService.process(queued)
+    assert _outbox(db, queued).status == "failed"
+    assert db.get(Transaction, queued).status == TransactionStatus.FAILED
+
+
+def test_customer_is_created_with_no_transaction_open(queued, orders, db, monkeypatch):
+    db.query(Maintainer).filter_by(id=1).update({Maintainer.client_id: None})
+    db.commit()
+
+    def create_customer(customer_data):
+        assert not db.in_transaction()
+        return {"id": "cus_novo"}
+
+    monkeypatch.setattr(PagarMeCustomerAPI, "create_customer", staticmethod(create_customer))
+
+    PaymentService.process_payment(db, queued)
+
+    assert orders[0][0]["customer_id"] == "cus_novo"
+    assert db.get(Maintainer, 1).client_id == "cus_novo"
+    assert db.query(PagarMeCustomer).filter_by(document="12345678909").one().customer_id == "cus_novo"
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.models.attendee import Attendee
+from app.models.campaign import Campaign
+from app.models.ong import ONG
+from app.models.project import Project, ProjectAttendee
+from app.services.payment_service import PaymentService
+
+
+@pytest.fixture
+def destinations(seed, db):
+    """Campanha e projetos da ONG 1 (o participante 1 só no projeto 1), e a ONG 2 com uma campanha própria."""
+    db.add(ONG(id=2, user_id=2, address_id=1))
+    db.add_all([
+        Campaign(id=1, ong_id=1, title="Inverno", goal=1000),
+        Campaign(id=2, ong_id=2, title="Outra ONG", goal=1000),
+        Project(id=1, ong_id=1, address_id=1, title="Reforço", target_audience="people"),
+        Project(id=2, ong_id=1, address_id=1, title="Abrigo", target_audience="animals"),
+        Attendee(id=1, name="Participante"),
+    ])
+    db.flush()
+    db.add(ProjectAttendee(project_id=1, attendee_id=1))
+    db.commit()
+
+
+@pytest.fixture
+def selects(db):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(db.bind, "before_cursor_execute", record)
+    yield statements
+    event.remove(db.bind, "before_cursor_execute", record)
+
+
+def _payment(**destinations):
+    return SimpleNamespace(**{"ong_id": 1, "campaign_id": None, "base_id": None, "project_id": None,
+                              "attendee_id": None, **destinations})
+
+
+def test_payment_is_validated_with_one_query(destinations, db, selects):
+    context = PaymentService._validate_payment(db, 1, _payment(campaign_id=1, project_id=1, attendee_id=1))
+
+    assert (context.maintainer.id, context.ong.id, context.campaign.id, context.project.id,
+            context.attendee.id) == (1, 1, 1, 1, 1)
+    assert context.maintainer.user.document == "12345678909"
+    assert len(selects) == 1
+
+
+@pytest.mark.parametrize("targets,status,detail", [
+    ({"ong_id": 9}, 404, "ONG not found"),
+    ({"campaign_id": 2}, 404, "Campaign not found or not associated with ONG"),
+    ({"project_id": 2, "attendee_id": 1}, 404, "Attendee not found or not associated with project"),
+    ({"attendee_id": 1}, 400, "Project ID is required when specifying an attendee"),
+])
+def test_invalid_destinations_are_rejected(destinations, db, targets, status, detail):
+    with pytest.raises(HTTPException) as error:
+        PaymentService._validate_payment(db, 1, _payment(**targets))
+
+    assert (error.value.status_code, error.value.detail) == (status, detail)
+
+
+def test_only_maintainers_can_pay(destinations, db):
+    with pytest.raises(HTTPException) as error:
+        PaymentService._validate_payment(db, 2, _payment())
+
+    assert error.value.status_code == 403
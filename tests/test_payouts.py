@@ -0,0 +1,102 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.models.ong import ONG
+from app.models.payout import Payout, PayoutBatch
+from app.models.transaction import PaymentMethod, Transaction, TransactionStatus
+from app.pagarme.balance import PagarMeBalanceAPI
+from app.pagarme.withdrawals import PagarMeWithdrawalsAPI
+from app.services.payout_service import PayoutService
+
+PERIOD_END = date(2026, 10, 15)
+
+
+@pytest.fixture
+def paid(seed, db):
+    """ONG 1 com duas doações pagas no ciclo e uma depois do corte; ONG 2 abaixo do mínimo."""
+    db.add(ONG(id=2, user_id=2, address_id=1))
+    for transaction_id, ong_id, cents, commission, created_at in [
+            (1, 1, 10000, 400, datetime(2026, 10, 1)), (2, 1, 5000, 200, datetime(2026, 10, 10)),
+            (3, 1, 7000, 280, datetime(2026, 10, 16)), (4, 2, 50, 2, datetime(2026, 10, 2))]:
+        db.add(Transaction(id=transaction_id, ong_id=ong_id, maintainer_id=1, amount=cents / 100,
+                           commission_amount=commission / 100, amount_cents=cents, commission_cents=commission,
+                           status=TransactionStatus.PAID, payment_method=PaymentMethod.PIX, created_at=created_at))
+    db.commit()
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    fake = {"withdrawals": [], "failures": 0, "available": 10 ** 6}
+
+    def get_balance(recipient_id):
+        return {"available_amount": fake["available"]}
+
+    def create_withdrawal(recipient_id, data, idempotency_key=None):
+        fake["withdrawals"].append((recipient_id, data["amount"], idempotency_key))
+        if fake["failures"]:
+            fake["failures"] -= 1
+            raise Exception("503 Service Unavailable")
+        return {"id": f"wd_{len(fake['withdrawals'])}"}
+
+    monkeypatch.setattr(PagarMeBalanceAPI, "get_balance", staticmethod(get_balance))
+    monkeypatch.setattr(PagarMeWithdrawalsAPI, "create_withdrawal", staticmethod(create_withdrawal))
+    monkeypatch.setattr(PayoutService, "METHOD", "withdrawal")
+    return fake
+
+
+def test_cycle_pays_each_ong_once(paid, gateway, db):
+    batch = PayoutService.run(db, PERIOD_END)
+
+    assert (batch.status, batch.payout_count, batch.total_cents) == ("done", 1, 14400)
+    key = f"payout-{batch.id}-1"
+    assert gateway["withdrawals"] == [("re_ong_1", 14400, key)]
+    payout = db.query(Payout).one()
+    assert (payout.transaction_count, payout.gateway_id, payout.idempotency_key) == (2, "wd_1", key)
+    assert [t.payout_id for t in db.query(Transaction).order_by(Transaction.id)] == [payout.id, payout.id, None, None]
+
+    PayoutService.run(db, PERIOD_END)
+    assert len(gateway["withdrawals"]) == 1
+    assert db.query(PayoutBatch).count() == db.query(Payout).count() == 1
+
+
+def test_failed_payout_is_retried_with_the_same_key(paid, gateway, db):
+    gateway["failures"] = 1
+
+    batch = PayoutService.run(db, PERIOD_END)
+    assert batch.status == "partial"
+    assert db.query(Payout).one().status == "failed"
+
+    batch = PayoutService.run(db, PERIOD_END)
+    assert batch.status == "done"
+    payout = db.query(Payout).one()
+    assert (payout.status, payout.attempts, payout.error) == ("submitted", 2, None)
+    assert [key for _, _, key in gateway["withdrawals"]] == [payout.idempotency_key] * 2
+
+
+def test_payout_waits_for_available_balance(paid, gateway, db):
+    gateway["available"] = 1000
+
+    batch = PayoutService.run(db, PERIOD_END)
+
+    assert batch.status == "partial"
+    assert db.query(Payout).one().status == "insufficient_funds"
+    assert gateway["withdrawals"] == []
+
+
+def test_next_cycle_retries_payouts_left_open_by_an_earlier_one(paid, gateway, db):
+    gateway["available"] = 1000
+    first = PayoutService.run(db, PERIOD_END)
+    assert first.status == "partial"
+
+    gateway["available"] = 10 ** 6
+    second = PayoutService.run(db, date(2026, 10, 20))
+
+    db.expire_all()
+    payouts = {payout.batch_id: payout for payout in db.query(Payout)}
+    assert (payouts[first.id].status, payouts[first.id].amount_cents) == ("submitted", 14400)
+    assert (payouts[second.id].status, payouts[second.id].amount_cents) == ("submitted", 6720)
+    assert [key for _, _, key in gateway["withdrawals"]] == [f"payout-{first.id}-1", f"payout-{second.id}-1"]
+    assert db.get(PayoutBatch, first.id).status == "done"
+    assert db.get(PayoutBatch, first.id).total_cents == 14400
+    assert second.status == "done"
@@ -0,0 +1,70 @@
+import asyncio
+import sqlite3
+import threading
+
+from app.pagarme.rate_limit import PagarMeRateLimiter, _SqliteStore
+
+
+def test_buckets_are_shared_through_the_file(tmp_path):
+    path = str(tmp_path / "buckets.db")
+    first, second = _SqliteStore(path), _SqliteStore(path)
+
+    assert first.take("write", rate=1, burst=2, floor=0) == 0
+    assert second.take("write", rate=1, burst=2, floor=0) == 0
+    assert first.take("write", rate=1, burst=2, floor=0) > 0
+
+
+def test_locked_file_falls_back_to_the_local_bucket(tmp_path):
+    path = str(tmp_path / "buckets.db")
+    store = _SqliteStore(path, timeout=0.01)
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        assert store.take("write", rate=1, burst=2, floor=0) == 0
+        assert store.take("write", rate=1, burst=2, floor=0) == 0
+        assert store.take("write", rate=1, burst=2, floor=0) > 0
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+
+    # Destravado, volta a usar o arquivo, que não foi consumido durante o bloqueio
+    assert store.take("write", rate=1, burst=2, floor=0) == 0
+    assert not store._connect().in_transaction
+
+
+def test_background_calls_keep_the_reserve(monkeypatch):
+    monkeypatch.setattr(PagarMeRateLimiter, "ENABLED", True)
+    monkeypatch.setattr(PagarMeRateLimiter, "_store", None)
+    monkeypatch.setattr(PagarMeRateLimiter, "STORE_PATH", None)
+    monkeypatch.setattr(PagarMeRateLimiter, "WRITE_BURST", 10)
+    monkeypatch.setattr(PagarMeRateLimiter, "WRITE_RATE", 0.001)
+    monkeypatch.setattr(PagarMeRateLimiter, "MAX_WAIT", 10 ** 6)
+
+    with PagarMeRateLimiter.background():
+        granted = 0
+        while PagarMeRateLimiter.acquire("POST") is None:
+            granted += 1
+    assert granted == 7
+    assert PagarMeRateLimiter.acquire("POST") is None
+
+
+def test_async_wait_takes_from_the_file_off_the_event_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(PagarMeRateLimiter, "ENABLED", True)
+    monkeypatch.setattr(PagarMeRateLimiter, "_store", _SqliteStore(str(tmp_path / "buckets.db")))
+    threads = []
+    take = _SqliteStore.take
+
+    def tracked_take(self, *args):
+        threads.append(threading.get_ident())
+        return take(self, *args)
+
+    monkeypatch.setattr(_SqliteStore, "take", tracked_take)
+
+    async def scenario():
+        with PagarMeRateLimiter.background():
+            waited = await PagarMeRateLimiter.wait_async("POST")
+        return waited, threading.get_ident()
+
+    waited, loop_thread = asyncio.run(scenario())
+    assert waited == 0
+    assert threads and loop_thread not in threads
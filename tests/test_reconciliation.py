@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.reconciliation import ReconciliationDiscrepancy
+from app.models.sync_state import SyncState
+from app.models.transaction import PaymentMethod, Transaction, TransactionStatus
+from app.pagarme.bulk import FetchResult
+from app.pagarme.orders import PagarMeOrdersAPI
+from app.services.reconciliation_service import ReconciliationService
+
+
+def _order(order_id, status, transaction_id, amount=1000):
+    return {"id": order_id, "status": status, "amount": amount, "metadata": {"transaction_id": str(transaction_id)},
+            "charges": [{"id": f"ch_{order_id}", "last_transaction": {}}]}
+
+
+@pytest.fixture
+def pending(seed, db):
+    """Duas transações pendentes antigas (fora da janela) e uma recente."""
+    now = datetime.utcnow()
+    for transaction_id, created_at in [(1, now - timedelta(days=30)), (2, now - timedelta(days=30)), (3, now)]:
+        db.add(Transaction(id=transaction_id, ong_id=1, maintainer_id=1, amount=10, commission_amount=0,
+                           amount_cents=1000, commission_cents=0, status=TransactionStatus.PENDING,
+                           payment_method=PaymentMethod.BOLETO, order_id=f"or_{transaction_id}",
+                           charge_id=f"ch_or_{transaction_id}", created_at=created_at))
+    db.add(SyncState(resource="orders", watermark=now - timedelta(days=1)))
+    db.commit()
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    def iter_orders(params=None, created_since=None, created_until=None, page_size=100):
+        return iter([_order("or_3", "paid", 3, amount=1200)])
+
+    def get_many_orders(order_ids, concurrency=None):
+        for order_id in order_ids:
+            if order_id == "or_2":
+                yield FetchResult(order_id, None, "503 Service Unavailable")
+            else:
+                yield FetchResult(order_id, _order(order_id, "canceled", 1), None)
+
+    monkeypatch.setattr(PagarMeOrdersAPI, "iter_orders", staticmethod(iter_orders))
+    monkeypatch.setattr(PagarMeOrdersAPI, "get_many_orders", staticmethod(get_many_orders))
+
+
+def _discrepancies(db, run):
+    return {(row.transaction_id, row.kind): row for row in
+            db.query(ReconciliationDiscrepancy).filter_by(run_id=run.id)}
+
+
+def test_reconciliation_corrects_status_and_records_discrepancies(pending, gateway, db):
+    run = ReconciliationService.run(db)
+
+    assert run.status == "done"
+    db.expire_all()
+    assert db.get(Transaction, 1).status == TransactionStatus.CANCELED
+    assert db.get(Transaction, 3).status == TransactionStatus.PAID
+    found = _discrepancies(db, run)
+    assert found[(3, "amount")].corrected is False
+    assert found[(3, "status")].remote_value == "paid"
+
+
+def test_orders_that_could_not_be_fetched_are_recorded(pending, gateway, db):
+    run = ReconciliationService.run(db)
+
+    failed = _discrepancies(db, run)[(2, "fetch_failed")]
+    assert (failed.order_id, failed.remote_value, failed.corrected) == ("or_2", "503 Service Unavailable", False)
+    assert db.get(Transaction, 2).status == TransactionStatus.PENDING
+    assert run.discrepancies == len(_discrepancies(db, run)) == 4
+
+
+def test_corrections_follow_the_transition_guard(pending, gateway, db, monkeypatch):
+    db.get(Transaction, 3).status = TransactionStatus.CANCELED
+    db.commit()
+    monkeypatch.setattr(PagarMeOrdersAPI, "iter_orders", staticmethod(
+        lambda params=None, created_since=None, created_until=None, page_size=100: iter([_order("or_3", "paid", 3)])))
+
+    run = ReconciliationService.run(db)
+
+    db.expire_all()
+    assert db.get(Transaction, 3).status == TransactionStatus.CANCELED
+    found = _discrepancies(db, run)[(3, "status")]
+    assert (found.local_value, found.remote_value, found.corrected) == ("canceled", "paid", False)
+    assert run.corrected == 1  # Só a transação 1, vinda da busca por id
+
+
+def test_chunk_rows_are_locked(db):
+    query = ReconciliationService._matching_rows(db, ["or_1"], ["ch_1"], [1])
+    assert str(query.statement.compile(dialect=postgresql.dialect())).rstrip().endswith("FOR UPDATE")
@@ -0,0 +1,50 @@
+import logging
+
+import httpx
+import requests
+
+from app.pagarme import responses
+from app.pagarme.responses import LogBody, decode_error, decode_json
+
+
+def _response(content):
+    response = requests.Response()
+    response.status_code = 400
+    response._content = content
+    return response
+
+
+def test_decode_json_handles_both_clients():
+    assert decode_json(_response(b'{"id": "or_1"}')) == {"id": "or_1"}
+    assert decode_json(httpx.Response(200, json={"id": "or_2"})) == {"id": "or_2"}
+    assert decode_json(_response(b"")) is None
+
+
+def test_decode_error_falls_back_to_text():
+    assert decode_error(_response(b'{"message": "invalid"}')) == {"message": "invalid"}
+    assert decode_error(_response(b"<html>Bad Gateway</html>")) == "<html>Bad Gateway</html>"
+
+
+def test_log_body_is_truncated(monkeypatch):
+    monkeypatch.setattr(responses, "LOG_BODY_LIMIT", 10)
+
+    assert str(LogBody("x" * 25)) == "xxxxxxxxxx... (25 chars)"
+    assert str(LogBody({"a": 1})) == "{'a': 1}"
+
+
+def test_log_body_is_only_rendered_when_emitted(caplog):
+    class Body:
+        rendered = 0
+
+        def __str__(self):
+            Body.rendered += 1
+            return "body"
+
+    logger = logging.getLogger("tests.responses")
+    with caplog.at_level(logging.INFO, logger="tests.responses"):
+        logger.debug("Response: %s", LogBody(Body()))
+        assert Body.rendered == 0
+        logger.info("Response: %s", LogBody(Body()))
+
+    assert Body.rendered >= 1
+    assert caplog.records[-1].getMessage() == "Response: body"
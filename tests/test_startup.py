@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect
+
+import app.main
+from app.config.database import Base
+from app.services.payment_outbox_service import PaymentOutboxService
+from app.services.webhook_queue_service import WebhookQueueService
+
+LATE_TABLES = ["payouts", "payout_batches", "reconciliation_discrepancies", "reconciliation_runs"]
+
+CREATE_ALL_ON_POSTGRES = """
+from sqlalchemy import create_mock_engine
+import app.main
+from app.config.database import Base
+
+statements = []
+engine = create_mock_engine("postgresql://", lambda sql, *args, **kwargs: statements.append(sql))
+Base.metadata.create_all(engine, checkfirst=False)
+print(len(statements))
+"""
+
+
+def test_fresh_interpreter_can_create_every_table():
+    """Em um processo novo só app.main é importado, como no uvicorn."""
+    result = subprocess.run([sys.executable, "-c", CREATE_ALL_ON_POSTGRES], capture_output=True, text=True,
+                            env={**os.environ, "PAGARME_API_KEY": "test"},
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    assert result.returncode == 0, result.stderr
+    assert int(result.stdout.split()[-1]) >= len(Base.metadata.tables)
+
+
+def test_startup_creates_missing_tables_and_shutdown_stops_the_workers(engine, session_factory, monkeypatch):
+    Base.metadata.drop_all(engine, tables=[Base.metadata.tables[name] for name in LATE_TABLES])
+    monkeypatch.setattr(app.main, "engine", engine)
+    monkeypatch.setattr(PaymentOutboxService, "WORKERS", 1)
+    monkeypatch.setattr(PaymentOutboxService, "POLL_INTERVAL", 0.05)
+    monkeypatch.setattr(WebhookQueueService, "WORKERS", 1)
+    monkeypatch.setattr(WebhookQueueService, "POLL_INTERVAL", 0.05)
+
+    with TestClient(app.main.app) as client:
+        assert client.get("/").status_code == 200
+        assert PaymentOutboxService._executor is not None
+        assert len(WebhookQueueService._workers) == 1
+
+    PaymentOutboxService._poller.join(timeout=5)
+    assert not PaymentOutboxService._poller.is_alive()
+    assert PaymentOutboxService._executor is None and WebhookQueueService._workers == []
+    assert set(LATE_TABLES) <= set(inspect(engine).get_table_names())
+    assert "payout_id" in {column["name"] for column in inspect(engine).get_columns("transactions")}
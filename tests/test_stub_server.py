@@ -0,0 +1,56 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.pagarme import stub_server
+from app.pagarme.stub_server import StubConfig, StubStore
+
+CARD_ORDER = {"customer_id": "cus_1", "items": [{"amount": 1500, "quantity": 2}],
+              "payments": [{"payment_method": "credit_card"}]}
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Servidor de testes com armazenamento e configuração limpos."""
+    for collection in ("customers", "addresses", "cards", "orders", "charges"):
+        monkeypatch.setattr(StubStore, collection, {})
+    for key, value in {"latency": "fixed:0", "error_rate": 0, "error_statuses": [503], "webhook_url": None,
+                       "paid_rate": 1}.items():
+        monkeypatch.setattr(StubConfig, key, value)
+    return TestClient(stub_server.app)
+
+
+def test_customers_round_trip(stub):
+    created = stub.post("/core/v5/customers", json={"name": "Mantenedor", "document": "12345678909"}).json()
+
+    assert created["id"].startswith("cus_")
+    assert stub.get(f"/core/v5/customers/{created['id']}").json()["name"] == "Mantenedor"
+    listed = stub.get("/core/v5/customers", params={"size": 1}).json()
+    assert [customer["id"] for customer in listed["data"]] == [created["id"]]
+    assert listed["paging"]["next"] is None
+    assert stub.get("/core/v5/customers/cus_inexistente").status_code == 404
+
+
+def test_orders_honour_the_idempotency_key(stub):
+    first = stub.post("/core/v5/orders", json=CARD_ORDER, headers={"Idempotency-Key": "payment-1"}).json()
+    replay = stub.post("/core/v5/orders", json=CARD_ORDER, headers={"Idempotency-Key": "payment-1"}).json()
+
+    assert (first["amount"], first["status"]) == (3000, "paid")
+    assert replay["id"] == first["id"]
+    assert stub.get("/__stub/stats").json()["orders"] == 1
+
+
+def test_failures_are_injected_at_runtime(stub):
+    assert stub.post("/__stub/config", json={"error_rate": 1}).json()["error_rate"] == 1
+
+    response = stub.get("/core/v5/customers")
+    assert (response.status_code, response.json()) == (503, {"message": "Injected failure"})
+    # As rotas de controle nunca falham
+    assert stub.get("/__stub/config").status_code == 200
+    assert stub.post("/__stub/config", json={"unknown": 1}).status_code == 400
+
+
+@pytest.mark.parametrize("latency,bounds", [("fixed:50", (0.05, 0.05)), ("uniform:20,120", (0.02, 0.12))])
+def test_latency_distribution(monkeypatch, latency, bounds):
+    monkeypatch.setattr(StubConfig, "latency", latency)
+
+    assert all(bounds[0] <= StubConfig.sample_latency() <= bounds[1] for _ in range(50))
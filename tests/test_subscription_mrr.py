@@ -0,0 +1,47 @@
+from datetime import datetime
+
+import pytest
+
+import app.main
+from app.models.ong import ONG
+from app.models.roles import Role
+from app.models.staff import Staff
+from app.models.subscription import Subscription
+from app.models.user import User, UserType
+from app.services.auth_service import get_current_user
+
+
+@pytest.fixture
+def staff(seed, db):
+    """ONG 2 com uma assinatura ativa; usuário 3 é staff (office) da ONG 1."""
+    db.add_all([UserType(id=3, name="staff"), Role(id=1, name="office"),
+                User(id=3, username="staff", user_type_id=3, name="Staff")])
+    db.flush()
+    db.add_all([ONG(id=2, user_id=2, address_id=1), Staff(id=1, user_id=3, role_id=1, ong_id=1)])
+    db.add(Subscription(subscription_id="sub_1", customer_id="cus_1", maintainer_id=1, ong_id=2, status="active",
+                        amount_cents=2500, monthly_amount_cents=2500, gateway_created_at=datetime(2026, 9, 1)))
+    db.commit()
+
+
+def _as(user):
+    app.main.app.dependency_overrides[get_current_user] = lambda: user
+
+
+def test_staff_only_sees_the_mrr_of_their_ong(staff, client):
+    _as({"user": User(id=3), "type": "staff", "role": "office"})
+
+    assert client.get("/subscriptions/ongs/2/mrr").status_code == 403
+    assert client.get("/subscriptions/ongs/1/mrr").json()["mrr_cents"] == 0
+
+
+def test_admin_and_the_ong_itself_see_the_mrr(staff, client):
+    _as({"user": None, "type": "staff", "role": "admin"})
+    assert client.get("/subscriptions/ongs/2/mrr").json() == {"ong_id": 2, "active_subscriptions": 1, "mrr_cents": 2500}
+
+    _as({"user_id": 2, "type": "ong", "role": None})
+    assert client.get("/subscriptions/ongs/2/mrr").status_code == 200
+    assert client.get("/subscriptions/ongs/9/mrr").status_code == 404
+
+
+def test_maintainers_cannot_see_the_mrr(staff, client):
+    assert client.get("/subscriptions/ongs/2/mrr").status_code == 403
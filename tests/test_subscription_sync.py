@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.subscription import Subscription, SubscriptionInvoice
+from app.models.sync_state import SyncState
+from app.pagarme.bulk import FetchResult
+from app.pagarme.subscriptions import PagarMeSubscriptionsAPI
+from app.services.subscription_sync_service import SubscriptionSyncService
+
+
+def _subscription(subscription_id, status="active", updated_at="2026-10-10T12:00:00Z"):
+    return {"id": subscription_id, "status": status, "customer": {"id": "cus_1"}, "interval": "month",
+            "items": [{"pricing_scheme": {"price": 2500}, "quantity": 1}], "metadata": {"ong_id": "1"},
+            "created_at": "2026-09-01T12:00:00Z", "updated_at": updated_at}
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    """Pagar.me falsa: listagem, busca individual e ciclos/faturas de cada assinatura."""
+    fake = {"listed": [], "list_calls": [], "fetched": [], "remote": {}, "invoices": {}}
+
+    def iter_subscriptions(params=None, created_since=None, created_until=None, page_size=100):
+        fake["list_calls"].append({"params": params, "created_since": created_since,
+                                   "created_until": created_until})
+        return iter(fake["listed"])
+
+    def get_many_subscriptions(subscription_ids, concurrency=None):
+        for subscription_id in subscription_ids:
+            fake["fetched"].append(subscription_id)
+            data = fake["remote"].get(subscription_id)
+            yield FetchResult(subscription_id, data, None if data else "404")
+
+    def pull_children(subscription_id, since):
+        return {"cycles": [], "invoices": fake["invoices"].get(subscription_id, [])}
+
+    monkeypatch.setattr(PagarMeSubscriptionsAPI, "iter_subscriptions", staticmethod(iter_subscriptions))
+    monkeypatch.setattr(PagarMeSubscriptionsAPI, "get_many_subscriptions", staticmethod(get_many_subscriptions))
+    monkeypatch.setattr(SubscriptionSyncService, "_pull_children", staticmethod(pull_children))
+    return fake
+
+
+@pytest.fixture
+def mirrored(seed, db):
+    """Espelho com uma assinatura ativa, uma cancelada e uma ativa que some da Pagar.me."""
+    for subscription_id, status in [("sub_a", "active"), ("sub_b", "canceled"), ("sub_c", "active")]:
+        db.add(Subscription(subscription_id=subscription_id, customer_id="cus_1", maintainer_id=1, ong_id=1,
+                            status=status, amount_cents=2500, monthly_amount_cents=2500,
+                            gateway_created_at=datetime(2026, 9, 1, 12), gateway_updated_at=datetime(2026, 9, 1, 12),
+                            synced_at=datetime(2026, 9, 2)))
+    db.add(SyncState(resource="subscriptions", watermark=datetime(2026, 9, 1, 12)))
+    db.commit()
+
+
+def test_incremental_sync_refreshes_existing_subscriptions(mirrored, gateway, db):
+    gateway["remote"]["sub_a"] = _subscription("sub_a", status="failed")
+    gateway["invoices"]["sub_a"] = [{"id": "in_1", "status": "failed", "amount": 2500,
+                                     "created_at": "2026-10-01T12:00:00Z"}]
+
+    totals = SubscriptionSyncService.sync(db)
+
+    assert gateway["fetched"] == ["sub_a", "sub_c"]
+    assert totals == {"subscriptions": 1, "cycles": 0, "invoices": 1, "failed": 1}
+    db.expire_all()
+    assert db.query(Subscription).filter_by(subscription_id="sub_a").one().status == "failed"
+    assert db.query(SubscriptionInvoice).filter_by(invoice_id="in_1").one().subscription_id == "sub_a"
+    # A que falhou mantém a marca antiga e é buscada de novo na próxima execução
+    assert db.query(Subscription).filter_by(subscription_id="sub_c").one().synced_at == datetime(2026, 9, 2)
+
+
+def test_listed_subscriptions_are_not_fetched_again(mirrored, gateway, db):
+    gateway["listed"] = [_subscription("sub_d")]
+    gateway["remote"]["sub_a"] = _subscription("sub_a")
+    gateway["remote"]["sub_c"] = _subscription("sub_c")
+
+    totals = SubscriptionSyncService.sync(db)
+
+    assert gateway["fetched"] == ["sub_a", "sub_c"]
+    assert totals["subscriptions"] == 3
+    assert db.query(Subscription).count() == 4
+
+
+def test_listing_window_is_pinned_until_the_run_finishes(mirrored, gateway, db):
+    snapshot = datetime(2026, 10, 18, 9)
+    state = db.get(SyncState, "subscriptions")
+    state.snapshot_at, state.cursor = snapshot, "3"
+    db.commit()
+
+    SubscriptionSyncService.sync(db)
+
+    call = gateway["list_calls"][0]
+    assert (call["params"], call["created_until"]) == ({"page": 3}, snapshot)
+    assert call["created_since"] < datetime(2026, 9, 1, 12)
+    state = db.get(SyncState, "subscriptions")
+    assert (state.snapshot_at, state.cursor) == (None, None)
+
+    SubscriptionSyncService.sync(db)
+    assert gateway["list_calls"][1]["params"] == {"page": 1}
+    assert gateway["list_calls"][1]["created_until"] > snapshot
+
+
+def test_watermark_stops_at_the_listing_window(mirrored, gateway, db):
+    snapshot = datetime(2026, 10, 18, 9)
+    state = db.get(SyncState, "subscriptions")
+    state.snapshot_at = snapshot
+    # Criada por webhook depois do início da execução
+    db.add(Subscription(subscription_id="sub_webhook", customer_id="cus_1", status="canceled",
+                        gateway_created_at=datetime(2026, 10, 18, 12), synced_at=datetime(2026, 10, 18, 12)))
+    db.commit()
+
+    SubscriptionSyncService.sync(db)
+
+    assert db.get(SyncState, "subscriptions").watermark == snapshot
+
+
+def test_only_due_subscriptions_are_refreshed(seed, gateway, db):
+    now = datetime.utcnow()
+    for subscription_id, synced_days_ago, billing_days_ahead in [("sub_billed", 2, -1), ("sub_recent", 2, 20),
+                                                                 ("sub_old", 30, 20), ("sub_new", None, 20)]:
+        db.add(Subscription(subscription_id=subscription_id, customer_id="cus_1", status="active",
+                            next_billing_at=now + timedelta(days=billing_days_ahead),
+                            synced_at=now - timedelta(days=synced_days_ago) if synced_days_ago else None))
+    db.add(SyncState(resource="subscriptions", watermark=now - timedelta(days=1)))
+    db.commit()
+
+    SubscriptionSyncService.sync(db)
+
+    assert gateway["fetched"] == ["sub_billed", "sub_new", "sub_old"]
@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from app.pagarme.cache import StaleWhileRevalidateCache
+
+
+class Loader:
+    """Carregador que devolve (chave, número da chamada) e pode ser segurado por um evento."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, key):
+        self.calls += 1
+        calls = self.calls
+        self.release.wait(2)
+        return key, calls
+
+
+@pytest.fixture
+def loader():
+    return Loader()
+
+
+@pytest.fixture
+def cache(loader):
+    return StaleWhileRevalidateCache("test", loader, soft_ttl=60, hard_ttl=300)
+
+
+def _age(cache, key, seconds):
+    loaded_at, value = cache._entries[key]
+    cache._entries[key] = (loaded_at - seconds, value)
+
+
+def _wait_refresh(cache, key):
+    deadline = time.monotonic() + 2
+    while key in cache._inflight and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_fresh_value_is_served_without_loading(cache, loader):
+    assert cache.get("acc") == ("acc", 1)
+    assert cache.get("acc") == ("acc", 1)
+    assert loader.calls == 1
+
+
+def test_stale_value_is_served_and_refreshed_in_background(cache, loader):
+    cache.get("acc")
+    _age(cache, "acc", 120)
+    loader.release.clear()
+
+    assert cache.get("acc") == ("acc", 1)  # Não espera a atualização
+    assert cache.get("acc") == ("acc", 1)  # E não dispara outra
+    loader.release.set()
+    _wait_refresh(cache, "acc")
+    assert (loader.calls, cache.get("acc")) == (2, ("acc", 2))
+
+
+def test_expired_value_waits_for_the_load(cache, loader):
+    cache.get("acc")
+    _age(cache, "acc", 600)
+
+    assert cache.get("acc") == ("acc", 2)
+
+
+def test_concurrent_misses_share_one_load(cache, loader):
+    loader.release.clear()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("acc"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    loader.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == [("acc", 1)] * 5
+    assert loader.calls == 1
+
+
+def test_invalidate_discards_an_inflight_refresh(cache, loader):
+    cache.get("acc")
+    _age(cache, "acc", 120)
+    loader.release.clear()
+    cache.get("acc")
+
+    cache.invalidate("acc")
+    loader.release.set()
+    time.sleep(0.05)
+
+    assert "acc" not in cache._entries
+    assert cache.get("acc") == ("acc", 3)
+
+
+def test_loader_errors_are_not_cached(loader):
+    failures = iter([RuntimeError("gateway down")])
+
+    def flaky(key):
+        for error in failures:
+            raise error
+        return loader(key)
+
+    cache = StaleWhileRevalidateCache("test", flaky, soft_ttl=60, hard_ttl=300)
+    with pytest.raises(RuntimeError):
+        cache.get("acc")
+    assert cache.get("acc") == ("acc", 1)
@@ -0,0 +1,87 @@
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.donation_total import DonationTotal
+from app.models.transaction import PaymentMethod, Transaction, TransactionStatus
+from app.models.webhook_log import WebhookLog
+from app.services.webhook_queue_service import WebhookQueueService
+from app.services.webhook_service import WebhookService
+
+
+@pytest.fixture
+def orders(seed, db):
+    """Três transações PIX pendentes, dos pedidos or_1, or_2 e or_3."""
+    for transaction_id in (1, 2, 3):
+        db.add(Transaction(
+            id=transaction_id, ong_id=1, maintainer_id=1, amount=10, commission_amount=0, amount_cents=1000,
+            commission_cents=0, status=TransactionStatus.PENDING, payment_method=PaymentMethod.PIX,
+            order_id=f"or_{transaction_id}", charge_id=f"ch_{transaction_id}", created_at=datetime(2026, 10, 1)))
+    db.commit()
+
+
+def _event(event_id, event, object_id, status=None):
+    data = {"id": object_id}
+    if status:
+        data["status"] = status
+    return json.dumps({"id": event_id, "type": event, "data": data})
+
+
+def _status(db, transaction_id):
+    db.expire_all()
+    return db.get(Transaction, transaction_id).status
+
+
+def test_redelivered_event_is_stored_once(orders, db):
+    WebhookQueueService.enqueue(db, _event("hook_1", "order.paid", "or_1", "paid"))
+    WebhookQueueService.enqueue(db, _event("hook_1", "order.paid", "or_1", "paid"))
+
+    assert db.query(WebhookLog).count() == 1
+
+
+def test_late_pending_does_not_regress_paid(orders, db):
+    WebhookQueueService.enqueue(db, _event("hook_1", "order.paid", "or_1", "paid"))
+    WebhookQueueService.process_batch()
+    WebhookQueueService.enqueue(db, _event("hook_2", "order.pending", "or_1", "pending"))
+    WebhookQueueService.process_batch()
+
+    assert _status(db, 1) == TransactionStatus.PAID
+    assert db.query(WebhookLog).filter_by(status="done").count() == 2
+
+
+def test_events_of_one_order_are_coalesced(orders, db):
+    for body in [_event("hook_1", "order.paid", "or_1", "paid"),
+                 _event("hook_2", "order.pending", "or_1", "pending"),
+                 _event("hook_3", "order.paid", "or_2", "paid"),
+                 _event("hook_4", "order.canceled", "or_2", "canceled")]:
+        WebhookQueueService.enqueue(db, body)
+
+    assert WebhookQueueService.process_batch() == 4
+    assert _status(db, 1) == TransactionStatus.PAID
+    assert _status(db, 2) == TransactionStatus.CANCELED
+    # or_2 passou por PAID só dentro do lote, então não entra nos totais
+    total = db.query(DonationTotal).filter_by(scope="ong", scope_id=1).one()
+    assert (total.raised_cents, total.donation_count) == (1000, 1)
+
+
+def test_refund_leaves_paid_and_updates_totals(orders, db):
+    WebhookQueueService.enqueue(db, _event("hook_1", "order.paid", "or_1", "paid"))
+    WebhookQueueService.enqueue(db, _event("hook_2", "charge.refunded", "ch_1"))
+    WebhookQueueService.process_batch()
+
+    assert _status(db, 1) == TransactionStatus.CANCELED
+    assert db.query(DonationTotal).filter_by(scope="ong", scope_id=1).one().raised_cents == 0
+
+
+def test_canceled_is_terminal():
+    assert not WebhookService.can_transition(TransactionStatus.CANCELED, TransactionStatus.PAID)
+    assert not WebhookService.can_transition(TransactionStatus.PAID, TransactionStatus.PENDING)
+    assert WebhookService.can_transition(TransactionStatus.EXPIRED, TransactionStatus.PAID)
+
+
+def test_transaction_lookup_locks_the_row(db):
+    query = WebhookService._locked(db).filter(Transaction.order_id == "or_1")
+    sql = str(query.statement.compile(dialect=postgresql.dialect()))
+    assert sql.rstrip().endswith("FOR UPDATE")
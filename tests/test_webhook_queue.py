@@ -0,0 +1,83 @@
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.webhook_log import WebhookLog
+from app.services.webhook_queue_service import WebhookQueueService
+from app.services.webhook_service import WebhookService
+
+EVENT = json.dumps({"id": "hook_1", "type": "charge.chargedback", "data": {"id": "ch_1"}})
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    """Fila com duas tentativas e sem espera entre elas."""
+    monkeypatch.setattr(WebhookQueueService, "MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(WebhookQueueService, "RETRY_DELAY", 0)
+
+
+def _log(db):
+    """Estado atual da única notificação, encerrando a transação de leitura antes do próximo lote."""
+    db.expire_all()
+    log = db.query(WebhookLog).one()
+    snapshot = SimpleNamespace(**{column.key: getattr(log, column.key) for column in WebhookLog.__table__.columns})
+    db.rollback()
+    return snapshot
+
+
+def test_webhook_is_stored_and_acknowledged(client, db, monkeypatch):
+    handled = []
+    monkeypatch.setattr(WebhookService, "handle_pagarme_webhook", staticmethod(lambda db, payload: handled.append(1)))
+
+    response = client.post("/webhooks/pagarme", content=EVENT, headers={"Content-Type": "application/json"})
+
+    assert (response.status_code, response.json()) == (200, {"status": "received"})
+    log = _log(db)
+    assert (log.event_id, log.status, log.raw_body) == ("hook_1", "pending", EVENT)
+    assert handled == []  # Nada é processado dentro da requisição
+
+
+def test_invalid_body_goes_straight_to_dead(client, db):
+    client.post("/webhooks/pagarme", content="not json")
+
+    assert WebhookQueueService.process_batch() == 1
+    log = _log(db)
+    assert (log.status, log.attempts) == ("dead", 1)
+    assert log.event_id is None
+
+
+def test_failures_are_retried_then_dead_lettered_and_requeued(queue, db, monkeypatch):
+    calls = []
+
+    def handle(db, payload):
+        calls.append(payload["id"])
+        if len(calls) <= 2:
+            raise Exception("transaction locked")
+
+    monkeypatch.setattr(WebhookService, "handle_pagarme_webhook", staticmethod(handle))
+    WebhookQueueService.enqueue(db, EVENT)
+
+    WebhookQueueService.process_batch()
+    log = _log(db)
+    assert (log.status, log.attempts, log.last_error) == ("pending", 1, "transaction locked")
+    WebhookQueueService.process_batch()
+    assert _log(db).status == "dead"
+    assert WebhookQueueService.process_batch() == 0
+
+    assert WebhookQueueService.requeue_dead(db) == 1
+    WebhookQueueService.process_batch()
+    log = _log(db)
+    assert (log.status, log.last_error) == ("done", None)
+    assert calls == ["hook_1"] * 3
+
+
+def test_stale_processing_lock_is_reclaimed(db, monkeypatch):
+    monkeypatch.setattr(WebhookService, "handle_pagarme_webhook", staticmethod(lambda db, payload: None))
+    WebhookQueueService.enqueue(db, EVENT)
+    db.query(WebhookLog).update({WebhookLog.status: "processing", WebhookLog.locked_at: datetime(2026, 1, 1)})
+    db.commit()
+
+    assert WebhookQueueService.process_batch() == 1
+    assert _log(db).status == "done"